@@ -6,4 +6,8 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.accounts'
\ No newline at end of file
+    name = 'apps.accounts'
+    
+    def ready(self):
+        from .services.token_service import TokenService
+        TokenService.register()
@@ -3,17 +3,32 @@ Custom JWT Authentication with Cookie Support
 """
 from django.conf import settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
+from .services.token_service import TOKEN_VERSION_CLAIM, TokenService
 
 User = get_user_model()
 
 
+class VersionedRefreshToken(RefreshToken):
+    """Refresh token carrying the user's token_version (copied into its access tokens)"""
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
 class CookieJWTAuthentication(JWTAuthentication):
     """
     Custom JWT Authentication that supports both Authorization header and cookies
+    
+    Users are resolved through TokenService snapshots instead of a SELECT per
+    request, and tokens revoked by logout or superseded by a token_version
+    bump (password change, logout from all devices) are rejected.
     """
     
     def authenticate(self, request):
@@ -35,19 +50,42 @@ class CookieJWTAuthentication(JWTAuthentication):
                 pass
         
         return None
+    
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        
+        if TokenService.is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        
+        version = TokenService.token_version(validated_token)
+        user = TokenService.get_user(user_id, version)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if user.token_version != version:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return user
 
 
-def set_jwt_cookies(response, user):
+def set_jwt_cookies(response, user, tokens=None):
     """
     Set JWT tokens as httpOnly cookies
+    
+    Pass the tokens already returned in the response body to set the same
+    pair; otherwise a new pair is issued.
     """
-    refresh = RefreshToken.for_user(user)
-    access_token = refresh.access_token
+    if tokens is None:
+        tokens = get_tokens_for_user(user)
+    access_token, refresh = tokens['access'], tokens['refresh']
     
     # Set access token cookie
     response.set_cookie(
         'access_token',
-        str(access_token),
+        access_token,
         max_age=api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
         httponly=True,
         secure=not settings.DEBUG,  # Only secure in production
@@ -57,7 +95,7 @@ def set_jwt_cookies(response, user):
     # Set refresh token cookie
     response.set_cookie(
         'refresh_token',
-        str(refresh),
+        refresh,
         max_age=api_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
         httponly=True,
         secure=not settings.DEBUG,  # Only secure in production
@@ -80,7 +118,7 @@ def get_tokens_for_user(user):
     """
     Generate JWT tokens for a user
     """
-    refresh = RefreshToken.for_user(user)
+    refresh = VersionedRefreshToken.for_user(user)
     return {
         'access': str(refresh.access_token),
         'refresh': str(refresh),
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:43
+
+import apps.shared.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='faculty',
+            name='profile_picture',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=apps.shared.storage.get_content_addressed_storage, upload_to='faculty_profiles/'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='profile_picture',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=apps.shared.storage.get_content_addressed_storage, upload_to='student_profiles/'),
+        ),
+    ]
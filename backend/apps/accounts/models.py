@@ -5,6 +5,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
 from django.utils import timezone
+from apps.shared.storage import get_content_addressed_storage
 
 
 class User(AbstractUser):
@@ -24,11 +25,24 @@ class User(AbstractUser):
         null=True
     )
     is_verified = models.BooleanField(default=False)
+    # Carried in JWTs as the "ver" claim; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
+    
+    def save(self, *args, **kwargs):
+        # token_version only moves through TokenService.bump_version (an UPDATE);
+        # leave it out of ordinary saves so a stale instance cannot roll it back
+        if not (self._state.adding or args or kwargs.get('force_insert') or kwargs.get('update_fields') is not None):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname != 'token_version' and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
 
 
 class Student(models.Model):
@@ -40,7 +54,10 @@ class Student(models.Model):
     year_of_study = models.IntegerField(choices=[(i, f'Year {i}') for i in range(1, 6)])
     branch = models.CharField(max_length=100)
     section = models.CharField(max_length=10, blank=True, null=True)
-    profile_picture = models.ImageField(upload_to='student_profiles/', blank=True, null=True)
+    profile_picture = models.ImageField(
+        upload_to='student_profiles/', storage=get_content_addressed_storage,
+        max_length=255, blank=True, null=True
+    )
     bio = models.TextField(blank=True, null=True)
     interests = models.JSONField(default=list, blank=True)  # List of interest tags
     is_active = models.BooleanField(default=True)
@@ -63,7 +80,10 @@ class Faculty(models.Model):
     department = models.CharField(max_length=100)
     subjects_taught = models.JSONField(default=list, blank=True)  # List of subjects
     research_areas = models.JSONField(default=list, blank=True)  # List of research areas
-    profile_picture = models.ImageField(upload_to='faculty_profiles/', blank=True, null=True)
+    profile_picture = models.ImageField(
+        upload_to='faculty_profiles/', storage=get_content_addressed_storage,
+        max_length=255, blank=True, null=True
+    )
     bio = models.TextField(blank=True, null=True)
     is_mentor_available = models.BooleanField(default=True)
     office_hours = models.CharField(max_length=200, blank=True, null=True)
@@ -150,6 +170,18 @@ class DeviceSession(models.Model):
         return timezone.now() > self.last_activity + timezone.timedelta(hours=hours)
 
 
+class RevokedToken(models.Model):
+    """A JWT revoked before its expiry (e.g. on logout), by its jti claim"""
+    
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Revoked token {self.jti} ({self.user.username})"
+
+
 class AllowedUSN(models.Model):
     """Model to store allowed 7th semester student USNs"""
     
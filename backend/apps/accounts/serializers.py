@@ -5,9 +5,42 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Student, Faculty, OTPVerification, TwoFactorAuth, DeviceSession
 from .otp_service import OTPService
+from apps.shared.services.image_service import ImageVariantService
 
 User = get_user_model()
 
+# Longest side, in pixels, of the avatar thumbnail linked from profiles
+PROFILE_THUMBNAIL_SIZE = 256
+
+
+def profile_picture_thumbnail_url(profile, request=None):
+    """URL of a resized profile picture, served by the image variant endpoint"""
+    if not profile.profile_picture:
+        return None
+    url = ImageVariantService.variant_url(profile.profile_picture.name, PROFILE_THUMBNAIL_SIZE)
+    if url and request:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class ProfilePictureFieldsMixin(serializers.Serializer):
+    """Absolute profile picture and thumbnail URLs for student and faculty profiles"""
+    profile_picture = serializers.SerializerMethodField()
+    profile_picture_thumbnail = serializers.SerializerMethodField()
+    
+    def get_profile_picture(self, obj):
+        """Return absolute URL for profile picture"""
+        if obj.profile_picture:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.profile_picture.url)
+            return obj.profile_picture.url
+        return None
+    
+    def get_profile_picture_thumbnail(self, obj):
+        """Return the resized variant endpoint for the profile picture"""
+        return profile_picture_thumbnail_url(obj, self.context.get('request'))
+
 
 class UserSerializer(serializers.ModelSerializer):
     """User serializer"""
@@ -18,50 +51,30 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined']
 
 
-class StudentProfileNestedSerializer(serializers.ModelSerializer):
+class StudentProfileNestedSerializer(ProfilePictureFieldsMixin, serializers.ModelSerializer):
     """Nested student profile serializer (without user field to avoid circular reference)"""
-    profile_picture = serializers.SerializerMethodField()
     
     class Meta:
         model = Student
         fields = [
             'id', 'student_id', 'usn', 'year_of_study', 'branch', 'section',
-            'profile_picture', 'bio', 'interests', 'is_active', 'created_at', 'updated_at'
+            'profile_picture', 'profile_picture_thumbnail', 'bio', 'interests', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_profile_picture(self, obj):
-        """Return absolute URL for profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
-        return None
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(ProfilePictureFieldsMixin, serializers.ModelSerializer):
     """Student profile serializer"""
     user = UserSerializer(read_only=True)
-    profile_picture = serializers.SerializerMethodField()
     
     class Meta:
         model = Student
         fields = [
             'id', 'user', 'student_id', 'usn', 'year_of_study', 'branch', 'section',
-            'profile_picture', 'bio', 'interests', 'is_active', 'created_at', 'updated_at'
+            'profile_picture', 'profile_picture_thumbnail', 'bio', 'interests', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
-    def get_profile_picture(self, obj):
-        """Return absolute URL for profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
-        return None
-    
     def validate_student_id(self, value):
         """Validate student ID if provided"""
         if value and Student.objects.filter(student_id=value).exclude(pk=self.instance.pk if self.instance else None).exists():
@@ -75,53 +88,33 @@ class StudentSerializer(serializers.ModelSerializer):
         return value
 
 
-class FacultyProfileNestedSerializer(serializers.ModelSerializer):
+class FacultyProfileNestedSerializer(ProfilePictureFieldsMixin, serializers.ModelSerializer):
     """Nested faculty profile serializer (without user field to avoid circular reference)"""
-    profile_picture = serializers.SerializerMethodField()
     
     class Meta:
         model = Faculty
         fields = [
             'id', 'employee_id', 'designation', 'department',
-            'subjects_taught', 'research_areas', 'profile_picture', 'bio',
+            'subjects_taught', 'research_areas', 'profile_picture', 'profile_picture_thumbnail', 'bio',
             'is_mentor_available', 'office_hours', 'office_location',
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_profile_picture(self, obj):
-        """Return absolute URL for profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
-        return None
 
 
-class FacultySerializer(serializers.ModelSerializer):
+class FacultySerializer(ProfilePictureFieldsMixin, serializers.ModelSerializer):
     """Faculty profile serializer"""
     user = UserSerializer(read_only=True)
-    profile_picture = serializers.SerializerMethodField()
     
     class Meta:
         model = Faculty
         fields = [
             'id', 'user', 'employee_id', 'designation', 'department',
-            'subjects_taught', 'research_areas', 'profile_picture', 'bio',
+            'subjects_taught', 'research_areas', 'profile_picture', 'profile_picture_thumbnail', 'bio',
             'is_mentor_available', 'office_hours', 'office_location',
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_profile_picture(self, obj):
-        """Return absolute URL for profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
-        return None
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -2,8 +2,9 @@
 Services for accounts app
 """
 from .sso_service import SSOService
+from .token_service import TokenService
 
-__all__ = ['SSOService']
+__all__ = ['SSOService', 'TokenService']
 
 
 
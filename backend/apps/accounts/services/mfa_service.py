@@ -13,7 +13,8 @@ from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from apps.accounts.models_mfa import MFAMethod, TrustedDevice, MFAAttempt, MFARecoveryCode
 from apps.accounts.otp_service import OTPService
-from apps.shared.services.audit_service import AuditService
+from apps.shared.services.audit_service import AuditService, get_client_ip
+from apps.shared.utils.rate_limit import RateLimiter
 
 User = get_user_model()
 
@@ -514,27 +515,12 @@ class MFAService:
     
     @staticmethod
     def _check_rate_limit(user: User, method_type: str, request=None) -> bool:
-        """Check rate limiting for MFA attempts"""
-        ip_address = None
-        if request:
-            ip_address = request.META.get('REMOTE_ADDR')
-        
-        # Check attempts in last window
-        window_start = timezone.now() - timedelta(seconds=MFAService.ATTEMPT_WINDOW)
-        recent_attempts = MFAAttempt.objects.filter(
-            user=user,
-            method_type=method_type,
-            created_at__gte=window_start,
-            is_successful=False
-        )
-        
-        if ip_address:
-            recent_attempts = recent_attempts.filter(ip_address=ip_address)
-        
-        if recent_attempts.count() >= MFAService.MAX_ATTEMPTS:
-            return False
-        
-        return True
+        """Check rate limiting for MFA attempts (failed attempts per user and method)"""
+        return MFAService._attempt_limiter().peek(f"{user.pk}:{method_type}").allowed
+    
+    @staticmethod
+    def _attempt_limiter() -> RateLimiter:
+        return RateLimiter('mfa', MFAService.MAX_ATTEMPTS, MFAService.ATTEMPT_WINDOW)
     
     @staticmethod
     def _log_attempt(user: User, method_type: str, is_successful: bool, request=None, 
@@ -544,9 +530,12 @@ class MFAService:
         user_agent = ''
         
         if request:
-            ip_address = request.META.get('REMOTE_ADDR')
+            ip_address = get_client_ip(request)
             user_agent = request.META.get('HTTP_USER_AGENT', '')
         
+        if not is_successful:
+            MFAService._attempt_limiter().hit(f"{user.pk}:{method_type}")
+        
         MFAAttempt.objects.create(
             user=user,
             method_type=method_type,
@@ -0,0 +1,160 @@
+"""
+Cached user resolution and revocation checks for JWT authentication
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from apps.accounts.models import RevokedToken
+from apps.shared.utils.bloom import BloomFilter
+from apps.shared.utils.cache import invalidate_on_commit, is_shared_cache
+
+User = get_user_model()
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+class TokenService:
+    """
+    Resolves the user behind a validated token without touching the database
+    on the common path.
+
+    Users are snapshotted (password deferred) per process for LOCAL_TIMEOUT
+    and in the shared cache for CACHE_TIMEOUT. A snapshot carries the user's
+    token_version, so a token is accepted only while its "ver" claim matches;
+    a newer claim than the snapshot refetches, an older one is rejected.
+    Saving or deleting a user drops the shared snapshot, so other processes
+    see the change within LOCAL_TIMEOUT. Without a shared cache (LocMem on
+    Render) a drop could not reach other workers, so users are loaded from
+    the database on every request instead.
+
+    Revoked token ids live in the database and in a per-process bloom filter
+    rebuilt every REVOCATION_REFRESH seconds: a token not in the filter is
+    not revoked, and only filter hits are confirmed with a query.
+    """
+
+    CACHE_PREFIX = 'auth:user'
+    CACHE_TIMEOUT = 300
+    LOCAL_TIMEOUT = 5
+    LOCAL_MAX_USERS = 2048
+    REVOCATION_REFRESH = 30
+    BLOOM_ERROR_RATE = 0.001
+
+    _local = OrderedDict()
+    _local_lock = threading.Lock()
+    _bloom = None
+    _bloom_built_at = float('-inf')
+    _bloom_lock = threading.Lock()
+
+    @staticmethod
+    def token_version(validated_token) -> int:
+        return int(validated_token.get(TOKEN_VERSION_CLAIM, 0))
+
+    @staticmethod
+    def get_user(user_id, version: int = 0) -> Optional[User]:
+        """
+        The user for a token with this id and version claim
+
+        Returns:
+            A private copy of the snapshot, or None if the user does not exist
+        """
+        if not is_shared_cache():
+            return User.objects.defer('password').filter(pk=user_id).first()
+
+        now = time.monotonic()
+        entry = TokenService._local.get(user_id)
+        user = entry[1] if entry is not None and entry[0] > now else None
+
+        if user is None or user.token_version < version:
+            user = cache.get(TokenService._cache_key(user_id))
+            if user is None or user.token_version < version:
+                user = User.objects.defer('password').filter(pk=user_id).first()
+                if user is None:
+                    return None
+                cache.set(TokenService._cache_key(user_id), user, TokenService.CACHE_TIMEOUT)
+            with TokenService._local_lock:
+                TokenService._local[user_id] = (now + TokenService.LOCAL_TIMEOUT, user)
+                TokenService._local.move_to_end(user_id)
+                while len(TokenService._local) > TokenService.LOCAL_MAX_USERS:
+                    TokenService._local.popitem(last=False)
+
+        # Views may modify request.user; never hand out the shared snapshot
+        return copy.copy(user)
+
+    @staticmethod
+    def invalidate_user(user_id):
+        """Drop a user's snapshots, now and again after commit"""
+        with TokenService._local_lock:
+            TokenService._local.pop(user_id, None)
+        invalidate_on_commit(TokenService._cache_key(user_id))
+
+    @staticmethod
+    def bump_version(user) -> int:
+        """Revoke every token issued to the user so far; returns the new version"""
+        User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+        user.token_version = User.objects.filter(pk=user.pk).values_list('token_version', flat=True).get()
+        TokenService.invalidate_user(user.pk)
+        return user.token_version
+
+    @staticmethod
+    def revoke(token, user):
+        """Revoke one token (access or refresh) until it expires"""
+        jti = token.get(api_settings.JTI_CLAIM)
+        if not jti:
+            return
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        RevokedToken.objects.get_or_create(
+            jti=jti, defaults={'user': user, 'expires_at': datetime_from_epoch(token['exp'])},
+        )
+        bloom = TokenService._bloom
+        if bloom is not None:
+            bloom.add(jti)
+
+    @staticmethod
+    def is_revoked(jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        if jti not in TokenService._revocation_filter():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    @staticmethod
+    def _revocation_filter() -> BloomFilter:
+        if time.monotonic() - TokenService._bloom_built_at > TokenService.REVOCATION_REFRESH:
+            with TokenService._bloom_lock:
+                if time.monotonic() - TokenService._bloom_built_at > TokenService.REVOCATION_REFRESH:
+                    jtis = RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True)
+                    TokenService._bloom = BloomFilter.from_items(jtis, TokenService.BLOOM_ERROR_RATE)
+                    TokenService._bloom_built_at = time.monotonic()
+        return TokenService._bloom
+
+    @staticmethod
+    def reset():
+        """Forget every per-process snapshot and the revocation filter"""
+        with TokenService._local_lock:
+            TokenService._local.clear()
+        with TokenService._bloom_lock:
+            TokenService._bloom = None
+            TokenService._bloom_built_at = float('-inf')
+
+    @staticmethod
+    def register():
+        """Drop snapshots whenever a user is saved or deleted"""
+        post_save.connect(TokenService._user_changed, sender=User, dispatch_uid='token_service_user_save')
+        post_delete.connect(TokenService._user_changed, sender=User, dispatch_uid='token_service_user_delete')
+
+    @staticmethod
+    def _user_changed(sender, instance, **kwargs):
+        TokenService.invalidate_user(instance.pk)
+
+    @staticmethod
+    def _cache_key(user_id):
+        return f"{TokenService.CACHE_PREFIX}:{user_id}"
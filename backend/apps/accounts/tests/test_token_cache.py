@@ -0,0 +1,171 @@
+"""
+Test cases for cached JWT user resolution and token revocation
+"""
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.jwt_authentication import get_tokens_for_user
+from apps.accounts.services import TokenService
+from apps.shared.utils import BloomFilter
+
+User = get_user_model()
+
+
+class TokenCacheTestCase(APITestCase):
+    """Test cases for CookieJWTAuthentication snapshots, revocation and token versions"""
+
+    def setUp(self):
+        cache.clear()
+        TokenService.reset()
+        self.addCleanup(TokenService.reset)
+        # The test process is the only one using the LocMem cache, so it acts as shared
+        patcher = mock.patch('apps.accounts.services.token_service.is_shared_cache', return_value=True)
+        self.shared_cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            username='tokenuser', email='tokenuser@example.com', password='oldpass123',
+        )
+        self.tokens = get_tokens_for_user(self.user)
+
+    def get_unread_count(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/notifications/unread-count/')
+        tables = [query['sql'] for query in queries.captured_queries]
+        return response, {
+            'user': sum('FROM "accounts_user"' in sql for sql in tables),
+            'revoked': sum('"accounts_revokedtoken"' in sql for sql in tables),
+        }
+
+    def test_repeat_requests_resolve_user_without_queries(self):
+        """Test only the first request loads the user, and other processes share the snapshot"""
+        response, first = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(first['user'], 1)
+
+        response, second = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second, {'user': 0, 'revoked': 0})
+
+        TokenService._local.clear()  # As in another worker process
+        response, shared = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(shared['user'], 0)
+
+    def test_unshared_cache_loads_user_every_request(self):
+        """Test a per-process cache is not trusted, so changes made without signals show at once"""
+        self.shared_cache.return_value = False
+        self.get_unread_count(self.tokens['access'])
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response, queries = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(queries['user'], 1)
+
+    def test_saving_user_invalidates_snapshot(self):
+        """Test a deactivated user is refused on the next request"""
+        self.get_unread_count(self.tokens['access'])
+        self.user.is_active = False
+        self.user.save()
+
+        response, queries = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(queries['user'], 1)
+
+    def test_logout_revokes_the_presented_tokens(self):
+        """Test logged-out tokens are refused here and in processes that rebuild the filter"""
+        other = get_tokens_for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        response = self.client.post('/api/auth/logout/', {'refresh_token': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response, _ = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        TokenService.reset()
+        response, _ = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post('/api/auth/refresh/', {'refresh_token': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Other sessions are unaffected and still skip the revocation query
+        self.get_unread_count(other['access'])
+        response, queries = self.get_unread_count(other['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries['revoked'], 0)
+
+    def test_version_bumps_revoke_earlier_tokens(self):
+        """Test logout from all devices and password changes revoke every earlier token"""
+        stale = User.objects.get(pk=self.user.pk)
+        self.get_unread_count(self.tokens['access'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        response = self.client.post('/api/auth/sessions/logout-all/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        fresh = response.data['tokens']
+
+        response, _ = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response, _ = self.get_unread_count(fresh['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        response = self.client.post('/api/auth/refresh/', {'refresh_token': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Saving an instance loaded before the bump does not roll it back
+        stale.first_name = 'Stale'
+        stale.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version, 1)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {fresh['access']}")
+        response = self.client.post('/api/auth/password/change/', {
+            'old_password': 'oldpass123', 'new_password': 'newpass456', 'confirm_password': 'newpass456',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # One token pair, in the body and the cookies
+        self.assertEqual(response.data['tokens']['access'], response.cookies['access_token'].value)
+        self.assertEqual(response.data['tokens']['refresh'], response.cookies['refresh_token'].value)
+        response, _ = self.get_unread_count(fresh['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response, _ = self.get_unread_count(self.client.cookies['access_token'].value)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('newpass456'))
+
+    def test_password_reset_revokes_earlier_tokens(self):
+        """Test tokens issued before a forgot-password reset are refused afterwards"""
+        self.get_unread_count(self.tokens['access'])
+        reset_token = AccessToken.for_user(self.user)
+        reset_token['purpose'] = 'password_reset'
+
+        self.client.credentials()
+        response = self.client.post('/api/auth/reset-password/', {
+            'reset_token': str(reset_token), 'new_password': 'newpass456', 'confirm_password': 'newpass456',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response, _ = self.get_unread_count(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post('/api/auth/refresh/', {'refresh_token': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response, _ = self.get_unread_count(self.client.cookies['access_token'].value)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BloomFilterTestCase(TestCase):
+    """Test cases for BloomFilter"""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        """Test every added item is found and few others are"""
+        bloom = BloomFilter.from_items((f'jti-{index}' for index in range(2000)), error_rate=0.01, headroom=0)
+        self.assertEqual(len(bloom), 2000)
+        self.assertTrue(all(f'jti-{index}' in bloom for index in range(2000)))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertNotIn('anything', BloomFilter(10))
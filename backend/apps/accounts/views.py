@@ -2,7 +2,7 @@
 Views for accounts app
 """
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.authtoken.models import Token
@@ -21,7 +21,10 @@ from .serializers import (
 from .otp_service import OTPService
 from .two_factor_service import TwoFactorService, DeviceSessionService
 from .jwt_authentication import set_jwt_cookies, clear_jwt_cookies, get_tokens_for_user
+from .services.token_service import TOKEN_VERSION_CLAIM, TokenService
 from .services.sso_service import SSOService
+from apps.shared.services.image_service import ImageVariantService
+from apps.shared.throttling import LoginRateThrottle, OTPRateThrottle
 from django.core.cache import cache
 
 User = get_user_model()
@@ -171,6 +174,7 @@ class FacultyCreateView(generics.CreateAPIView):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OTPRateThrottle])
 def request_otp(request):
     """Request OTP for phone verification"""
     serializer = OTPRequestSerializer(data=request.data)
@@ -191,6 +195,7 @@ def request_otp(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OTPRateThrottle])
 def verify_otp(request):
     """Verify OTP"""
     serializer = OTPVerifySerializer(data=request.data)
@@ -296,13 +301,18 @@ def change_password(request):
                 'message': 'Current password is incorrect'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Set new password
+        # Set new password and revoke every token issued before the change
         user.set_password(new_password)
         user.save()
+        TokenService.bump_version(user)
         
-        return Response({
-            'message': 'Password changed successfully'
+        # This client stays signed in with one fresh token pair
+        tokens = get_tokens_for_user(user)
+        response = Response({
+            'message': 'Password changed successfully',
+            'tokens': tokens,
         })
+        return set_jwt_cookies(response, user, tokens)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -321,22 +331,22 @@ def upload_profile_picture(request):
         user = request.user
         
         # Update profile picture based on user type
+        profile = None
         if user.user_type == 'student':
-            if hasattr(user, 'student_profile'):
-                user.student_profile.profile_picture = profile_picture
-                user.student_profile.save()
-                return Response({
-                    'profile_picture_url': user.student_profile.profile_picture.url if user.student_profile.profile_picture else None,
-                    'message': 'Profile picture updated successfully'
-                })
+            profile = getattr(user, 'student_profile', None)
         elif user.user_type == 'faculty':
-            if hasattr(user, 'faculty_profile'):
-                user.faculty_profile.profile_picture = profile_picture
-                user.faculty_profile.save()
-                return Response({
-                    'profile_picture_url': user.faculty_profile.profile_picture.url if user.faculty_profile.profile_picture else None,
-                    'message': 'Profile picture updated successfully'
-                })
+            profile = getattr(user, 'faculty_profile', None)
+        
+        if profile is not None:
+            profile.profile_picture = profile_picture
+            profile.save()
+            # Thumbnails are generated in the background after commit
+            ImageVariantService.schedule(profile.profile_picture.name)
+            return Response({
+                'profile_picture_url': profile.profile_picture.url if profile.profile_picture else None,
+                'thumbnail_url': ImageVariantService.variant_url(profile.profile_picture.name),
+                'message': 'Profile picture updated successfully'
+            })
         
         return Response({
             'error': 'User profile not found'
@@ -595,17 +605,23 @@ def logout_all_devices(request):
     user = request.user
     current_session_id = request.data.get('current_session_id')
     deactivated_count = DeviceSessionService.deactivate_all_sessions(user, current_session_id)
+    # Revoke every token issued so far; this device continues with fresh ones
+    TokenService.bump_version(user)
     
-    return Response({
+    tokens = get_tokens_for_user(user)
+    response = Response({
         'message': f'Logged out from {deactivated_count} devices',
-        'deactivated_count': deactivated_count
+        'deactivated_count': deactivated_count,
+        'tokens': tokens,
     })
+    return set_jwt_cookies(response, user, tokens)
 
 
 # Enhanced Login with 2FA
 @api_view(['POST'])
 @authentication_classes([])  # Disable authentication for login endpoint
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login_with_2fa(request):
     """Login with Two-Factor Authentication"""
     serializer = LoginWith2FASerializer(data=request.data)
@@ -712,6 +728,7 @@ def login_with_2fa(request):
 @api_view(['POST'])
 @authentication_classes([])  # Disable authentication for login endpoint
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login(request):
     """Simple login endpoint for Flutter app with JWT and cookies"""
     username = request.data.get('username')
@@ -811,7 +828,7 @@ def login(request):
         response = Response(response_data)
         
         # Set JWT cookies
-        response = set_jwt_cookies(response, user)
+        response = set_jwt_cookies(response, user, tokens)
         
         return response
     else:
@@ -832,6 +849,20 @@ def logout(request):
         except:
             pass  # Token might not exist
         
+        # Revoke the JWTs this client holds until they expire
+        from rest_framework_simplejwt.tokens import RefreshToken, Token as JWTToken
+        from rest_framework_simplejwt.exceptions import TokenError
+        if isinstance(request.auth, JWTToken):
+            TokenService.revoke(request.auth, request.user)
+        raw_refresh = request.data.get('refresh_token') or request.COOKIES.get('refresh_token')
+        if raw_refresh:
+            try:
+                refresh = RefreshToken(raw_refresh)
+                if str(refresh.get('user_id')) == str(request.user.id):
+                    TokenService.revoke(refresh, request.user)
+            except TokenError:
+                pass
+        
         # Create response
         response = Response({'message': 'Logout successful'})
         
@@ -880,6 +911,10 @@ def refresh_token(request):
         user = refresh.payload.get('user_id')
         user = User.objects.get(id=user)
         
+        # Refresh tokens revoked by logout or a token_version bump are refused
+        if TokenService.is_revoked(refresh.get('jti')) or refresh.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            raise TokenError('Token has been revoked')
+        
         # Create response
         response_data = {
             'access_token': str(new_access_token),
@@ -915,6 +950,7 @@ def refresh_token(request):
 # Registration with OTP Flow
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OTPRateThrottle])
 def register(request):
     """Register new user with OTP verification"""
     import sys
@@ -1160,7 +1196,7 @@ def register(request):
             
             # Set JWT cookies
             try:
-                response = set_jwt_cookies(response, user)
+                response = set_jwt_cookies(response, user, tokens)
             except Exception as e:
                 print(f"Warning: Failed to set JWT cookies: {e}")
                 sys.stdout.flush()
@@ -1202,6 +1238,7 @@ def register(request):
 @api_view(['POST'])
 @permission_classes([])
 @authentication_classes([])
+@throttle_classes([OTPRateThrottle])
 def verify_registration_otp(request):
     """Verify OTP and activate user account with JWT"""
     print(f"OTP verification request data: {request.data}")
@@ -1284,7 +1321,7 @@ def verify_registration_otp(request):
         response = Response(response_data)
         
         # Set JWT cookies
-        response = set_jwt_cookies(response, user)
+        response = set_jwt_cookies(response, user, tokens)
         
         return response
     else:
@@ -1409,7 +1446,7 @@ def verify_and_update_usn(request):
         }
         
         response = Response(response_data)
-        response = set_jwt_cookies(response, user)
+        response = set_jwt_cookies(response, user, tokens)
         
         return response
         
@@ -1431,6 +1468,7 @@ def verify_and_update_usn(request):
 # Forgot Password Flow
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OTPRateThrottle])
 def forgot_password_request(request):
     """Send OTP for password reset"""
     phone_number = request.data.get('phone_number')
@@ -1463,6 +1501,7 @@ def forgot_password_request(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OTPRateThrottle])
 def forgot_password_verify_otp(request):
     """Verify OTP for password reset"""
     phone_number = request.data.get('phone_number')
@@ -1547,9 +1586,10 @@ def reset_password(request):
         user_id = token['user_id']
         user = User.objects.get(id=user_id)
         
-        # Set new password
+        # Set new password and revoke every token issued before the reset
         user.set_password(new_password)
         user.save()
+        TokenService.bump_version(user)
         
         # Generate new JWT tokens for the user
         tokens = get_tokens_for_user(user)
@@ -1566,7 +1606,7 @@ def reset_password(request):
         response = Response(response_data)
         
         # Set JWT cookies
-        response = set_jwt_cookies(response, user)
+        response = set_jwt_cookies(response, user, tokens)
         
         return response
         
@@ -1655,7 +1695,7 @@ def sso_callback(request):
         }
         
         response = Response(response_data)
-        response = set_jwt_cookies(response, user)
+        response = set_jwt_cookies(response, user, jwt_tokens)
         
         return response
         
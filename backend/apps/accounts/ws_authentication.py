@@ -0,0 +1,59 @@
+"""
+JWT authentication for WebSocket connections
+"""
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+from .jwt_authentication import CookieJWTAuthentication
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Populate scope['user'] from a JWT access token.
+
+    Tokens are looked up the way CookieJWTAuthentication does for HTTP: the
+    ``Authorization: Bearer`` header first, then the ``token`` query parameter
+    (clients that cannot set handshake headers) and finally the
+    ``access_token`` cookie set by set_jwt_cookies (web clients).
+    Connections without a valid token get an AnonymousUser.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = self.get_raw_token(scope)
+        scope['user'] = await self.get_user(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+    @staticmethod
+    def get_raw_token(scope):
+        headers = dict(scope.get('headers', []))
+        if b'authorization' in headers:
+            try:
+                raw_token = CookieJWTAuthentication().get_raw_token(headers[b'authorization'])
+            except AuthenticationFailed:
+                raw_token = None
+            if raw_token is not None:
+                return raw_token.decode()
+
+        query = parse_qs(scope.get('query_string', b'').decode())
+        if query.get('token'):
+            return query['token'][0]
+
+        if b'cookie' in headers:
+            cookie = SimpleCookie()
+            cookie.load(headers[b'cookie'].decode())
+            if 'access_token' in cookie:
+                return cookie['access_token'].value
+        return None
+
+    @database_sync_to_async
+    def get_user(self, raw_token):
+        authentication = CookieJWTAuthentication()
+        try:
+            validated_token = authentication.get_validated_token(raw_token)
+            return authentication.get_user(validated_token)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return AnonymousUser()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CalendarEvent, EventReminder, GoogleCalendarSync, CalendarEventSync
+from .models import CalendarEvent, EventReminder, GoogleCalendarSync, CalendarEventSync, RecurrenceException
 
 
 @admin.register(CalendarEvent)
@@ -75,6 +75,14 @@ class EventReminderAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(RecurrenceException)
+class RecurrenceExceptionAdmin(admin.ModelAdmin):
+    list_display = ['event', 'occurrence_start', 'created_at']
+    search_fields = ['event__title']
+    readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-occurrence_start']
+
+
 @admin.register(GoogleCalendarSync)
 class GoogleCalendarSyncAdmin(admin.ModelAdmin):
     list_display = [
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CalendarsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.calendars"
+
+    def ready(self):
+        import apps.calendars.signals  # noqa
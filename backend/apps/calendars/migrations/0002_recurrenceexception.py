@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurrenceException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('occurrence_start', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence_exceptions', to='calendars.calendarevent')),
+            ],
+            options={
+                'verbose_name': 'Recurrence Exception',
+                'verbose_name_plural': 'Recurrence Exceptions',
+                'ordering': ['occurrence_start'],
+                'unique_together': {('event', 'occurrence_start')},
+            },
+        ),
+    ]
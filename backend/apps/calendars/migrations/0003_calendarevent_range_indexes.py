@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0002_recurrenceexception'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['created_by', 'start_time', 'end_time'], name='calendars_c_created_ee0055_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['privacy', 'start_time', 'end_time'], name='calendars_c_privacy_be744e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['is_recurring', 'start_time'], name='calendars_c_is_recu_9d9174_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0003_calendarevent_range_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendarsync',
+            name='sync_token',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -82,6 +82,10 @@ class CalendarEvent(TimestampedModel):
             models.Index(fields=['event_type']),
             models.Index(fields=['created_by']),
             models.Index(fields=['is_cancelled']),
+            # Range queries per visibility branch (owner / public / series)
+            models.Index(fields=['created_by', 'start_time', 'end_time']),
+            models.Index(fields=['privacy', 'start_time', 'end_time']),
+            models.Index(fields=['is_recurring', 'start_time']),
         ]
     
     def __str__(self):
@@ -124,6 +128,22 @@ class CalendarEvent(TimestampedModel):
         return dict(self.PRIVACY_LEVELS).get(self.privacy, self.privacy)
 
 
+class RecurrenceException(TimestampedModel):
+    """Excluded occurrence (EXDATE) of a recurring calendar event"""
+    
+    event = models.ForeignKey(CalendarEvent, on_delete=models.CASCADE, related_name='recurrence_exceptions')
+    occurrence_start = models.DateTimeField()  # Original start time of the skipped occurrence
+    
+    class Meta:
+        ordering = ['occurrence_start']
+        verbose_name = 'Recurrence Exception'
+        verbose_name_plural = 'Recurrence Exceptions'
+        unique_together = [['event', 'occurrence_start']]
+    
+    def __str__(self):
+        return f"{self.event.title} - skip {self.occurrence_start}"
+
+
 class EventReminder(TimestampedModel):
     """Reminders for calendar events"""
     
@@ -187,6 +207,7 @@ class GoogleCalendarSync(TimestampedModel):
     refresh_token = models.TextField(blank=True, null=True)  # Encrypted
     token_expires_at = models.DateTimeField(blank=True, null=True)
     calendar_id = models.CharField(max_length=200, blank=True, null=True)
+    sync_token = models.TextField(blank=True, null=True)  # Google nextSyncToken for incremental pulls
     last_sync_at = models.DateTimeField(blank=True, null=True)
     sync_enabled = models.BooleanField(default=True)
     sync_direction = models.CharField(
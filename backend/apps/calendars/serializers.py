@@ -35,6 +35,8 @@ class CalendarEventSerializer(serializers.ModelSerializer):
     duration_minutes = serializers.IntegerField(read_only=True)
     event_type_display = serializers.CharField(read_only=True)
     privacy_display = serializers.CharField(read_only=True)
+    is_occurrence = serializers.SerializerMethodField()
+    series_start_time = serializers.SerializerMethodField()
     
     class Meta:
         model = CalendarEvent
@@ -43,6 +45,7 @@ class CalendarEventSerializer(serializers.ModelSerializer):
             'start_time', 'end_time', 'all_day', 'timezone',
             'location', 'meeting_link',
             'is_recurring', 'recurrence_pattern', 'recurrence_end_date', 'recurrence_count',
+            'is_occurrence', 'series_start_time',
             'color', 'privacy', 'privacy_display',
             'created_by', 'created_by_name', 'created_by_email',
             'attendees', 'attendees_details', 'external_attendees',
@@ -65,6 +68,15 @@ class CalendarEventSerializer(serializers.ModelSerializer):
             }
             for attendee in attendees
         ]
+    
+    def get_is_occurrence(self, obj):
+        """Whether this is an expanded occurrence of a recurring event"""
+        return getattr(obj, 'is_occurrence', False)
+    
+    def get_series_start_time(self, obj):
+        """Start time of the recurring series this occurrence belongs to"""
+        series_start = getattr(obj, 'series_start_time', None)
+        return series_start.isoformat() if series_start else None
 
 
 class CreateCalendarEventSerializer(serializers.ModelSerializer):
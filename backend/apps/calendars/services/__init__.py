@@ -1,10 +1,12 @@
 from .calendar_service import CalendarService
 from .ical_service import ICalService
 from .google_calendar_service import GoogleCalendarService
+from .recurrence_service import RecurrenceService
 
 __all__ = [
     'CalendarService',
     'ICalService',
     'GoogleCalendarService',
+    'RecurrenceService',
 ]
 
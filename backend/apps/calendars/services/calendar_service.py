@@ -1,7 +1,9 @@
+import heapq
 from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
-from apps.calendars.models import CalendarEvent, EventReminder
+from apps.calendars.models import CalendarEvent, EventReminder, RecurrenceException
+from apps.calendars.services.recurrence_service import RecurrenceService
 from apps.notifications.notification_service import NotificationService
 
 
@@ -230,22 +232,34 @@ class CalendarService:
         queryset = CalendarEvent.objects.all()
         
         if user:
-            # Get events created by user, events user is attending, or public events
+            # Get events created by user, events user is attending, or public events.
+            # Attendance is a semi-join on the M2M table, so rows are never
+            # duplicated and no DISTINCT pass is needed.
+            attending = CalendarEvent.attendees.through.objects.filter(
+                user=user,
+            ).values('calendarevent_id')
             queryset = queryset.filter(
                 Q(created_by=user) |
-                Q(attendees=user) |
-                Q(privacy='public')
-            ).distinct()
-        
-        if start_date:
-            queryset = queryset.filter(start_time__gte=start_date)
-            print(f"📅 Filtered by start_date >= {start_date}")
+                Q(privacy='public') |
+                Q(id__in=attending)
+            )
         
-        if end_date:
-            # For end_date, we want events that start on or before the end_date
-            # This includes multi-day events that might span beyond end_date
-            queryset = queryset.filter(start_time__lte=end_date)
-            print(f"📅 Filtered by start_time <= {end_date}")
+        if start_date or end_date:
+            # Single events must overlap the range (start < end_date and
+            # end > start_date); recurring masters are kept while their series
+            # can still produce occurrences in it.
+            range_q = Q()
+            series_q = RecurrenceService.series_filter()
+            if start_date:
+                range_q &= (
+                    Q(end_time__gt=start_date) |
+                    Q(end_time__isnull=True, start_time__gte=start_date)
+                )
+                series_q &= Q(recurrence_end_date__isnull=True) | Q(recurrence_end_date__gte=start_date)
+            if end_date:
+                range_q &= Q(start_time__lt=end_date)
+                series_q &= Q(start_time__lt=end_date)
+            queryset = queryset.filter(range_q | series_q)
         
         if event_type:
             queryset = queryset.filter(event_type=event_type)
@@ -258,27 +272,50 @@ class CalendarService:
         
         return queryset.order_by('start_time')
     
+    @staticmethod
+    def expand_recurring_events(queryset, start_date, end_date):
+        """
+        Lazily merge single events and recurring occurrences within a window.
+        
+        Recurring masters in the queryset are replaced by their occurrences
+        between start_date and end_date; everything is yielded in start-time order.
+        """
+        series_q = RecurrenceService.series_filter()
+        single_events = queryset.exclude(series_q).order_by('start_time', 'id')
+        masters = list(queryset.filter(series_q).order_by('start_time', 'id'))
+        exceptions = RecurrenceService.exceptions_by_event([master.id for master in masters])
+        occurrence_streams = [
+            RecurrenceService.expand(master, start_date, end_date, exceptions.get(master.id, ()))
+            for master in masters
+        ]
+        return heapq.merge(
+            single_events, *occurrence_streams,
+            key=lambda event: event.start_time,
+        )
+    
     @staticmethod
     def get_upcoming_events(user, days=7):
-        """Get upcoming events for a user"""
+        """Get upcoming events (including recurring occurrences) for a user"""
         now = timezone.now()
         end_date = now + timedelta(days=days)
-        return CalendarService.get_events(
+        queryset = CalendarService.get_events(
             user=user,
             start_date=now,
             end_date=end_date,
             is_cancelled=False,
         )
+        return CalendarService.expand_recurring_events(queryset, now, end_date)
     
     @staticmethod
     def get_events_by_date_range(user, start_date, end_date):
-        """Get events within a date range"""
-        return CalendarService.get_events(
+        """Get events (including recurring occurrences) within a date range"""
+        queryset = CalendarService.get_events(
             user=user,
             start_date=start_date,
             end_date=end_date,
             is_cancelled=False,
         )
+        return CalendarService.expand_recurring_events(queryset, start_date, end_date)
     
     @staticmethod
     def get_events_by_type(user, event_type):
@@ -289,6 +326,15 @@ class CalendarService:
             is_cancelled=False,
         )
     
+    @staticmethod
+    def skip_occurrence(event, occurrence_start):
+        """Exclude a single occurrence from a recurring event"""
+        exception, created = RecurrenceException.objects.get_or_create(
+            event=event,
+            occurrence_start=occurrence_start,
+        )
+        return exception
+    
     @staticmethod
     def add_reminder(event, user, reminder_type='notification', minutes_before=15):
         """Add a reminder to an event"""
@@ -1,8 +1,10 @@
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch, Q, F, OuterRef, Subquery
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from apps.calendars.models import CalendarEvent, GoogleCalendarSync, CalendarEventSync
-from apps.calendars.services.calendar_service import CalendarService
 
 try:
     from google.auth.transport.requests import Request
@@ -10,6 +12,7 @@ try:
     from google_auth_oauthlib.flow import Flow
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
+    from googleapiclient.http import BatchHttpRequest
     GOOGLE_API_AVAILABLE = True
 except ImportError:
     GOOGLE_API_AVAILABLE = False
@@ -24,6 +27,8 @@ except ImportError:
         pass
     class HttpError(Exception):
         pass
+    class BatchHttpRequest:
+        pass
 
 
 class GoogleCalendarService:
@@ -37,6 +42,16 @@ class GoogleCalendarService:
     CLIENT_SECRET = getattr(settings, 'GOOGLE_CALENDAR_CLIENT_SECRET', None)
     REDIRECT_URI = getattr(settings, 'GOOGLE_CALENDAR_REDIRECT_URI', 'https://ksitnexus.onrender.com/api/calendars/google/callback/')
     
+    # API root (overridable to point at a local fake server in tests)
+    API_ROOT = getattr(settings, 'GOOGLE_CALENDAR_API_ROOT', 'https://www.googleapis.com/')
+    
+    # Google allows at most 50 calls per batch request
+    BATCH_SIZE = 50
+    PAGE_SIZE = 250
+    
+    # Minimum seconds between two syncs of the same user
+    MIN_SYNC_INTERVAL = getattr(settings, 'GOOGLE_CALENDAR_MIN_SYNC_INTERVAL', 60)
+    
     @staticmethod
     def get_authorization_url(user):
         """Get Google OAuth authorization URL"""
@@ -144,6 +159,24 @@ class GoogleCalendarService:
         
         return credentials
     
+    @staticmethod
+    def _build_service(credentials):
+        """Build a Google Calendar API client against the configured API root"""
+        return build(
+            'calendar', 'v3',
+            credentials=credentials,
+            cache_discovery=False,
+            client_options={'api_endpoint': f"{GoogleCalendarService.API_ROOT}calendar/v3/"},
+        )
+    
+    @staticmethod
+    def _new_batch(callback):
+        """Create a batch request for the configured API root"""
+        return BatchHttpRequest(
+            callback=callback,
+            batch_uri=f"{GoogleCalendarService.API_ROOT}batch/calendar/v3",
+        )
+    
     @staticmethod
     def _get_primary_calendar_id(user):
         """Get primary calendar ID for a user"""
@@ -152,7 +185,7 @@ class GoogleCalendarService:
             if not credentials:
                 return None
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = GoogleCalendarService._build_service(credentials)
             calendar_list = service.calendarList().list().execute()
             
             for calendar in calendar_list.get('items', []):
@@ -172,6 +205,7 @@ class GoogleCalendarService:
             sync_record.access_token = None
             sync_record.refresh_token = None
             sync_record.token_expires_at = None
+            sync_record.sync_token = None
             sync_record.save()
         
         return sync_record
@@ -184,7 +218,7 @@ class GoogleCalendarService:
             if not credentials:
                 raise ValueError("Google Calendar not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = GoogleCalendarService._build_service(credentials)
             sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
             calendar_id = sync_record.calendar_id or 'primary'
             
@@ -216,7 +250,7 @@ class GoogleCalendarService:
             if not credentials:
                 raise ValueError("Google Calendar not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = GoogleCalendarService._build_service(credentials)
             sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
             calendar_id = sync_record.calendar_id or 'primary'
             
@@ -255,7 +289,7 @@ class GoogleCalendarService:
             if not credentials:
                 raise ValueError("Google Calendar not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = GoogleCalendarService._build_service(credentials)
             sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
             calendar_id = sync_record.calendar_id or 'primary'
             
@@ -276,95 +310,292 @@ class GoogleCalendarService:
         except HttpError as error:
             raise Exception(f"Error deleting event from Google Calendar: {error}")
     
+    @staticmethod
+    def acquire_sync_slot(user_id):
+        """Per-user rate limit: allow one sync per MIN_SYNC_INTERVAL seconds"""
+        return cache.add(
+            f"google_calendar_sync:{user_id}", 1, GoogleCalendarService.MIN_SYNC_INTERVAL,
+        )
+    
+    @staticmethod
+    def sync_user(user):
+        """Run an incremental sync for a user in their configured direction"""
+        sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
+        result = {'imported': 0, 'pushed': 0}
+        if sync_record.sync_direction in ['bidirectional', 'from_google']:
+            result['imported'] = len(GoogleCalendarService.sync_events_from_google_calendar(user))
+        if sync_record.sync_direction in ['bidirectional', 'to_google']:
+            result['pushed'] = len(GoogleCalendarService.sync_events_to_google_calendar(user))
+        return result
+    
     @staticmethod
     def sync_events_from_google_calendar(user, start_date=None, end_date=None):
-        """Sync events from Google Calendar to KSIT Nexus"""
+        """
+        Sync events from Google Calendar to KSIT Nexus.
+        
+        The first run lists the requested window; afterwards the stored
+        nextSyncToken is used so only events changed since the last sync
+        are fetched. An expired token (410 Gone) falls back to a full sync.
+        """
         try:
             credentials = GoogleCalendarService._get_credentials(user)
             if not credentials:
                 raise ValueError("Google Calendar not connected")
             
-            service = build('calendar', 'v3', credentials=credentials)
+            service = GoogleCalendarService._build_service(credentials)
             sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
             calendar_id = sync_record.calendar_id or 'primary'
             
-            # Set time range
-            if not start_date:
-                start_date = timezone.now()
-            if not end_date:
-                end_date = start_date + timedelta(days=30)
-            
-            # Get events from Google Calendar
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=start_date.isoformat(),
-                timeMax=end_date.isoformat(),
-                singleEvents=True,
-                orderBy='startTime',
-            ).execute()
+            params = {
+                'calendarId': calendar_id,
+                'singleEvents': True,
+                'showDeleted': True,
+                'maxResults': GoogleCalendarService.PAGE_SIZE,
+            }
+            if sync_record.sync_token:
+                params['syncToken'] = sync_record.sync_token
+            else:
+                # Set time range for the initial full sync
+                if not start_date:
+                    start_date = timezone.now()
+                if not end_date:
+                    end_date = start_date + timedelta(days=30)
+                params['timeMin'] = GoogleCalendarService._to_rfc3339(start_date)
+                params['timeMax'] = GoogleCalendarService._to_rfc3339(end_date)
             
-            events = events_result.get('items', [])
             imported_events = []
-            
-            for google_event in events:
-                # Check if event already exists
-                sync = CalendarEventSync.objects.filter(
-                    google_calendar_id=google_event.get('id'),
-                ).first()
+            page_token = None
+            while True:
+                try:
+                    events_result = service.events().list(pageToken=page_token, **params).execute()
+                except HttpError as error:
+                    if error.resp.status == 410 and sync_record.sync_token:
+                        # Sync token invalidated by Google: start over with a full sync
+                        sync_record.sync_token = None
+                        sync_record.save(update_fields=['sync_token', 'updated_at'])
+                        return GoogleCalendarService.sync_events_from_google_calendar(
+                            user, start_date, end_date,
+                        )
+                    raise
                 
-                if sync:
-                    # Update existing event
-                    event = sync.event
-                    GoogleCalendarService._update_event_from_google(event, google_event)
-                    imported_events.append(event)
-                else:
-                    # Create new event
-                    event = GoogleCalendarService._create_event_from_google(user, google_event)
-                    imported_events.append(event)
+                imported_events.extend(
+                    GoogleCalendarService._apply_google_changes(user, events_result.get('items', []))
+                )
+                page_token = events_result.get('nextPageToken')
+                if not page_token:
+                    break
             
-            # Update last sync time
+            # Store the token for the next incremental sync
+            sync_record.sync_token = events_result.get('nextSyncToken')
             sync_record.last_sync_at = timezone.now()
-            sync_record.save()
+            sync_record.save(update_fields=['sync_token', 'last_sync_at', 'updated_at'])
             
             return imported_events
         except HttpError as error:
             raise Exception(f"Error syncing events from Google Calendar: {error}")
     
+    @staticmethod
+    def _apply_google_changes(user, google_events):
+        """Apply one page of changed Google events with bulk writes"""
+        if not google_events:
+            return []
+        
+        google_ids = [google_event['id'] for google_event in google_events]
+        existing = {
+            sync.google_calendar_id: sync
+            for sync in CalendarEventSync.objects.filter(
+                google_calendar_id__in=google_ids,
+                event__created_by=user,
+            ).select_related('event')
+        }
+        
+        now = timezone.now()
+        deleted_ids = []
+        updated_events = []
+        updated_syncs = []
+        new_events = []
+        new_google_ids = []
+        
+        for google_event in google_events:
+            sync = existing.get(google_event['id'])
+            if google_event.get('status') == 'cancelled':
+                if sync:
+                    deleted_ids.append(sync.event_id)
+                continue
+            
+            fields = GoogleCalendarService._parse_google_event(google_event)
+            if sync:
+                # Update existing event
+                event = sync.event
+                for field, value in fields.items():
+                    setattr(event, field, value)
+                # bulk_update skips auto_now; stamp both sides so the push
+                # step does not echo this change back to Google
+                event.updated_at = now
+                sync.last_synced_at = now
+                sync.sync_status = 'synced'
+                updated_events.append(event)
+                updated_syncs.append(sync)
+            else:
+                # Create new event
+                new_events.append(CalendarEvent(
+                    created_by=user,
+                    event_type='event',
+                    privacy='private',
+                    **fields,
+                ))
+                new_google_ids.append(google_event['id'])
+        
+        with transaction.atomic():
+            if deleted_ids:
+                CalendarEvent.objects.filter(id__in=deleted_ids).delete()
+            if updated_events:
+                CalendarEvent.objects.bulk_update(
+                    updated_events,
+                    ['title', 'description', 'location', 'start_time', 'end_time', 'all_day', 'updated_at'],
+                )
+                CalendarEventSync.objects.bulk_update(updated_syncs, ['last_synced_at', 'sync_status'])
+            if new_events:
+                created = CalendarEvent.objects.bulk_create(new_events)
+                # Store Google Calendar event IDs
+                CalendarEventSync.objects.bulk_create([
+                    CalendarEventSync(
+                        event=event,
+                        google_calendar_id=google_id,
+                        sync_status='synced',
+                    )
+                    for event, google_id in zip(created, new_google_ids)
+                ])
+        
+        return updated_events + new_events
+    
+    @staticmethod
+    def _pending_push_events(user):
+        """Events owned by the user that are new, changed since their last push, or failed to push"""
+        google_syncs = CalendarEventSync.objects.filter(
+            event=OuterRef('pk'),
+            google_calendar_id__isnull=False,
+        )
+        return CalendarEvent.objects.filter(
+            created_by=user,
+            is_cancelled=False,
+        ).annotate(
+            google_synced_at=Subquery(google_syncs.values('last_synced_at')[:1]),
+            google_sync_status=Subquery(google_syncs.values('sync_status')[:1]),
+        ).filter(
+            Q(google_synced_at__isnull=True) |
+            Q(updated_at__gt=F('google_synced_at')) |
+            Q(google_sync_status='failed')
+        ).prefetch_related(
+            'attendees',
+            Prefetch(
+                'sync_records',
+                queryset=CalendarEventSync.objects.filter(google_calendar_id__isnull=False),
+                to_attr='google_sync_records',
+            ),
+        ).order_by('id')
+    
     @staticmethod
     def sync_events_to_google_calendar(user, events=None):
-        """Sync events from KSIT Nexus to Google Calendar"""
+        """
+        Sync events from KSIT Nexus to Google Calendar.
+        
+        Only events created or modified since their last push are sent, up to
+        BATCH_SIZE inserts/updates per HTTP batch request.
+        """
         try:
-            if not events:
-                # Get all user events
-                events = CalendarService.get_events(user=user, is_cancelled=False)
+            credentials = GoogleCalendarService._get_credentials(user)
+            if not credentials:
+                raise ValueError("Google Calendar not connected")
             
-            synced_events = []
+            service = GoogleCalendarService._build_service(credentials)
+            sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
+            calendar_id = sync_record.calendar_id or 'primary'
             
-            for event in events:
-                # Check if event already exists in Google Calendar
-                sync = CalendarEventSync.objects.filter(
-                    event=event,
-                    google_calendar_id__isnull=False,
-                ).first()
-                
-                if sync:
-                    # Update existing event
-                    GoogleCalendarService.update_event_in_google_calendar(user, event)
-                else:
-                    # Create new event
-                    GoogleCalendarService.create_event_in_google_calendar(user, event)
-                
-                synced_events.append(event)
+            if events is None:
+                events = GoogleCalendarService._pending_push_events(user)
+            else:
+                events = CalendarEvent.objects.filter(
+                    id__in=[event.id for event in events],
+                ).prefetch_related(
+                    'attendees',
+                    Prefetch(
+                        'sync_records',
+                        queryset=CalendarEventSync.objects.filter(google_calendar_id__isnull=False),
+                        to_attr='google_sync_records',
+                    ),
+                )
+            
+            synced_events = []
+            chunk = []
+            for event in events.iterator(chunk_size=GoogleCalendarService.BATCH_SIZE):
+                chunk.append(event)
+                if len(chunk) == GoogleCalendarService.BATCH_SIZE:
+                    synced_events.extend(GoogleCalendarService._push_batch(service, calendar_id, chunk))
+                    chunk = []
+            if chunk:
+                synced_events.extend(GoogleCalendarService._push_batch(service, calendar_id, chunk))
             
             # Update last sync time
-            sync_record = GoogleCalendarSync.objects.get(user=user, is_connected=True)
             sync_record.last_sync_at = timezone.now()
-            sync_record.save()
+            sync_record.save(update_fields=['last_sync_at', 'updated_at'])
             
             return synced_events
         except Exception as error:
             raise Exception(f"Error syncing events to Google Calendar: {error}")
     
+    @staticmethod
+    def _push_batch(service, calendar_id, events):
+        """Insert or update a chunk of events through one batch request"""
+        responses = {}
+        
+        def collect(request_id, response, exception):
+            responses[request_id] = (response, exception)
+        
+        batch = GoogleCalendarService._new_batch(collect)
+        for event in events:
+            google_event = GoogleCalendarService._convert_to_google_event(event)
+            if event.google_sync_records:
+                request = service.events().update(
+                    calendarId=calendar_id,
+                    eventId=event.google_sync_records[0].google_calendar_id,
+                    body=google_event,
+                )
+            else:
+                request = service.events().insert(calendarId=calendar_id, body=google_event)
+            batch.add(request, request_id=str(event.id))
+        batch.execute()
+        
+        now = timezone.now()
+        synced_events = []
+        new_syncs = []
+        updated_syncs = []
+        for event in events:
+            response, exception = responses.get(str(event.id), (None, None))
+            if event.google_sync_records:
+                sync = event.google_sync_records[0]
+                # A failed push keeps its last successful time, so it is retried
+                sync.sync_status = 'failed' if exception else 'synced'
+                if not exception:
+                    sync.last_synced_at = now
+                updated_syncs.append(sync)
+            elif not exception and response:
+                new_syncs.append(CalendarEventSync(
+                    event=event,
+                    google_calendar_id=response.get('id'),
+                    sync_status='synced',
+                ))
+            if not exception:
+                synced_events.append(event)
+        
+        with transaction.atomic():
+            if new_syncs:
+                CalendarEventSync.objects.bulk_create(new_syncs)
+            if updated_syncs:
+                CalendarEventSync.objects.bulk_update(updated_syncs, ['sync_status', 'last_synced_at'])
+        
+        return synced_events
+    
     @staticmethod
     def _convert_to_google_event(event):
         """Convert CalendarEvent to Google Calendar event format"""
@@ -434,73 +665,44 @@ class GoogleCalendarService:
         return rrule
     
     @staticmethod
-    def _create_event_from_google(user, google_event):
-        """Create CalendarEvent from Google Calendar event"""
-        # Extract event data
-        start = google_event.get('start', {})
-        end = google_event.get('end', {})
-        
-        start_time = datetime.fromisoformat(
-            start.get('dateTime', start.get('date'))
-        ).replace(tzinfo=timezone.utc)
-        
-        end_time = None
-        if end:
-            end_time = datetime.fromisoformat(
-                end.get('dateTime', end.get('date'))
-            ).replace(tzinfo=timezone.utc)
-        
-        all_day = 'date' in start
-        
-        # Create event
-        event = CalendarService.create_event(
-            user=user,
-            title=google_event.get('summary', 'Imported Event'),
-            description=google_event.get('description'),
-            start_time=start_time,
-            end_time=end_time,
-            location=google_event.get('location'),
-            all_day=all_day,
-            event_type='event',
-            privacy='private',
-        )
-        
-        # Store Google Calendar event ID
-        CalendarEventSync.objects.create(
-            event=event,
-            google_calendar_id=google_event.get('id'),
-            sync_status='synced',
-        )
-        
-        return event
+    def _to_rfc3339(value):
+        """Format a datetime for Google query parameters (naive values are UTC)"""
+        if timezone.is_naive(value):
+            return value.isoformat() + 'Z'
+        return value.isoformat()
     
     @staticmethod
-    def _update_event_from_google(event, google_event):
-        """Update CalendarEvent from Google Calendar event"""
-        # Extract event data
+    def _parse_google_time(value):
+        """Parse a Google date/dateTime string into a UTC datetime"""
+        parsed = datetime.fromisoformat(value)
+        if timezone.is_naive(parsed):
+            parsed = parsed.replace(tzinfo=dt_timezone.utc)
+        parsed = parsed.astimezone(dt_timezone.utc)
+        if not settings.USE_TZ:
+            parsed = parsed.replace(tzinfo=None)
+        return parsed
+    
+    @staticmethod
+    def _parse_google_event(google_event):
+        """Extract CalendarEvent field values from a Google Calendar event"""
         start = google_event.get('start', {})
         end = google_event.get('end', {})
         
-        start_time = datetime.fromisoformat(
+        start_time = GoogleCalendarService._parse_google_time(
             start.get('dateTime', start.get('date'))
-        ).replace(tzinfo=timezone.utc)
+        )
         
         end_time = None
         if end:
-            end_time = datetime.fromisoformat(
+            end_time = GoogleCalendarService._parse_google_time(
                 end.get('dateTime', end.get('date'))
-            ).replace(tzinfo=timezone.utc)
-        
-        all_day = 'date' in start
-        
-        # Update event
-        event.title = google_event.get('summary', event.title)
-        event.description = google_event.get('description', event.description)
-        event.location = google_event.get('location', event.location)
-        event.start_time = start_time
-        event.end_time = end_time
-        event.all_day = all_day
-        event.save()
+            )
         
-        return event
-
+        return {
+            'title': google_event.get('summary', 'Imported Event'),
+            'description': google_event.get('description'),
+            'location': google_event.get('location'),
+            'start_time': start_time,
+            'end_time': end_time,
+            'all_day': 'date' in start,
+        }
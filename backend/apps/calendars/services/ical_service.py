@@ -1,6 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import hashlib
 import uuid
+from django.core import signing
+from django.db.models import Count, Max, Prefetch
 from django.http import HttpResponse
+from django.urls import reverse
 from django.utils import timezone
 from apps.calendars.models import CalendarEvent, CalendarEventSync
 from apps.calendars.services.calendar_service import CalendarService
@@ -20,6 +24,9 @@ except ImportError:
 class ICalService:
     """Service for iCal file generation and import"""
     
+    FEED_CHUNK_SIZE = 200
+    FEED_TOKEN_SALT = 'calendars.ical_feed'
+    
     @staticmethod
     def generate_ical_file(events, calendar_name='KSIT Nexus Calendar'):
         """Generate an iCal file from a list of events"""
@@ -33,51 +40,109 @@ class ICalService:
         cal.add('X-WR-TIMEZONE', 'UTC')
         
         for event in events:
-            ical_event = ICalEvent()
             # Get or generate iCal UID
             sync_record = CalendarEventSync.objects.filter(event=event, ical_uid__isnull=False).first()
-            ical_uid = sync_record.ical_uid if sync_record else f"event-{event.id}@ksit-nexus"
-            ical_event.add('uid', ical_uid)
-            ical_event.add('dtstamp', timezone.now())
-            ical_event.add('dtstart', event.start_time)
-            
-            if event.end_time:
-                ical_event.add('dtend', event.end_time)
-            elif event.all_day:
-                # For all-day events, end time is next day
-                from datetime import timedelta
-                ical_event.add('dtend', event.start_time + timedelta(days=1))
-            
-            ical_event.add('summary', event.title)
-            
-            if event.description:
-                ical_event.add('description', event.description)
-            
-            if event.location:
-                ical_event.add('location', event.location)
-            
-            if event.meeting_link:
-                ical_event.add('url', event.meeting_link)
-            
-            # Add recurrence rule if applicable
-            if event.is_recurring and event.recurrence_pattern != 'none':
-                rrule = ICalService._generate_rrule(event)
-                if rrule:
-                    ical_event.add('rrule', rrule)
-            
-            # Add attendees
-            if event.attendees.exists():
-                for attendee in event.attendees.all():
-                    ical_event.add('attendee', f"mailto:{attendee.email}")
-            
-            if event.external_attendees:
-                for email in event.external_attendees:
-                    ical_event.add('attendee', f"mailto:{email}")
-            
-            cal.add_component(ical_event)
+            ical_uid = sync_record.ical_uid if sync_record else None
+            cal.add_component(ICalService._build_vevent(event, ical_uid))
         
         return cal.to_ical()
     
+    @staticmethod
+    def _build_vevent(event, ical_uid=None, exception_starts=None):
+        """Build a VEVENT component for a calendar event"""
+        ical_event = ICalEvent()
+        ical_event.add('uid', ical_uid or f"event-{event.id}@ksit-nexus")
+        ical_event.add('dtstamp', timezone.now())
+        ical_event.add('dtstart', event.start_time)
+        
+        if event.end_time:
+            ical_event.add('dtend', event.end_time)
+        elif event.all_day:
+            # For all-day events, end time is next day
+            ical_event.add('dtend', event.start_time + timedelta(days=1))
+        
+        ical_event.add('summary', event.title)
+        
+        if event.description:
+            ical_event.add('description', event.description)
+        
+        if event.location:
+            ical_event.add('location', event.location)
+        
+        if event.meeting_link:
+            ical_event.add('url', event.meeting_link)
+        
+        # Add recurrence rule if applicable
+        if event.is_recurring and event.recurrence_pattern != 'none':
+            rrule = ICalService._generate_rrule(event)
+            if rrule:
+                ical_event.add('rrule', rrule)
+            for exception_start in exception_starts or []:
+                ical_event.add('exdate', exception_start)
+        
+        # Add attendees
+        for attendee in event.attendees.all():
+            ical_event.add('attendee', f"mailto:{attendee.email}")
+        
+        if event.external_attendees:
+            for email in event.external_attendees:
+                ical_event.add('attendee', f"mailto:{email}")
+        
+        return ical_event
+    
+    @staticmethod
+    def stream_ical_feed(events, calendar_name='KSIT Nexus Calendar'):
+        """
+        Lazily generate an iCal feed, one VEVENT at a time.
+        
+        Events are read in chunks with their attendees, iCal UIDs and
+        recurrence exceptions prefetched, so memory stays flat for large feeds.
+        """
+        if not ICALENDAR_AVAILABLE:
+            raise ImportError("icalendar package is not installed. Please install it with: pip install icalendar")
+        
+        cal = Calendar()
+        cal.add('prodid', f'-//{calendar_name}//EN')
+        cal.add('version', '2.0')
+        cal.add('X-WR-CALNAME', calendar_name)
+        cal.add('X-WR-TIMEZONE', 'UTC')
+        header = cal.to_ical().decode()
+        # Calendar.to_ical() closes the component; split off the END line
+        yield header[:header.rindex('END:VCALENDAR')]
+        
+        events = events.prefetch_related(
+            'attendees',
+            'recurrence_exceptions',
+            Prefetch(
+                'sync_records',
+                queryset=CalendarEventSync.objects.filter(ical_uid__isnull=False),
+                to_attr='ical_sync_records',
+            ),
+        )
+        for event in events.iterator(chunk_size=ICalService.FEED_CHUNK_SIZE):
+            ical_uid = event.ical_sync_records[0].ical_uid if event.ical_sync_records else None
+            exception_starts = [
+                exception.occurrence_start for exception in event.recurrence_exceptions.all()
+            ]
+            yield ICalService._build_vevent(event, ical_uid, exception_starts).to_ical().decode()
+        
+        yield 'END:VCALENDAR\r\n'
+    
+    @staticmethod
+    def feed_etag(events):
+        """Compute a validator that changes whenever the feed contents change"""
+        summary = events.order_by().aggregate(
+            count=Count('id', distinct=True),
+            last_id=Max('id'),
+            last_updated=Max('updated_at'),
+            exceptions=Count('recurrence_exceptions', distinct=True),
+            last_exception=Max('recurrence_exceptions__updated_at'),
+        )
+        digest = hashlib.md5(
+            '|'.join(str(summary[key]) for key in sorted(summary)).encode()
+        ).hexdigest()
+        return f'"{digest}"'
+    
     @staticmethod
     def _generate_rrule(event):
         """Generate recurrence rule for iCal"""
@@ -190,10 +255,23 @@ class ICalService:
     
     @staticmethod
     def generate_ical_feed_url(user):
-        """Generate iCal feed URL for a user"""
-        # In production, this would return a URL to a view that generates the iCal file
-        # For now, return a placeholder
-        return f"/api/calendars/feed/{user.id}/calendar.ics"
+        """Generate the subscription feed URL for a user"""
+        return reverse('calendar-ical-subscription', kwargs={
+            'token': ICalService.generate_feed_token(user),
+        })
+    
+    @staticmethod
+    def generate_feed_token(user):
+        """Signed, stable token identifying a user's subscription feed"""
+        return signing.dumps({'user_id': user.id}, salt=ICalService.FEED_TOKEN_SALT)
+    
+    @staticmethod
+    def get_feed_user_id(token):
+        """Resolve a feed token back to a user id, or None if it is invalid"""
+        try:
+            return signing.loads(token, salt=ICalService.FEED_TOKEN_SALT)['user_id']
+        except (signing.BadSignature, KeyError, TypeError):
+            return None
     
     @staticmethod
     def update_event_ical_uid(event, ical_uid):
@@ -0,0 +1,210 @@
+import calendar
+import copy
+from collections import defaultdict
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Q
+from apps.calendars.models import RecurrenceException
+from apps.shared.utils.cache import invalidate_on_commit
+from apps.shared.utils.metrics import record_cache
+
+
+class RecurrenceService:
+    """Expands recurring calendar events (RRULE-style) into concrete occurrences"""
+
+    DAY_STEPS = {
+        'daily': timedelta(days=1),
+        'weekly': timedelta(weeks=1),
+    }
+    MONTH_STEPS = {
+        'monthly': 1,
+        'yearly': 12,
+    }
+
+    # Safety cap on occurrences expanded for one event in one window
+    MAX_OCCURRENCES = 1000
+    CACHE_TIMEOUT = 3600
+    CACHE_PREFIX = 'calendar_occurrences'
+
+    @staticmethod
+    def series_filter():
+        """Q object matching recurring master events"""
+        return Q(is_recurring=True) & ~Q(recurrence_pattern='none')
+
+    @staticmethod
+    def is_series(event):
+        """Check if an event is the master of a recurring series"""
+        return bool(event.is_recurring) and event.recurrence_pattern in (
+            *RecurrenceService.DAY_STEPS, *RecurrenceService.MONTH_STEPS,
+        )
+
+    @staticmethod
+    def iter_occurrence_starts(event, window_start=None):
+        """
+        Lazily generate occurrence start times of a series, in order.
+
+        Occurrences whose end falls before window_start are skipped
+        arithmetically instead of being generated. COUNT and UNTIL limits
+        are applied; exceptions are not (see iter_occurrences).
+        """
+        start = event.start_time
+        duration = RecurrenceService._duration(event)
+        count = event.recurrence_count
+        until = event.recurrence_end_date
+        pattern = event.recurrence_pattern
+
+        if pattern in RecurrenceService.DAY_STEPS:
+            step = RecurrenceService.DAY_STEPS[pattern]
+            index = 0
+            if window_start is not None and window_start - duration > start:
+                # First occurrence whose end reaches the window (ceil division)
+                index = -((start + duration - window_start) // step)
+            while True:
+                if count and index >= count:
+                    return
+                occurrence = start + step * index
+                if until and occurrence > until:
+                    return
+                yield occurrence
+                index += 1
+        elif pattern in RecurrenceService.MONTH_STEPS:
+            months = RecurrenceService.MONTH_STEPS[pattern]
+            index = 0
+            generated = 0
+            if window_start is not None:
+                skip_to = window_start - duration
+                offset = (skip_to.year - start.year) * 12 + (skip_to.month - start.month) - 1
+                if offset > 0:
+                    index = offset // months
+                    if start.day <= 28:
+                        generated = index
+                    else:
+                        # Months without this day produce no occurrence (RFC 5545)
+                        generated = sum(
+                            1 for i in range(index)
+                            if RecurrenceService._add_months(start, i * months) is not None
+                        )
+            while True:
+                if count and generated >= count:
+                    return
+                occurrence = RecurrenceService._add_months(start, index * months)
+                index += 1
+                if occurrence is None:
+                    continue
+                if until and occurrence > until:
+                    return
+                generated += 1
+                yield occurrence
+
+    @staticmethod
+    def iter_occurrences(event, window_start, window_end, exceptions=()):
+        """Generate (start, end) pairs of occurrences overlapping [window_start, window_end)"""
+        duration = RecurrenceService._duration(event)
+        excluded = set(exceptions)
+        produced = 0
+        for occurrence in RecurrenceService.iter_occurrence_starts(event, window_start):
+            if occurrence >= window_end or produced >= RecurrenceService.MAX_OCCURRENCES:
+                return
+            if not RecurrenceService.overlaps(occurrence, occurrence + duration, window_start):
+                continue
+            if occurrence in excluded:
+                continue
+            produced += 1
+            yield occurrence, occurrence + duration
+
+    @staticmethod
+    def overlaps(start, end, window_start):
+        """Check an occurrence ends after window_start (instants must start in it)"""
+        if end > start:
+            return end > window_start
+        return start >= window_start
+
+    @staticmethod
+    def get_occurrences(event, window_start, window_end, exceptions=None):
+        """
+        Get (start, end) pairs for an event within a window.
+
+        Occurrences are memoized per event for the window widened to whole
+        days, so callers passing "now" share one entry per day; the key embeds
+        a per-event generation that is bumped whenever the event or its
+        exceptions change. Pass `exceptions` (occurrence starts) when they
+        have been prefetched, otherwise they are queried on a cache miss.
+        """
+        day_start, day_end = RecurrenceService._day_window(window_start, window_end)
+        cache_key = RecurrenceService._cache_key(event, day_start, day_end)
+        occurrences = cache.get(cache_key)
+        record_cache('recurrence', occurrences is not None)
+        if occurrences is None:
+            if exceptions is None:
+                exceptions = RecurrenceException.objects.filter(
+                    event_id=event.id,
+                ).values_list('occurrence_start', flat=True)
+            occurrences = list(RecurrenceService.iter_occurrences(
+                event, day_start, day_end, exceptions=exceptions,
+            ))
+            cache.set(cache_key, occurrences, RecurrenceService.CACHE_TIMEOUT)
+        return [
+            (start, end) for start, end in occurrences
+            if start < window_end and RecurrenceService.overlaps(start, end, window_start)
+        ]
+
+    @staticmethod
+    def expand(event, window_start, window_end, exceptions=None):
+        """Yield copies of the master event shifted to each occurrence in the window"""
+        series_start = event.start_time
+        occurrences = RecurrenceService.get_occurrences(event, window_start, window_end, exceptions)
+        for start, end in occurrences:
+            occurrence = copy.copy(event)
+            occurrence.start_time = start
+            occurrence.end_time = end if event.end_time else None
+            occurrence.series_start_time = series_start
+            occurrence.is_occurrence = True
+            yield occurrence
+
+    @staticmethod
+    def exceptions_by_event(event_ids):
+        """Map event id -> skipped occurrence starts, for many events in one query"""
+        exceptions = defaultdict(list)
+        for event_id, occurrence_start in RecurrenceException.objects.filter(
+            event_id__in=event_ids,
+        ).values_list('event_id', 'occurrence_start'):
+            exceptions[event_id].append(occurrence_start)
+        return exceptions
+
+    @staticmethod
+    def invalidate(event_id):
+        """Invalidate memoized occurrences of an event"""
+        invalidate_on_commit(f"{RecurrenceService.CACHE_PREFIX}:gen:{event_id}", generation=True)
+
+    @staticmethod
+    def _cache_key(event, window_start, window_end):
+        generation = cache.get(f"{RecurrenceService.CACHE_PREFIX}:gen:{event.id}", 0)
+        return (
+            f"{RecurrenceService.CACHE_PREFIX}:{event.id}:{generation}:"
+            f"{window_start.isoformat()}:{window_end.isoformat()}"
+        )
+
+    @staticmethod
+    def _day_window(window_start, window_end):
+        """Widen a window to midnight boundaries"""
+        day_start = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = window_end.replace(hour=0, minute=0, second=0, microsecond=0)
+        if day_end < window_end:
+            day_end += timedelta(days=1)
+        return day_start, day_end
+
+    @staticmethod
+    def _duration(event):
+        if event.end_time and event.end_time > event.start_time:
+            return event.end_time - event.start_time
+        return timedelta(0)
+
+    @staticmethod
+    def _add_months(value, months):
+        """Shift a datetime by whole months, or None if the day does not exist"""
+        month_index = value.month - 1 + months
+        year = value.year + month_index // 12
+        month = month_index % 12 + 1
+        if value.day > calendar.monthrange(year, month)[1]:
+            return None
+        return value.replace(year=year, month=month)
@@ -0,0 +1,22 @@
+"""
+Signals for calendars app
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CalendarEvent, RecurrenceException
+from .services.recurrence_service import RecurrenceService
+
+
+@receiver(post_save, sender=CalendarEvent)
+@receiver(post_delete, sender=CalendarEvent)
+def invalidate_event_occurrences(sender, instance, **kwargs):
+    """Drop memoized occurrences when a recurring event is edited or deleted"""
+    if instance.is_recurring:
+        RecurrenceService.invalidate(instance.id)
+
+
+@receiver(post_save, sender=RecurrenceException)
+@receiver(post_delete, sender=RecurrenceException)
+def invalidate_exception_occurrences(sender, instance, **kwargs):
+    """Drop memoized occurrences when an occurrence is skipped or restored"""
+    RecurrenceService.invalidate(instance.event_id)
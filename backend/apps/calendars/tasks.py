@@ -68,3 +68,43 @@ def send_event_reminders(self):
 
 
 
+
+
+@shared_task
+def sync_google_calendars():
+    """
+    Fan out incremental Google Calendar syncs, one task per connected user,
+    so users are spread over the Celery worker pool.
+    """
+    from .models import GoogleCalendarSync
+    
+    user_ids = GoogleCalendarSync.objects.filter(
+        is_connected=True,
+        sync_enabled=True,
+    ).values_list('user_id', flat=True)
+    
+    queued = 0
+    for user_id in user_ids.iterator():
+        sync_google_calendar_for_user.delay(user_id)
+        queued += 1
+    
+    return {'queued': queued, 'timestamp': timezone.now().isoformat()}
+
+
+@shared_task(bind=True, max_retries=3)
+def sync_google_calendar_for_user(self, user_id):
+    """Incrementally sync one user's Google Calendar, at most once per interval"""
+    from django.contrib.auth import get_user_model
+    from .services.google_calendar_service import GoogleCalendarService
+    
+    if not GoogleCalendarService.acquire_sync_slot(user_id):
+        return {'user_id': user_id, 'skipped': True}
+    
+    try:
+        user = get_user_model().objects.get(id=user_id)
+        result = GoogleCalendarService.sync_user(user)
+        result['user_id'] = user_id
+        return result
+    except Exception as e:
+        logger.error(f"Error syncing Google Calendar for user {user_id}: {e}")
+        raise self.retry(exc=e, countdown=300)
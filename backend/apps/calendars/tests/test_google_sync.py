@@ -0,0 +1,253 @@
+"""
+Test cases for incremental Google Calendar sync against a local fake API server
+"""
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+from email.parser import FeedParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from apps.calendars.models import CalendarEvent, CalendarEventSync, GoogleCalendarSync
+from apps.calendars.services import GoogleCalendarService
+
+User = get_user_model()
+
+
+class FakeGoogleCalendar:
+    """In-memory Google Calendar with sync tokens and batch support"""
+
+    def __init__(self):
+        self.events = {}
+        self.version = 0
+        self.expired_tokens = set()
+        self.list_requests = []
+        self.batch_requests = []
+
+    def put(self, event_id, **fields):
+        self.version += 1
+        event = self.events.setdefault(event_id, {'id': event_id, 'status': 'confirmed'})
+        event.update(fields)
+        event['_version'] = self.version
+        return event
+
+    def list(self, params):
+        self.list_requests.append(params)
+        sync_token = params.get('syncToken')
+        if sync_token in self.expired_tokens:
+            return 410, {'error': {'code': 410, 'message': 'Sync token is no longer valid'}}
+        since = int(sync_token[1:]) if sync_token else 0
+        changed = sorted(
+            (event for event in self.events.values() if event['_version'] > since),
+            key=lambda event: event['_version'],
+        )
+        if not sync_token:
+            changed = [event for event in changed if event['status'] != 'cancelled']
+        offset = int(params.get('pageToken', 0))
+        size = int(params.get('maxResults', 250))
+        page = changed[offset:offset + size]
+        body = {'items': [self._public(event) for event in page]}
+        if offset + size < len(changed):
+            body['nextPageToken'] = str(offset + size)
+        else:
+            body['nextSyncToken'] = f"v{self.version}"
+        return 200, body
+
+    def apply(self, method, path, body):
+        if method == 'POST':
+            return 200, self._public(self.put(uuid.uuid4().hex, **body))
+        event_id = path.rsplit('/', 1)[-1]
+        if event_id not in self.events:
+            return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+        return 200, self._public(self.put(event_id, **body))
+
+    @staticmethod
+    def _public(event):
+        return {key: value for key, value in event.items() if not key.startswith('_')}
+
+
+class FakeGoogleCalendarHandler(BaseHTTPRequestHandler):
+    """HTTP front end for FakeGoogleCalendar"""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self._send(*self.server.calendar.list(params))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        parser = FeedParser()
+        parser.feed(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n{body}")
+        message = parser.close()
+        self.server.calendar.batch_requests.append(len(message.get_payload()))
+
+        boundary = 'batch_fake_boundary'
+        parts = []
+        for part in message.get_payload():
+            request = part.get_payload()
+            request_line, rest = request.split('\n', 1)
+            method, path, _ = request_line.split(' ', 2)
+            payload = rest.split('\n\n', 1)[1] if '\n\n' in rest else ''
+            status, result = self.server.calendar.apply(
+                method, urlparse(path).path, json.loads(payload or '{}'),
+            )
+            content_id = part['Content-ID'].replace('<', '<response-', 1)
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: {content_id}\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n\r\n"
+                f"{json.dumps(result)}\r\n"
+            )
+        response = ''.join(parts) + f"--{boundary}--\r\n"
+        self._send(200, response.encode(), f'multipart/mixed; boundary={boundary}')
+
+
+class GoogleCalendarSyncTestCase(TransactionTestCase):
+    """Test cases for incremental pull and batched push"""
+
+    def setUp(self):
+        self.calendar = FakeGoogleCalendar()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGoogleCalendarHandler)
+        self.server.calendar = self.calendar
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        api_root = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        for name, value in [('API_ROOT', api_root), ('PAGE_SIZE', 2)]:
+            patcher = patch.object(GoogleCalendarService, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(
+            username='googleuser',
+            email='google@example.com',
+            password='testpass123',
+        )
+        self.sync_record = GoogleCalendarSync.objects.create(
+            user=self.user,
+            is_connected=True,
+            access_token='fake-access-token',
+            refresh_token='fake-refresh-token',
+            token_expires_at=datetime.now() + timedelta(hours=1),
+            calendar_id='primary',
+        )
+
+    def _google_event(self, event_id, title, day):
+        return self.calendar.put(
+            event_id,
+            summary=title,
+            start={'dateTime': f'2026-03-{day:02d}T09:00:00Z'},
+            end={'dateTime': f'2026-03-{day:02d}T10:00:00Z'},
+        )
+
+    def test_incremental_pull(self):
+        """Test only changed events are fetched once a sync token exists"""
+        for index, title in enumerate(['Lab', 'Quiz', 'Seminar'], start=1):
+            self._google_event(f'g{index}', title, index)
+
+        imported = GoogleCalendarService.sync_events_from_google_calendar(self.user)
+        self.assertEqual(len(imported), 3)
+        self.assertEqual(len(self.calendar.list_requests), 2)  # Two pages
+        self.sync_record.refresh_from_db()
+        self.assertEqual(self.sync_record.sync_token, 'v3')
+
+        self._google_event('g1', 'Lab (moved)', 4)
+        self.calendar.put('g2', status='cancelled')
+        self.calendar.list_requests.clear()
+
+        changed = GoogleCalendarService.sync_events_from_google_calendar(self.user)
+        self.assertEqual([event.title for event in changed], ['Lab (moved)'])
+        self.assertEqual(self.calendar.list_requests[0]['syncToken'], 'v3')
+        self.assertEqual(
+            sorted(CalendarEvent.objects.values_list('title', flat=True)),
+            ['Lab (moved)', 'Seminar'],
+        )
+        self.assertEqual(CalendarEvent.objects.get(title='Lab (moved)').start_time.day, 4)
+
+        # Pulled changes are not pushed back to Google
+        self.assertFalse(GoogleCalendarService._pending_push_events(self.user).exists())
+
+    def test_expired_sync_token_falls_back_to_full_sync(self):
+        """Test a 410 response clears the token and re-lists the window"""
+        self._google_event('g1', 'Lab', 1)
+        self.sync_record.sync_token = 'v0'
+        self.sync_record.save()
+        self.calendar.expired_tokens.add('v0')
+
+        imported = GoogleCalendarService.sync_events_from_google_calendar(
+            self.user, start_date=datetime(2026, 3, 1),
+        )
+        self.assertEqual([event.title for event in imported], ['Lab'])
+        self.sync_record.refresh_from_db()
+        self.assertEqual(self.sync_record.sync_token, 'v1')
+
+    def test_batched_push_sends_only_changes(self):
+        """Test local changes are pushed through one batch request"""
+        events = [
+            CalendarEvent.objects.create(
+                created_by=self.user,
+                title=f'Event {index}',
+                start_time=datetime(2026, 3, index, 9, 0),
+                end_time=datetime(2026, 3, index, 10, 0),
+            )
+            for index in range(1, 4)
+        ]
+
+        pushed = GoogleCalendarService.sync_events_to_google_calendar(self.user)
+        self.assertEqual(len(pushed), 3)
+        self.assertEqual(self.calendar.batch_requests, [3])
+        self.assertEqual(
+            CalendarEventSync.objects.filter(google_calendar_id__isnull=False).count(), 3,
+        )
+
+        self.assertEqual(GoogleCalendarService.sync_events_to_google_calendar(self.user), [])
+        self.assertEqual(self.calendar.batch_requests, [3])
+
+        events[0].title = 'Event 1 (renamed)'
+        events[0].save()
+        pushed = GoogleCalendarService.sync_events_to_google_calendar(self.user)
+        self.assertEqual([event.id for event in pushed], [events[0].id])
+        self.assertEqual(self.calendar.batch_requests, [3, 1])
+        google_id = CalendarEventSync.objects.get(event=events[0]).google_calendar_id
+        self.assertEqual(self.calendar.events[google_id]['summary'], 'Event 1 (renamed)')
+
+    def test_failed_push_is_retried(self):
+        """Test an update rejected by Google stays pending until it goes through"""
+        event = CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Event',
+            start_time=datetime(2026, 3, 1, 9, 0),
+            end_time=datetime(2026, 3, 1, 10, 0),
+        )
+        GoogleCalendarService.sync_events_to_google_calendar(self.user)
+        google_id = CalendarEventSync.objects.get(event=event).google_calendar_id
+
+        removed = self.calendar.events.pop(google_id)
+        event.title = 'Event (renamed)'
+        event.save()
+        self.assertEqual(GoogleCalendarService.sync_events_to_google_calendar(self.user), [])
+        self.assertEqual(CalendarEventSync.objects.get(event=event).sync_status, 'failed')
+        self.assertTrue(GoogleCalendarService._pending_push_events(self.user).exists())
+
+        self.calendar.events[google_id] = removed
+        pushed = GoogleCalendarService.sync_events_to_google_calendar(self.user)
+        self.assertEqual([pushed_event.id for pushed_event in pushed], [event.id])
+        self.assertEqual(self.calendar.events[google_id]['summary'], 'Event (renamed)')
+        self.assertFalse(GoogleCalendarService._pending_push_events(self.user).exists())
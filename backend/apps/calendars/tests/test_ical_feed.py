@@ -0,0 +1,118 @@
+"""
+Test cases for calendar range queries and the iCal subscription feed
+"""
+from datetime import datetime
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from apps.calendars.models import CalendarEvent
+from apps.calendars.services import CalendarService, ICalService
+
+User = get_user_model()
+
+
+class CalendarRangeQueryTestCase(TestCase):
+    """Test cases for overlap range queries and visibility"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='rangeuser',
+            email='range@example.com',
+            password='testpass123',
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123',
+        )
+
+    def test_multi_day_event_overlapping_window(self):
+        """Test events that started before the window but are still running are returned"""
+        CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Fest',
+            start_time=datetime(2026, 2, 27, 9, 0),
+            end_time=datetime(2026, 3, 2, 18, 0),
+        )
+        CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Past',
+            start_time=datetime(2026, 2, 20, 9, 0),
+            end_time=datetime(2026, 2, 20, 10, 0),
+        )
+        events = CalendarService.get_events(
+            user=self.user,
+            start_date=datetime(2026, 3, 1),
+            end_date=datetime(2026, 3, 31),
+        )
+        self.assertEqual([event.title for event in events], ['Fest'])
+
+    def test_visibility_union_has_no_duplicates(self):
+        """Test an event matching several visibility branches is returned once"""
+        event = CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Seminar',
+            start_time=datetime(2026, 3, 5, 9, 0),
+            privacy='public',
+        )
+        event.attendees.set([self.user, self.other])
+        CalendarEvent.objects.create(
+            created_by=self.other,
+            title='Private',
+            start_time=datetime(2026, 3, 6, 9, 0),
+        )
+        events = CalendarService.get_events(user=self.user)
+        self.assertEqual([e.title for e in events], ['Seminar'])
+        self.assertNotIn('DISTINCT', str(events.query))
+
+
+class ICalSubscriptionTestCase(TestCase):
+    """Test cases for the streaming iCal subscription endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='feeduser',
+            email='feed@example.com',
+            password='testpass123',
+        )
+        CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Lab',
+            start_time=datetime(2026, 3, 2, 9, 0),
+            end_time=datetime(2026, 3, 2, 11, 0),
+            is_recurring=True,
+            recurrence_pattern='weekly',
+        )
+        self.url = ICalService.generate_ical_feed_url(self.user)
+
+    def test_feed_streams_events(self):
+        """Test the feed streams a complete calendar"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR'))
+        self.assertTrue(body.rstrip().endswith('END:VCALENDAR'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn('RRULE:FREQ=WEEKLY', body)
+
+    def test_feed_returns_not_modified(self):
+        """Test polling clients get 304 until the calendar changes"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Quiz',
+            start_time=datetime(2026, 3, 4, 9, 0),
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_token(self):
+        """Test tampered feed tokens are rejected"""
+        response = self.client.get(self.url.replace('calendar.ics', '').rstrip('/') + 'x/calendar.ics')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,141 @@
+"""
+Test cases for recurring calendar event expansion
+"""
+from datetime import datetime, timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from apps.calendars.models import CalendarEvent, RecurrenceException
+from apps.calendars.services import CalendarService, RecurrenceService
+
+User = get_user_model()
+
+
+class RecurrenceServiceTestCase(TestCase):
+    """Test cases for RecurrenceService"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='calendaruser',
+            email='calendar@example.com',
+            password='testpass123',
+        )
+
+    def _event(self, **kwargs):
+        defaults = {
+            'created_by': self.user,
+            'title': 'Lecture',
+            'start_time': datetime(2026, 1, 5, 9, 0),
+            'end_time': datetime(2026, 1, 5, 10, 0),
+            'is_recurring': True,
+            'recurrence_pattern': 'weekly',
+        }
+        defaults.update(kwargs)
+        return CalendarEvent.objects.create(**defaults)
+
+    def test_weekly_expansion_skips_to_window(self):
+        """Test weekly occurrences are generated only inside the window"""
+        event = self._event()
+        occurrences = RecurrenceService.get_occurrences(
+            event, datetime(2026, 3, 1), datetime(2026, 3, 31),
+        )
+        self.assertEqual(
+            [start for start, end in occurrences],
+            [datetime(2026, 3, d, 9, 0) for d in (2, 9, 16, 23, 30)],
+        )
+        self.assertTrue(all(end - start == timedelta(hours=1) for start, end in occurrences))
+
+    def test_daily_count_limit(self):
+        """Test COUNT limits the series even when the window starts later"""
+        event = self._event(recurrence_pattern='daily', recurrence_count=10)
+        occurrences = RecurrenceService.get_occurrences(
+            event, datetime(2026, 1, 12), datetime(2026, 2, 1),
+        )
+        self.assertEqual([start.day for start, end in occurrences], [12, 13, 14])
+
+    def test_monthly_skips_missing_days(self):
+        """Test monthly events on the 31st skip shorter months"""
+        event = self._event(
+            recurrence_pattern='monthly',
+            start_time=datetime(2026, 1, 31, 9, 0),
+            end_time=None,
+            recurrence_count=4,
+        )
+        starts = list(RecurrenceService.iter_occurrence_starts(event))
+        self.assertEqual([start.month for start in starts], [1, 3, 5, 7])
+
+    def test_until_and_overlap(self):
+        """Test UNTIL bound and occurrences overlapping the window start"""
+        event = self._event(
+            recurrence_pattern='daily',
+            recurrence_end_date=datetime(2026, 1, 8, 9, 0),
+        )
+        occurrences = RecurrenceService.get_occurrences(
+            event, datetime(2026, 1, 6, 9, 30), datetime(2026, 1, 31),
+        )
+        self.assertEqual([start.day for start, end in occurrences], [6, 7, 8])
+
+    def test_exceptions_invalidate_memoized_occurrences(self):
+        """Test skipping an occurrence invalidates the occurrence cache"""
+        event = self._event()
+        window = (datetime(2026, 1, 1), datetime(2026, 1, 31))
+        self.assertEqual(len(RecurrenceService.get_occurrences(event, *window)), 4)
+
+        CalendarService.skip_occurrence(event, datetime(2026, 1, 12, 9, 0))
+        starts = [start for start, end in RecurrenceService.get_occurrences(event, *window)]
+        self.assertNotIn(datetime(2026, 1, 12, 9, 0), starts)
+        self.assertEqual(len(starts), 3)
+
+        RecurrenceException.objects.all().delete()
+        event.recurrence_pattern = 'daily'
+        event.save()
+        self.assertEqual(len(RecurrenceService.get_occurrences(event, *window)), 26)
+
+    def test_range_query_merges_occurrences(self):
+        """Test range queries return single events and occurrences in start order"""
+        self._event()
+        CalendarEvent.objects.create(
+            created_by=self.user,
+            title='Exam',
+            start_time=datetime(2026, 3, 10, 14, 0),
+        )
+        window = (datetime(2026, 3, 1), datetime(2026, 3, 16, 23, 59))
+        queryset = CalendarService.get_events(user=self.user, start_date=window[0], end_date=window[1])
+        events = list(CalendarService.expand_recurring_events(queryset, *window))
+        self.assertEqual(
+            [(event.title, event.start_time) for event in events],
+            [
+                ('Lecture', datetime(2026, 3, 2, 9, 0)),
+                ('Lecture', datetime(2026, 3, 9, 9, 0)),
+                ('Exam', datetime(2026, 3, 10, 14, 0)),
+                ('Lecture', datetime(2026, 3, 16, 9, 0)),
+            ],
+        )
+        self.assertTrue(events[0].is_occurrence)
+        self.assertEqual(events[0].series_start_time, datetime(2026, 1, 5, 9, 0))
+
+    def test_windows_within_a_day_share_the_cache(self):
+        """Test windows starting at different times of day reuse one cache entry"""
+        event = self._event(recurrence_pattern='daily')
+        first = RecurrenceService.get_occurrences(
+            event, datetime(2026, 3, 2, 8, 15), datetime(2026, 3, 9, 8, 15),
+        )
+        self.assertEqual(first[0][0], datetime(2026, 3, 2, 9, 0))
+        self.assertEqual(first[-1][0], datetime(2026, 3, 8, 9, 0))
+        with self.assertNumQueries(0):
+            later = RecurrenceService.get_occurrences(
+                event, datetime(2026, 3, 2, 9, 45), datetime(2026, 3, 9, 9, 45),
+            )
+        # The 9:00 occurrence on the 2nd still overlaps; the 9th now fits
+        self.assertEqual([start.day for start, end in later], [2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_expansion_prefetches_exceptions(self):
+        """Test expanding many series queries their exceptions once"""
+        events = [self._event(title=f'Lecture {index}') for index in range(3)]
+        CalendarService.skip_occurrence(events[0], datetime(2026, 3, 9, 9, 0))
+        window = (datetime(2026, 3, 1), datetime(2026, 3, 16))
+        queryset = CalendarService.get_events(user=self.user, start_date=window[0], end_date=window[1])
+        with self.assertNumQueries(3):  # Single events, masters, exceptions
+            events = list(CalendarService.expand_recurring_events(queryset, *window))
+        self.assertEqual(len(events), 5)
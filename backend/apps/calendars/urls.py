@@ -9,6 +9,7 @@ urlpatterns = [
     path('events/date-range/', views.events_by_date_range, name='calendar-event-date-range'),
     path('events/type/<str:event_type>/', views.events_by_type, name='calendar-event-type'),
     path('events/<int:pk>/cancel/', views.cancel_event, name='calendar-event-cancel'),
+    path('events/<int:pk>/occurrences/skip/', views.skip_occurrence, name='calendar-event-skip-occurrence'),
     
     # Event reminders
     path('events/<int:pk>/reminders/', views.add_reminder, name='calendar-event-add-reminder'),
@@ -18,6 +19,7 @@ urlpatterns = [
     path('ical/export/', views.export_ical, name='calendar-ical-export'),
     path('ical/import/', views.import_ical, name='calendar-ical-import'),
     path('ical/feed/<int:user_id>/', views.ical_feed, name='calendar-ical-feed'),
+    path('feed/<str:token>/calendar.ics', views.ical_subscription, name='calendar-ical-subscription'),
     
     # Google Calendar integration
     path('google/authorize/', views.google_calendar_authorize, name='google-calendar-authorize'),
@@ -6,7 +6,10 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.conf import settings
 from datetime import datetime, timedelta
-from django.http import HttpResponse
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
 from apps.calendars.models import CalendarEvent, EventReminder, GoogleCalendarSync
 from apps.calendars.serializers import (
     CalendarEventSerializer,
@@ -15,9 +18,11 @@ from apps.calendars.serializers import (
     EventReminderSerializer,
     GoogleCalendarSyncSerializer,
 )
-from apps.calendars.services import CalendarService, ICalService, GoogleCalendarService
+from apps.calendars.services import CalendarService, ICalService, GoogleCalendarService, RecurrenceService
 from apps.shared.utils.cache import cache_result
 
+User = get_user_model()
+
 
 class CalendarEventListCreateView(generics.ListCreateAPIView):
     """List and create calendar events"""
@@ -56,6 +61,10 @@ class CalendarEventListCreateView(generics.ListCreateAPIView):
                 except (ValueError, AttributeError) as e:
                     print(f"📅 Error parsing end_date '{end_date}': {e}")
             
+            # Remember the window so list() can expand recurring events into it
+            self.start_dt = start_dt
+            self.end_dt = end_dt
+            
             # Get queryset with date filters
             queryset = CalendarService.get_events(
                 user=self.request.user,
@@ -82,7 +91,7 @@ class CalendarEventListCreateView(generics.ListCreateAPIView):
                 queryset = queryset.filter(privacy=privacy)
             
             print(f"📅 Final queryset count: {queryset.count()}")
-            return queryset.distinct()
+            return queryset
         except Exception as e:
             import traceback
             print(f"Error in CalendarEventListCreateView.get_queryset: {e}")
@@ -102,7 +111,11 @@ class CalendarEventListCreateView(generics.ListCreateAPIView):
             print(f"📅 Total events in queryset: {queryset.count()}")
             for event in queryset[:10]:  # Print first 10 events
                 print(f"   - Event {event.id}: {event.title} - {event.start_time} (allDay: {event.all_day}, privacy: {event.privacy})")
-            serializer = self.get_serializer(queryset, many=True)
+            events = queryset
+            if getattr(self, 'start_dt', None) and getattr(self, 'end_dt', None):
+                # Bounded window: replace recurring masters with their occurrences
+                events = CalendarService.expand_recurring_events(queryset, self.start_dt, self.end_dt)
+            serializer = self.get_serializer(events, many=True)
             print(f"📅 Serialized {len(serializer.data)} events")
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
@@ -406,6 +419,44 @@ def cancel_event(request, pk):
     return Response(serializer.data)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def skip_occurrence(request, pk):
+    """Skip a single occurrence of a recurring event"""
+    event = get_object_or_404(CalendarEvent, pk=pk)
+    
+    # Check permissions
+    if event.created_by != request.user:
+        return Response(
+            {'error': 'You do not have permission to modify this event.'},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    
+    if not RecurrenceService.is_series(event):
+        return Response(
+            {'error': 'Only recurring events have occurrences to skip.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    
+    occurrence_start = request.data.get('occurrence_start', None)
+    if not occurrence_start:
+        return Response(
+            {'error': 'occurrence_start is required.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    
+    try:
+        occurrence_dt = datetime.fromisoformat(occurrence_start.replace('Z', '+00:00'))
+    except ValueError:
+        return Response(
+            {'error': 'Invalid date format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS).'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    
+    CalendarService.skip_occurrence(event, occurrence_dt)
+    return Response({'message': 'Occurrence skipped successfully.'}, status=status.HTTP_201_CREATED)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_reminder(request, pk):
@@ -492,11 +543,41 @@ def import_ical(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def ical_feed(request, user_id):
-    """Generate iCal feed URL for a user"""
-    # In production, this would generate a feed URL
-    # For now, return a placeholder
+    """Get the iCal subscription feed URL for the current user"""
     feed_url = ICalService.generate_ical_feed_url(request.user)
-    return Response({'feed_url': feed_url})
+    return Response({'feed_url': request.build_absolute_uri(feed_url)})
+
+
+@require_GET
+def ical_subscription(request, token):
+    """
+    Stream a user's calendar as an iCal subscription feed.
+    
+    Plain Django view: calendar clients authenticate with the signed token in
+    the URL and may send Accept headers DRF content negotiation would reject.
+    """
+    user_id = ICalService.get_feed_user_id(token)
+    user = User.objects.filter(id=user_id, is_active=True).first() if user_id else None
+    if not user:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    
+    events = CalendarService.get_events(user=user, is_cancelled=False)
+    
+    # Polling clients revalidate with If-None-Match; answer 304 when unchanged
+    etag = ICalService.feed_etag(events)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    calendar_name = f"{user.get_full_name() or user.username}'s Calendar"
+    response = StreamingHttpResponse(
+        ICalService.stream_ical_feed(events, calendar_name),
+        content_type='text/calendar; charset=utf-8',
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = f'inline; filename="calendar-{user.id}.ics"'
+    return response
 
 
 # Google Calendar integration views
@@ -582,6 +663,12 @@ def google_calendar_sync(request):
     """Sync events with Google Calendar"""
     sync_direction = request.data.get('sync_direction', 'bidirectional')
     
+    if not GoogleCalendarService.acquire_sync_slot(request.user.id):
+        return Response(
+            {'error': 'Google Calendar was synced recently. Please try again shortly.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+    
     try:
         if sync_direction == 'from_google':
             # Sync from Google Calendar
@@ -2,12 +2,13 @@
 Views for chatbot app
 """
 from rest_framework import generics, status, permissions, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from apps.shared.throttling import ChatbotRateThrottle, SearchRateThrottle
 import uuid
 import re
 from .models import (
@@ -33,6 +34,7 @@ User = get_user_model()
 class ChatbotView(generics.CreateAPIView):
     """Main chatbot view"""
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [ChatbotRateThrottle]
     serializer_class = ChatbotQuerySerializer
     
     def create(self, request, *args, **kwargs):
@@ -440,6 +442,7 @@ def chatbot_stats(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SearchRateThrottle])
 def question_suggestions(request):
     """Get question suggestions based on query"""
     query = request.GET.get('query', '').strip()
@@ -468,6 +471,7 @@ def question_suggestions(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SearchRateThrottle])
 def search_faq(request):
     """Search FAQ questions"""
     query = request.GET.get('query', '').strip()
@@ -516,6 +520,7 @@ def popular_questions(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([ChatbotRateThrottle])
 def chat_endpoint(request):
     """Enhanced chat endpoint that returns FAQ answers"""
     message = request.data.get('message', '').strip()
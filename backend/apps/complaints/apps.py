@@ -9,4 +9,8 @@ class ComplaintsConfig(AppConfig):
     name = 'apps.complaints'
     
     def ready(self):
-        import apps.complaints.signals  # noqa
\ No newline at end of file
+        import apps.complaints.signals  # noqa
+        
+        from apps.shared.services import StatsService
+        from .models import Complaint
+        StatsService.register(Complaint)
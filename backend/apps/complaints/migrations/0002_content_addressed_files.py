@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:43
+
+import apps.shared.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complaintattachment',
+            name='file',
+            field=models.FileField(max_length=255, storage=apps.shared.storage.get_content_addressed_storage, upload_to='complaint_attachments/'),
+        ),
+    ]
@@ -4,6 +4,7 @@ Complaint models for KSIT Nexus
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.shared.storage import get_content_addressed_storage
 
 User = get_user_model()
 
@@ -89,7 +90,9 @@ class ComplaintAttachment(models.Model):
     """File attachments for complaints"""
     
     complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='complaint_attachments/')
+    file = models.FileField(
+        upload_to='complaint_attachments/', storage=get_content_addressed_storage, max_length=255
+    )
     file_name = models.CharField(max_length=255)
     file_size = models.IntegerField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
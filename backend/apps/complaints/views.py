@@ -9,6 +9,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from apps.shared.services import StatsService
 from .models import Complaint, ComplaintAttachment, ComplaintUpdate
 from .serializers import (
     ComplaintSerializer, ComplaintCreateSerializer, ComplaintUpdateStatusSerializer,
@@ -163,6 +164,18 @@ class AdminComplaintsView(generics.ListAPIView):
         return context
 
 
+def complaint_counts():
+    """Complaint breakdowns shared by the stats endpoints, from one cached query"""
+    return StatsService.breakdowns(
+        Complaint,
+        fields=('category', 'status'),
+        counts={
+            'open': Q(status__in=['submitted', 'under_review', 'in_progress']),
+            'urgent': Q(urgency='urgent'),
+        },
+    )
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def complaint_stats(request):
@@ -170,24 +183,17 @@ def complaint_stats(request):
     if request.user.user_type not in ['admin', 'faculty']:
         return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
+    counts = complaint_counts()
     stats = {
-        'total_complaints': Complaint.objects.count(),
-        'pending_complaints': Complaint.objects.filter(status='submitted').count(),
-        'in_progress_complaints': Complaint.objects.filter(status='in_progress').count(),
-        'resolved_complaints': Complaint.objects.filter(status='resolved').count(),
-        'urgent_complaints': Complaint.objects.filter(urgency='urgent').count(),
-        'complaints_by_category': {},
-        'complaints_by_status': {},
+        'total_complaints': counts['total'],
+        'pending_complaints': counts['status']['submitted'],
+        'in_progress_complaints': counts['status']['in_progress'],
+        'resolved_complaints': counts['status']['resolved'],
+        'urgent_complaints': counts['urgent'],
+        'complaints_by_category': counts['category'],
+        'complaints_by_status': counts['status'],
     }
     
-    # Category breakdown
-    for category, _ in Complaint.CATEGORY_CHOICES:
-        stats['complaints_by_category'][category] = Complaint.objects.filter(category=category).count()
-    
-    # Status breakdown
-    for status_choice, _ in Complaint.STATUS_CHOICES:
-        stats['complaints_by_status'][status_choice] = Complaint.objects.filter(status=status_choice).count()
-    
     return Response(stats)
 
 
@@ -416,23 +422,14 @@ def faculty_complaint_stats(request):
     if request.user.user_type != 'faculty':
         return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
+    counts = complaint_counts()
     stats = {
-        'total_complaints': Complaint.objects.count(),
-        'pending_complaints': Complaint.objects.filter(
-            status__in=['submitted', 'under_review', 'in_progress']
-        ).count(),
-        'resolved_complaints': Complaint.objects.filter(status='resolved').count(),
-        'urgent_complaints': Complaint.objects.filter(urgency='urgent').count(),
-        'complaints_by_category': {},
-        'complaints_by_status': {},
+        'total_complaints': counts['total'],
+        'pending_complaints': counts['open'],
+        'resolved_complaints': counts['status']['resolved'],
+        'urgent_complaints': counts['urgent'],
+        'complaints_by_category': counts['category'],
+        'complaints_by_status': counts['status'],
     }
     
-    # Category breakdown
-    for category, _ in Complaint.CATEGORY_CHOICES:
-        stats['complaints_by_category'][category] = Complaint.objects.filter(category=category).count()
-    
-    # Status breakdown
-    for status_choice, _ in Complaint.STATUS_CHOICES:
-        stats['complaints_by_status'][status_choice] = Complaint.objects.filter(status=status_choice).count()
-    
     return Response(stats)
\ No newline at end of file
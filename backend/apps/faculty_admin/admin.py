@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Case, CaseTag, CaseUpdate, Broadcast, BroadcastEngagement,
-    PredictiveMetric, OperationalAlert
+    PredictiveMetric, DailyOperationsRollup, OperationalAlert
 )
 
 
@@ -50,6 +50,12 @@ class PredictiveMetricAdmin(admin.ModelAdmin):
     ordering = ['-period_end']
 
 
+@admin.register(DailyOperationsRollup)
+class DailyOperationsRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'cases_created', 'first_responses', 'resolutions', 'broadcast_views', 'broadcast_clicks']
+    ordering = ['-date']
+
+
 @admin.register(OperationalAlert)
 class OperationalAlertAdmin(admin.ModelAdmin):
     list_display = ['alert_type', 'severity', 'title', 'is_acknowledged', 'is_resolved', 'created_at']
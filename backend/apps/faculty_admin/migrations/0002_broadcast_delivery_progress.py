@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def mark_published_delivered(apps, schema_editor):
+    """Broadcasts published before the background job already have their engagement rows"""
+    Broadcast = apps.get_model('faculty_admin', 'Broadcast')
+    BroadcastEngagement = apps.get_model('faculty_admin', 'BroadcastEngagement')
+    engagements = BroadcastEngagement.objects.filter(
+        broadcast=OuterRef('pk'),
+    ).order_by().values('broadcast').annotate(total=Count('id')).values('total')
+    total = Coalesce(Subquery(engagements, output_field=models.IntegerField()), 0)
+    Broadcast.objects.filter(is_published=True).update(
+        delivery_status='completed', audience_size=total, delivered_count=total,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty_admin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='audience_size',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='delivered_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='delivery_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_published_delivered, migrations.RunPython.noop),
+    ]
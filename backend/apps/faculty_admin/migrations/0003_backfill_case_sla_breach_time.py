@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:11
+
+from datetime import timedelta
+from django.db import migrations
+
+
+def backfill_sla_breach_time(apps, schema_editor):
+    """Cases saved once never got a breach time, so the SLA sweeper could not see them"""
+    Case = apps.get_model('faculty_admin', 'Case')
+    cases = list(Case.objects.filter(sla_breach_time__isnull=True, sla_start_time__isnull=False))
+    for case in cases:
+        case.sla_breach_time = case.sla_start_time + timedelta(hours=case.sla_target_hours)
+    Case.objects.bulk_update(cases, ['sla_breach_time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty_admin', '0002_broadcast_delivery_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sla_breach_time, migrations.RunPython.noop),
+    ]
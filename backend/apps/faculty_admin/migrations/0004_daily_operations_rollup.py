@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faculty_admin', '0003_backfill_case_sla_breach_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOperationsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField(unique=True)),
+                ('cases_created', models.IntegerField(default=0)),
+                ('first_responses', models.IntegerField(default=0)),
+                ('first_response_hours', models.FloatField(default=0, help_text='Sum of hours from case creation to first update')),
+                ('resolutions', models.IntegerField(default=0)),
+                ('broadcast_views', models.IntegerField(default=0)),
+                ('broadcast_clicks', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Operations Rollup',
+                'verbose_name_plural': 'Daily Operations Rollups',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='broadcastengagement',
+            index=models.Index(fields=['viewed_at'], name='faculty_adm_viewed__54bd65_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastengagement',
+            index=models.Index(fields=['clicked_at'], name='faculty_adm_clicked_da4cd9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['created_at'], name='faculty_adm_created_bdc476_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['resolved_at'], name='faculty_adm_resolve_152a4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caseupdate',
+            index=models.Index(fields=['case', 'created_at'], name='faculty_adm_case_id_93c4d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caseupdate',
+            index=models.Index(fields=['created_at'], name='faculty_adm_created_8dba13_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 """
 Faculty & Admin Tools models for KSIT Nexus
 """
+from datetime import timedelta
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -40,6 +41,12 @@ class Case(TimestampedModel):
         ('escalated', 'Escalated'),
     ]
     
+    # Statuses that stop the SLA clock
+    CLOSED_STATUSES = ['resolved', 'closed']
+    
+    # Open cases this close to their breach time are at risk
+    SLA_AT_RISK_WINDOW = timedelta(hours=4)
+    
     # Case identification
     case_id = models.CharField(max_length=20, unique=True)
     case_type = models.CharField(max_length=20, choices=CASE_TYPES, default='complaint')
@@ -109,30 +116,43 @@ class Case(TimestampedModel):
             models.Index(fields=['status', 'priority']),
             models.Index(fields=['assigned_to', 'status']),
             models.Index(fields=['sla_status', 'sla_breach_time']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['resolved_at']),
         ]
     
     def __str__(self):
         return f"{self.case_id} - {self.title}"
     
+    @classmethod
+    def classify_sla(cls, breach_time, status, now, resolved_at=None):
+        """SLA status for a case; closed cases are judged by when they were resolved"""
+        if status in cls.CLOSED_STATUSES:
+            return 'breached' if resolved_at and resolved_at > breach_time else 'on_time'
+        if now > breach_time:
+            return 'breached'
+        if breach_time - now < cls.SLA_AT_RISK_WINDOW:
+            return 'at_risk'
+        return 'on_time'
+    
     def save(self, *args, **kwargs):
         if not self.case_id:
             import uuid
             self.case_id = f"CASE-{uuid.uuid4().hex[:8].upper()}"
         
+        # auto_now_add only fills sla_start_time during the insert, too late
+        # for the breach time below
+        if self._state.adding and not self.sla_start_time:
+            self.sla_start_time = timezone.now()
+        
         # Calculate SLA breach time
         if self.sla_start_time and self.sla_target_hours:
-            from datetime import timedelta
             self.sla_breach_time = self.sla_start_time + timedelta(hours=self.sla_target_hours)
         
-        # Update SLA status
+        # Update SLA status; SLAService.sweep() moves untouched cases along
         if self.sla_breach_time:
-            now = timezone.now()
-            if now > self.sla_breach_time and self.status not in ['resolved', 'closed']:
-                self.sla_status = 'breached'
-            elif (self.sla_breach_time - now).total_seconds() < 3600 * 4:  # 4 hours before breach
-                self.sla_status = 'at_risk'
-            else:
-                self.sla_status = 'on_time'
+            self.sla_status = Case.classify_sla(
+                self.sla_breach_time, self.status, timezone.now(), self.resolved_at,
+            )
         
         super().save(*args, **kwargs)
 
@@ -171,6 +191,10 @@ class CaseUpdate(TimestampedModel):
         verbose_name = 'Case Update'
         verbose_name_plural = 'Case Updates'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['case', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"Update for {self.case.case_id}"
@@ -203,6 +227,13 @@ class Broadcast(TimestampedModel):
         ('specific', 'Specific Users/Groups'),
     ]
     
+    DELIVERY_STATUSES = [
+        ('pending', 'Pending'),
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
     # Basic information
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -259,6 +290,11 @@ class Broadcast(TimestampedModel):
     views_count = models.IntegerField(default=0)
     engagement_count = models.IntegerField(default=0)
     
+    # Delivery progress, written by the background publishing job
+    delivery_status = models.CharField(max_length=20, choices=DELIVERY_STATUSES, default='pending')
+    audience_size = models.IntegerField(default=0)
+    delivered_count = models.IntegerField(default=0)
+    
     class Meta:
         verbose_name = 'Broadcast'
         verbose_name_plural = 'Broadcasts'
@@ -288,6 +324,8 @@ class BroadcastEngagement(TimestampedModel):
         unique_together = [['broadcast', 'user']]
         indexes = [
             models.Index(fields=['broadcast', 'user']),
+            models.Index(fields=['viewed_at']),
+            models.Index(fields=['clicked_at']),
         ]
     
     def __str__(self):
@@ -336,6 +374,36 @@ class PredictiveMetric(TimestampedModel):
         return f"{self.get_metric_type_display()} - {self.period_end}"
 
 
+class DailyOperationsRollup(TimestampedModel):
+    """
+    Per-day operations counters, filled by RollupService.refresh().
+
+    Every event is counted on the day it happened (a first response on the
+    day of the first case update, a resolution on the day it was resolved),
+    so closed days never change and only days since the last rollup need
+    recomputing.
+    """
+
+    date = models.DateField(unique=True)
+    cases_created = models.IntegerField(default=0)
+    first_responses = models.IntegerField(default=0)
+    first_response_hours = models.FloatField(
+        default=0,
+        help_text='Sum of hours from case creation to first update'
+    )
+    resolutions = models.IntegerField(default=0)
+    broadcast_views = models.IntegerField(default=0)
+    broadcast_clicks = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily Operations Rollup'
+        verbose_name_plural = 'Daily Operations Rollups'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Operations rollup - {self.date}"
+
+
 class OperationalAlert(TimestampedModel):
     """Operational alerts based on predictions"""
     
@@ -82,6 +82,7 @@ class BroadcastSerializer(serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
     target_users_count = serializers.SerializerMethodField()
     engagement_rate = serializers.SerializerMethodField()
+    delivery_progress = serializers.SerializerMethodField()
     
     class Meta:
         model = Broadcast
@@ -91,11 +92,13 @@ class BroadcastSerializer(serializers.ModelSerializer):
             'target_audience', 'target_users', 'target_departments', 'target_courses',
             'scheduled_at', 'expires_at', 'is_published', 'published_at',
             'created_by', 'created_by_name', 'views_count', 'engagement_count',
-            'target_users_count', 'engagement_rate', 'created_at', 'updated_at',
+            'target_users_count', 'engagement_rate', 'delivery_status', 'audience_size',
+            'delivered_count', 'delivery_progress', 'created_at', 'updated_at',
         ]
         read_only_fields = [
             'created_by', 'published_at', 'views_count', 'engagement_count',
             'created_at', 'updated_at', 'target_users_count', 'engagement_rate', 'created_by_name',
+            'delivery_status', 'audience_size', 'delivered_count', 'delivery_progress',
         ]
     
     def validate_target_departments(self, value):
@@ -151,13 +154,21 @@ class BroadcastSerializer(serializers.ModelSerializer):
         if not obj.pk:  # New object, no engagement yet
             return 0.0
         try:
-            target_count = obj.target_users.count()
+            target_count = obj.audience_size or obj.target_users.count()
             if target_count > 0 and obj.engagement_count > 0:
                 return (obj.engagement_count / target_count) * 100
         except Exception:
             pass
         return 0.0
     
+    def get_delivery_progress(self, obj):
+        """Percentage of the audience whose engagement rows exist"""
+        if obj.delivery_status == 'completed':
+            return 100.0
+        if obj.audience_size > 0:
+            return round(min(obj.delivered_count / obj.audience_size, 1.0) * 100, 1)
+        return 0.0
+    
     def create(self, validated_data):
         # Extract ManyToMany field data before creating instance
         # Note: target_users is handled in the view's create method
@@ -17,9 +17,21 @@ try:
 except Exception:
     PredictiveService = None
 
+try:
+    from .rollup_service import RollupService
+except Exception:
+    RollupService = None
+
+try:
+    from .sla_service import SLAService
+except Exception:
+    SLAService = None
+
 
 __all__ = [
     'CaseService',
     'BroadcastService',
     'PredictiveService',
+    'RollupService',
+    'SLAService',
 ]
\ No newline at end of file
@@ -1,9 +1,11 @@
 """
 Broadcast Service
 """
-from typing import List, Optional
+import threading
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count
+from django.db import close_old_connections, transaction
+from django.db.models import F, QuerySet
 from django.utils import timezone
 from apps.faculty_admin.models import Broadcast, BroadcastEngagement
 from apps.shared.utils.logging import get_logger
@@ -13,65 +15,131 @@ logger = get_logger(__name__)
 
 
 class BroadcastService:
-    """Service for broadcast management"""
-    
+    """
+    Service for broadcast management.
+
+    Publishing only counts the audience and queues delivery; a background job
+    walks the audience's user ids in keyset-paginated batches and inserts the
+    engagement rows with bulk_create(ignore_conflicts=True), recording its
+    progress on the broadcast after every batch. Re-running the job is safe.
+    """
+
+    BATCH_SIZE = 1000
+
     @staticmethod
-    def get_target_users(broadcast: Broadcast) -> List[User]:
-        """Get list of target users for a broadcast"""
+    def get_target_users(broadcast: Broadcast) -> QuerySet:
+        """Get the (lazy) queryset of target users for a broadcast"""
         if broadcast.target_audience == 'all':
-            return list(User.objects.filter(is_active=True))
+            return User.objects.filter(is_active=True)
         elif broadcast.target_audience == 'students':
-            return list(User.objects.filter(user_type='student', is_active=True))
+            return User.objects.filter(user_type='student', is_active=True)
         elif broadcast.target_audience == 'faculty':
-            return list(User.objects.filter(user_type='faculty', is_active=True))
+            return User.objects.filter(user_type='faculty', is_active=True)
         elif broadcast.target_audience == 'staff':
-            return list(User.objects.filter(user_type='staff', is_active=True))
+            return User.objects.filter(user_type='staff', is_active=True)
         elif broadcast.target_audience == 'specific':
-            return list(broadcast.target_users.all())
-        return []
-    
+            return broadcast.target_users.all()
+        return User.objects.none()
+
     @staticmethod
     def publish_broadcast(broadcast: Broadcast):
-        """Publish a broadcast"""
+        """Publish a broadcast and queue creation of its engagement rows"""
         broadcast.is_published = True
         broadcast.published_at = timezone.now()
-        broadcast.save()
-        
-        # Create engagement records for target users
-        target_users = BroadcastService.get_target_users(broadcast)
-        for user in target_users:
-            BroadcastEngagement.objects.get_or_create(
-                broadcast=broadcast,
-                user=user
-            )
-    
-    @staticmethod
-    def track_view(broadcast: Broadcast, user: User):
-        """Track broadcast view"""
-        engagement, created = BroadcastEngagement.objects.get_or_create(
-            broadcast=broadcast,
-            user=user
-        )
-        
-        if not engagement.viewed_at:
-            engagement.viewed_at = timezone.now()
-            engagement.save()
-            broadcast.views_count += 1
-            broadcast.save(update_fields=['views_count'])
-
-
-
-
-
-
-
-
-
-
-
-
+        broadcast.audience_size = BroadcastService.get_target_users(broadcast).count()
+        broadcast.delivered_count = 0
+        broadcast.delivery_status = 'pending'
+        broadcast.save(update_fields=[
+            'is_published', 'published_at', 'audience_size', 'delivered_count',
+            'delivery_status', 'updated_at',
+        ])
 
+        broadcast_id = broadcast.id
+        transaction.on_commit(lambda: BroadcastService._dispatch(broadcast_id))
 
+    @staticmethod
+    def _dispatch(broadcast_id):
+        if getattr(settings, 'CELERY_BROKER_URL', None):
+            from apps.faculty_admin.tasks import deliver_broadcast_task
+            deliver_broadcast_task.delay(broadcast_id)
+            return
+        # No Celery (e.g. on Render): keep the request fast with a thread
+        threading.Thread(target=BroadcastService._deliver_in_thread, args=(broadcast_id,), daemon=True).start()
 
+    @staticmethod
+    def _deliver_in_thread(broadcast_id):
+        try:
+            BroadcastService.deliver(broadcast_id)
+        except Exception as e:
+            logger.error(f"Broadcast delivery failed for {broadcast_id}: {e}", exc_info=True)
+        finally:
+            close_old_connections()
 
+    @staticmethod
+    def deliver(broadcast_id, batch_size=None):
+        """
+        Create engagement rows for the audience of a published broadcast.
+
+        Returns the number of audience members processed.
+        """
+        batch_size = batch_size or BroadcastService.BATCH_SIZE
+        broadcast = Broadcast.objects.filter(id=broadcast_id, is_published=True).first()
+        if broadcast is None:
+            return 0
+
+        audience = BroadcastService.get_target_users(broadcast).order_by('id')
+        Broadcast.objects.filter(id=broadcast_id).update(
+            delivery_status='in_progress', delivered_count=0, updated_at=timezone.now(),
+        )
+        processed = 0
+        last_id = 0
+        try:
+            while True:
+                user_ids = list(audience.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+                if not user_ids:
+                    break
+                with transaction.atomic():
+                    BroadcastEngagement.objects.bulk_create(
+                        [BroadcastEngagement(broadcast_id=broadcast_id, user_id=user_id) for user_id in user_ids],
+                        ignore_conflicts=True,
+                    )
+                    processed += len(user_ids)
+                    Broadcast.objects.filter(id=broadcast_id).update(delivered_count=processed)
+                last_id = user_ids[-1]
+        except Exception:
+            Broadcast.objects.filter(id=broadcast_id).update(delivery_status='failed', updated_at=timezone.now())
+            raise
+
+        # The audience may have changed since publishing; report what was delivered
+        Broadcast.objects.filter(id=broadcast_id).update(
+            delivery_status='completed', audience_size=processed, updated_at=timezone.now(),
+        )
+        logger.info(f"Delivered broadcast {broadcast_id} to {processed} users")
+        return processed
 
+    @staticmethod
+    def track_view(broadcast: Broadcast, user: User):
+        """Track a user's first view of a broadcast. Returns True when it was counted."""
+        now = timezone.now()
+        viewed = BroadcastEngagement.objects.filter(
+            broadcast=broadcast, user=user, viewed_at__isnull=True,
+        ).update(viewed_at=now, updated_at=now)
+
+        if not viewed:
+            # No row yet (delivery still running, or a viewer outside the audience)
+            engagement, created = BroadcastEngagement.objects.get_or_create(
+                broadcast=broadcast,
+                user=user,
+                defaults={'viewed_at': now},
+            )
+            if not created:
+                # Either already viewed, or delivery inserted the row in between
+                viewed = BroadcastEngagement.objects.filter(
+                    pk=engagement.pk, viewed_at__isnull=True,
+                ).update(viewed_at=now, updated_at=now)
+                if not viewed:
+                    return False
+
+        Broadcast.objects.filter(pk=broadcast.pk).update(views_count=F('views_count') + 1)
+        broadcast.views_count += 1
+        return True
@@ -3,7 +3,8 @@ Case Management Service
 """
 from typing import List, Optional, Dict
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count, Avg, F
+from django.db.models import Q, Count, Avg, F, Case as CaseWhen, IntegerField, Value, When
+from django.db.models.functions import Least
 from django.utils import timezone
 from datetime import timedelta
 from apps.faculty_admin.models import Case, CaseUpdate, CaseTag
@@ -50,6 +51,34 @@ class CaseService:
         
         return min(score, 20)  # Cap at 20
     
+    @staticmethod
+    def priority_score_expression(now=None):
+        """calculate_priority_score as a SQL expression, for bulk updates"""
+        now = now or timezone.now()
+        priority_weights = {'low': 1, 'medium': 3, 'high': 5, 'urgent': 8, 'critical': 10}
+        base = CaseWhen(
+            *[When(priority=priority, then=Value(weight)) for priority, weight in priority_weights.items()],
+            default=Value(0),
+        )
+        age = CaseWhen(
+            When(created_at__lt=now - timedelta(hours=48), then=Value(2)),
+            When(created_at__lt=now - timedelta(hours=24), then=Value(1)),
+            default=Value(0),
+        )
+        sla = CaseWhen(
+            When(sla_status='breached', then=Value(5)),
+            When(sla_status='at_risk', then=Value(2)),
+            default=Value(0),
+        )
+        updates = CaseWhen(When(updates_count__gt=5, then=Value(1)), default=Value(0))
+        return Least(base + age + sla + updates, Value(20), output_field=IntegerField())
+    
+    @staticmethod
+    def bulk_update_priority_scores(queryset, now=None):
+        """Recompute priority_score in one UPDATE, writing only the cases whose score changed"""
+        score = CaseService.priority_score_expression(now)
+        return queryset.exclude(priority_score=score).update(priority_score=score)
+    
     @staticmethod
     def get_case_analytics(user: Optional[User] = None, department: Optional[str] = None):
         """Get case management analytics"""
@@ -1,12 +1,15 @@
 """
 Predictive Operations Service
 """
+from collections import defaultdict
 from typing import List, Dict, Optional
+import numpy as np
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Exists, OuterRef, Q
 from django.utils import timezone
 from datetime import timedelta
 from apps.faculty_admin.models import Case, PredictiveMetric, OperationalAlert
+from apps.faculty_admin.services.rollup_service import RollupService
 from apps.shared.utils.logging import get_logger
 
 User = get_user_model()
@@ -14,40 +17,78 @@ logger = get_logger(__name__)
 
 
 class PredictiveService:
-    """Service for predictive analytics and operations"""
+    """
+    Service for predictive analytics and operations.
+    
+    Metrics and forecasts read DailyOperationsRollup (kept current by
+    RollupService) instead of scanning cases, so an hourly run costs the
+    same however much history there is.
+    """
+    
+    # Days of rollups the forecasts look at (eight full weeks)
+    HISTORY_DAYS = 56
+    # EWMA smoothing factor; higher reacts faster to recent days
+    EWMA_ALPHA = 0.3
+    
+    SEVERITY_ORDER = {'info': 0, 'warning': 1, 'critical': 2}
+    SEVERITY_PRIORITIES = {'critical': 'high', 'warning': 'medium', 'info': 'low'}
+    # Alerts listed in a digest notification's message
+    DIGEST_LINES = 10
     
     @staticmethod
-    def predict_complaint_volume(days_ahead: int = 7) -> Dict:
-        """Predict complaint volume for next N days"""
-        # Simple moving average prediction (can be enhanced with ML)
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=30)
+    def forecast(values: np.ndarray, dates: List, days_ahead: int):
+        """
+        Forecast a daily series with an EWMA level and day-of-week seasonality.
         
-        # Get historical data
-        cases = Case.objects.filter(
-            created_at__gte=start_date,
-            created_at__lte=end_date
-        )
+        Returns (daily forecast array, confidence). Confidence falls with the
+        one-step-ahead error of the model over the history.
+        """
+        values = np.asarray(values, dtype=float)
+        weekdays = np.array([day.weekday() for day in dates])
+        future_weekdays = np.array([
+            (dates[-1] + timedelta(days=offset)).weekday() for offset in range(1, days_ahead + 1)
+        ])
+        mean = values.mean() if values.size else 0.0
+        if mean <= 0:
+            return np.zeros(days_ahead), 0.5
         
-        daily_counts = {}
-        for case in cases:
-            date_key = case.created_at.date()
-            daily_counts[date_key] = daily_counts.get(date_key, 0) + 1
+        # Seasonal factor per weekday: that weekday's mean relative to the overall mean
+        factors = np.ones(7)
+        for weekday in range(7):
+            on_weekday = values[weekdays == weekday]
+            if on_weekday.size:
+                factors[weekday] = on_weekday.mean() / mean
+        seasonal = factors[weekdays]
+        deseasonalized = np.divide(values, seasonal, out=values.copy(), where=seasonal > 0)
         
-        # Calculate average
-        if daily_counts:
-            avg_daily = sum(daily_counts.values()) / len(daily_counts)
-        else:
-            avg_daily = 0
+        # EWMA of the deseasonalized series, keeping each step's one-ahead estimate
+        alpha = PredictiveService.EWMA_ALPHA
+        levels = np.empty_like(deseasonalized)
+        level = deseasonalized[0]
+        for index, value in enumerate(deseasonalized):
+            levels[index] = level
+            level = alpha * value + (1 - alpha) * level
         
-        # Predict future
-        predicted_volume = avg_daily * days_ahead
+        errors = np.abs(values[1:] - levels[1:] * seasonal[1:])
+        confidence = float(np.clip(1 - errors.mean() / mean, 0.3, 0.95)) if errors.size else 0.5
+        return level * factors[future_weekdays], round(confidence, 2)
+    
+    @staticmethod
+    def predict_complaint_volume(days_ahead: int = 7, history: Optional[Dict] = None) -> Dict:
+        """Predict complaint volume for next N days from the daily rollups"""
+        if history is None:
+            RollupService.refresh()
+            history = RollupService.series(RollupService.today(), PredictiveService.HISTORY_DAYS)
+        
+        daily = history['cases_created']
+        forecast, confidence = PredictiveService.forecast(daily, history['dates'], days_ahead)
         
         return {
-            'current_avg_daily': avg_daily,
-            'predicted_volume': predicted_volume,
+            'current_avg_daily': float(daily[-30:].mean()),
+            'predicted_volume': float(forecast.sum()),
+            'daily_forecast': [round(float(value), 2) for value in forecast],
             'days_ahead': days_ahead,
-            'confidence': 0.7,  # Placeholder
+            'confidence': confidence,
         }
     
     @staticmethod
@@ -65,29 +106,27 @@ class PredictiveService:
     @staticmethod
     def generate_operational_alerts():
         """Generate operational alerts based on predictions and send notifications"""
-        alerts = []
+        now = timezone.now()
         
-        # Check for SLA risks
-        at_risk_cases = PredictiveService.predict_sla_breaches()
-        for case in at_risk_cases:
-            alert, created = OperationalAlert.objects.get_or_create(
+        # Check for SLA risks: cases without an unresolved risk alert, in one anti-join
+        open_alert = OperationalAlert.objects.filter(
+            alert_type='sla_risk', related_case=OuterRef('pk'), is_resolved=False,
+        )
+        new_risks = PredictiveService.predict_sla_breaches().exclude(Exists(open_alert))
+        alerts = OperationalAlert.objects.bulk_create([
+            OperationalAlert(
                 alert_type='sla_risk',
+                severity='critical' if case.sla_breach_time <= now + timedelta(hours=1) else 'warning',
+                title=f'SLA Risk: {case.case_id}',
+                message=f'Case {case.case_id} is at risk of SLA breach. Breach time: {case.sla_breach_time}',
                 related_case=case,
-                is_resolved=False,
-                defaults={
-                    'severity': 'critical' if case.sla_breach_time <= timezone.now() + timedelta(hours=1) else 'warning',
-                    'title': f'SLA Risk: {case.case_id}',
-                    'message': f'Case {case.case_id} is at risk of SLA breach. Breach time: {case.sla_breach_time}',
-                }
             )
-            if created:
-                alerts.append(alert)
-                # Send notification to assigned faculty or all faculty if not assigned
-                PredictiveService._notify_alert(alert, case.assigned_to if case.assigned_to else None)
+            for case in new_risks
+        ])
         
         # Check for high volume
         recent_cases = Case.objects.filter(
-            created_at__gte=timezone.now() - timedelta(hours=24)
+            created_at__gte=now - timedelta(hours=24)
         ).count()
         
         if recent_cases > 20:  # Threshold
@@ -102,69 +141,79 @@ class PredictiveService:
             )
             if created:
                 alerts.append(alert)
-                # Send notification to all faculty members
-                PredictiveService._notify_alert(alert, None)
         
+        PredictiveService.notify_alerts(alerts)
         return alerts
     
     @staticmethod
-    def _notify_alert(alert: OperationalAlert, target_user: Optional[User] = None):
-        """Send notification for an operational alert"""
+    def notify_alerts(alerts: List[OperationalAlert]) -> List:
+        """
+        Send one digest notification per recipient for a batch of alerts.
+        
+        Alerts on an assigned case go to its assignee; all others go to every
+        active faculty member. Returns the notifications created.
+        """
+        if not alerts:
+            return []
         try:
             from apps.notifications.notification_service import NotificationService
             
-            # Determine priority based on severity
-            priority_map = {
-                'critical': 'high',
-                'warning': 'medium',
-                'info': 'low',
-            }
-            priority = priority_map.get(alert.severity, 'medium')
+            case_ids = {alert.related_case_id for alert in alerts if alert.related_case_id}
+            assignees = dict(
+                Case.objects.filter(id__in=case_ids).values_list('id', 'assigned_to_id')
+            ) if case_ids else {}
+            faculty_ids = None
             
-            # If target_user is specified, send to that user
-            if target_user:
-                NotificationService.create_notification(
-                    user=target_user,
-                    notification_type='operational_alert',
-                    title=alert.title,
-                    message=alert.message,
-                    priority=priority,
-                    data={
-                        'alert_id': alert.id,
-                        'alert_type': alert.alert_type,
-                        'severity': alert.severity,
-                        'related_case_id': alert.related_case.id if alert.related_case else None,
-                    },
-                    related_object_type='operational_alert',
-                    related_object_id=alert.id,
-                )
-            else:
-                # Send to all faculty members
-                faculty_users = User.objects.filter(
-                    groups__name='Faculty',
-                    is_active=True
-                ).distinct()
-                
-                for user in faculty_users:
-                    NotificationService.create_notification(
-                        user=user,
-                        notification_type='operational_alert',
-                        title=alert.title,
-                        message=alert.message,
-                        priority=priority,
-                        data={
-                            'alert_id': alert.id,
-                            'alert_type': alert.alert_type,
-                            'severity': alert.severity,
-                            'related_case_id': alert.related_case.id if alert.related_case else None,
-                        },
-                        related_object_type='operational_alert',
-                        related_object_id=alert.id,
-                    )
+            digests = defaultdict(list)
+            for alert in alerts:
+                assignee_id = assignees.get(alert.related_case_id)
+                if assignee_id:
+                    digests[assignee_id].append(alert)
+                    continue
+                if faculty_ids is None:
+                    faculty_ids = list(User.objects.filter(
+                        groups__name='Faculty',
+                        is_active=True
+                    ).values_list('id', flat=True).distinct())
+                for user_id in faculty_ids:
+                    digests[user_id].append(alert)
             
-            logger.info(f"Sent notifications for operational alert: {alert.id}")
+            notifications = NotificationService.create_bulk_notifications('operational_alert', [
+                PredictiveService._digest(user_id, user_alerts) for user_id, user_alerts in digests.items()
+            ])
+            logger.info(f"Sent {len(notifications)} digest notifications for {len(alerts)} operational alerts")
+            return notifications
         except Exception as e:
-            logger.error(f"Error sending notification for alert {alert.id}: {e}")
+            logger.error(f"Error sending notifications for alerts {[alert.id for alert in alerts]}: {e}")
+            return []
+    
+    @staticmethod
+    def _digest(user_id, alerts: List[OperationalAlert]) -> Dict:
+        """Notification entry summarising a user's alerts, most severe first"""
+        alerts = sorted(alerts, key=lambda alert: PredictiveService.SEVERITY_ORDER.get(alert.severity, 0), reverse=True)
+        top = alerts[0]
+        if len(alerts) == 1:
+            title, message = top.title, top.message
+        else:
+            title = f'{len(alerts)} operational alerts'
+            lines = [f'- {alert.title}' for alert in alerts[:PredictiveService.DIGEST_LINES]]
+            if len(alerts) > PredictiveService.DIGEST_LINES:
+                lines.append(f'... and {len(alerts) - PredictiveService.DIGEST_LINES} more')
+            message = '\n'.join(lines)
+        return {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'priority': PredictiveService.SEVERITY_PRIORITIES.get(top.severity, 'medium'),
+            'data': {
+                'alert_ids': [alert.id for alert in alerts],
+                'alert_count': len(alerts),
+                'severity': top.severity,
+                'related_case_ids': [alert.related_case_id for alert in alerts if alert.related_case_id],
+            },
+            'related_object_type': 'operational_alert',
+            'related_object_id': top.id,
+        }
     
     @staticmethod
     def calculate_metrics():
@@ -174,45 +223,42 @@ class PredictiveService:
         period_end = now
         metrics = []
         
+        # Everything below except SLA and workload reads the daily rollups
+        RollupService.refresh(now)
+        history = RollupService.series(RollupService.today(now), PredictiveService.HISTORY_DAYS)
+        week = {counter: float(history[counter][-7:].sum()) for counter in RollupService.COUNTERS}
+        
+        def forecast_week(counter):
+            forecast, confidence = PredictiveService.forecast(history[counter], history['dates'], 7)
+            return float(forecast.sum()), confidence
+        
         # 1. Complaint Volume
-        volume = Case.objects.filter(
-            created_at__gte=period_start,
-            created_at__lte=period_end
-        ).count()
-        prediction = PredictiveService.predict_complaint_volume(7)
+        volume = week['cases_created']
+        prediction = PredictiveService.predict_complaint_volume(7, history)
         
         metric, _ = PredictiveMetric.objects.update_or_create(
             metric_type='complaint_volume',
             period_start=period_start,
             period_end=period_end,
             defaults={
-                'value': float(volume),
+                'value': volume,
                 'predicted_value': prediction['predicted_volume'],
                 'confidence': prediction['confidence'],
                 'metadata': {
                     'current_avg_daily': prediction['current_avg_daily'],
                     'days_ahead': prediction['days_ahead'],
+                    'daily_forecast': prediction['daily_forecast'],
                 }
             }
         )
         metrics.append(metric)
         
         # 2. Response Time (average time from case creation to first update)
-        cases_with_updates = Case.objects.filter(
-            created_at__gte=period_start,
-            created_at__lte=period_end,
-            updates__isnull=False
-        ).distinct()
-        
-        response_times = []
-        for case in cases_with_updates:
-            first_update = case.updates.order_by('created_at').first()
-            if first_update:
-                response_time = (first_update.created_at - case.created_at).total_seconds() / 3600  # hours
-                response_times.append(response_time)
-        
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        predicted_response = avg_response_time * 1.15 if avg_response_time > 0 else 0  # Predict 15% increase
+        responses = int(week['first_responses'])
+        avg_response_time = week['first_response_hours'] / responses if responses else 0
+        predicted_hours, confidence = forecast_week('first_response_hours')
+        predicted_responses, _ = forecast_week('first_responses')
+        predicted_response = predicted_hours / predicted_responses if predicted_responses > 0 else avg_response_time
         
         metric, _ = PredictiveMetric.objects.update_or_create(
             metric_type='response_time',
@@ -221,28 +267,23 @@ class PredictiveService:
             defaults={
                 'value': avg_response_time,
                 'predicted_value': predicted_response,
-                'confidence': 0.75 if response_times else 0.5,
+                'confidence': confidence if responses else 0.5,
                 'metadata': {
-                    'sample_size': len(response_times),
+                    'sample_size': responses,
                     'unit': 'hours',
                 }
             }
         )
         metrics.append(metric)
         
-        # 3. Resolution Rate (percentage of cases resolved)
-        total_cases = Case.objects.filter(
-            created_at__gte=period_start,
-            created_at__lte=period_end
-        ).count()
-        resolved_cases = Case.objects.filter(
-            created_at__gte=period_start,
-            created_at__lte=period_end,
-            status__in=['resolved', 'closed']
-        ).count()
+        # 3. Resolution Rate (cases resolved relative to cases opened)
+        total_cases = int(week['cases_created'])
+        resolved_cases = int(week['resolutions'])
         
-        resolution_rate = (resolved_cases / total_cases * 100) if total_cases > 0 else 0
-        predicted_resolution = resolution_rate * 0.98 if resolution_rate > 0 else 0  # Predict slight decrease
+        resolution_rate = min(resolved_cases / total_cases * 100, 100) if total_cases > 0 else 0
+        predicted_resolved, confidence = forecast_week('resolutions')
+        predicted_total, _ = forecast_week('cases_created')
+        predicted_resolution = min(predicted_resolved / predicted_total * 100, 100) if predicted_total > 0 else 0
         
         metric, _ = PredictiveMetric.objects.update_or_create(
             metric_type='resolution_rate',
@@ -251,7 +292,7 @@ class PredictiveService:
             defaults={
                 'value': resolution_rate,
                 'predicted_value': predicted_resolution,
-                'confidence': 0.80 if total_cases > 0 else 0.5,
+                'confidence': confidence if total_cases > 0 else 0.5,
                 'metadata': {
                     'total_cases': total_cases,
                     'resolved_cases': resolved_cases,
@@ -261,16 +302,16 @@ class PredictiveService:
         metrics.append(metric)
         
         # 4. SLA Breach (number of cases that breached SLA)
-        breached_cases = Case.objects.filter(
-            created_at__gte=period_start,
-            created_at__lte=period_end,
-            sla_status='breached'
-        ).count()
-        
-        at_risk_cases = Case.objects.filter(
-            sla_status='at_risk',
-            status__in=['new', 'assigned', 'in_progress']
-        ).count()
+        sla_counts = Case.objects.aggregate(
+            breached_cases=Count('id', filter=Q(
+                created_at__gte=period_start, created_at__lte=period_end, sla_status='breached',
+            )),
+            at_risk_cases=Count('id', filter=Q(
+                sla_status='at_risk', status__in=['new', 'assigned', 'in_progress'],
+            )),
+        )
+        breached_cases = sla_counts['breached_cases']
+        at_risk_cases = sla_counts['at_risk_cases']
         predicted_breaches = breached_cases + (at_risk_cases * 0.5)  # Estimate 50% of at-risk will breach
         
         metric, _ = PredictiveMetric.objects.update_or_create(
@@ -289,19 +330,15 @@ class PredictiveService:
         )
         metrics.append(metric)
         
-        # 5. Engagement (from broadcast engagement)
+        # 5. Engagement (broadcast clicks relative to views)
         try:
-            from apps.faculty_admin.models import Broadcast
-            broadcasts = Broadcast.objects.filter(
-                created_at__gte=period_start,
-                created_at__lte=period_end
-            )
-            
-            total_views = sum(b.views_count for b in broadcasts)
-            total_engagements = sum(b.engagement_count for b in broadcasts)
+            total_views = int(week['broadcast_views'])
+            total_engagements = int(week['broadcast_clicks'])
             
             engagement_rate = (total_engagements / total_views * 100) if total_views > 0 else 0
-            predicted_engagement = engagement_rate * 0.95 if engagement_rate > 0 else 0  # Predict slight decrease
+            predicted_clicks, confidence = forecast_week('broadcast_clicks')
+            predicted_views, _ = forecast_week('broadcast_views')
+            predicted_engagement = (predicted_clicks / predicted_views * 100) if predicted_views > 0 else 0
             
             metric, _ = PredictiveMetric.objects.update_or_create(
                 metric_type='engagement',
@@ -310,11 +347,10 @@ class PredictiveService:
                 defaults={
                     'value': engagement_rate,
                     'predicted_value': predicted_engagement,
-                    'confidence': 0.75 if total_views > 0 else 0.5,
+                    'confidence': confidence if total_views > 0 else 0.5,
                     'metadata': {
                         'total_views': total_views,
                         'total_engagements': total_engagements,
-                        'broadcasts_count': broadcasts.count(),
                     }
                 }
             )
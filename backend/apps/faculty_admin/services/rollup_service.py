@@ -0,0 +1,142 @@
+"""
+Daily operations rollups for predictive metrics
+"""
+from datetime import datetime, time, timedelta
+from typing import Dict
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.faculty_admin.models import BroadcastEngagement, Case, CaseUpdate, DailyOperationsRollup
+from apps.shared.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RollupService:
+    """
+    Keeps DailyOperationsRollup up to date.
+
+    refresh() recomputes only the days from the last rollup (the watermark)
+    to today, with one grouped query per counter bucketed by TruncDate, so
+    its cost depends on the days since the last run, not on history size.
+    """
+
+    COUNTERS = [
+        'cases_created', 'first_responses', 'first_response_hours',
+        'resolutions', 'broadcast_views', 'broadcast_clicks',
+    ]
+    # Days filled on the first run
+    INITIAL_DAYS = 90
+    # Days before the watermark recomputed on every run, for rows written late
+    LOOKBACK_DAYS = 1
+
+    @staticmethod
+    def refresh(now=None) -> int:
+        """Recompute the rollups from the watermark to today. Returns the number of days written."""
+        now = now or timezone.now()
+        today = RollupService.today(now)
+        watermark = DailyOperationsRollup.objects.order_by('-date').values_list('date', flat=True).first()
+        if watermark:
+            start = min(watermark, today) - timedelta(days=RollupService.LOOKBACK_DAYS)
+        else:
+            start = today - timedelta(days=RollupService.INITIAL_DAYS - 1)
+
+        since = RollupService._day_start(start)
+        days = {
+            start + timedelta(days=offset): dict.fromkeys(RollupService.COUNTERS, 0)
+            for offset in range((today - start).days + 1)
+        }
+        for counter, rows in RollupService._counts(since).items():
+            for row in rows:
+                if row['day'] in days:
+                    days[row['day']][counter] = row['value'] or 0
+
+        with transaction.atomic():
+            existing = {
+                rollup.date: rollup
+                for rollup in DailyOperationsRollup.objects.select_for_update().filter(date__gte=start)
+            }
+            updated = []
+            created = []
+            for day, values in days.items():
+                rollup = existing.get(day)
+                if rollup is None:
+                    created.append(DailyOperationsRollup(date=day, **values))
+                    continue
+                for counter, value in values.items():
+                    setattr(rollup, counter, value)
+                rollup.updated_at = now
+                updated.append(rollup)
+            DailyOperationsRollup.objects.bulk_create(created, ignore_conflicts=True)
+            DailyOperationsRollup.objects.bulk_update(updated, RollupService.COUNTERS + ['updated_at'])
+
+        logger.info(f"Refreshed operations rollups for {len(days)} days from {start}")
+        return len(days)
+
+    @staticmethod
+    def _counts(since) -> Dict:
+        """Per-day counter values for everything that happened since a datetime"""
+        # Time of each case's first update
+        first_update = CaseUpdate.objects.filter(
+            case=OuterRef('case'),
+        ).order_by().values('case').annotate(first=Min('created_at')).values('first')
+        first_responses = CaseUpdate.objects.filter(created_at__gte=since).annotate(
+            first_update_at=Subquery(first_update),
+        ).filter(created_at=F('first_update_at'))
+        latency = ExpressionWrapper(F('created_at') - F('case__created_at'), output_field=DurationField())
+
+        def per_day(queryset, field, **aggregates):
+            return list(queryset.annotate(day=TruncDate(field)).values('day').annotate(**aggregates).order_by())
+
+        counts = {
+            'cases_created': per_day(
+                Case.objects.filter(created_at__gte=since), 'created_at', value=Count('id'),
+            ),
+            'resolutions': per_day(
+                Case.objects.filter(status__in=Case.CLOSED_STATUSES, resolved_at__gte=since),
+                'resolved_at', value=Count('id'),
+            ),
+            'broadcast_views': per_day(
+                BroadcastEngagement.objects.filter(viewed_at__gte=since), 'viewed_at', value=Count('id'),
+            ),
+            'broadcast_clicks': per_day(
+                BroadcastEngagement.objects.filter(clicked_at__gte=since), 'clicked_at', value=Count('id'),
+            ),
+        }
+        responses = per_day(first_responses, 'created_at', value=Count('case', distinct=True), latency=Sum(latency))
+        counts['first_responses'] = responses
+        counts['first_response_hours'] = [
+            {'day': row['day'], 'value': row['latency'].total_seconds() / 3600 if row['latency'] else 0}
+            for row in responses
+        ]
+        return counts
+
+    @staticmethod
+    def series(until, days) -> Dict:
+        """
+        The last `days` rollups up to `until` as NumPy arrays, one per counter,
+        plus 'dates'. Days without a rollup row count as zero.
+        """
+        start = until - timedelta(days=days - 1)
+        dates = [start + timedelta(days=offset) for offset in range(days)]
+        series = {counter: np.zeros(days) for counter in RollupService.COUNTERS}
+        rows = DailyOperationsRollup.objects.filter(date__gte=start, date__lte=until).values('date', *RollupService.COUNTERS)
+        for row in rows:
+            index = (row['date'] - start).days
+            for counter in RollupService.COUNTERS:
+                series[counter][index] = row[counter]
+        series['dates'] = dates
+        return series
+
+    @staticmethod
+    def today(now=None):
+        now = now or timezone.now()
+        return timezone.localtime(now).date() if settings.USE_TZ else now.date()
+
+    @staticmethod
+    def _day_start(day):
+        start = datetime.combine(day, time.min)
+        return timezone.make_aware(start) if settings.USE_TZ else start
@@ -0,0 +1,105 @@
+"""
+SLA state sweeper for faculty cases
+"""
+from typing import Dict
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from apps.faculty_admin.models import Case, OperationalAlert
+from apps.faculty_admin.services.case_service import CaseService
+from apps.shared.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class SLAService:
+    """
+    Moves open cases through SLA states as time passes.
+
+    Case.save() only classifies a case when it is written, so an untouched
+    case would stay 'on_time' forever. sweep() runs on a schedule and issues
+    one range-bounded UPDATE per transition over (sla_status, sla_breach_time),
+    rewrites the priority scores of open cases whose score changed in one
+    UPDATE, and raises alerts only for the cases that changed state in that
+    pass.
+    """
+
+    @staticmethod
+    def open_cases():
+        return Case.objects.exclude(status__in=Case.CLOSED_STATUSES).filter(sla_breach_time__isnull=False)
+
+    @staticmethod
+    def sweep(now=None) -> Dict:
+        """Advance SLA states. Returns the ids moved to each state and the alerts created."""
+        now = now or timezone.now()
+        open_cases = SLAService.open_cases()
+        transitions = {
+            # on_time/at_risk cases whose breach time has passed
+            'breached': open_cases.filter(
+                sla_status__in=['on_time', 'at_risk'],
+                sla_breach_time__lt=now,
+            ),
+            # on_time cases whose breach time is inside the risk window
+            'at_risk': open_cases.filter(
+                sla_status='on_time',
+                sla_breach_time__gte=now,
+                sla_breach_time__lt=now + Case.SLA_AT_RISK_WINDOW,
+            ),
+        }
+
+        changed = {}
+        with transaction.atomic():
+            for state, queryset in transitions.items():
+                ids = list(queryset.select_for_update(skip_locked=True).values_list('id', flat=True))
+                if ids:
+                    Case.objects.filter(id__in=ids).update(sla_status=state, updated_at=now)
+                changed[state] = ids
+            scored = CaseService.bulk_update_priority_scores(open_cases, now)
+            alerts = SLAService._create_alerts(changed, now)
+
+        if alerts:
+            from apps.faculty_admin.services.predictive_service import PredictiveService
+            PredictiveService.notify_alerts(alerts)
+        if changed['breached'] or changed['at_risk']:
+            logger.info(
+                f"SLA sweep: {len(changed['at_risk'])} at risk, {len(changed['breached'])} breached, "
+                f"{len(alerts)} alerts"
+            )
+        return {**changed, 'scored': scored, 'alerts': alerts}
+
+    @staticmethod
+    def _create_alerts(changed, now):
+        """One alert per case that changed state in this pass"""
+        if changed['breached']:
+            # A breach supersedes the case's earlier risk alert
+            OperationalAlert.objects.filter(
+                alert_type='sla_risk', related_case_id__in=changed['breached'], is_resolved=False,
+            ).update(is_resolved=True, resolved_at=now, updated_at=now)
+
+        # Cases already flagged by generate_operational_alerts get no second risk alert
+        open_alert = OperationalAlert.objects.filter(
+            alert_type='sla_risk', related_case=OuterRef('pk'), is_resolved=False,
+        )
+        at_risk = Case.objects.filter(id__in=changed['at_risk']).exclude(Exists(open_alert))
+        breached = Case.objects.filter(id__in=changed['breached'])
+
+        alerts = [
+            OperationalAlert(
+                alert_type='sla_risk',
+                severity='warning',
+                title=f'SLA Risk: {case.case_id}',
+                message=f'Case {case.case_id} is at risk of SLA breach. Breach time: {case.sla_breach_time}',
+                related_case=case,
+            )
+            for case in at_risk
+        ] + [
+            OperationalAlert(
+                alert_type='sla_risk',
+                severity='critical',
+                title=f'SLA Breached: {case.case_id}',
+                message=f'Case {case.case_id} breached its SLA at {case.sla_breach_time}',
+                related_case=case,
+            )
+            for case in breached
+        ]
+        return OperationalAlert.objects.bulk_create(alerts)
@@ -49,3 +49,39 @@ def calculate_predictive_metrics_task(self):
         # Retry the task if it fails
         raise self.retry(exc=e, countdown=300)  # Retry after 5 minutes
 
+
+
+@shared_task(bind=True, max_retries=3)
+def deliver_broadcast_task(self, broadcast_id):
+    """
+    Create engagement rows for a published broadcast in batches.
+    Queued by BroadcastService.publish_broadcast.
+    """
+    from apps.faculty_admin.services.broadcast_service import BroadcastService
+    try:
+        delivered = BroadcastService.deliver(broadcast_id)
+        return {'status': 'success', 'broadcast_id': broadcast_id, 'delivered': delivered}
+    except Exception as e:
+        logger.error(f"Error in deliver_broadcast_task for broadcast {broadcast_id}: {e}")
+        # Delivery is idempotent, so a retry resumes safely
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def sweep_sla_states_task(self):
+    """
+    Periodic task to move open cases through SLA states.
+    This task should run every 5 minutes via Celery Beat.
+    """
+    from apps.faculty_admin.services.sla_service import SLAService
+    try:
+        result = SLAService.sweep()
+        return {
+            'status': 'success',
+            'at_risk': len(result['at_risk']),
+            'breached': len(result['breached']),
+            'alerts_generated': len(result['alerts']),
+        }
+    except Exception as e:
+        logger.error(f"Error in sweep_sla_states_task: {e}")
+        raise self.retry(exc=e, countdown=60)
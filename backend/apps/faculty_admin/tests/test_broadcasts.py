@@ -0,0 +1,77 @@
+"""
+Test cases for background broadcast publishing and view tracking
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.faculty_admin.models import Broadcast, BroadcastEngagement
+from apps.faculty_admin.services.broadcast_service import BroadcastService
+
+User = get_user_model()
+
+
+class BroadcastPublishingTestCase(APITestCase):
+    """Test cases for BroadcastService publishing and engagement tracking"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='broadcaster', email='broadcaster@example.com', user_type='faculty',
+        )
+        self.students = User.objects.bulk_create([
+            User(username=f'audience{index}', email=f'audience{index}@example.com', user_type='student')
+            for index in range(2500)
+        ])
+        User.objects.filter(id=self.students[0].id).update(is_active=False)
+        self.broadcast = Broadcast.objects.create(
+            title='Campus closed', content='Closed tomorrow', target_audience='students', created_by=self.author,
+        )
+
+    @override_settings(CELERY_BROKER_URL=None)
+    def test_publish_counts_audience_and_queues_delivery(self):
+        """Test publishing writes no engagement rows and queues the job after commit"""
+        self.client.force_authenticate(user=self.author)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(f'/api/faculty-admin/broadcasts/{self.broadcast.id}/publish/')
+        # Lookup, audience COUNT and UPDATE, plus serializing the response
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['audience_size'], 2499)
+        self.assertEqual(response.data['delivery_status'], 'pending')
+        self.assertEqual(response.data['delivery_progress'], 0.0)
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(BroadcastEngagement.objects.exists())
+
+    def test_delivery_is_batched_and_idempotent(self):
+        """Test delivery inserts engagement rows in batches and reports progress"""
+        BroadcastService.publish_broadcast(self.broadcast)
+        with CaptureQueriesContext(connection) as queries:
+            delivered = BroadcastService.deliver(self.broadcast.id, batch_size=1000)
+        self.assertEqual(delivered, 2499)
+        # A constant number of statements per batch of 1000, not per user
+        self.assertLess(len(queries), 40)
+        self.assertEqual(BroadcastEngagement.objects.filter(broadcast=self.broadcast).count(), 2499)
+
+        self.broadcast.refresh_from_db()
+        self.assertEqual(self.broadcast.delivery_status, 'completed')
+        self.assertEqual(self.broadcast.delivered_count, 2499)
+
+        self.assertEqual(BroadcastService.deliver(self.broadcast.id), 2499)
+        self.assertEqual(BroadcastEngagement.objects.filter(broadcast=self.broadcast).count(), 2499)
+
+    def test_track_view_counts_each_user_once(self):
+        """Test views are counted atomically once per user, with or without an engagement row"""
+        BroadcastService.publish_broadcast(self.broadcast)
+        BroadcastService.deliver(self.broadcast.id)
+        viewer = self.students[1]
+
+        self.assertTrue(BroadcastService.track_view(self.broadcast, viewer))
+        self.assertFalse(BroadcastService.track_view(self.broadcast, viewer))
+        # Outside the audience: the row is created on first view
+        self.assertTrue(BroadcastService.track_view(self.broadcast, self.author))
+
+        self.broadcast.refresh_from_db()
+        self.assertEqual(self.broadcast.views_count, 2)
+        self.assertEqual(BroadcastEngagement.objects.filter(viewed_at__isnull=False).count(), 2)
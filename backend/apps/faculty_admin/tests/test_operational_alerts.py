@@ -0,0 +1,101 @@
+"""
+Test cases for deduplicated operational alerts and digest notifications
+"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.faculty_admin.models import Case, OperationalAlert
+from apps.faculty_admin.services.predictive_service import PredictiveService
+from apps.notifications.fcm_models import FCMToken, PushNotification
+from apps.notifications.models import Notification, NotificationPreference
+
+User = get_user_model()
+
+
+class OperationalAlertsTestCase(TestCase):
+    """Test cases for PredictiveService.generate_operational_alerts"""
+
+    def setUp(self):
+        group = Group.objects.create(name='Faculty')
+        self.faculty = [
+            User.objects.create_user(username=f'alertfaculty{index}', email=f'alertfaculty{index}@example.com')
+            for index in range(4)
+        ]
+        group.user_set.add(*self.faculty)
+        User.objects.filter(pk=self.faculty[3].pk).update(is_active=False)
+        NotificationPreference.objects.create(user=self.faculty[2], in_app_enabled=False)
+
+    def create_cases(self, count, hours_to_breach=2, **kwargs):
+        cases = [Case.objects.create(title='Lab access', description='Card reader', **kwargs) for _ in range(count)]
+        # Old cases, so the high volume check stays quiet
+        Case.objects.filter(pk__in=[case.pk for case in cases]).update(
+            sla_breach_time=timezone.now() + timedelta(hours=hours_to_breach),
+            created_at=timezone.now() - timedelta(days=2),
+        )
+        return cases
+
+    @override_settings(FCM_SERVER_KEY='test-key')
+    def test_alerts_are_deduplicated_and_digested_per_user(self):
+        """Test one alert per new at-risk case and one notification per recipient"""
+        unassigned = self.create_cases(3)
+        assigned = self.create_cases(2, hours_to_breach=0.5, assigned_to=self.faculty[0], status='assigned')
+        already_flagged = self.create_cases(1)[0]
+        OperationalAlert.objects.create(
+            alert_type='sla_risk', title='Existing', message='Existing', related_case=already_flagged,
+        )
+        self.create_cases(1, hours_to_breach=24)  # Not at risk yet
+        FCMToken.objects.create(user=self.faculty[0], token='faculty-device', platform='android')
+
+        with CaptureQueriesContext(connection) as queries:
+            alerts = PredictiveService.generate_operational_alerts()
+        baseline = len(queries)
+
+        self.assertEqual(
+            sorted(alert.related_case_id for alert in alerts),
+            sorted(case.id for case in unassigned + assigned),
+        )
+        self.assertEqual(
+            sorted(alert.severity for alert in alerts), ['critical', 'critical', 'warning', 'warning', 'warning'],
+        )
+
+        # The assignee gets everything in one digest; other faculty only the
+        # unassigned cases; opted-out and inactive faculty get nothing
+        notifications = {notification.user_id: notification for notification in Notification.objects.all()}
+        self.assertEqual(set(notifications), {self.faculty[0].id, self.faculty[1].id})
+        digest = notifications[self.faculty[0].id]
+        self.assertEqual(digest.title, '5 operational alerts')
+        self.assertEqual(digest.priority, 'high')
+        self.assertEqual(digest.data['alert_count'], 5)
+        self.assertEqual(digest.data['severity'], 'critical')
+        self.assertEqual(notifications[self.faculty[1].id].data['alert_count'], 3)
+        self.assertEqual(notifications[self.faculty[1].id].priority, 'medium')
+
+        push = PushNotification.objects.get()
+        self.assertEqual(list(push.target_users.all()), [self.faculty[0]])
+        self.assertEqual(push.data['notification_id'], digest.id)
+
+        # A second run finds nothing new
+        self.assertEqual(PredictiveService.generate_operational_alerts(), [])
+        self.assertEqual(Notification.objects.count(), 2)
+
+        # More cases cost no more queries
+        self.create_cases(20)
+        with CaptureQueriesContext(connection) as queries:
+            alerts = PredictiveService.generate_operational_alerts()
+        self.assertEqual(len(alerts), 20)
+        self.assertEqual(len(queries), baseline)
+
+    def test_single_alert_keeps_its_own_title(self):
+        """Test a digest of one alert reads like the alert itself"""
+        case = self.create_cases(1, assigned_to=self.faculty[1])[0]
+        alert = PredictiveService.generate_operational_alerts()[0]
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.faculty[1])
+        self.assertEqual(notification.title, f'SLA Risk: {case.case_id}')
+        self.assertEqual(notification.related_object_id, alert.id)
+        self.assertEqual(notification.data['alert_ids'], [alert.id])
@@ -0,0 +1,104 @@
+"""
+Test cases for operations rollups and rollup-based predictions
+"""
+from datetime import timedelta
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.faculty_admin.models import (
+    Broadcast, BroadcastEngagement, Case, CaseUpdate, DailyOperationsRollup, PredictiveMetric,
+)
+from apps.faculty_admin.services.predictive_service import PredictiveService
+from apps.faculty_admin.services.rollup_service import RollupService
+
+User = get_user_model()
+
+
+class PredictiveMetricsTestCase(TestCase):
+    """Test cases for RollupService and PredictiveService.calculate_metrics"""
+
+    def setUp(self):
+        # Midday, so no test event crosses into another day
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.faculty = User.objects.create_user(
+            username='metricsfaculty', email='metricsfaculty@example.com', user_type='faculty',
+        )
+
+    def create_case(self, days_ago, response_hours=None, resolved=False):
+        created_at = self.now - timedelta(days=days_ago)
+        case = Case.objects.create(title='Broken bench', description='Block A')
+        values = {'created_at': created_at}
+        if resolved:
+            values.update(status='resolved', resolved_at=created_at + timedelta(hours=5))
+        Case.objects.filter(pk=case.pk).update(**values)
+        if response_hours is not None:
+            for offset in (response_hours, response_hours + 1):
+                update = CaseUpdate.objects.create(case=case, updated_by=self.faculty, comment='Looking into it')
+                CaseUpdate.objects.filter(pk=update.pk).update(created_at=created_at + timedelta(hours=offset))
+        return case
+
+    def test_refresh_buckets_events_by_day_from_the_watermark(self):
+        """Test the first refresh fills history and later ones only touch recent days"""
+        self.create_case(3, response_hours=2, resolved=True)
+        self.create_case(3, response_hours=4)
+        self.create_case(0)
+        broadcast = Broadcast.objects.create(title='Fest', content='Friday', created_by=self.faculty)
+        engagement = BroadcastEngagement.objects.create(broadcast=broadcast, user=self.faculty, viewed_at=self.now)
+        BroadcastEngagement.objects.filter(pk=engagement.pk).update(clicked_at=self.now)
+
+        self.assertEqual(RollupService.refresh(self.now), RollupService.INITIAL_DAYS)
+        rollups = {rollup.date: rollup for rollup in DailyOperationsRollup.objects.all()}
+        three_days_ago = rollups[(self.now - timedelta(days=3)).date()]
+        self.assertEqual(three_days_ago.cases_created, 2)
+        self.assertEqual(three_days_ago.first_responses, 2)  # Second updates are not first responses
+        self.assertAlmostEqual(three_days_ago.first_response_hours, 6)
+        today = rollups[self.now.date()]
+        self.assertEqual((today.cases_created, today.broadcast_views, today.broadcast_clicks), (1, 1, 1))
+        self.assertEqual(sum(rollup.resolutions for rollup in rollups.values()), 1)
+
+        # The next run recomputes from the watermark only
+        self.create_case(0)
+        self.assertEqual(RollupService.refresh(self.now), RollupService.LOOKBACK_DAYS + 1)
+        self.assertEqual(DailyOperationsRollup.objects.get(date=self.now.date()).cases_created, 2)
+        self.assertEqual(DailyOperationsRollup.objects.count(), RollupService.INITIAL_DAYS)
+
+    def test_forecast_follows_weekly_seasonality(self):
+        """Test the EWMA forecast carries the day-of-week pattern forward"""
+        dates = [self.now.date() - timedelta(days=offset) for offset in range(55, -1, -1)]
+        values = np.array([10.0 if day.weekday() < 5 else 2.0 for day in dates])
+
+        forecast, confidence = PredictiveService.forecast(values, dates, 7)
+        future = [dates[-1] + timedelta(days=offset) for offset in range(1, 8)]
+        for day, value in zip(future, forecast):
+            self.assertAlmostEqual(value, 10.0 if day.weekday() < 5 else 2.0)
+        self.assertEqual(confidence, 0.95)
+
+        flat, confidence = PredictiveService.forecast(np.zeros(56), dates, 7)
+        self.assertEqual((flat.sum(), confidence), (0, 0.5))
+
+    def test_calculate_metrics_cost_is_independent_of_history(self):
+        """Test hourly runs issue the same queries however many cases exist"""
+        for days_ago in range(10):
+            self.create_case(days_ago, response_hours=3, resolved=days_ago % 2 == 0)
+        PredictiveService.calculate_metrics()
+
+        with CaptureQueriesContext(connection) as queries:
+            metrics = PredictiveService.calculate_metrics()
+        baseline = len(queries)
+        self.assertEqual(len(metrics), 6)
+
+        for _ in range(40):
+            self.create_case(0, response_hours=1)
+        with CaptureQueriesContext(connection) as queries:
+            PredictiveService.calculate_metrics()
+        self.assertEqual(len(queries), baseline)
+
+        volume = PredictiveMetric.objects.filter(metric_type='complaint_volume').latest('created_at')
+        self.assertEqual(volume.value, 47)  # Days 0-6 of the first batch, plus today's 40
+        self.assertEqual(len(volume.metadata['daily_forecast']), 7)
+        response = PredictiveMetric.objects.filter(metric_type='response_time').latest('created_at')
+        self.assertEqual(response.metadata['sample_size'], 47)
+        self.assertAlmostEqual(response.value, (7 * 3 + 40 * 1) / 47)
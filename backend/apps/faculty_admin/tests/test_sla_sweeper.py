@@ -0,0 +1,82 @@
+"""
+Test cases for the SLA state sweeper
+"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.faculty_admin.models import Case, OperationalAlert
+from apps.faculty_admin.services.case_service import CaseService
+from apps.faculty_admin.services.sla_service import SLAService
+
+User = get_user_model()
+
+
+class SLASweeperTestCase(TestCase):
+    """Test cases for SLAService.sweep"""
+
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='slafaculty', email='slafaculty@example.com', user_type='faculty',
+        )
+
+    def create_case(self, hours_to_breach, **kwargs):
+        case = Case.objects.create(title='Leaking roof', description='Room 101', assigned_to=self.faculty, **kwargs)
+        self.assertIsNotNone(case.sla_breach_time)
+        Case.objects.filter(pk=case.pk).update(
+            sla_breach_time=timezone.now() + timedelta(hours=hours_to_breach), sla_status='on_time',
+        )
+        return case
+
+    def test_untouched_cases_move_through_states(self):
+        """Test on_time cases become at_risk, then breached, without being saved"""
+        fresh = self.create_case(24)
+        soon = self.create_case(2, priority='high')
+        overdue = self.create_case(-1)
+        closed = self.create_case(-5, status='resolved')
+
+        with CaptureQueriesContext(connection) as queries:
+            result = SLAService.sweep()
+        # Per transition one SELECT and one UPDATE, one scoring UPDATE, the
+        # alert writes and the digest's assignee lookup; constant in the number
+        # of cases (notifications excluded)
+        self.assertEqual(len([q for q in queries if 'faculty_admin' in q['sql']]), 10)
+        self.assertEqual(result['at_risk'], [soon.id])
+        self.assertEqual(result['breached'], [overdue.id])
+        self.assertEqual(result['scored'], 3)
+
+        states = dict(Case.objects.values_list('id', 'sla_status'))
+        self.assertEqual(states[fresh.id], 'on_time')
+        self.assertEqual(states[soon.id], 'at_risk')
+        self.assertEqual(states[overdue.id], 'breached')
+        self.assertEqual(states[closed.id], 'on_time')
+
+        # Scores match the per-case calculation
+        for case in Case.objects.exclude(status='resolved'):
+            self.assertEqual(case.priority_score, CaseService.calculate_priority_score(case))
+
+        alerts = OperationalAlert.objects.order_by('severity')
+        self.assertEqual([(a.related_case_id, a.severity) for a in alerts], [(overdue.id, 'critical'), (soon.id, 'warning')])
+
+        # A second pass changes nothing, rewrites no scores and raises no new alerts
+        result = SLAService.sweep()
+        self.assertEqual((result['at_risk'], result['breached'], result['alerts']), ([], [], []))
+        self.assertEqual(result['scored'], 0)
+
+        # Time passes: the at-risk case breaches and its risk alert is superseded
+        result = SLAService.sweep(now=timezone.now() + timedelta(hours=3))
+        self.assertEqual(result['breached'], [soon.id])
+        risk_alert = OperationalAlert.objects.get(related_case=soon, severity='warning')
+        self.assertTrue(risk_alert.is_resolved)
+        self.assertTrue(OperationalAlert.objects.filter(related_case=soon, severity='critical', is_resolved=False).exists())
+
+    def test_save_classifies_closed_cases_by_resolution_time(self):
+        """Test resolving a case freezes its SLA state instead of reporting at_risk"""
+        case = Case.objects.create(title='Projector', description='Broken', sla_target_hours=1)
+        self.assertEqual(case.sla_status, 'at_risk')
+        case.status = 'resolved'
+        case.resolved_at = timezone.now()
+        case.save()
+        self.assertEqual(case.sla_status, 'on_time')
@@ -6,4 +6,7 @@ from django.apps import AppConfig
 
 class FeedbackConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.feedback'
\ No newline at end of file
+    name = 'apps.feedback'
+    
+    def ready(self):
+        import apps.feedback.signals  # noqa
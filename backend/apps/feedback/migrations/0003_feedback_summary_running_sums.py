@@ -0,0 +1,94 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:04
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+RATING_FIELDS = ('teaching_quality', 'communication', 'punctuality', 'subject_knowledge', 'helpfulness')
+
+
+def populate_running_sums(apps, schema_editor):
+    """Rebuild every summary, including its new sums and histogram, from one GROUP BY"""
+    FacultyFeedback = apps.get_model('feedback', 'FacultyFeedback')
+    FacultyFeedbackSummary = apps.get_model('feedback', 'FacultyFeedbackSummary')
+    rows = FacultyFeedback.objects.order_by().values('faculty_id').annotate(
+        total_feedback_count=Count('id'),
+        **{f'sum_{field}': Sum(field) for field in RATING_FIELDS},
+        **{f'rating_{rating}_count': Count('id', filter=Q(overall_rating=rating)) for rating in range(1, 6)},
+    )
+    summaries = {summary.faculty_id: summary for summary in FacultyFeedbackSummary.objects.all()}
+    for row in rows:
+        faculty_id = row.pop('faculty_id')
+        summary = summaries.pop(faculty_id, None) or FacultyFeedbackSummary(faculty_id=faculty_id)
+        count = row['total_feedback_count']
+        for column, value in row.items():
+            setattr(summary, column, value)
+        for field in RATING_FIELDS:
+            setattr(summary, f'avg_{field}', row[f'sum_{field}'] / count)
+        summary.avg_overall_rating = sum(row[f'sum_{field}'] for field in RATING_FIELDS) / (count * len(RATING_FIELDS))
+        summary.save()
+    # Summaries of faculty without feedback keep their zero defaults
+    FacultyFeedbackSummary.objects.filter(faculty_id__in=list(summaries)).update(
+        total_feedback_count=0, avg_teaching_quality=0.0, avg_communication=0.0, avg_punctuality=0.0,
+        avg_subject_knowledge=0.0, avg_helpfulness=0.0, avg_overall_rating=0.0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0002_facultyfeedback_submitted_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='rating_1_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='rating_2_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='rating_3_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='rating_4_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='rating_5_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='sum_communication',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='sum_helpfulness',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='sum_punctuality',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='sum_subject_knowledge',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='facultyfeedbacksummary',
+            name='sum_teaching_quality',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_running_sums, migrations.RunPython.noop),
+    ]
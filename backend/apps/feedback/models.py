@@ -1,7 +1,10 @@
 """
 Faculty feedback models for KSIT Nexus
 """
-from django.db import models
+from collections import Counter
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -20,6 +23,15 @@ class FacultyFeedback(models.Model):
         (5, '5 - Excellent'),
     ]
     
+    # Category ratings; overall_rating is their mean
+    RATING_FIELDS = (
+        'teaching_quality',
+        'communication',
+        'punctuality',
+        'subject_knowledge',
+        'helpfulness',
+    )
+    
     # Optional student reference for tracking submissions
     feedback_id = models.CharField(max_length=20, unique=True)
     faculty = models.ForeignKey(
@@ -87,6 +99,16 @@ class FacultyFeedback(models.Model):
     def __str__(self):
         return f"Feedback for {self.faculty.get_full_name()} - {self.feedback_id}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_summary_state = instance.summary_state()
+        return instance
+    
+    def summary_state(self):
+        """The (faculty id, category ratings) this feedback contributes to its summary"""
+        return self.faculty_id, tuple(getattr(self, field) for field in self.RATING_FIELDS)
+    
     def save(self, *args, **kwargs):
         if not self.feedback_id:
             # Generate feedback ID
@@ -103,11 +125,31 @@ class FacultyFeedback(models.Model):
         ]
         self.overall_rating = sum(ratings) / len(ratings)
         
-        super().save(*args, **kwargs)
+        previous = None
+        if not self._state.adding:
+            previous = getattr(self, '_saved_summary_state', None)
+            if previous is None:
+                saved = FacultyFeedback.objects.filter(pk=self.pk).values_list('faculty_id', *self.RATING_FIELDS).first()
+                previous = (saved[0], tuple(saved[1:])) if saved else None
+        current = self.summary_state()
+        
+        # Keep the faculty summary in the same transaction as the feedback
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous != current:
+                FacultyFeedbackSummary.apply_changes(removed=previous, added=current)
+        self._saved_summary_state = current
 
 
 class FacultyFeedbackSummary(models.Model):
-    """Aggregated feedback summary for faculty"""
+    """
+    Aggregated feedback summary for faculty.
+    
+    Running sums of the category ratings, the feedback count and a histogram
+    of whole overall ratings are adjusted by one UPDATE whenever a feedback
+    is saved or deleted, which also derives the averages. reconcile() rebuilds
+    summaries from a single GROUP BY query to correct any drift.
+    """
     
     faculty = models.OneToOneField(
         User, 
@@ -124,49 +166,150 @@ class FacultyFeedbackSummary(models.Model):
     avg_helpfulness = models.FloatField(default=0.0)
     avg_overall_rating = models.FloatField(default=0.0)
     
+    # Running sums the averages are derived from
+    sum_teaching_quality = models.IntegerField(default=0)
+    sum_communication = models.IntegerField(default=0)
+    sum_punctuality = models.IntegerField(default=0)
+    sum_subject_knowledge = models.IntegerField(default=0)
+    sum_helpfulness = models.IntegerField(default=0)
+    
     # Counts
     total_feedback_count = models.IntegerField(default=0)
     
+    # Feedback whose overall rating is exactly 1..5
+    rating_1_count = models.IntegerField(default=0)
+    rating_2_count = models.IntegerField(default=0)
+    rating_3_count = models.IntegerField(default=0)
+    rating_4_count = models.IntegerField(default=0)
+    rating_5_count = models.IntegerField(default=0)
+    
     # Last updated
     last_updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Feedback Summary for {self.faculty.get_full_name()}"
     
-    def update_summary(self):
-        """Update aggregated feedback data"""
-        try:
-            feedbacks = FacultyFeedback.objects.filter(faculty=self.faculty)
+    @staticmethod
+    def feedback_deltas(state, sign):
+        """Column deltas for adding (sign=1) or removing (sign=-1) one feedback's state"""
+        _, ratings = state
+        deltas = Counter({'total_feedback_count': sign})
+        for field, rating in zip(FacultyFeedback.RATING_FIELDS, ratings):
+            deltas[f'sum_{field}'] += sign * rating
+        total = sum(ratings)
+        if total % len(ratings) == 0:
+            deltas[f'rating_{total // len(ratings)}_count'] += sign
+        return deltas
+    
+    @classmethod
+    def apply_changes(cls, removed=None, added=None):
+        """Move one feedback's contribution from its previous to its current summary state"""
+        changes = {}
+        for state, sign in ((removed, -1), (added, 1)):
+            if state is not None:
+                changes.setdefault(state[0], Counter()).update(cls.feedback_deltas(state, sign))
+        for faculty_id, deltas in changes.items():
+            deltas = {column: delta for column, delta in deltas.items() if delta}
+            if deltas:
+                cls.adjust(faculty_id, deltas)
+    
+    @classmethod
+    def adjust(cls, faculty_id, deltas):
+        """Add column deltas to a faculty's summary and re-derive its averages in one UPDATE"""
+        count_delta = deltas.get('total_feedback_count', 0)
+        count = F('total_feedback_count') + count_delta
+        # Conditions see the row before the update, so compare the old count
+        has_feedback = Q(total_feedback_count__gt=-count_delta)
+        sums = [
+            F(f'sum_{field}') + deltas.get(f'sum_{field}', 0)
+            for field in FacultyFeedback.RATING_FIELDS
+        ]
+        
+        updates = {column: F(column) + delta for column, delta in deltas.items()}
+        for field, total in zip(FacultyFeedback.RATING_FIELDS, sums):
+            updates[f'avg_{field}'] = cls._average(total, count, has_feedback)
+        updates['avg_overall_rating'] = cls._average(
+            sum(sums[1:], sums[0]), count * len(sums), has_feedback,
+        )
+        updates['last_updated'] = timezone.now()
+        
+        if not cls.objects.filter(faculty_id=faculty_id).update(**updates):
+            cls.objects.get_or_create(faculty_id=faculty_id)
+            cls.objects.filter(faculty_id=faculty_id).update(**updates)
+    
+    @staticmethod
+    def _average(total, count, has_feedback):
+        return Case(
+            When(has_feedback, then=Cast(total, FloatField()) / count),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    
+    @classmethod
+    def reconcile(cls, faculty_ids=None):
+        """
+        Rebuild summaries from one GROUP BY over FacultyFeedback.
+        
+        Locks the existing summary rows first, so feedback saved concurrently
+        waits and applies its delta on top of the rebuilt values. Returns the
+        number of summaries that were created or corrected.
+        """
+        fields = FacultyFeedback.RATING_FIELDS
+        with transaction.atomic():
+            summaries = cls.objects.select_for_update()
+            feedback = FacultyFeedback.objects.all()
+            if faculty_ids is not None:
+                summaries = summaries.filter(faculty_id__in=faculty_ids)
+                feedback = feedback.filter(faculty_id__in=faculty_ids)
+            summaries = {summary.faculty_id: summary for summary in summaries}
+            
+            rows = feedback.order_by().values('faculty_id').annotate(
+                total_feedback_count=Count('id'),
+                **{f'sum_{field}': Sum(field) for field in fields},
+                **{
+                    f'rating_{rating}_count': Count('id', filter=Q(overall_rating=rating))
+                    for rating in range(1, 6)
+                },
+            )
+            expected = {row.pop('faculty_id'): row for row in rows}
             
-            if feedbacks.exists():
-                count = feedbacks.count()
-                self.avg_teaching_quality = sum(f.teaching_quality for f in feedbacks) / count if count > 0 else 0.0
-                self.avg_communication = sum(f.communication for f in feedbacks) / count if count > 0 else 0.0
-                self.avg_punctuality = sum(f.punctuality for f in feedbacks) / count if count > 0 else 0.0
-                self.avg_subject_knowledge = sum(f.subject_knowledge for f in feedbacks) / count if count > 0 else 0.0
-                self.avg_helpfulness = sum(f.helpfulness for f in feedbacks) / count if count > 0 else 0.0
-                self.avg_overall_rating = sum(f.overall_rating for f in feedbacks) / count if count > 0 else 0.0
-                self.total_feedback_count = count
-            else:
-                self.avg_teaching_quality = 0.0
-                self.avg_communication = 0.0
-                self.avg_punctuality = 0.0
-                self.avg_subject_knowledge = 0.0
-                self.avg_helpfulness = 0.0
-                self.avg_overall_rating = 0.0
-                self.total_feedback_count = 0
+            columns = ['total_feedback_count', 'avg_overall_rating'] + [
+                column for field in fields for column in (f'sum_{field}', f'avg_{field}')
+            ] + [f'rating_{rating}_count' for rating in range(1, 6)]
+            created, changed = [], []
+            for faculty_id in expected.keys() | summaries.keys():
+                values = cls._summary_values(expected.get(faculty_id))
+                summary = summaries.get(faculty_id)
+                if summary is None:
+                    created.append(cls(faculty_id=faculty_id, **values))
+                elif any(getattr(summary, column) != value for column, value in values.items()):
+                    for column, value in values.items():
+                        setattr(summary, column, value)
+                    summary.last_updated = timezone.now()
+                    changed.append(summary)
             
-            self.save()
-        except Exception as e:
-            print(f"Error updating feedback summary for faculty {self.faculty.id}: {e}")
-            import traceback
-            traceback.print_exc()
-            # Set default values on error
-            self.avg_teaching_quality = 0.0
-            self.avg_communication = 0.0
-            self.avg_punctuality = 0.0
-            self.avg_subject_knowledge = 0.0
-            self.avg_helpfulness = 0.0
-            self.avg_overall_rating = 0.0
-            self.total_feedback_count = 0
-            self.save()
\ No newline at end of file
+            cls.objects.bulk_create(created, ignore_conflicts=True)
+            cls.objects.bulk_update(changed, columns + ['last_updated'], batch_size=500)
+        return len(created) + len(changed)
+    
+    @staticmethod
+    def _summary_values(row):
+        """Column values for a GROUP BY row (None: no feedback)"""
+        fields = FacultyFeedback.RATING_FIELDS
+        row = row or {}
+        count = row.get('total_feedback_count', 0)
+        values = {'total_feedback_count': count}
+        for rating in range(1, 6):
+            values[f'rating_{rating}_count'] = row.get(f'rating_{rating}_count', 0)
+        for field in fields:
+            total = row.get(f'sum_{field}') or 0
+            values[f'sum_{field}'] = total
+            values[f'avg_{field}'] = total / count if count else 0.0
+        total = sum(values[f'sum_{field}'] for field in fields)
+        values['avg_overall_rating'] = total / (count * len(fields)) if count else 0.0
+        return values
+    
+    def update_summary(self):
+        """Recompute this summary from the faculty's feedback"""
+        FacultyFeedbackSummary.reconcile(faculty_ids=[self.faculty_id])
+        self.refresh_from_db()
@@ -0,0 +1,13 @@
+"""
+Signals for feedback app
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import FacultyFeedback, FacultyFeedbackSummary
+
+
+@receiver(post_delete, sender=FacultyFeedback)
+def remove_from_summary(sender, instance, **kwargs):
+    """Take a deleted feedback's ratings out of its faculty summary"""
+    state = getattr(instance, '_saved_summary_state', None) or instance.summary_state()
+    FacultyFeedbackSummary.apply_changes(removed=state)
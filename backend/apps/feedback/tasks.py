@@ -0,0 +1,19 @@
+"""
+Celery tasks for feedback app
+"""
+from celery import shared_task
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_feedback_summaries():
+    """Rebuild every faculty feedback summary from one GROUP BY query"""
+    from .models import FacultyFeedbackSummary
+    
+    corrected = FacultyFeedbackSummary.reconcile()
+    if corrected:
+        logger.info(f"Reconciled {corrected} faculty feedback summaries")
+    return {'corrected': corrected, 'timestamp': timezone.now().isoformat()}
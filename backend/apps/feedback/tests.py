@@ -1,3 +1,107 @@
-from django.test import TestCase
+"""
+Test cases for incrementally maintained faculty feedback summaries
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.feedback.models import FacultyFeedback, FacultyFeedbackSummary
+from apps.feedback.tasks import reconcile_feedback_summaries
 
-# Create your tests here.
+User = get_user_model()
+
+
+def give_feedback(faculty, *ratings):
+    fields = dict(zip(FacultyFeedback.RATING_FIELDS, ratings))
+    return FacultyFeedback.objects.create(faculty=faculty, overall_rating=0, **fields)
+
+
+class FacultyFeedbackSummaryTestCase(APITestCase):
+    """Test cases for running sums, reconciliation and feedback_stats"""
+
+    def setUp(self):
+        self.faculty = User.objects.create_user(
+            username='summaryfaculty', email='summaryfaculty@example.com', user_type='faculty',
+        )
+        self.other_faculty = User.objects.create_user(
+            username='otherfaculty', email='otherfaculty@example.com', user_type='faculty',
+        )
+
+    def summary(self, faculty=None):
+        return FacultyFeedbackSummary.objects.get(faculty=faculty or self.faculty)
+
+    def test_summary_follows_saves_and_deletes(self):
+        """Test averages track created, edited, moved and deleted feedback"""
+        first = give_feedback(self.faculty, 5, 5, 5, 5, 5)
+        with CaptureQueriesContext(connection) as queries:
+            give_feedback(self.faculty, 3, 4, 2, 4, 2)
+        # INSERT and one summary UPDATE (plus savepoint statements)
+        self.assertEqual(len([q for q in queries if 'feedback' in q['sql'].lower()]), 2)
+
+        summary = self.summary()
+        self.assertEqual(summary.total_feedback_count, 2)
+        self.assertEqual(summary.avg_teaching_quality, 4.0)
+        self.assertEqual(summary.avg_punctuality, 3.5)
+        self.assertAlmostEqual(summary.avg_overall_rating, 4.0)
+        self.assertEqual((summary.rating_5_count, summary.rating_3_count), (1, 1))
+
+        first.refresh_from_db()
+        first.teaching_quality = 1
+        first.save()
+        summary = self.summary()
+        self.assertEqual(summary.avg_teaching_quality, 2.0)
+        self.assertEqual(summary.rating_5_count, 0)
+
+        first.faculty = self.other_faculty
+        first.save()
+        self.assertEqual(self.summary().total_feedback_count, 1)
+        self.assertEqual(self.summary(self.other_faculty).avg_teaching_quality, 1.0)
+
+        FacultyFeedback.objects.filter(faculty=self.faculty).delete()
+        summary = self.summary()
+        self.assertEqual(summary.total_feedback_count, 0)
+        self.assertEqual(summary.avg_overall_rating, 0.0)
+        self.assertEqual(summary.sum_helpfulness, 0)
+
+    def test_reconcile_corrects_drift(self):
+        """Test the nightly job rebuilds all summaries from one GROUP BY"""
+        give_feedback(self.faculty, 4, 4, 4, 4, 4)
+        give_feedback(self.faculty, 2, 2, 2, 2, 2)
+        give_feedback(self.other_faculty, 5, 4, 3, 2, 1)
+        expected = {
+            summary.faculty_id: summary.avg_overall_rating
+            for summary in FacultyFeedbackSummary.objects.all()
+        }
+        FacultyFeedbackSummary.objects.filter(faculty=self.faculty).update(
+            total_feedback_count=7, sum_communication=1, avg_overall_rating=0.5,
+        )
+        FacultyFeedbackSummary.objects.filter(faculty=self.other_faculty).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            result = reconcile_feedback_summaries()
+        self.assertEqual(result['corrected'], 2)
+        self.assertEqual(len([q for q in queries if 'GROUP BY' in q['sql']]), 1)
+        self.assertEqual(
+            {summary.faculty_id: summary.avg_overall_rating for summary in FacultyFeedbackSummary.objects.all()},
+            expected,
+        )
+        self.assertEqual(self.summary().sum_communication, 6)
+        self.assertEqual(FacultyFeedbackSummary.reconcile(), 0)
+
+    def test_feedback_stats_reads_summaries(self):
+        """Test feedback_stats totals come from summaries in constant queries"""
+        for _ in range(3):
+            give_feedback(self.faculty, 4, 4, 4, 4, 4)
+        give_feedback(self.other_faculty, 5, 4, 3, 2, 1)
+        give_feedback(self.other_faculty, 5, 4, 3, 2, 2)
+
+        admin = User.objects.create_user(username='statsadmin', email='statsadmin@example.com', user_type='admin')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/feedback/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_feedback'], 5)
+        self.assertEqual(response.data['average_rating'], round((12 + 3 + 3.2) / 5, 2))
+        self.assertEqual(response.data['feedback_by_rating']['rating_4'], 3)
+        self.assertEqual(response.data['feedback_by_rating']['rating_3'], 1)
+        self.assertEqual(response.data['top_rated_faculty'][0]['faculty_id'], self.faculty.id)
+        self.assertFalse(FacultyFeedback.objects.filter(overall_rating=0).exists())
@@ -5,7 +5,7 @@ from rest_framework import generics, status, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.db.models import Avg, Count, Q
+from django.db.models import F, Sum
 from .models import FacultyFeedback, FacultyFeedbackSummary
 from .serializers import (
     FacultyFeedbackSerializer, FacultyFeedbackCreateSerializer,
@@ -40,11 +40,9 @@ class FeedbackListCreateView(generics.ListCreateAPIView):
         print("Request user:", self.request.user)
         print("Request user type:", getattr(self.request.user, 'user_type', 'unknown'))
         
-        # Create feedback (anonymous by default)
-        feedback = serializer.save()
-        
-        # Update faculty feedback summary
-        self._update_feedback_summary(feedback.faculty)
+        # Create feedback (anonymous by default); saving updates the
+        # faculty's feedback summary in the same transaction
+        serializer.save()
     
     def create(self, request, *args, **kwargs):
         """Override create to return full feedback object"""
@@ -58,11 +56,6 @@ class FeedbackListCreateView(generics.ListCreateAPIView):
         # Return the full feedback object using the read serializer
         read_serializer = FacultyFeedbackSerializer(feedback)
         return Response(read_serializer.data, status=status.HTTP_201_CREATED)
-    
-    def _update_feedback_summary(self, faculty):
-        """Update faculty feedback summary"""
-        summary, created = FacultyFeedbackSummary.objects.get_or_create(faculty=faculty)
-        summary.update_summary()
 
 
 class FeedbackDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -113,8 +106,6 @@ class FeedbackSummaryView(generics.RetrieveAPIView):
         
         try:
             summary, created = FacultyFeedbackSummary.objects.get_or_create(faculty=self.request.user)
-            if created:
-                summary.update_summary()
             return summary
         except Exception as e:
             print(f"Error in FeedbackSummaryView.get_object: {e}")
@@ -174,22 +165,31 @@ def feedback_stats(request):
     if request.user.user_type not in ['admin', 'faculty']:
         return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Calculate statistics
-    total_feedback = FacultyFeedback.objects.count()
-    average_rating = FacultyFeedback.objects.aggregate(
-        avg_rating=Avg('overall_rating')
-    )['avg_rating'] or 0
+    # Totals and rating distribution come from the maintained summaries
+    totals = FacultyFeedbackSummary.objects.aggregate(
+        total_feedback=Sum('total_feedback_count'),
+        rating_sum=Sum(
+            F('sum_teaching_quality') + F('sum_communication') + F('sum_punctuality')
+            + F('sum_subject_knowledge') + F('sum_helpfulness')
+        ),
+        **{f'rating_{rating}': Sum(f'rating_{rating}_count') for rating in range(1, 6)},
+    )
+    total_feedback = totals['total_feedback'] or 0
+    average_rating = (
+        totals['rating_sum'] / (total_feedback * len(FacultyFeedback.RATING_FIELDS))
+        if total_feedback else 0
+    )
     
     # Rating distribution
-    feedback_by_rating = {}
-    for rating in range(1, 6):
-        count = FacultyFeedback.objects.filter(overall_rating=rating).count()
-        feedback_by_rating[f'rating_{rating}'] = count
+    feedback_by_rating = {
+        f'rating_{rating}': totals[f'rating_{rating}'] or 0
+        for rating in range(1, 6)
+    }
     
     # Top rated faculty
     top_rated_faculty = FacultyFeedbackSummary.objects.filter(
         total_feedback_count__gt=0
-    ).order_by('-avg_overall_rating')[:5]
+    ).select_related('faculty__faculty_profile').order_by('-avg_overall_rating')[:5]
     
     top_rated_data = FacultyFeedbackSummarySerializer(top_rated_faculty, many=True).data
     
@@ -221,12 +221,9 @@ def submit_feedback(request):
     
     serializer = FacultyFeedbackCreateSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
+        # Saving updates the faculty's feedback summary
         feedback = serializer.save()
         
-        # Update faculty feedback summary
-        summary, created = FacultyFeedbackSummary.objects.get_or_create(faculty=feedback.faculty)
-        summary.update_summary()
-        
         # Return the full feedback object using the read serializer
         read_serializer = FacultyFeedbackSerializer(feedback)
         return Response(read_serializer.data, status=status.HTTP_201_CREATED)
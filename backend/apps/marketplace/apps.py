@@ -6,19 +6,5 @@ class MarketplaceConfig(AppConfig):
     name = 'apps.marketplace'
     verbose_name = 'Community Marketplace'
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def ready(self):
+        import apps.marketplace.signals  # noqa
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:12
+
+import apps.shared.storage
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('marketplace', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketplaceImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(max_length=255, storage=apps.shared.storage.get_content_addressed_storage, upload_to='marketplace/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='image_files', to='marketplace.marketplaceitem')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='marketplace_images', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Marketplace Image',
+                'verbose_name_plural': 'Marketplace Images',
+                'indexes': [models.Index(fields=['uploaded_by', 'item'], name='marketplace_uploade_16b302_idx')],
+            },
+        ),
+    ]
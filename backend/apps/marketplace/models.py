@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.shared.models.base import TimestampedModel
+from apps.shared.storage import get_content_addressed_storage
 
 User = get_user_model()
 
@@ -82,6 +83,52 @@ class MarketplaceItem(TimestampedModel):
         return f"{self.get_item_type_display()} - {self.title}"
 
 
+class MarketplaceImage(models.Model):
+    """
+    An uploaded marketplace image, holding its content-addressed blob reference.
+
+    Uploads start without an item; saving an item attaches the uploads its
+    `images` list points at and deletes the ones it no longer lists, which
+    releases their blobs (see signals.py).
+    """
+
+    item = models.ForeignKey(
+        MarketplaceItem,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='image_files'
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='marketplace_images'
+    )
+    file = models.FileField(
+        upload_to='marketplace/', storage=get_content_addressed_storage, max_length=255
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Marketplace Image'
+        verbose_name_plural = 'Marketplace Images'
+        indexes = [
+            models.Index(fields=['uploaded_by', 'item']),
+        ]
+
+    def __str__(self):
+        return self.file.name
+
+    @property
+    def blob_name(self):
+        """Name of the shared blob, which is what the listed image URLs end with"""
+        return self.file.storage.resolve(self.file.name)
+
+    def is_listed_in(self, urls):
+        blob_name = self.blob_name
+        return any(url.split('?')[0].endswith(blob_name) for url in urls if isinstance(url, str))
+
+
 class BookListing(TimestampedModel):
     """Book listing model"""
     
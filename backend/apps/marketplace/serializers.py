@@ -3,6 +3,7 @@ Serializers for marketplace app
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from apps.shared.services.image_service import ImageVariantService
 from .models import (
     MarketplaceItem, BookListing, RideListing, LostFoundItem,
     MarketplaceTransaction, MarketplaceFavorite
@@ -10,6 +11,9 @@ from .models import (
 
 User = get_user_model()
 
+# Longest side, in pixels, of the listing thumbnails
+LISTING_THUMBNAIL_SIZE = 512
+
 
 class MarketplaceItemSerializer(serializers.ModelSerializer):
     """Serializer for MarketplaceItem"""
@@ -18,6 +22,7 @@ class MarketplaceItemSerializer(serializers.ModelSerializer):
     ride_listing = serializers.SerializerMethodField()
     lost_found_item = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
+    image_thumbnails = serializers.SerializerMethodField()
     
     class Meta:
         model = MarketplaceItem
@@ -25,12 +30,16 @@ class MarketplaceItemSerializer(serializers.ModelSerializer):
             'id', 'item_type', 'title', 'description', 'status',
             'posted_by', 'posted_by_name', 'location', 'pickup_location',
             'dropoff_location', 'contact_phone', 'contact_email',
-            'images', 'tags', 'is_active', 'views_count',
+            'images', 'image_thumbnails', 'tags', 'is_active', 'views_count',
             'book_listing', 'ride_listing', 'lost_found_item',
             'is_favorited', 'created_at', 'updated_at',
         ]
         read_only_fields = ['posted_by', 'views_count', 'created_at', 'updated_at']
     
+    def get_image_thumbnails(self, obj):
+        """Resized variant endpoint for each image, None for images uploaded before variants existed"""
+        return [ImageVariantService.variant_url(url, LISTING_THUMBNAIL_SIZE) for url in obj.images or []]
+    
     def get_posted_by_name(self, obj):
         return f"{obj.posted_by.first_name} {obj.posted_by.last_name}".strip() or obj.posted_by.username
     
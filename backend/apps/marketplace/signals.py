@@ -0,0 +1,34 @@
+"""
+Signals for marketplace app
+"""
+from django.db.models import F, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import MarketplaceImage, MarketplaceItem
+
+
+@receiver(post_save, sender=MarketplaceItem)
+def sync_item_images(sender, instance, raw=False, **kwargs):
+    """
+    Match an item's uploads to the image URLs it lists
+
+    The poster's unattached uploads that the item lists are attached to it,
+    and attached uploads it no longer lists are deleted, releasing their blobs.
+    """
+    if raw:
+        return
+    urls = instance.images or []
+    uploads = MarketplaceImage.objects.filter(
+        Q(item=instance) | Q(item__isnull=True, uploaded_by_id=instance.posted_by_id)
+    ).order_by(F('item_id').asc(nulls_last=True), 'pk')
+    attached = set()
+    for image in uploads:
+        listed = image.is_listed_in(urls) and image.blob_name not in attached
+        if image.item_id is not None:
+            if listed:
+                attached.add(image.blob_name)
+            else:
+                image.delete()
+        elif listed:
+            attached.add(image.blob_name)
+            MarketplaceImage.objects.filter(pk=image.pk).update(item=instance)
@@ -0,0 +1,21 @@
+"""
+Celery tasks for marketplace app
+"""
+from celery import shared_task
+from datetime import timedelta
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def cleanup_unattached_images(max_age_hours=24):
+    """Delete uploads no item has listed within max_age_hours, releasing their blobs"""
+    from .models import MarketplaceImage
+    
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    deleted, _ = MarketplaceImage.objects.filter(item__isnull=True, created_at__lt=cutoff).delete()
+    if deleted:
+        logger.info(f"Deleted {deleted} unattached marketplace images")
+    return {'deleted': deleted, 'timestamp': timezone.now().isoformat()}
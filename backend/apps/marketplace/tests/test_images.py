@@ -0,0 +1,81 @@
+"""
+Test cases for marketplace image uploads and their blob references
+"""
+import shutil
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.marketplace.models import MarketplaceImage, MarketplaceItem
+from apps.shared.models import StoredBlob
+
+User = get_user_model()
+
+
+class MarketplaceImageTestCase(APITestCase):
+    """Test cases for attaching uploads to items and releasing them"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL_REDIRECT_PREFIX=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='seller',
+            email='seller@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _upload(self, content):
+        response = self.client.post(
+            '/api/marketplace/upload-image/',
+            {'image': SimpleUploadedFile('photo.png', content, content_type='image/png')},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['image_url']
+
+    def _item(self, images):
+        return MarketplaceItem.objects.create(
+            item_type='book', title='Calculus', description='Second hand', posted_by=self.user, images=images,
+        )
+
+    def test_item_attaches_and_releases_its_images(self):
+        """Test listed uploads are attached and unlisted or deleted ones release their blobs"""
+        first, second = self._upload(b'first image'), self._upload(b'second image')
+        self.assertEqual(StoredBlob.objects.count(), 2)
+
+        item = self._item([f'http://testserver{first}', second])
+        self.assertEqual(item.image_files.count(), 2)
+        self.assertFalse(MarketplaceImage.objects.filter(item__isnull=True).exists())
+
+        # Dropping an image from the list releases its blob
+        item.images = [second]
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertEqual(item.image_files.count(), 1)
+        self.assertEqual(list(StoredBlob.objects.values_list('ref_count', flat=True)), [1])
+
+        # Deleting the item releases the rest
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertFalse(MarketplaceImage.objects.exists())
+        self.assertFalse(StoredBlob.objects.exists())
+
+    def test_unlisted_uploads_stay_pending(self):
+        """Test uploads an item does not list are left for the poster's next item"""
+        url = self._upload(b'shared image')
+        self._item([])
+        self.assertTrue(MarketplaceImage.objects.get().item is None)
+
+        # The same picture listed twice is one reference; another upload of it stays pending
+        self._upload(b'shared image')
+        item = self._item([url, url])
+        self.assertEqual(item.image_files.count(), 1)
+        self.assertEqual(MarketplaceImage.objects.filter(item__isnull=True).count(), 1)
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
@@ -8,11 +8,10 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth import get_user_model
 from django.db.models import Q, Count
 from django.utils import timezone
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 import os
+from apps.shared.services.image_service import ImageVariantService
 from .models import (
-    MarketplaceItem, BookListing, RideListing, LostFoundItem,
+    MarketplaceItem, MarketplaceImage, BookListing, RideListing, LostFoundItem,
     MarketplaceTransaction, MarketplaceFavorite
 )
 from .serializers import (
@@ -498,22 +497,23 @@ def upload_marketplace_image(request):
                 'error': 'File must be an image'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Generate unique filename
+        # Generate filename; the stored name also embeds the content hash
         file_extension = os.path.splitext(image_file.name)[1]
-        filename = f'marketplace/{request.user.id}/{timezone.now().strftime("%Y%m%d_%H%M%S")}{file_extension}'
+        filename = f'{request.user.id}/{timezone.now().strftime("%Y%m%d_%H%M%S")}{file_extension}'
         
-        # Save file
-        saved_path = default_storage.save(filename, ContentFile(image_file.read()))
+        # Save file (identical images are stored once); the upload holds the
+        # blob reference until an item lists it and is released with the item
+        image = MarketplaceImage(uploaded_by=request.user)
+        image.file.save(filename, image_file)
+        saved_path = image.file.name
+        image_url = image.file.url
         
-        # Get URL
-        if hasattr(default_storage, 'url'):
-            image_url = default_storage.url(saved_path)
-        else:
-            # For local storage, construct URL
-            image_url = f'/media/{saved_path}'
+        # Thumbnails are generated in the background after commit
+        ImageVariantService.schedule(saved_path)
         
         return Response({
             'image_url': image_url,
+            'thumbnail_url': ImageVariantService.variant_url(saved_path),
             'message': 'Image uploaded successfully'
         }, status=status.HTTP_201_CREATED)
         
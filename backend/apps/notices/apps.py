@@ -6,4 +6,7 @@ from django.apps import AppConfig
 
 class NoticesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.notices'
\ No newline at end of file
+    name = 'apps.notices'
+    
+    def ready(self):
+        import apps.notices.signals  # noqa
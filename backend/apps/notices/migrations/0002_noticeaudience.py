@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_notice_audience(apps, schema_editor):
+    """Build audience rows for notices created before the table existed"""
+    Notice = apps.get_model('notices', 'Notice')
+    NoticeAudience = apps.get_model('notices', 'NoticeAudience')
+    rows = []
+    for notice in Notice.objects.only('id', 'target_branches', 'target_years').iterator():
+        values = set()
+        for branch in notice.target_branches or []:
+            if str(branch).strip():
+                values.add(('branch', str(branch).strip()))
+        for year in notice.target_years or []:
+            if str(year).strip():
+                values.add(('year', str(year).strip()))
+        rows.extend(
+            NoticeAudience(notice_id=notice.id, audience_kind=kind, value=value)
+            for kind, value in values
+        )
+    NoticeAudience.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoticeAudience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience_kind', models.CharField(choices=[('branch', 'Branch'), ('year', 'Year')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['status', 'visibility', 'publish_at'], name='notices_not_status_f130aa_idx'),
+        ),
+        migrations.AddField(
+            model_name='noticeaudience',
+            name='notice',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audience', to='notices.notice'),
+        ),
+        migrations.AddIndex(
+            model_name='noticeaudience',
+            index=models.Index(fields=['audience_kind', 'value', 'notice'], name='notices_not_audienc_4f71b7_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='noticeaudience',
+            unique_together={('notice', 'audience_kind', 'value')},
+        ),
+        migrations.RunPython(populate_notice_audience, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ Notices and Announcements models for KSIT Nexus
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.shared.storage import get_content_addressed_storage
 
 User = get_user_model()
 
@@ -62,7 +63,10 @@ class Notice(models.Model):
     )
     
     # Attachments
-    attachment = models.FileField(upload_to='notice_attachments/', blank=True, null=True)
+    attachment = models.FileField(
+        upload_to='notice_attachments/', storage=get_content_addressed_storage,
+        max_length=255, blank=True, null=True
+    )
     attachment_name = models.CharField(max_length=255, blank=True, null=True)
     
     # Scheduling
@@ -81,6 +85,9 @@ class Notice(models.Model):
     
     class Meta:
         ordering = ['-is_pinned', '-published_at', '-created_at']
+        indexes = [
+            models.Index(fields=['status', 'visibility', 'publish_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
@@ -95,6 +102,34 @@ class Notice(models.Model):
     def is_expired(self):
         return self.expires_at and self.expires_at <= timezone.now()
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded targeting so save() only rebuilds changed audiences
+        instance._saved_audience = instance.audience_values()
+        return instance
+    
+    def audience_values(self):
+        """Normalized (audience_kind, value) pairs for branch/year targeting"""
+        values = set()
+        for branch in self.target_branches or []:
+            if str(branch).strip():
+                values.add(('branch', str(branch).strip()))
+        for year in self.target_years or []:
+            if str(year).strip():
+                values.add(('year', str(year).strip()))
+        return values
+    
+    def sync_audience(self):
+        """Rebuild the NoticeAudience rows from target_branches/target_years"""
+        values = self.audience_values()
+        NoticeAudience.objects.filter(notice=self).delete()
+        NoticeAudience.objects.bulk_create([
+            NoticeAudience(notice=self, audience_kind=kind, value=value)
+            for kind, value in values
+        ])
+        self._saved_audience = values
+    
     def save(self, *args, **kwargs):
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
@@ -104,6 +139,32 @@ class Notice(models.Model):
             self.view_count = 0
             
         super().save(*args, **kwargs)
+        
+        # Keep the normalized audience table in step with the JSON targeting
+        if self.audience_values() != getattr(self, '_saved_audience', set()):
+            self.sync_audience()
+
+
+class NoticeAudience(models.Model):
+    """Normalized branch/year targeting of a notice, for indexed visibility joins"""
+    
+    AUDIENCE_KINDS = [
+        ('branch', 'Branch'),
+        ('year', 'Year'),
+    ]
+    
+    notice = models.ForeignKey(Notice, on_delete=models.CASCADE, related_name='audience')
+    audience_kind = models.CharField(max_length=10, choices=AUDIENCE_KINDS)
+    value = models.CharField(max_length=100)
+    
+    class Meta:
+        unique_together = ['notice', 'audience_kind', 'value']
+        indexes = [
+            models.Index(fields=['audience_kind', 'value', 'notice']),
+        ]
+    
+    def __str__(self):
+        return f"{self.notice_id} -> {self.audience_kind}={self.value}"
 
 
 class Announcement(models.Model):
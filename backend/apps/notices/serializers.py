@@ -3,7 +3,9 @@ Serializers for notices app
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from .models import Notice, Announcement, NoticeView
+from .services import NoticeViewCountService
 
 User = get_user_model()
 
@@ -51,6 +53,7 @@ class NoticeCreateSerializer(serializers.ModelSerializer):
 class NoticeListSerializer(serializers.ModelSerializer):
     """Simplified notice serializer for list views"""
     author = serializers.StringRelatedField(read_only=True)
+    view_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Notice
@@ -59,6 +62,10 @@ class NoticeListSerializer(serializers.ModelSerializer):
             'author', 'publish_at', 'expires_at', 'view_count', 'is_pinned',
             'created_at'
         ]
+    
+    def get_view_count(self, obj):
+        """Use the annotated viewer count when the queryset provides it"""
+        return getattr(obj, 'viewer_count', obj.view_count)
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
@@ -118,21 +125,17 @@ class NoticeViewCreateSerializer(serializers.Serializer):
     """Serializer for creating notice views"""
     notice_id = serializers.IntegerField()
     
+    def validate_notice_id(self, value):
+        if not Notice.objects.filter(id=value).exists():
+            raise serializers.ValidationError('Notice not found')
+        return value
+    
     def create(self, validated_data):
         notice_id = validated_data['notice_id']
         user = self.context['request'].user
         ip_address = self.context['request'].META.get('REMOTE_ADDR')
         
-        notice_view, created = NoticeView.objects.get_or_create(
-            notice_id=notice_id,
-            user=user,
-            defaults={'ip_address': ip_address}
-        )
-        
-        if created:
-            # Increment view count
-            notice = notice_view.notice
-            notice.view_count += 1
-            notice.save()
-        
-        return notice_view
+        # With Redis, views are buffered and written in bulk, so the notice
+        # row is not updated once per view
+        counted = NoticeViewCountService.record_view(notice_id, user.id, ip_address)
+        return {'notice_id': notice_id, 'counted': counted}
@@ -0,0 +1,7 @@
+from .visibility_service import NoticeVisibilityService
+from .view_count_service import NoticeViewCountService
+
+__all__ = [
+    'NoticeVisibilityService',
+    'NoticeViewCountService',
+]
@@ -0,0 +1,162 @@
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from apps.notices.models import Notice, NoticeView
+
+User = get_user_model()
+
+
+class NoticeViewCountService:
+    """
+    Buffers notice views so a popular notice is not rewritten on every view.
+
+    Views are deduplicated per (notice, user) with a cache key. With Redis as
+    the default cache they are accumulated in one shared hash (HSETNX per
+    view, HINCRBY per notice) that the beat task flushes to NoticeView and
+    Notice.view_count with one bulk insert and one UPDATE. Other cache
+    backends are per process, so a buffer there could only be drained by the
+    process that holds it; views are then written through immediately.
+    """
+
+    CACHE_PREFIX = 'notices:views'
+    SEEN_TIMEOUT = 60 * 60 * 24
+    FLUSH_LOCK_TIMEOUT = 60
+    BATCH_SIZE = 500
+
+    @staticmethod
+    def record_view(notice_id, user_id, ip_address=None):
+        """
+        Record a view of a notice by a user.
+
+        Returns False when the view was already recorded. With Redis nothing
+        is written to the database here; flush() persists buffered views.
+        """
+        seen_key = f"{NoticeViewCountService.CACHE_PREFIX}:seen:{notice_id}:{user_id}"
+        if not cache.add(seen_key, 1, NoticeViewCountService.SEEN_TIMEOUT):
+            return False
+
+        redis = NoticeViewCountService._redis()
+        if redis is None:
+            with transaction.atomic():
+                _, created = NoticeView.objects.get_or_create(
+                    notice_id=notice_id, user_id=user_id, defaults={'ip_address': ip_address},
+                )
+                if created:
+                    Notice.objects.filter(id=notice_id).update(view_count=F('view_count') + 1)
+            return created
+
+        buffer_key = NoticeViewCountService._buffer_key()
+        if redis.hsetnx(buffer_key, f"view:{notice_id}:{user_id}", ip_address or ''):
+            redis.hincrby(buffer_key, f"count:{notice_id}", 1)
+        return True
+
+    @staticmethod
+    def get_pending_counts():
+        """Buffered, not yet flushed view counts keyed by notice id"""
+        redis = NoticeViewCountService._redis()
+        if redis is None:
+            return {}
+        raw = redis.hgetall(NoticeViewCountService._buffer_key())
+        return NoticeViewCountService._decode(raw)[1]
+
+    @staticmethod
+    def flush():
+        """
+        Persist buffered views. Returns the number of new NoticeView rows.
+
+        Only one flush runs at a time. The buffer is renamed before reading so
+        views recorded meanwhile land in a fresh hash, and the renamed hash is
+        only deleted once the database write has committed.
+        """
+        redis = NoticeViewCountService._redis()
+        if redis is None:
+            return 0  # Views were written through
+
+        lock_key = f"{NoticeViewCountService.CACHE_PREFIX}:flush-lock"
+        if not cache.add(lock_key, 1, NoticeViewCountService.FLUSH_LOCK_TIMEOUT):
+            return 0
+        try:
+            from redis.exceptions import ResponseError
+
+            flushing_key = f"{NoticeViewCountService._buffer_key()}:flushing"
+            # A leftover hash means the previous flush failed; retry it first
+            if not redis.exists(flushing_key):
+                try:
+                    redis.rename(NoticeViewCountService._buffer_key(), flushing_key)
+                except ResponseError:
+                    return 0  # Nothing buffered
+            pending, counts = NoticeViewCountService._decode(redis.hgetall(flushing_key))
+            written = NoticeViewCountService._write(pending, counts)
+            redis.delete(flushing_key)
+            return written
+        finally:
+            cache.delete(lock_key)
+
+    @staticmethod
+    def _write(pending, counts):
+        """Bulk insert new NoticeView rows and bump view counts in one UPDATE"""
+        if not pending:
+            return 0
+        notice_ids = {notice_id for notice_id, user_id in pending}
+        user_ids = {user_id for notice_id, user_id in pending}
+
+        with transaction.atomic():
+            live_notices = set(Notice.objects.filter(id__in=notice_ids).values_list('id', flat=True))
+            live_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+            # Views persisted before the dedup key expired, or by a retried flush
+            existing = set(NoticeView.objects.filter(
+                notice_id__in=notice_ids, user_id__in=user_ids,
+            ).values_list('notice_id', 'user_id'))
+
+            rows = []
+            skipped = Counter()
+            for (notice_id, user_id), ip_address in pending.items():
+                if notice_id in live_notices and user_id in live_users and (notice_id, user_id) not in existing:
+                    rows.append(NoticeView(notice_id=notice_id, user_id=user_id, ip_address=ip_address or None))
+                else:
+                    skipped[notice_id] += 1
+            NoticeView.objects.bulk_create(rows, batch_size=NoticeViewCountService.BATCH_SIZE)
+
+            increments = {
+                notice_id: count - skipped[notice_id]
+                for notice_id, count in counts.items()
+                if notice_id in live_notices and count > skipped[notice_id]
+            }
+            if increments:
+                Notice.objects.filter(id__in=increments).update(view_count=F('view_count') + Case(
+                    *[When(id=notice_id, then=Value(count)) for notice_id, count in increments.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ))
+        return len(rows)
+
+    @staticmethod
+    def _decode(raw):
+        """Split a Redis buffer hash into pending views and per-notice counts"""
+        pending = {}
+        counts = Counter()
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            value = value.decode() if isinstance(value, bytes) else value
+            kind, _, rest = field.partition(':')
+            if kind == 'view':
+                notice_id, user_id = rest.split(':')
+                pending[(int(notice_id), int(user_id))] = value or None
+            elif kind == 'count':
+                counts[int(rest)] = int(value)
+        return pending, counts
+
+    @staticmethod
+    def _buffer_key():
+        return f"{NoticeViewCountService.CACHE_PREFIX}:buffer"
+
+    @staticmethod
+    def _redis():
+        """Raw Redis client behind the default cache, or None for other backends"""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            return None
@@ -0,0 +1,123 @@
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.notices.models import Notice, NoticeAudience, NoticeView
+from apps.shared.utils.cache import invalidate_on_commit
+from apps.shared.utils.metrics import record_cache
+
+
+class NoticeVisibilityService:
+    """Resolves which published notices a user may see"""
+
+    CACHE_PREFIX = 'notices:visible'
+    CACHE_TIMEOUT = 300
+
+    @staticmethod
+    def live_notices(now=None):
+        """Published notices that are past publish_at and not yet expired"""
+        now = now or timezone.now()
+        return Notice.objects.filter(
+            Q(status='published') &
+            Q(publish_at__lte=now) &
+            (Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+        )
+
+    @staticmethod
+    def audience_filter(user_type, branch=None, year=None):
+        """Q object matching notices targeted at a user type, branch and year"""
+        if user_type == 'student':
+            audience_q = Q(visibility__in=['all', 'students'])
+            if branch:
+                audience_q |= Q(
+                    visibility='specific_branch',
+                    id__in=NoticeAudience.objects.filter(
+                        audience_kind='branch', value=branch,
+                    ).values('notice_id'),
+                )
+            if year:
+                audience_q |= Q(
+                    visibility='specific_year',
+                    id__in=NoticeAudience.objects.filter(
+                        audience_kind='year', value=year,
+                    ).values('notice_id'),
+                )
+            return audience_q
+        if user_type == 'faculty':
+            return Q(visibility__in=['all', 'faculty'])
+        return Q()
+
+    @staticmethod
+    def get_audience(user):
+        """(user_type, branch, year) key describing what a user can see"""
+        branch = ''
+        year = ''
+        if user.user_type == 'student' and hasattr(user, 'student_profile'):
+            branch = str(getattr(user.student_profile, 'branch', '') or '').strip()
+            year = str(getattr(user.student_profile, 'year_of_study', '') or '').strip()
+        return user.user_type, branch, year
+
+    @staticmethod
+    def get_visible_notice_ids(user):
+        """
+        IDs of live notices visible to a user.
+
+        Cached per (user_type, branch, year). Keys embed a generation bumped on
+        every notice write, and expire no later than the next scheduled
+        publish or expiry so time-based changes are picked up too.
+        """
+        user_type, branch, year = NoticeVisibilityService.get_audience(user)
+        cache_key = (
+            f"{NoticeVisibilityService.CACHE_PREFIX}:{NoticeVisibilityService._generation()}:"
+            f"{user_type}:{branch}:{year}"
+        )
+        notice_ids = cache.get(cache_key)
+        record_cache('notice_visibility', notice_ids is not None)
+        if notice_ids is None:
+            now = timezone.now()
+            notice_ids = list(
+                NoticeVisibilityService.live_notices(now).filter(
+                    NoticeVisibilityService.audience_filter(user_type, branch, year)
+                ).values_list('id', flat=True)
+            )
+            cache.set(cache_key, notice_ids, NoticeVisibilityService._timeout_until_next_change(now))
+        return notice_ids
+
+    @staticmethod
+    def visible_notices(user):
+        """Queryset of live notices visible to a user"""
+        return NoticeVisibilityService.live_notices().filter(
+            id__in=NoticeVisibilityService.get_visible_notice_ids(user),
+        )
+
+    @staticmethod
+    def with_view_counts(queryset):
+        """Annotate unique viewer counts with a correlated COUNT subquery"""
+        views = NoticeView.objects.filter(
+            notice=OuterRef('pk'),
+        ).order_by().values('notice').annotate(total=Count('id')).values('total')
+        return queryset.annotate(
+            viewer_count=Coalesce(Subquery(views, output_field=IntegerField()), 0),
+        )
+
+    @staticmethod
+    def invalidate():
+        """Invalidate every cached visibility set"""
+        invalidate_on_commit(f"{NoticeVisibilityService.CACHE_PREFIX}:generation", generation=True)
+
+    @staticmethod
+    def _generation():
+        return cache.get(f"{NoticeVisibilityService.CACHE_PREFIX}:generation", 0)
+
+    @staticmethod
+    def _timeout_until_next_change(now):
+        """Seconds until the next scheduled publish or expiry, capped at CACHE_TIMEOUT"""
+        upcoming = Notice.objects.filter(status='published').aggregate(
+            next_publish=Min('publish_at', filter=Q(publish_at__gt=now)),
+            next_expiry=Min('expires_at', filter=Q(expires_at__gt=now)),
+        )
+        timeout = NoticeVisibilityService.CACHE_TIMEOUT
+        for moment in upcoming.values():
+            if moment:
+                timeout = min(timeout, max(1, int((moment - now).total_seconds()) + 1))
+        return timeout
@@ -0,0 +1,14 @@
+"""
+Signals for notices app
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Notice
+from .services import NoticeVisibilityService
+
+
+@receiver(post_save, sender=Notice)
+@receiver(post_delete, sender=Notice)
+def invalidate_notice_visibility(sender, instance, **kwargs):
+    """Drop cached visibility sets when a notice is published, edited or removed"""
+    NoticeVisibilityService.invalidate()
@@ -0,0 +1,19 @@
+"""
+Celery tasks for notices app
+"""
+from celery import shared_task
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_notice_views():
+    """Persist buffered notice views and view counts in bulk"""
+    from .services import NoticeViewCountService
+    
+    written = NoticeViewCountService.flush()
+    if written:
+        logger.info(f"Flushed {written} notice views")
+    return {'written': written, 'timestamp': timezone.now().isoformat()}
@@ -0,0 +1,169 @@
+"""
+Test cases for buffered notice view counting
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.notices.models import Notice, NoticeView
+from apps.notices.services import NoticeViewCountService
+from apps.shared.redis_stub import fake_redis_caches
+
+User = get_user_model()
+
+
+class NoticeViewTestBase(TestCase):
+    """A notice and its viewers"""
+
+    def setUp(self):
+        cache.clear()
+        NoticeViewCountService.flush()
+        self.author = User.objects.create_user(
+            username='viewauthor',
+            email='viewauthor@example.com',
+            password='testpass123',
+            user_type='faculty',
+        )
+        self.notice = Notice.objects.create(
+            author=self.author,
+            title='Exam schedule',
+            content='Exam schedule',
+            status='published',
+            publish_at=timezone.now(),
+        )
+
+    def _users(self, count):
+        User.objects.bulk_create([
+            User(username=f'viewer{index}', email=f'viewer{index}@example.com')
+            for index in range(count)
+        ])
+        return list(User.objects.filter(username__startswith='viewer').values_list('id', flat=True))
+
+
+class NoticeViewCountTestCase(NoticeViewTestBase):
+    """Test cases for NoticeViewCountService without Redis (views are written through)"""
+
+    def test_endpoint_dedups_and_writes_through(self):
+        """Test repeated views are counted once, and stored at once without Redis"""
+        client = APIClient()
+        client.force_authenticate(user=self.author)
+        responses = [
+            client.post(f'/api/notices/{self.notice.id}/view/', {'notice_id': self.notice.id})
+            for _ in range(3)
+        ]
+        self.assertEqual([response.status_code for response in responses], [201] * 3)
+        self.assertEqual([response.data['counted'] for response in responses], [True, False, False])
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.view_count, 1)
+        self.assertEqual(NoticeView.objects.get().ip_address, '127.0.0.1')
+        self.assertEqual(NoticeViewCountService.get_pending_counts(), {})
+        self.assertEqual(NoticeViewCountService.flush(), 0)
+
+        response = client.post('/api/notices/0/view/', {'notice_id': 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_views_already_persisted_are_not_recounted(self):
+        """Test views stored by another process (or before the dedup key expired) count once"""
+        user_ids = self._users(5)
+        for user_id in user_ids:
+            self.assertTrue(NoticeViewCountService.record_view(self.notice.id, user_id))
+        cache.clear()  # As in a worker that has not seen these views
+        for user_id in user_ids:
+            self.assertFalse(NoticeViewCountService.record_view(self.notice.id, user_id))
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.view_count, 5)
+        self.assertEqual(NoticeView.objects.filter(notice=self.notice).count(), 5)
+
+    def test_buffered_flush_touches_notice_row_once(self):
+        """Load test: a flushed burst of buffered views is one UPDATE with exact counts"""
+        user_ids = self._users(200)
+        other = Notice.objects.create(
+            author=self.author, title='Other', content='Other', status='published',
+        )
+        NoticeView.objects.create(notice=self.notice, user_id=user_ids[0])
+        Notice.objects.filter(id=self.notice.id).update(view_count=1)
+
+        # The Redis hash as record_view leaves it (HSETNX per view, HINCRBY per notice)
+        buffer = {f'view:{self.notice.id}:{user_id}'.encode(): b'10.0.0.1' for user_id in user_ids}
+        buffer.update({f'view:{other.id}:{user_id}'.encode(): b'' for user_id in user_ids[:10]})
+        buffer[f'count:{self.notice.id}'.encode()] = b'200'
+        buffer[f'count:{other.id}'.encode()] = b'10'
+        pending, counts = NoticeViewCountService._decode(buffer)
+
+        with CaptureQueriesContext(connection) as flushing:
+            self.assertEqual(NoticeViewCountService._write(pending, counts), 209)
+        notice_updates = [
+            query['sql'] for query in flushing.captured_queries
+            if query['sql'].startswith('UPDATE "notices_notice"')
+        ]
+        self.assertEqual(len(notice_updates), 1)
+
+        self.notice.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.notice.view_count, 200)
+        self.assertEqual(other.view_count, 10)
+        self.assertEqual(NoticeView.objects.filter(notice=self.notice).count(), 200)
+        self.assertEqual(
+            set(NoticeView.objects.filter(notice=other).values_list('user_id', flat=True)), set(user_ids[:10]),
+        )
+
+
+@override_settings(CACHES=fake_redis_caches())
+class RedisNoticeViewCountTestCase(NoticeViewTestBase):
+    """Test cases for buffered views and flush through django-redis on a fake Redis server"""
+
+    def test_endpoint_buffers_views(self):
+        """Test the endpoint buffers the view instead of writing it"""
+        client = APIClient()
+        client.force_authenticate(user=self.author)
+        for _ in range(2):
+            client.post(f'/api/notices/{self.notice.id}/view/', {'notice_id': self.notice.id})
+        self.assertFalse(NoticeView.objects.exists())
+        self.assertEqual(NoticeViewCountService.get_pending_counts(), {self.notice.id: 1})
+        self.assertEqual(NoticeViewCountService.flush(), 1)
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.view_count, 1)
+
+    def test_flushed_views_are_not_recounted(self):
+        """Test a view persisted before its dedup key expired is not counted again by a flush"""
+        user_id, = self._users(1)
+        self.assertTrue(NoticeViewCountService.record_view(self.notice.id, user_id))
+        self.assertEqual(NoticeViewCountService.flush(), 1)
+        cache.delete(f"{NoticeViewCountService.CACHE_PREFIX}:seen:{self.notice.id}:{user_id}")
+        self.assertTrue(NoticeViewCountService.record_view(self.notice.id, user_id))
+        self.assertEqual(NoticeViewCountService.flush(), 0)
+        self.notice.refresh_from_db()
+        self.assertEqual(self.notice.view_count, 1)
+
+    def test_recorded_burst_flushes_in_one_update(self):
+        """Load test: a burst of recorded views is buffered, then flushed in one UPDATE with exact counts"""
+        user_ids = self._users(300)
+        other = Notice.objects.create(
+            author=self.author, title='Other', content='Other', status='published',
+        )
+        with CaptureQueriesContext(connection) as recording:
+            for user_id in user_ids + user_ids[:50]:  # Repeat views are dropped
+                NoticeViewCountService.record_view(self.notice.id, user_id, ip_address='10.0.0.1')
+            for user_id in user_ids[:10]:
+                NoticeViewCountService.record_view(other.id, user_id)
+        self.assertEqual(len(recording.captured_queries), 0)
+        self.assertEqual(NoticeViewCountService.get_pending_counts(), {self.notice.id: 300, other.id: 10})
+
+        with CaptureQueriesContext(connection) as flushing:
+            self.assertEqual(NoticeViewCountService.flush(), 310)
+        notice_updates = [
+            query['sql'] for query in flushing.captured_queries
+            if query['sql'].startswith('UPDATE "notices_notice"')
+        ]
+        self.assertEqual(len(notice_updates), 1)
+
+        # The buffer was swapped out and emptied; later views start a new one
+        self.assertEqual(NoticeViewCountService.get_pending_counts(), {})
+        self.assertEqual(NoticeViewCountService.flush(), 0)
+        self.notice.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.notice.view_count, other.view_count), (300, 10))
+        self.assertEqual(NoticeView.objects.filter(notice=self.notice, ip_address='10.0.0.1').count(), 300)
@@ -0,0 +1,106 @@
+"""
+Test cases for the precomputed notice visibility index
+"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from apps.accounts.models import Student
+from apps.notices.models import Notice, NoticeAudience, NoticeView
+from apps.notices.services import NoticeVisibilityService
+
+User = get_user_model()
+
+
+class NoticeVisibilityTestCase(TestCase):
+    """Test cases for NoticeVisibilityService"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='noticeadmin',
+            email='noticeadmin@example.com',
+            password='testpass123',
+            user_type='admin',
+        )
+        self.student = User.objects.create_user(
+            username='noticestudent',
+            email='noticestudent@example.com',
+            password='testpass123',
+            user_type='student',
+        )
+        Student.objects.create(
+            user=self.student, student_id='S001', year_of_study=2, branch='CSE',
+        )
+        self.faculty = User.objects.create_user(
+            username='noticefaculty',
+            email='noticefaculty@example.com',
+            password='testpass123',
+            user_type='faculty',
+        )
+
+    def _notice(self, title, **kwargs):
+        defaults = {
+            'author': self.author,
+            'title': title,
+            'content': title,
+            'status': 'published',
+            'publish_at': timezone.now() - timedelta(hours=1),
+        }
+        defaults.update(kwargs)
+        return Notice.objects.create(**defaults)
+
+    def _titles(self, user):
+        return sorted(NoticeVisibilityService.visible_notices(user).values_list('title', flat=True))
+
+    def test_branch_and_year_targeting(self):
+        """Test targeted notices are matched through the audience index"""
+        self._notice('All')
+        self._notice('Faculty only', visibility='faculty')
+        self._notice('CSE', visibility='specific_branch', target_branches=['CSE', 'ECE'])
+        self._notice('ME', visibility='specific_branch', target_branches=['ME'])
+        self._notice('Year 2', visibility='specific_year', target_years=[2])
+        self._notice('Year 3', visibility='specific_year', target_years=['3'])
+
+        self.assertEqual(self._titles(self.student), ['All', 'CSE', 'Year 2'])
+        self.assertEqual(self._titles(self.faculty), ['All', 'Faculty only'])
+        self.assertEqual(len(self._titles(self.author)), 6)
+        self.assertEqual(NoticeAudience.objects.filter(audience_kind='branch').count(), 3)
+
+    def test_retargeting_rebuilds_audience(self):
+        """Test editing targets replaces audience rows and invalidates cached sets"""
+        notice = self._notice('Targeted', visibility='specific_branch', target_branches=['ME'])
+        self.assertEqual(self._titles(self.student), [])
+
+        notice.target_branches = ['CSE']
+        notice.save()
+        self.assertEqual(
+            list(notice.audience.values_list('value', flat=True)), ['CSE'],
+        )
+        self.assertEqual(self._titles(self.student), ['Targeted'])
+
+    def test_scheduled_and_expired_notices(self):
+        """Test unpublished, scheduled and expired notices are hidden"""
+        self._notice('Draft', status='draft')
+        self._notice('Scheduled', publish_at=timezone.now() + timedelta(hours=1))
+        expiring = self._notice('Expiring', expires_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self._titles(self.student), ['Expiring'])
+
+        # Expiry is enforced even while the cached id set is still warm
+        Notice.objects.filter(pk=expiring.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self._titles(self.student), [])
+
+    def test_list_view_query_count(self):
+        """Test the list endpoint annotates view counts instead of prefetching views"""
+        for index in range(5):
+            notice = self._notice(f'Notice {index}')
+            NoticeView.objects.create(notice=notice, user=self.faculty)
+        self.client.force_login(self.student)
+        self.client.get('/api/notices/')
+
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/notices/')
+        self.assertEqual(response.status_code, 200)
+        results = response.json().get('results', response.json())
+        self.assertEqual({item['view_count'] for item in results}, {1})
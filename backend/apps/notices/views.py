@@ -10,10 +10,11 @@ from django.db.models import Q
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from .models import Notice, Announcement, NoticeView
+from .services import NoticeVisibilityService
 from .serializers import (
     NoticeSerializer, NoticeCreateSerializer, NoticeListSerializer,
     NoticeDraftSerializer, AnnouncementSerializer, AnnouncementCreateSerializer,
-    NoticeViewSerializer, NoticeViewCreateSerializer
+    NoticeViewCreateSerializer
 )
 
 User = get_user_model()
@@ -52,70 +53,10 @@ class NoticeListCreateView(generics.ListCreateAPIView):
         serializer.save(author=user)
     
     def get_queryset(self):
-        user = self.request.user
-        now = timezone.now()
-        
-        # Filter based on user type and visibility
-        base_queryset = Notice.objects.filter(
-            Q(status='published') & 
-            Q(publish_at__lte=now) & 
-            (Q(expires_at__isnull=True) | Q(expires_at__gt=now))
-        ).select_related('author').prefetch_related('views')
-        
-        # Apply visibility filters
-        if user.user_type == 'student':
-            # Get all notices that are visible to students
-            student_notices = base_queryset.filter(
-                Q(visibility='all') | 
-                Q(visibility='students')
-            )
-            
-            # For specific branch/year targeting, we'll filter in Python
-            # since SQLite doesn't support JSONField contains lookup
-            specific_branch_notices = base_queryset.filter(visibility='specific_branch')
-            specific_year_notices = base_queryset.filter(visibility='specific_year')
-            
-            # Get user's branch and year info
-            user_branch = ''
-            user_year = ''
-            if hasattr(user, 'student_profile'):
-                user_branch = getattr(user.student_profile, 'branch', '')
-                user_year = getattr(user.student_profile, 'year_of_study', '')
-            
-            # Filter specific branch notices in Python
-            filtered_branch_notices = []
-            for notice in specific_branch_notices:
-                if user_branch in (notice.target_branches or []):
-                    filtered_branch_notices.append(notice.id)
-            
-            # Filter specific year notices in Python
-            filtered_year_notices = []
-            for notice in specific_year_notices:
-                if user_year in (notice.target_years or []):
-                    filtered_year_notices.append(notice.id)
-            
-            # Get all notice IDs that should be visible
-            visible_notice_ids = set()
-            
-            # Add student notices
-            visible_notice_ids.update(student_notices.values_list('id', flat=True))
-            
-            # Add filtered branch notices
-            visible_notice_ids.update(filtered_branch_notices)
-            
-            # Add filtered year notices
-            visible_notice_ids.update(filtered_year_notices)
-            
-            # Return the final queryset with all visible notices
-            return base_queryset.filter(id__in=visible_notice_ids)
-            
-        elif user.user_type == 'faculty':
-            return base_queryset.filter(
-                Q(visibility='all') | 
-                Q(visibility='faculty')
-            )
-        
-        return base_queryset
+        # Visibility is resolved through the indexed audience table and cached
+        # per (user type, branch, year); view counts come from an annotation
+        queryset = NoticeVisibilityService.visible_notices(self.request.user).select_related('author')
+        return NoticeVisibilityService.with_view_counts(queryset)
 
 
 class NoticeDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -130,7 +71,7 @@ class NoticeDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Show published notices and user's own notices
         return Notice.objects.filter(
             Q(status='published', publish_at__lte=now) | Q(author=user)
-        ).select_related('author', 'approved_by').prefetch_related('views')
+        ).select_related('author', 'approved_by')
 
 
 class NoticeViewView(generics.CreateAPIView):
@@ -141,10 +82,11 @@ class NoticeViewView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            notice_view = serializer.save()
+            result = serializer.save()
             return Response({
                 'message': 'View recorded successfully',
-                'view': NoticeViewSerializer(notice_view).data
+                'notice_id': result['notice_id'],
+                'counted': result['counted'],
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -215,7 +157,9 @@ class MyNoticesView(generics.ListAPIView):
     serializer_class = NoticeListSerializer
     
     def get_queryset(self):
-        return Notice.objects.filter(author=self.request.user).select_related('author')
+        return NoticeVisibilityService.with_view_counts(
+            Notice.objects.filter(author=self.request.user).select_related('author')
+        )
 
 
 class DraftNoticesView(generics.ListCreateAPIView):
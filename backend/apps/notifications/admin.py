@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import Notification, NotificationPreference, NotificationTemplate, NotificationLog
 from .models_digest import NotificationDigest, NotificationTier, NotificationSummary, NotificationPriorityRule
-from .fcm_models import FCMToken, PushNotification, FCMNotificationTemplate
+from .fcm_models import FCMToken, FCMTopicSubscription, PushNotification, FCMNotificationTemplate
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -17,6 +17,14 @@ class FCMTokenAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'token']
     readonly_fields = ['created_at', 'updated_at', 'last_used']
 
+@admin.register(FCMTopicSubscription)
+class FCMTopicSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ['topic', 'token', 'created_at']
+    list_filter = ['topic']
+    search_fields = ['topic', 'token__user__username']
+    raw_id_fields = ['token']
+    readonly_fields = ['created_at']
+
 @admin.register(PushNotification)
 class PushNotificationAdmin(admin.ModelAdmin):
     list_display = ['title', 'notification_type', 'status', 'created_at', 'sent_at']
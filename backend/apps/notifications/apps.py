@@ -11,3 +11,7 @@ class NotificationsConfig(AppConfig):
     def ready(self):
         from .signals import register_signals
         register_signals()
+        
+        from apps.shared.services import StatsService
+        from .models import Notification
+        StatsService.register(Notification)
@@ -41,12 +41,48 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(minute='*'),  # Every minute
     },
     
+    # Incremental Google Calendar sync every 5 minutes
+    'sync-google-calendars': {
+        'task': 'apps.calendars.tasks.sync_google_calendars',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
+    
+    # Flush buffered notice views every 30 seconds
+    'flush-notice-views': {
+        'task': 'apps.notices.tasks.flush_notice_views',
+        'schedule': 30.0,  # Every 30 seconds
+    },
+    
+    # Deliver scheduled and leftover push notifications every 30 seconds
+    'deliver-push-notifications': {
+        'task': 'apps.notifications.tasks.deliver_push_notifications',
+        'schedule': 30.0,  # Every 30 seconds
+    },
+    
+    # Reconcile faculty feedback summaries nightly at 2:30 AM
+    'reconcile-feedback-summaries': {
+        'task': 'apps.feedback.tasks.reconcile_feedback_summaries',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    
+    # Move untouched cases through SLA states every 5 minutes
+    'sweep-sla-states': {
+        'task': 'apps.faculty_admin.tasks.sweep_sla_states_task',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
+    
     # Generate operational alerts every 15 minutes
     'generate-operational-alerts': {
         'task': 'apps.faculty_admin.tasks.generate_operational_alerts_task',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
     
+    # Release marketplace uploads never attached to an item, daily at 3:30 AM
+    'cleanup-marketplace-images': {
+        'task': 'apps.marketplace.tasks.cleanup_unattached_images',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    
     # Calculate predictive metrics every hour
     'calculate-predictive-metrics': {
         'task': 'apps.faculty_admin.tasks.calculate_predictive_metrics_task',
@@ -2,24 +2,57 @@
 WebSocket consumers for real-time features
 """
 
+import asyncio
 import json
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.shared.services import StatsService
+from apps.shared.utils.metrics import ConnectionMetricsMixin
 from .models import Notification
-from apps.study_groups.models import StudyGroup, GroupMessage
+from apps.study_groups.models import StudyGroup, GroupMembership, GroupMessage
+from apps.study_groups.services import GroupChatService
 from apps.reservations.models import Reservation
 
 User = get_user_model()
 
 
-class NotificationConsumer(AsyncWebsocketConsumer):
-    """Consumer for real-time notifications"""
+class NotificationConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
+    """
+    Consumer for real-time notifications of the authenticated user.
+
+    The user comes from the JWT resolved by JWTAuthMiddleware; a user id in
+    the URL must match it. On connect the unread backlog is sent as a single
+    'backlog' frame carrying a cursor (the highest notification id sent);
+    reconnecting with ?cursor=<id> resumes after it. Pushes arriving within
+    COALESCE_WINDOW go out as one frame, and read acks received in the same
+    window are applied with one UPDATE.
+    """
+    
+    BACKLOG_LIMIT = 50
+    COALESCE_WINDOW = 0.05  # seconds
+    MAX_PENDING = 100
+    MAX_MESSAGE_SIZE = 8192
     
     async def connect(self):
-        self.user_id = self.scope['url_route']['kwargs']['user_id']
+        self.room_group_name = None
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        
+        url_user_id = self.scope['url_route']['kwargs'].get('user_id')
+        if url_user_id not in (None, 'me', str(user.id)):
+            await self.close(code=4403)
+            return
+        
+        self.user_id = user.id
         self.room_group_name = f'notifications_{self.user_id}'
+        self.pending_notifications = []
+        self.pending_read_ids = set()
+        self.flush_task = None
         
         # Join room group
         await self.channel_layer.group_add(
@@ -29,96 +62,166 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         
         await self.accept()
         
-        # Send any pending notifications
-        await self.send_pending_notifications()
+        # Subscribing first means nothing is lost; clients dedup by id
+        cursor = parse_qs(self.scope.get('query_string', b'').decode()).get('cursor')
+        await self.send_backlog(int(cursor[0]) if cursor and cursor[0].isdigit() else None)
     
     async def disconnect(self, close_code):
+        if not self.room_group_name:
+            return
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        # Read acks still waiting for the window are applied, pushes are
+        # dropped (they remain in the unread backlog)
+        if self.pending_read_ids:
+            await self.apply_read_acks(self.pending_read_ids)
+            self.pending_read_ids = set()
+        
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
     
-    async def receive(self, text_data):
-        data = json.loads(text_data)
+    async def receive(self, text_data=None, bytes_data=None):
+        if text_data is None:
+            return
+        if len(text_data) > self.MAX_MESSAGE_SIZE:
+            await self.close(code=1009)
+            return
+        try:
+            data = json.loads(text_data)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await self.send(text_data=json.dumps({'type': 'error', 'message': 'Invalid message'}))
+            return
         message_type = data.get('type')
         
         if message_type == 'mark_read':
-            notification_id = data.get('notification_id')
-            await self.mark_notification_read(notification_id)
+            notification_ids = data.get('notification_ids')
+            if not isinstance(notification_ids, list):
+                notification_ids = [data.get('notification_id')]
+            self.pending_read_ids.update(
+                int(notification_id) for notification_id in notification_ids
+                if str(notification_id).isdigit()
+            )
+            self.schedule_flush()
         elif message_type == 'mark_all_read':
-            await self.mark_all_notifications_read()
+            self.pending_read_ids = set()
+            updated = await self.mark_all_notifications_read()
+            await self.send(text_data=json.dumps({
+                'type': 'read_ack',
+                'all': True,
+                'updated': updated,
+            }))
     
     async def send_notification(self, event):
-        """Send notification to WebSocket"""
-        notification = event['notification']
-        
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
-            'notification': notification
-        }))
-    
-    async def send_pending_notifications(self):
-        """Send any unread notifications on connect"""
-        notifications = await self.get_unread_notifications()
-        for notification in notifications:
+        """Buffer a pushed notification for the next coalesced frame"""
+        self.pending_notifications.append(event['notification'])
+        if len(self.pending_notifications) >= self.MAX_PENDING:
+            await self.flush_notifications()
+        else:
+            self.schedule_flush()
+    
+    def schedule_flush(self):
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_after_window())
+    
+    async def flush_after_window(self):
+        await asyncio.sleep(self.COALESCE_WINDOW)
+        self.flush_task = None
+        await self.flush_notifications()
+        if self.pending_read_ids:
+            notification_ids, self.pending_read_ids = self.pending_read_ids, set()
+            updated = await self.apply_read_acks(notification_ids)
             await self.send(text_data=json.dumps({
-                'type': 'notification',
-                'notification': notification
+                'type': 'read_ack',
+                'notification_ids': sorted(notification_ids),
+                'updated': updated,
             }))
     
+    async def flush_notifications(self):
+        """Send buffered pushes: one 'notification' frame, or one 'notifications' frame for a burst"""
+        if not self.pending_notifications:
+            return
+        notifications, self.pending_notifications = self.pending_notifications, []
+        cursor = max(int(notification['id']) for notification in notifications)
+        if len(notifications) == 1:
+            frame = {'type': 'notification', 'notification': notifications[0], 'cursor': cursor}
+        else:
+            frame = {'type': 'notifications', 'notifications': notifications, 'cursor': cursor}
+        await self.send(text_data=json.dumps(frame))
+    
+    async def send_backlog(self, cursor):
+        """Send unread notifications as one frame, oldest first"""
+        notifications, has_more = await self.get_unread_notifications(cursor)
+        if notifications:
+            cursor = max(int(notification['id']) for notification in notifications)
+        await self.send(text_data=json.dumps({
+            'type': 'backlog',
+            'notifications': notifications,
+            'cursor': cursor,
+            'has_more': has_more,
+        }))
+    
     @database_sync_to_async
-    def get_unread_notifications(self):
-        """Get unread notifications for user"""
-        try:
-            user = User.objects.get(id=self.user_id)
-            notifications = Notification.objects.filter(
-                user=user,
-                is_read=False
-            ).order_by('-created_at')[:10]
-            
-            return [
-                {
-                    'id': str(notification.id),
-                    'title': notification.title,
-                    'message': notification.message,
-                    'type': notification.type,
-                    'is_read': notification.is_read,
-                    'created_at': notification.created_at.isoformat(),
-                }
-                for notification in notifications
-            ]
-        except User.DoesNotExist:
-            return []
+    def get_unread_notifications(self, cursor=None):
+        """
+        Unread notifications after cursor (or the newest ones without a
+        cursor), at most BACKLOG_LIMIT; has_more tells the client to page
+        through the REST list for the rest.
+        """
+        queryset = Notification.objects.filter(user_id=self.user_id, is_read=False)
+        if cursor is not None:
+            notifications = list(queryset.filter(id__gt=cursor).order_by('id')[:self.BACKLOG_LIMIT + 1])
+            has_more = len(notifications) > self.BACKLOG_LIMIT
+            notifications = notifications[:self.BACKLOG_LIMIT]
+        else:
+            notifications = list(queryset.order_by('-id')[:self.BACKLOG_LIMIT + 1])
+            has_more = len(notifications) > self.BACKLOG_LIMIT
+            notifications = notifications[:self.BACKLOG_LIMIT][::-1]
+        return [notification.to_realtime_payload() for notification in notifications], has_more
     
     @database_sync_to_async
-    def mark_notification_read(self, notification_id):
-        """Mark a specific notification as read"""
-        try:
-            notification = Notification.objects.get(
-                id=notification_id,
-                user_id=self.user_id
-            )
-            notification.is_read = True
-            notification.save()
-        except Notification.DoesNotExist:
-            pass
+    def apply_read_acks(self, notification_ids):
+        """Mark the acknowledged notifications as read in one UPDATE"""
+        now = timezone.now()
+        updated = Notification.objects.filter(
+            id__in=notification_ids,
+            user_id=self.user_id,
+            is_read=False
+        ).update(is_read=True, read_at=now, updated_at=now)
+        StatsService.invalidate(Notification)
+        return updated
     
     @database_sync_to_async
     def mark_all_notifications_read(self):
         """Mark all notifications as read for user"""
-        Notification.objects.filter(
+        now = timezone.now()
+        updated = Notification.objects.filter(
             user_id=self.user_id,
             is_read=False
-        ).update(is_read=True)
+        ).update(is_read=True, read_at=now, updated_at=now)
+        StatsService.invalidate(Notification)
+        return updated
 
 
-class StudyGroupConsumer(AsyncWebsocketConsumer):
-    """Consumer for study group updates"""
+class StudyGroupConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
+    """Consumer for study group updates and chat message pushes"""
     
     async def connect(self):
         self.group_id = self.scope['url_route']['kwargs']['group_id']
-        self.room_group_name = f'study_group_{self.group_id}'
+        self.room_group_name = None
+        
+        # Only authenticated group members may subscribe to a group
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated or not await self.is_group_member(user):
+            await self.close(code=4403)
+            return
+        
+        self.room_group_name = GroupChatService.group_name(self.group_id)
         
         # Join room group
         await self.channel_layer.group_add(
@@ -127,13 +230,57 @@ class StudyGroupConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
+        
+        # Replay messages missed while disconnected (?since=<last message id>).
+        # Subscribing first means nothing is lost; clients dedup by message id.
+        since = parse_qs(self.scope.get('query_string', b'').decode()).get('since')
+        if since and since[0].isdigit():
+            await self.send_missed_messages(int(since[0]))
     
     async def disconnect(self, close_code):
         # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if self.room_group_name:
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+    
+    async def chat_message(self, event):
+        """Send a newly created group message to WebSocket"""
+        await self.send(text_data=json.dumps({
+            'type': 'chat_message',
+            'message': event['message']
+        }))
+    
+    async def send_missed_messages(self, since_id):
+        """Send messages created after since_id, oldest first"""
+        messages, has_more = await self.get_messages_since(since_id)
+        for message in messages:
+            await self.send(text_data=json.dumps({
+                'type': 'chat_message',
+                'message': message
+            }))
+        if has_more:
+            # Too many to replay; the client pages through the delta endpoint
+            await self.send(text_data=json.dumps({
+                'type': 'sync_required',
+                'last_id': messages[-1]['id'],
+            }))
+    
+    @database_sync_to_async
+    def is_group_member(self, user):
+        """Check the user has an active membership in this group"""
+        return GroupMembership.objects.filter(
+            group_id=self.group_id,
+            user=user,
+            is_active=True
+        ).exists()
+    
+    @database_sync_to_async
+    def get_messages_since(self, since_id):
+        """Serialized messages of this group newer than since_id"""
+        messages, has_more = GroupChatService.messages_since(self.group_id, since_id)
+        return [GroupChatService.serialize_message(message) for message in messages], has_more
     
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -235,7 +382,7 @@ class StudyGroupConsumer(AsyncWebsocketConsumer):
             return None
 
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
     """Consumer for study group chat"""
     
     async def connect(self):
@@ -356,7 +503,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
 
 
-class ReservationConsumer(AsyncWebsocketConsumer):
+class ReservationConsumer(ConnectionMetricsMixin, AsyncWebsocketConsumer):
     """Consumer for live seat availability updates"""
     
     async def connect(self):
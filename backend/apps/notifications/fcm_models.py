@@ -42,6 +42,25 @@ class FCMToken(models.Model):
         return f"{self.user.username} - {self.platform} - {self.token[:20]}..."
 
 
+class FCMTopicSubscription(models.Model):
+    """Membership of an FCM token in a notification topic"""
+    
+    topic = models.CharField(max_length=100)
+    token = models.ForeignKey(
+        FCMToken,
+        on_delete=models.CASCADE,
+        related_name='topic_subscriptions'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'fcm_topic_subscriptions'
+        unique_together = ['topic', 'token']  # Index on (topic, token) serves topic fan-out
+    
+    def __str__(self):
+        return f"{self.topic} - {self.token_id}"
+
+
 class PushNotification(models.Model):
     """Push notification model for tracking sent notifications"""
     
@@ -100,6 +119,7 @@ class PushNotification(models.Model):
     error_message = models.TextField(blank=True, null=True)
     retry_count = models.PositiveIntegerField(default=0)
     max_retries = models.PositiveIntegerField(default=3)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         db_table = 'push_notifications'
@@ -2,12 +2,12 @@
 FCM Service for sending push notifications
 """
 
-import json
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.utils import timezone
 from .fcm_models import FCMToken, PushNotification
-import requests
+from .services.topic_service import FCMTopicService
 
 
 class FCMService:
@@ -15,55 +15,41 @@ class FCMService:
     
     def __init__(self):
         self.server_key = getattr(settings, 'FCM_SERVER_KEY', None)
-        self.fcm_url = 'https://fcm.googleapis.com/fcm/send'
+        self.fcm_url = getattr(settings, 'FCM_URL', None) or 'https://fcm.googleapis.com/fcm/send'
         
         if not self.server_key:
             raise ValueError('FCM_SERVER_KEY not configured')
     
     async def send_notification(self, push_notification):
-        """Send push notification to target users"""
+        """Send push notification to target users in multicast batches"""
         try:
-            # Get target FCM tokens
-            fcm_tokens = self._get_target_tokens(push_notification)
-            
-            if not fcm_tokens:
-                return False
-            
-            # Prepare notification payload
-            payload = self._prepare_payload(push_notification)
-            
-            # Send to each token
-            success_count = 0
-            for token in fcm_tokens:
-                if await self._send_to_token(token, payload):
-                    success_count += 1
-                    # Update last used timestamp
-                    token.last_used = timezone.now()
-                    token.save(update_fields=['last_used'])
-            
-            # Update push notification with FCM tokens
-            push_notification.fcm_tokens.set(fcm_tokens)
-            
-            return success_count > 0
+            loop = asyncio.get_event_loop()
+            stats = await loop.run_in_executor(None, self._deliver, push_notification)
+            return stats['sent'] > 0
             
         except Exception as e:
             print(f"Error sending notification: {e}")
             return False
     
+    def _deliver(self, push_notification):
+        """Deliver one notification through the batching delivery worker"""
+        from .services.push_delivery_service import PushDeliveryWorker
+        with PushDeliveryWorker(self.server_key, self.fcm_url) as worker:
+            with ThreadPoolExecutor(max_workers=worker.concurrency) as executor:
+                return worker.deliver([push_notification], executor)
+    
     async def send_topic_notification(self, topic, title, body, data=None):
         """Send notification to topic subscribers"""
         try:
-            payload = {
-                'to': f'/topics/{topic}',
-                'notification': {
-                    'title': title,
-                    'body': body,
-                },
-                'data': data or {},
-                'priority': 'high',
-            }
-            
-            return await self._send_payload(payload)
+            loop = asyncio.get_event_loop()
+            push_notification = await loop.run_in_executor(None, lambda: PushNotification.objects.create(
+                title=title,
+                body=body,
+                target_topic=topic,
+                data=data or {},
+                status='sending',
+            ))
+            return await self.send_notification(push_notification)
             
         except Exception as e:
             print(f"Error sending topic notification: {e}")
@@ -72,13 +58,8 @@ class FCMService:
     async def subscribe_to_topic(self, topic, fcm_tokens):
         """Subscribe FCM tokens to topic"""
         try:
-            # This would typically use the FCM Admin SDK
-            # For now, we'll just mark the subscription in our database
-            for token in fcm_tokens:
-                # In a real implementation, you would call FCM API to subscribe
-                # For now, we'll just return True
-                pass
-            
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, FCMTopicService.subscribe, topic, fcm_tokens)
             return True
             
         except Exception as e:
@@ -88,13 +69,8 @@ class FCMService:
     async def unsubscribe_from_topic(self, topic, fcm_tokens):
         """Unsubscribe FCM tokens from topic"""
         try:
-            # This would typically use the FCM Admin SDK
-            # For now, we'll just mark the unsubscription in our database
-            for token in fcm_tokens:
-                # In a real implementation, you would call FCM API to unsubscribe
-                # For now, we'll just return True
-                pass
-            
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, FCMTopicService.unsubscribe, topic, fcm_tokens)
             return True
             
         except Exception as e:
@@ -103,33 +79,18 @@ class FCMService:
     
     def _get_target_tokens(self, push_notification):
         """Get FCM tokens for push notification targets"""
-        tokens = []
-        
-        # Get tokens from target users
-        if push_notification.target_users.exists():
-            user_tokens = FCMToken.objects.filter(
-                user__in=push_notification.target_users.all(),
-                is_active=True
-            )
-            tokens.extend(user_tokens)
-        
-        # Get tokens from target topic (if implemented)
-        if push_notification.target_topic:
-            # In a real implementation, you would query tokens by topic
-            # For now, we'll get all active tokens
-            topic_tokens = FCMToken.objects.filter(is_active=True)
-            tokens.extend(topic_tokens)
-        
-        return list(set(tokens))  # Remove duplicates
+        from .services.push_delivery_service import PushDeliveryWorker
+        return PushDeliveryWorker.resolve_tokens([push_notification])[push_notification.id]
     
-    def _prepare_payload(self, push_notification):
+    @staticmethod
+    def _prepare_payload(push_notification):
         """Prepare FCM payload for notification"""
         payload = {
             'notification': {
                 'title': push_notification.title,
                 'body': push_notification.body,
             },
-            'data': push_notification.data or {},
+            'data': dict(push_notification.data or {}),
             'priority': 'high',
         }
         
@@ -139,48 +100,6 @@ class FCMService:
         
         return payload
     
-    async def _send_to_token(self, fcm_token, payload):
-        """Send notification to specific FCM token"""
-        try:
-            payload['to'] = fcm_token.token
-            
-            return await self._send_payload(payload)
-            
-        except Exception as e:
-            print(f"Error sending to token {fcm_token.token}: {e}")
-            return False
-    
-    async def _send_payload(self, payload):
-        """Send payload to FCM"""
-        try:
-            headers = {
-                'Authorization': f'key={self.server_key}',
-                'Content-Type': 'application/json',
-            }
-            
-            # Use asyncio to run the request in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(
-                    self.fcm_url,
-                    headers=headers,
-                    data=json.dumps(payload),
-                    timeout=30
-                )
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('success', 0) > 0
-            else:
-                print(f"FCM API error: {response.status_code} - {response.text}")
-                return False
-                
-        except Exception as e:
-            print(f"Error sending FCM payload: {e}")
-            return False
-    
     async def send_bulk_notifications(self, notifications):
         """Send multiple notifications efficiently"""
         try:
@@ -0,0 +1,108 @@
+"""
+Local stand-in for the FCM legacy HTTP API, for tests and delivery benchmarks
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubFCMServer:
+    """
+    Minimal FCM /fcm/send endpoint on localhost.
+
+    Accepts `to` and `registration_ids` payloads and answers with one result
+    per token: tokens starting with INVALID_PREFIX get NotRegistered, the rest
+    a message_id. The next `fail_requests` requests get a 503 instead. Each
+    request waits `latency` seconds to model the network.
+    Records request count, tokens seen and peak concurrent requests.
+    """
+
+    INVALID_PREFIX = 'invalid'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.fail_requests = 0
+        self.requests = 0
+        self.tokens = 0
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/fcm/send'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, so pooled sessions reuse connections
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                tokens = body.get('registration_ids') or ([body['to']] if body.get('to') else [])
+                with stub._lock:
+                    stub.requests += 1
+                    stub.tokens += len(tokens)
+                    stub.connections.add(self.client_address)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    unavailable = stub.fail_requests > 0
+                    stub.fail_requests -= unavailable
+                if unavailable:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    results = [
+                        {'error': 'NotRegistered'} if token.startswith(stub.INVALID_PREFIX)
+                        else {'message_id': f'0:{index}'}
+                        for index, token in enumerate(tokens)
+                    ]
+                    failures = sum(1 for result in results if 'error' in result)
+                    payload = json.dumps({
+                        'multicast_id': stub.requests,
+                        'success': len(results) - failures,
+                        'failure': failures,
+                        'canonical_ids': 0,
+                        'results': results,
+                    }).encode()
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -7,13 +7,14 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.conf import settings
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
-import asyncio
 from .fcm_models import FCMToken, PushNotification, FCMNotificationTemplate
 from .fcm_serializers import FCMTokenSerializer, PushNotificationSerializer, NotificationTemplateSerializer
-from .fcm_service import FCMService
+from .services.push_delivery_service import PushDeliveryWorker
+from .services.topic_service import FCMTopicService
 
 
 class FCMTokenListCreateView(generics.ListCreateAPIView):
@@ -58,10 +59,12 @@ def register_fcm_token(request):
             )
         
         # Deactivate old tokens for the same user and platform
-        FCMToken.objects.filter(
+        replaced_ids = list(FCMToken.objects.filter(
             user=request.user,
-            platform=platform
-        ).update(is_active=False)
+            platform=platform,
+            is_active=True
+        ).exclude(token=token).values_list('id', flat=True))
+        FCMToken.objects.filter(id__in=replaced_ids).update(is_active=False)
         
         # Create or update FCM token
         fcm_token, created = FCMToken.objects.get_or_create(
@@ -79,6 +82,10 @@ def register_fcm_token(request):
             fcm_token.last_used = timezone.now()
             fcm_token.save()
         
+        # A rotated token keeps the topics of the token it replaces
+        if replaced_ids:
+            FCMTopicService.transfer(replaced_ids, fcm_token)
+        
         return Response({
             'message': 'FCM token registered successfully',
             'created': created
@@ -133,6 +140,8 @@ def send_push_notification(request):
                 {'error': 'Title and body are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not getattr(settings, 'FCM_SERVER_KEY', None):
+            raise ValueError('FCM_SERVER_KEY not configured')
         
         # Create push notification record
         push_notification = PushNotification.objects.create(
@@ -149,27 +158,12 @@ def send_push_notification(request):
         if target_user_ids:
             push_notification.target_users.set(target_user_ids)
         
-        # Send notification using asyncio
-        fcm_service = FCMService()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            success = loop.run_until_complete(fcm_service.send_notification(push_notification))
-        finally:
-            loop.close()
-        
-        if success:
-            push_notification.mark_as_sent()
-            return Response({
-                'message': 'Push notification sent successfully',
-                'notification_id': push_notification.id
-            })
-        else:
-            push_notification.mark_as_failed('Failed to send notification')
-            return Response(
-                {'error': 'Failed to send push notification'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Queue for the delivery worker, which sends in multicast batches
+        PushDeliveryWorker.schedule()
+        return Response({
+            'message': 'Push notification queued',
+            'notification_id': push_notification.id
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         return Response(
@@ -193,6 +187,8 @@ def send_topic_notification(request):
                 {'error': 'Topic, title, and body are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not getattr(settings, 'FCM_SERVER_KEY', None):
+            raise ValueError('FCM_SERVER_KEY not configured')
         
         # Create push notification record
         push_notification = PushNotification.objects.create(
@@ -203,27 +199,12 @@ def send_topic_notification(request):
             status='pending'
         )
         
-        # Send topic notification using asyncio
-        fcm_service = FCMService()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            success = loop.run_until_complete(fcm_service.send_topic_notification(topic, title, body, data))
-        finally:
-            loop.close()
-        
-        if success:
-            push_notification.mark_as_sent()
-            return Response({
-                'message': 'Topic notification sent successfully',
-                'notification_id': push_notification.id
-            })
-        else:
-            push_notification.mark_as_failed('Failed to send topic notification')
-            return Response(
-                {'error': 'Failed to send topic notification'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Queue for the delivery worker, which fans out over the topic index
+        PushDeliveryWorker.schedule()
+        return Response({
+            'message': 'Topic notification queued',
+            'notification_id': push_notification.id
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         return Response(
@@ -276,24 +257,11 @@ def subscribe_to_topic(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Subscribe to topic using asyncio
-        fcm_service = FCMService()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            success = loop.run_until_complete(fcm_service.subscribe_to_topic(topic, fcm_tokens))
-        finally:
-            loop.close()
-        
-        if success:
-            return Response({
-                'message': f'Successfully subscribed to topic: {topic}'
-            })
-        else:
-            return Response(
-                {'error': 'Failed to subscribe to topic'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # One bulk statement against the topic index
+        FCMTopicService.subscribe(topic, fcm_tokens)
+        return Response({
+            'message': f'Successfully subscribed to topic: {topic}'
+        })
         
     except Exception as e:
         return Response(
@@ -327,24 +295,11 @@ def unsubscribe_from_topic(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Unsubscribe from topic using asyncio
-        fcm_service = FCMService()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            success = loop.run_until_complete(fcm_service.unsubscribe_from_topic(topic, fcm_tokens))
-        finally:
-            loop.close()
-        
-        if success:
-            return Response({
-                'message': f'Successfully unsubscribed from topic: {topic}'
-            })
-        else:
-            return Response(
-                {'error': 'Failed to unsubscribe from topic'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # One bulk statement against the topic index
+        FCMTopicService.unsubscribe(topic, fcm_tokens)
+        return Response({
+            'message': f'Successfully unsubscribed from topic: {topic}'
+        })
         
     except Exception as e:
         return Response(
@@ -384,6 +339,8 @@ def send_template_notification(request):
             )
         
         template = get_object_or_404(FCMNotificationTemplate, id=template_id)
+        if not getattr(settings, 'FCM_SERVER_KEY', None):
+            raise ValueError('FCM_SERVER_KEY not configured')
         rendered = template.render(context)
         
         # Create push notification
@@ -401,27 +358,12 @@ def send_template_notification(request):
         if target_user_ids:
             push_notification.target_users.set(target_user_ids)
         
-        # Send notification using asyncio
-        fcm_service = FCMService()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            success = loop.run_until_complete(fcm_service.send_notification(push_notification))
-        finally:
-            loop.close()
-        
-        if success:
-            push_notification.mark_as_sent()
-            return Response({
-                'message': 'Template notification sent successfully',
-                'notification_id': push_notification.id
-            })
-        else:
-            push_notification.mark_as_failed('Failed to send template notification')
-            return Response(
-                {'error': 'Failed to send template notification'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Queue for the delivery worker, which sends in multicast batches
+        PushDeliveryWorker.schedule()
+        return Response({
+            'message': 'Template notification queued',
+            'notification_id': push_notification.id
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         return Response(
@@ -0,0 +1,76 @@
+"""
+Management command to measure push delivery throughput against a local stub FCM server
+"""
+import json
+import time
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.notifications.fcm_models import FCMToken, PushNotification
+from apps.notifications.fcm_stub import StubFCMServer
+from apps.notifications.services.push_delivery_service import PushDeliveryWorker
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare per-token and batched push delivery throughput (all data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=2000, help='Device tokens to target')
+        parser.add_argument('--notifications', type=int, default=5, help='Notifications to deliver')
+        parser.add_argument('--latency', type=float, default=0.02, help='Stub server latency per request (seconds)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent requests for the worker')
+        parser.add_argument('--sample', type=int, default=100, help='Tokens to time for the per-token baseline')
+
+    def handle(self, *args, **options):
+        with StubFCMServer(latency=options['latency']) as stub:
+            try:
+                with transaction.atomic():
+                    self._benchmark(stub, options)
+                    raise Rollback()
+            except Rollback:
+                pass
+
+    def _benchmark(self, stub, options):
+        users = User.objects.bulk_create([
+            User(username=f'push-benchmark-{index}', email=f'push-benchmark-{index}@example.com')
+            for index in range(options['tokens'])
+        ])
+        tokens = FCMToken.objects.bulk_create([
+            FCMToken(user=user, token=f'benchmark-token-{user.id}', platform='android')
+            for user in users
+        ])
+
+        # Baseline: one un-pooled request per token, as FCMService used to send
+        sample = tokens[:options['sample']]
+        started = time.monotonic()
+        for token in sample:
+            requests.post(stub.url, data=json.dumps({'to': token.token}), timeout=30)
+        baseline_rate = len(sample) / (time.monotonic() - started)
+
+        for index in range(options['notifications']):
+            notification = PushNotification.objects.create(
+                title=f'Benchmark {index}', body='Benchmark', notification_type='system',
+            )
+            notification.target_users.add(*users)
+
+        requests_before = stub.requests
+        with PushDeliveryWorker(server_key='benchmark', fcm_url=stub.url, concurrency=options['concurrency']) as worker:
+            stats = worker.run()
+
+        self.stdout.write(f"Per-token baseline:  {baseline_rate:.1f} tokens/s ({len(sample)} sampled)")
+        self.stdout.write(
+            f"Batched worker:      {stats['tokens_per_second']:.1f} tokens/s "
+            f"({stats['delivered']} deliveries, {stub.requests - requests_before} requests, "
+            f"{stats['seconds']}s, peak {stub.max_in_flight} in flight)"
+        )
+        if baseline_rate:
+            self.stdout.write(self.style.SUCCESS(
+                f"Speed-up:            {stats['tokens_per_second'] / baseline_rate:.1f}x"
+            ))
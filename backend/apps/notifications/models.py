@@ -120,6 +120,19 @@ class Notification(models.Model):
         self.read_at = timezone.now()
         self.save(update_fields=['is_read', 'read_at', 'updated_at'])
     
+    def to_realtime_payload(self):
+        """Notification as pushed over the notifications WebSocket"""
+        return {
+            'id': str(self.id),
+            'title': self.title,
+            'message': self.message,
+            'type': self.notification_type,
+            'priority': self.priority,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat(),
+            'data': self.data,
+        }
+    
     def mark_as_sent(self, channel=None):
         """Mark notification as sent for specific channel"""
         if channel == 'push':
@@ -7,6 +7,7 @@ from django.utils import timezone
 from datetime import timedelta
 from typing import Optional, List, Dict, Any
 
+from apps.shared.services import StatsService
 from .models import Notification, NotificationPreference
 from .services.quiet_hours_service import QuietHoursService
 from .services.digest_service import TierService
@@ -123,12 +124,12 @@ class NotificationService:
         except Exception as e:
             print(f"Error generating summary: {e}")
         
-        # Try to send push notification if enabled
+        # Queue a push copy; the delivery worker sends it after commit
         try:
-            from .fcm_service import FCMService
-            FCMService.send_notification(notification)
+            from .services.push_delivery_service import PushDeliveryWorker
+            PushDeliveryWorker.enqueue_for_notification(notification)
         except Exception as e:
-            print(f"Error sending push notification: {e}")
+            print(f"Error queueing push notification: {e}")
         
         return notification
     
@@ -139,7 +140,11 @@ class NotificationService:
         if not pref:
             return True
         
-        # Map notification types to preferences
+        return getattr(pref, NotificationService._preference_field(notification_type), True)
+    
+    @staticmethod
+    def _preference_field(notification_type: str) -> str:
+        """Map notification types to preferences"""
         type_map = {
             'complaint': 'complaint_updates',
             'study_group': 'study_group_messages',
@@ -148,9 +153,91 @@ class NotificationService:
             'feedback': 'feedback_requests',
             'announcement': 'general_announcements',
         }
+        return type_map.get(notification_type, 'general_announcements')
+    
+    @staticmethod
+    def create_bulk_notifications(notification_type: str, entries: List[Dict[str, Any]]) -> List[Notification]:
+        """
+        Create one notification per entry with a constant number of queries.
+        
+        Each entry holds user_id, title and message, and optionally priority,
+        data, related_object_type and related_object_id. Preferences are read
+        in one query and applied as in create_notification (in-app and category
+        switches, quiet hours for push); the rows are inserted with one
+        bulk_create and their push copies queued in bulk. Priority, tier and
+        summary processing are skipped: the caller's priority is used as is.
+        
+        Returns the created notifications.
+        """
+        if not entries:
+            return []
+        preferences = {
+            pref.user_id: pref
+            for pref in NotificationPreference.objects.filter(user_id__in={entry['user_id'] for entry in entries})
+        }
+        preference_field = NotificationService._preference_field(notification_type)
+        
+        notifications = []
+        quiet_user_ids = set()
+        for entry in entries:
+            pref = preferences.get(entry['user_id'])
+            if pref and (not pref.in_app_enabled or not getattr(pref, preference_field, True)):
+                continue
+            priority = entry.get('priority', 'medium')
+            if priority not in ('high', 'urgent') and QuietHoursService.is_quiet_hours_for(pref):
+                # Kept in the inbox, but no push during quiet hours
+                quiet_user_ids.add(entry['user_id'])
+            notifications.append(Notification(
+                user_id=entry['user_id'],
+                notification_type=notification_type,
+                priority=priority,
+                title=entry['title'],
+                message=entry['message'],
+                data=entry.get('data') or {},
+                related_object_type=entry.get('related_object_type'),
+                related_object_id=entry.get('related_object_id'),
+            ))
+        if not notifications:
+            return []
+        
+        notifications = Notification.objects.bulk_create(notifications)
+        # bulk_create sends no post_save, so do what the signal handlers would
+        StatsService.invalidate(Notification)
+        transaction.on_commit(lambda: NotificationService._send_realtime(notifications))
+        
+        try:
+            from .services.push_delivery_service import PushDeliveryWorker
+            PushDeliveryWorker.enqueue_for_notifications(
+                [notification for notification in notifications if notification.user_id not in quiet_user_ids]
+            )
+        except Exception as e:
+            print(f"Error queueing push notifications: {e}")
+        
+        return notifications
+    
+    @staticmethod
+    def _send_realtime(notifications: List[Notification]):
+        """Push notifications to their users' WebSocket groups in one event loop"""
+        try:
+            from channels.layers import get_channel_layer
+            from asgiref.sync import async_to_sync
+        except ImportError:
+            return
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
         
-        preference_field = type_map.get(notification_type, 'general_announcements')
-        return getattr(pref, preference_field, True)
+        async def send_all():
+            for notification in notifications:
+                await channel_layer.group_send(
+                    f'notifications_{notification.user_id}',
+                    {'type': 'send_notification', 'notification': notification.to_realtime_payload()},
+                )
+        
+        try:
+            async_to_sync(send_all)()
+        except Exception as e:
+            print(f"Error sending real-time notifications: {e}")
     
     @staticmethod
     def notify_study_group_created(group):
@@ -378,6 +465,7 @@ class NotificationService:
             is_read=True,
             read_at=timezone.now()
         )
+        StatsService.invalidate(Notification)
         return True
     
     @staticmethod
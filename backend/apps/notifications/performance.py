@@ -11,8 +11,11 @@ from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
 from django.core.paginator import Paginator
 from django.db.models import Prefetch
+from apps.shared.services.audit_service import get_client_ip
+from apps.shared.utils.rate_limit import RateLimiter
 import hashlib
 import json
+import math
 import time
 
 
@@ -45,28 +48,22 @@ def api_cache(timeout=300, key_prefix='api'):
 
 def rate_limit(max_requests=100, window=3600):
     """
-    Rate limiting decorator
+    Rate limiting decorator (sliding window per client IP, shared across processes)
     """
     def decorator(view_func):
+        limiter = RateLimiter(f"view:{view_func.__module__}.{view_func.__name__}", max_requests, window)
+
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            # Get client IP
-            client_ip = request.META.get('REMOTE_ADDR', 'unknown')
-            
-            # Create rate limit key
-            rate_key = f"rate_limit_{client_ip}_{view_func.__name__}"
-            
-            # Get current request count
-            current_requests = cache.get(rate_key, 0)
-            
-            if current_requests >= max_requests:
-                return JsonResponse({
+            result = limiter.hit(get_client_ip(request) or 'unknown')
+            if not result.allowed:
+                retry_after = math.ceil(result.retry_after)
+                response = JsonResponse({
                     'error': 'Rate limit exceeded',
-                    'retry_after': window
+                    'retry_after': retry_after
                 }, status=429)
-            
-            # Increment request count
-            cache.set(rate_key, current_requests + 1, window)
+                response['Retry-After'] = str(retry_after)
+                return response
             
             return view_func(request, *args, **kwargs)
         return wrapper
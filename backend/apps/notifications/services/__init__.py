@@ -5,6 +5,8 @@ from .quiet_hours_service import QuietHoursService
 from .digest_service import DigestService, TierService
 from .summary_service import SummaryService
 from .priority_service import PriorityService
+from .push_delivery_service import PushDeliveryWorker
+from .topic_service import FCMTopicService
 
 __all__ = [
     'QuietHoursService',
@@ -12,5 +14,7 @@ __all__ = [
     'TierService',
     'SummaryService',
     'PriorityService',
+    'PushDeliveryWorker',
+    'FCMTopicService',
 ]
 
@@ -0,0 +1,473 @@
+"""
+Batched push notification delivery worker
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+from ..fcm_models import FCMToken, PushNotification
+
+# Per-token errors after which FCM will never accept the token again
+INVALID_TOKEN_ERRORS = {'NotRegistered', 'InvalidRegistration', 'MismatchSenderId'}
+
+# Notification priorities mapped onto PushNotification priorities
+PUSH_PRIORITIES = {'low': 'low', 'medium': 'normal', 'high': 'high', 'urgent': 'urgent'}
+
+
+class PushDeliveryWorker:
+    """
+    Delivers queued PushNotification rows to FCM in multicast batches.
+
+    Pending rows are claimed in chunks (status pending -> sending) once due. User
+    targets resolve with one token query per chunk, topic targets stream from
+    the cached topic index, and each notification is sent to at most
+    MULTICAST_SIZE tokens per request over a keep-alive session, with at
+    most `concurrency` requests in flight. Results are
+    written back in bulk: last_used via bulk_update, invalid tokens
+    deactivated with one UPDATE, statuses with one UPDATE per outcome.
+    Transient FCM failures (network errors, non-200 responses) go back to
+    pending with an exponential backoff until max_retries is used up.
+    """
+
+    MULTICAST_SIZE = 500
+    CLAIM_SIZE = 100
+    DEFAULT_CONCURRENCY = 8
+    REQUEST_TIMEOUT = 30
+    STALE_SENDING_AFTER = timedelta(minutes=10)
+    RETRY_BACKOFF = timedelta(seconds=30)  # Doubled for each further retry
+    FCM_URL = 'https://fcm.googleapis.com/fcm/send'
+
+    # One queue drain per process when delivering without Celery
+    _drain_lock = threading.Lock()
+    _drain_requested = threading.Event()
+    _wake_timer = None
+
+    def __init__(self, server_key=None, fcm_url=None, concurrency=None):
+        self.server_key = server_key or getattr(settings, 'FCM_SERVER_KEY', None)
+        if not self.server_key:
+            raise ValueError('FCM_SERVER_KEY not configured')
+        self.fcm_url = fcm_url or getattr(settings, 'FCM_URL', None) or self.FCM_URL
+        self.concurrency = concurrency or getattr(settings, 'FCM_MAX_CONCURRENCY', None) or self.DEFAULT_CONCURRENCY
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'key={self.server_key}',
+            'Content-Type': 'application/json',
+        })
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, max_notifications=None):
+        """Drain the queue. Returns delivery statistics including throughput."""
+        stats = defaultdict(int)
+        started = time.monotonic()
+        stats['requeued'] = self.requeue_stale()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while max_notifications is None or stats['notifications'] < max_notifications:
+                limit = self.CLAIM_SIZE
+                if max_notifications is not None:
+                    limit = min(limit, max_notifications - stats['notifications'])
+                notifications = self.claim(limit)
+                if not notifications:
+                    break
+                for key, value in self.deliver(notifications, executor).items():
+                    stats[key] += value
+
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        stats['tokens_per_second'] = round(stats['tokens'] / stats['seconds'], 1) if stats['seconds'] else 0
+        return dict(stats)
+
+    @staticmethod
+    def requeue_stale():
+        """Return notifications left in 'sending' by a worker that died to the queue"""
+        cutoff = timezone.now() - PushDeliveryWorker.STALE_SENDING_AFTER
+        return PushNotification.objects.filter(status='sending', updated_at__lt=cutoff).update(status='pending')
+
+    @staticmethod
+    def claim(limit):
+        """Move up to limit due notifications from pending to sending and return them"""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                PushNotification.objects.select_for_update(skip_locked=True).filter(
+                    Q(scheduled_at__isnull=True) | Q(scheduled_at__lte=now),
+                    Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+                    status='pending',
+                ).order_by('created_at').values_list('id', flat=True)[:limit]
+            )
+            PushNotification.objects.filter(id__in=ids).update(status='sending', updated_at=now)
+        return list(PushNotification.objects.filter(id__in=ids).order_by('created_at'))
+
+    def deliver(self, notifications, executor):
+        """Send claimed notifications and record the outcome"""
+        from ..fcm_service import FCMService
+
+        tokens = {}
+        token_ids_by_notification = self.resolve_token_ids(notifications, tokens)
+        delivered_before = self.skip_delivered_tokens(notifications, token_ids_by_notification)
+        attempted = defaultdict(int)
+        futures = []
+        for notification in notifications:
+            payload = FCMService._prepare_payload(notification)
+            for batch in self.iter_token_batches(token_ids_by_notification[notification.id], tokens):
+                attempted[notification.id] += len(batch)
+                futures.append((notification.id, executor.submit(self._send_batch, payload, batch)))
+
+        delivered = defaultdict(list)
+        errors = {}
+        invalid_ids = set()
+        for notification_id, future in futures:
+            succeeded, invalid, error = future.result()
+            delivered[notification_id].extend(succeeded)
+            invalid_ids.update(token.id for token in invalid)
+            if error:
+                errors[notification_id] = error
+
+        return self._record(notifications, attempted, delivered, invalid_ids, errors, delivered_before)
+
+    @staticmethod
+    def skip_delivered_tokens(notifications, token_ids_by_notification):
+        """
+        Drop tokens a retried notification already reached from its targets
+
+        Returns:
+            Ids of the notifications that reached some tokens before
+        """
+        retried = [notification.id for notification in notifications if notification.retry_count]
+        if not retried:
+            return set()
+        reached = defaultdict(set)
+        for notification_id, token_id in PushNotification.fcm_tokens.through.objects.filter(
+            pushnotification_id__in=retried,
+        ).values_list('pushnotification_id', 'fcmtoken_id'):
+            reached[notification_id].add(token_id)
+        for notification_id, token_ids in reached.items():
+            token_ids_by_notification[notification_id] = [
+                token_id for token_id in token_ids_by_notification[notification_id] if token_id not in token_ids
+            ]
+        return set(reached)
+
+    @staticmethod
+    def resolve_token_ids(notifications, tokens):
+        """
+        Target token ids per notification, deduplicated, in send order.
+
+        User targets are loaded into tokens (id -> FCMToken) with one query;
+        topic targets come from the cached topic index and are loaded later,
+        batch by batch, by iter_token_batches.
+        """
+        from .topic_service import FCMTopicService
+
+        ids_by_notification = {notification.id: {} for notification in notifications}
+        through = PushNotification.target_users.through
+        user_targets = defaultdict(list)
+        for notification_id, user_id in through.objects.filter(
+            pushnotification_id__in=ids_by_notification,
+        ).values_list('pushnotification_id', 'user_id'):
+            user_targets[user_id].append(notification_id)
+
+        if user_targets:
+            for token in FCMToken.objects.filter(
+                user_id__in=user_targets, is_active=True,
+            ).only('id', 'user_id', 'token'):
+                tokens[token.id] = token
+                for notification_id in user_targets[token.user_id]:
+                    ids_by_notification[notification_id][token.id] = None
+
+        for notification in notifications:
+            if notification.target_topic:
+                ids = ids_by_notification[notification.id]
+                for token_id in FCMTopicService.get_token_ids(notification.target_topic):
+                    ids[token_id] = None
+
+        return {notification_id: list(ids) for notification_id, ids in ids_by_notification.items()}
+
+    @staticmethod
+    def iter_token_batches(token_ids, tokens, batch_size=None):
+        """Yield multicast batches of active tokens, loading ids not in tokens by primary key"""
+        batch_size = batch_size or PushDeliveryWorker.MULTICAST_SIZE
+        for start in range(0, len(token_ids), batch_size):
+            chunk = token_ids[start:start + batch_size]
+            missing = [token_id for token_id in chunk if token_id not in tokens]
+            if missing:
+                tokens.update(dict.fromkeys(missing))  # Deactivated since the index was cached
+                for token in FCMToken.objects.filter(
+                    id__in=missing, is_active=True,
+                ).only('id', 'user_id', 'token'):
+                    tokens[token.id] = token
+            batch = [tokens[token_id] for token_id in chunk if tokens[token_id] is not None]
+            if batch:
+                yield batch
+
+    @staticmethod
+    def resolve_tokens(notifications):
+        """Active target tokens per notification"""
+        tokens = {}
+        return {
+            notification_id: [
+                token
+                for batch in PushDeliveryWorker.iter_token_batches(token_ids, tokens)
+                for token in batch
+            ]
+            for notification_id, token_ids in PushDeliveryWorker.resolve_token_ids(notifications, tokens).items()
+        }
+
+    def _send_batch(self, payload, tokens):
+        """
+        POST one multicast request. Returns (succeeded, invalid, error).
+
+        FCM answers with one result per registration id, in request order.
+        """
+        body = dict(payload, registration_ids=[token.token for token in tokens])
+        try:
+            response = self.session.post(self.fcm_url, data=json.dumps(body), timeout=self.REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            return [], [], str(e)
+        if response.status_code != 200:
+            return [], [], f"FCM API error: {response.status_code} - {response.text[:200]}"
+
+        succeeded = []
+        invalid = []
+        for token, result in zip(tokens, response.json().get('results', [])):
+            if 'message_id' in result:
+                succeeded.append(token)
+            elif result.get('error') in INVALID_TOKEN_ERRORS:
+                invalid.append(token)
+        return succeeded, invalid, None
+
+    @staticmethod
+    def _record(notifications, attempted, delivered, invalid_ids, errors, delivered_before=frozenset()):
+        now = timezone.now()
+        # FCM could not be reached or refused a batch: send to the tokens not
+        # yet reached later, even if other batches of the notification got through
+        retries = defaultdict(list)
+        for n in notifications:
+            if n.id in errors and n.retry_count + 1 < n.max_retries:
+                retries[n.retry_count, errors[n.id]].append(n.id)
+        retrying = {notification_id for notification_ids in retries.values() for notification_id in notification_ids}
+        done = [n for n in notifications if n.id not in retrying]
+        sent_ids = [n.id for n in done if delivered.get(n.id) or n.id in delivered_before]
+        failed = {
+            n.id: errors.get(n.id) or ('No active FCM tokens' if not attempted.get(n.id)
+                                       else 'No token accepted the notification')
+            for n in done if n.id not in sent_ids
+        }
+
+        succeeded_tokens = {}
+        for tokens in delivered.values():
+            for token in tokens:
+                token.last_used = now
+                succeeded_tokens[token.id] = token
+
+        with transaction.atomic():
+            FCMToken.objects.bulk_update(
+                list(succeeded_tokens.values()), ['last_used'], batch_size=PushDeliveryWorker.MULTICAST_SIZE,
+            )
+            if invalid_ids:
+                FCMToken.objects.filter(id__in=invalid_ids).update(is_active=False, updated_at=now)
+
+            through = PushNotification.fcm_tokens.through
+            through.objects.bulk_create([
+                through(pushnotification_id=notification_id, fcmtoken_id=token.id)
+                for notification_id, tokens in delivered.items()
+                for token in tokens
+            ], batch_size=PushDeliveryWorker.MULTICAST_SIZE, ignore_conflicts=True)
+
+            if sent_ids:
+                # A batch that still failed on the last retry is kept as the error
+                for error_message in {errors.get(notification_id) for notification_id in sent_ids}:
+                    PushNotification.objects.filter(
+                        id__in=[notification_id for notification_id in sent_ids
+                                if errors.get(notification_id) == error_message],
+                    ).update(
+                        status='sent', sent_at=now, error_message=error_message, next_attempt_at=None,
+                        updated_at=now,
+                    )
+                PushDeliveryWorker._mark_source_notifications(notifications, sent_ids)
+            for error_message in set(failed.values()):
+                PushNotification.objects.filter(
+                    id__in=[notification_id for notification_id, error in failed.items() if error == error_message],
+                ).update(
+                    status='failed', retry_count=F('retry_count') + 1,
+                    error_message=error_message, updated_at=now,
+                )
+            for (retry_count, error_message), notification_ids in retries.items():
+                PushNotification.objects.filter(id__in=notification_ids).update(
+                    status='pending', retry_count=F('retry_count') + 1, error_message=error_message,
+                    next_attempt_at=now + PushDeliveryWorker.RETRY_BACKOFF * 2 ** retry_count, updated_at=now,
+                )
+
+        return {
+            'notifications': len(notifications),
+            'sent': len(sent_ids),
+            'failed': len(failed),
+            'retried': sum(len(notification_ids) for notification_ids in retries.values()),
+            'tokens': sum(attempted.values()),
+            'delivered': sum(len(tokens) for tokens in delivered.values()),
+            'invalid': len(invalid_ids),
+        }
+
+    @staticmethod
+    def _mark_source_notifications(notifications, sent_ids):
+        """Flag in-app notifications whose push copy was delivered"""
+        from ..models import Notification
+
+        sent = set(sent_ids)
+        source_ids = [
+            n.data.get('notification_id') for n in notifications
+            if n.id in sent and isinstance(n.data, dict) and n.data.get('notification_id')
+        ]
+        if source_ids:
+            Notification.objects.filter(id__in=source_ids).update(push_sent=True)
+
+    @staticmethod
+    def enqueue_for_notification(notification):
+        """
+        Queue a push copy of an in-app Notification for its user.
+
+        Skipped when push is not configured, the user turned push off or has
+        no active device. Delivery is kicked off once the transaction commits.
+        """
+        if not getattr(settings, 'FCM_SERVER_KEY', None):
+            return None
+        user = notification.user
+        preferences = getattr(user, 'notification_preferences', None)
+        if preferences is not None and not preferences.push_enabled:
+            return None
+        if not FCMToken.objects.filter(user=user, is_active=True).exists():
+            return None
+
+        push_notification = PushNotification.objects.create(
+            title=notification.title,
+            body=notification.message,
+            notification_type=notification.notification_type,
+            priority=PUSH_PRIORITIES.get(notification.priority, 'normal'),
+            data=dict(notification.data or {}, notification_id=notification.id),
+            status='pending',
+        )
+        push_notification.target_users.add(user)
+        PushDeliveryWorker.schedule()
+        return push_notification
+
+    @staticmethod
+    def enqueue_for_notifications(notifications):
+        """
+        Queue push copies of many in-app Notifications with a constant number
+        of queries; the same rules as enqueue_for_notification apply.
+        """
+        if not getattr(settings, 'FCM_SERVER_KEY', None) or not notifications:
+            return []
+        from ..models import NotificationPreference
+        user_ids = {notification.user_id for notification in notifications}
+        reachable = set(FCMToken.objects.filter(
+            user_id__in=user_ids, is_active=True,
+        ).values_list('user_id', flat=True)) - set(NotificationPreference.objects.filter(
+            user_id__in=user_ids, push_enabled=False,
+        ).values_list('user_id', flat=True))
+        notifications = [notification for notification in notifications if notification.user_id in reachable]
+        if not notifications:
+            return []
+
+        push_notifications = PushNotification.objects.bulk_create([
+            PushNotification(
+                title=notification.title,
+                body=notification.message,
+                notification_type=notification.notification_type,
+                priority=PUSH_PRIORITIES.get(notification.priority, 'normal'),
+                data=dict(notification.data or {}, notification_id=notification.id),
+                status='pending',
+            )
+            for notification in notifications
+        ])
+        Target = PushNotification.target_users.through
+        Target.objects.bulk_create([
+            Target(pushnotification_id=push_notification.id, user_id=notification.user_id)
+            for push_notification, notification in zip(push_notifications, notifications)
+        ])
+        PushDeliveryWorker.schedule()
+        return push_notifications
+
+    @staticmethod
+    def schedule():
+        """Start a queue drain after commit: on Celery when configured, else on a thread"""
+        transaction.on_commit(PushDeliveryWorker._dispatch)
+
+    @staticmethod
+    def _dispatch():
+        if getattr(settings, 'CELERY_BROKER_URL', None):
+            from ..tasks import deliver_push_notifications
+            deliver_push_notifications.delay()
+            return
+        threading.Thread(target=PushDeliveryWorker._drain_in_thread, daemon=True).start()
+
+    @staticmethod
+    def _drain_in_thread():
+        """
+        Drain the queue on this thread, then wake up for the next row that falls due
+
+        Without Celery there is no beat task, so retries (next_attempt_at) and
+        scheduled pushes are picked up by a timer armed after each drain. The
+        timer lives in this process only; after a restart the next schedule()
+        re-arms it.
+        """
+        PushDeliveryWorker._drain_requested.set()
+        # A request made after the inner loop's last check finds the lock
+        # still held and returns, so look again once the lock is released
+        while PushDeliveryWorker._drain_requested.is_set():
+            if not PushDeliveryWorker._drain_lock.acquire(blocking=False):
+                return  # The running drain goes round again for the new rows
+            try:
+                with PushDeliveryWorker() as worker:
+                    while PushDeliveryWorker._drain_requested.is_set():
+                        PushDeliveryWorker._drain_requested.clear()
+                        worker.run()
+                PushDeliveryWorker._arm_wake_timer()
+            except Exception as e:
+                print(f"Error delivering push notifications: {e}")
+            finally:
+                PushDeliveryWorker._drain_lock.release()
+                close_old_connections()
+
+    @staticmethod
+    def next_due_at(now=None):
+        """When the earliest pending notification not yet due becomes due, or None"""
+        now = now or timezone.now()
+        due = PushNotification.objects.filter(status='pending').aggregate(
+            scheduled=Min('scheduled_at', filter=Q(scheduled_at__gt=now)),
+            retry=Min('next_attempt_at', filter=Q(next_attempt_at__gt=now)),
+        )
+        # Waking for the earlier of the two is at worst early; that drain re-arms
+        return min((value for value in due.values() if value is not None), default=None)
+
+    @staticmethod
+    def _arm_wake_timer():
+        """Replace the wake-up timer with one for the next notification that falls due"""
+        if PushDeliveryWorker._wake_timer is not None:
+            PushDeliveryWorker._wake_timer.cancel()
+            PushDeliveryWorker._wake_timer = None
+        now = timezone.now()
+        due_at = PushDeliveryWorker.next_due_at(now)
+        if due_at is None:
+            return
+        timer = threading.Timer((due_at - now).total_seconds(), PushDeliveryWorker._drain_in_thread)
+        timer.daemon = True
+        timer.start()
+        PushDeliveryWorker._wake_timer = timer
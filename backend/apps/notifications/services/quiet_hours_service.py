@@ -24,6 +24,15 @@ class QuietHoursService:
         """
         try:
             pref = NotificationPreference.objects.filter(user=user).first()
+            return QuietHoursService.is_quiet_hours_for(pref)
+        except Exception as e:
+            print(f"Error checking quiet hours: {e}")
+            return False
+    
+    @staticmethod
+    def is_quiet_hours_for(pref: Optional[NotificationPreference]) -> bool:
+        """Check quiet hours against an already loaded preference (None: no quiet hours)"""
+        try:
             if not pref:
                 return False
             
@@ -0,0 +1,102 @@
+"""
+FCM topic membership index
+"""
+from django.core.cache import cache
+from apps.shared.utils.cache import invalidate_on_commit
+from apps.shared.utils.metrics import record_cache
+from ..fcm_models import FCMToken, FCMTopicSubscription
+
+
+class FCMTopicService:
+    """
+    Persisted topic subscriptions with a cached topic -> token id set.
+
+    Subscribe and unsubscribe are single bulk statements. The id set of a
+    topic is read once from the (topic, token) index and cached until the
+    topic's membership changes; PushDeliveryWorker loads the token strings
+    by primary key, one multicast batch at a time.
+    """
+
+    CACHE_PREFIX = 'fcm:topic'
+    CACHE_TIMEOUT = 60 * 60
+
+    @staticmethod
+    def subscribe(topic, tokens):
+        """Subscribe tokens (FCMToken objects, ids or token strings). Returns the number added."""
+        token_ids = FCMTopicService._token_ids(tokens)
+        if not token_ids:
+            return 0
+        existing = set(FCMTopicSubscription.objects.filter(
+            topic=topic, token_id__in=token_ids,
+        ).values_list('token_id', flat=True))
+        new_ids = [token_id for token_id in token_ids if token_id not in existing]
+        FCMTopicSubscription.objects.bulk_create(
+            [FCMTopicSubscription(topic=topic, token_id=token_id) for token_id in new_ids],
+            ignore_conflicts=True,
+        )
+        if new_ids:
+            FCMTopicService.invalidate(topic)
+        return len(new_ids)
+
+    @staticmethod
+    def unsubscribe(topic, tokens):
+        """Unsubscribe tokens from a topic. Returns the number removed."""
+        token_ids = FCMTopicService._token_ids(tokens)
+        if not token_ids:
+            return 0
+        removed, _ = FCMTopicSubscription.objects.filter(topic=topic, token_id__in=token_ids).delete()
+        if removed:
+            FCMTopicService.invalidate(topic)
+        return removed
+
+    @staticmethod
+    def transfer(old_token_ids, new_token):
+        """Carry the topics of replaced tokens over to the token that supersedes them"""
+        topics = set(FCMTopicSubscription.objects.filter(
+            token_id__in=old_token_ids,
+        ).exclude(token=new_token).values_list('topic', flat=True))
+        for topic in topics:
+            FCMTopicService.subscribe(topic, [new_token.id])
+        return topics
+
+    @staticmethod
+    def get_token_ids(topic):
+        """
+        Ids of the tokens subscribed to a topic, cached per topic.
+
+        Only subscribe/unsubscribe change the set; tokens deactivated since
+        are skipped when the delivery worker loads them.
+        """
+        cache_key = FCMTopicService._cache_key(topic)
+        token_ids = cache.get(cache_key)
+        record_cache('fcm_topics', token_ids is not None)
+        if token_ids is None:
+            token_ids = list(FCMTopicSubscription.objects.filter(
+                topic=topic,
+            ).order_by('token_id').values_list('token_id', flat=True))
+            cache.set(cache_key, token_ids, FCMTopicService.CACHE_TIMEOUT)
+        return token_ids
+
+    @staticmethod
+    def invalidate(topic):
+        invalidate_on_commit(FCMTopicService._cache_key(topic))
+
+    @staticmethod
+    def _cache_key(topic):
+        return f"{FCMTopicService.CACHE_PREFIX}:{topic}"
+
+    @staticmethod
+    def _token_ids(tokens):
+        """Normalize FCMToken objects, ids and token strings to a list of ids"""
+        ids = []
+        strings = []
+        for token in tokens:
+            if isinstance(token, FCMToken):
+                ids.append(token.id)
+            elif isinstance(token, int):
+                ids.append(token)
+            else:
+                strings.append(str(token))
+        if strings:
+            ids.extend(FCMToken.objects.filter(token__in=strings).values_list('id', flat=True))
+        return list(dict.fromkeys(ids))
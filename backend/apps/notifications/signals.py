@@ -45,26 +45,14 @@ def send_realtime_notification(sender, instance, created, **kwargs):
         try:
             channel_layer = get_channel_layer()
             
-            # Prepare notification data
-            notification_data = {
-                'id': str(instance.id),
-                'title': instance.title,
-                'message': instance.message,
-                'type': instance.notification_type,
-                'priority': instance.priority,
-                'is_read': instance.is_read,
-                'created_at': instance.created_at.isoformat(),
-                'data': instance.data,
-            }
-            
             # Send to user's notification channel
-            room_group_name = f'notifications_{instance.user.id}'
+            room_group_name = f'notifications_{instance.user_id}'
             
             async_to_sync(channel_layer.group_send)(
                 room_group_name,
                 {
                     'type': 'send_notification',
-                    'notification': notification_data
+                    'notification': instance.to_realtime_payload()
                 }
             )
         except Exception as e:
@@ -219,3 +219,24 @@ def generate_notification_summaries(self, notification_ids=None):
             'error': str(e)
         }
 
+
+
+@shared_task(bind=True, max_retries=3)
+def deliver_push_notifications(self, max_notifications=None):
+    """
+    Drain the push notification queue in multicast batches
+    
+    Args:
+        max_notifications: Stop after this many notifications (optional, drains the queue if None)
+    """
+    from django.conf import settings
+    from .services.push_delivery_service import PushDeliveryWorker
+    
+    if not getattr(settings, 'FCM_SERVER_KEY', None):
+        return {'notifications': 0, 'error': 'FCM_SERVER_KEY not configured'}
+    try:
+        with PushDeliveryWorker() as worker:
+            return worker.run(max_notifications=max_notifications)
+    except Exception as e:
+        print(f"Error in deliver_push_notifications task: {e}")
+        raise self.retry(exc=e, countdown=30)
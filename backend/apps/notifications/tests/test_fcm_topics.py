@@ -0,0 +1,103 @@
+"""
+Test cases for the FCM topic membership index
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.notifications.fcm_models import FCMToken, FCMTopicSubscription, PushNotification
+from apps.notifications.fcm_stub import StubFCMServer
+from apps.notifications.services.push_delivery_service import PushDeliveryWorker
+from apps.notifications.services.topic_service import FCMTopicService
+
+User = get_user_model()
+
+
+class FCMTopicServiceTestCase(APITestCase):
+    """Test cases for topic subscriptions and topic fan-out"""
+
+    def setUp(self):
+        cache.clear()
+        self.users = User.objects.bulk_create([
+            User(username=f'topicuser{index}', email=f'topicuser{index}@example.com')
+            for index in range(1500)
+        ])
+        self.tokens = FCMToken.objects.bulk_create([
+            FCMToken(user=user, token=f'device-{user.id}', platform='android')
+            for user in self.users
+        ])
+
+    def test_bulk_subscribe_and_cached_index(self):
+        """Test subscribe/unsubscribe are bulk and the id set is read once per change"""
+        with CaptureQueriesContext(connection) as queries:
+            added = FCMTopicService.subscribe('exams', self.tokens[:1200])
+        self.assertEqual(added, 1200)
+        # One existence check and one bulk insert (split only by SQLite's parameter limit)
+        self.assertLessEqual(len(queries), 5)
+        self.assertEqual(FCMTopicService.subscribe('exams', self.tokens[:10]), 0)
+
+        with self.assertNumQueries(1):
+            token_ids = FCMTopicService.get_token_ids('exams')
+        self.assertEqual(len(token_ids), 1200)
+        with self.assertNumQueries(0):
+            FCMTopicService.get_token_ids('exams')
+
+        with self.assertNumQueries(2):  # Token lookup and one DELETE
+            removed = FCMTopicService.unsubscribe('exams', [token.token for token in self.tokens[:200]])
+        self.assertEqual(removed, 200)
+        self.assertEqual(len(FCMTopicService.get_token_ids('exams')), 1000)
+
+    def test_topic_send_reaches_only_subscribers(self):
+        """Test a topic notification is delivered to subscribed, active tokens only"""
+        FCMTopicService.subscribe('sports', self.tokens[:1100])
+        FCMToken.objects.filter(id=self.tokens[0].id).update(is_active=False)
+        notification = PushNotification.objects.create(
+            title='Match today', body='4pm', notification_type='info', target_topic='sports',
+        )
+
+        with StubFCMServer() as stub:
+            with PushDeliveryWorker(server_key='test-key', fcm_url=stub.url) as worker:
+                stats = worker.run()
+
+        self.assertEqual(stub.tokens, 1099)
+        self.assertEqual(stub.requests, 3)  # 500 + 500 + 99
+        self.assertEqual(stats['delivered'], 1099)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'sent')
+        self.assertFalse(notification.fcm_tokens.filter(id=self.tokens[0].id).exists())
+        self.assertFalse(notification.fcm_tokens.filter(id=self.tokens[1200].id).exists())
+
+    @override_settings(FCM_SERVER_KEY='test-key', CELERY_BROKER_URL=None)
+    def test_topic_endpoints(self):
+        """Test subscribe/unsubscribe endpoints, token rotation and queued topic sends"""
+        user = self.users[0]
+        self.client.force_authenticate(user=user)
+
+        response = self.client.post('/api/notifications/topics/subscribe/', {'topic': 'library'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FCMTopicService.get_token_ids('library'), [self.tokens[0].id])
+
+        # Registering a new token for the platform moves the subscription over
+        response = self.client.post(
+            '/api/notifications/fcm-tokens/register/', {'token': 'rotated-token', 'platform': 'android'},
+        )
+        self.assertEqual(response.status_code, 201)
+        rotated = FCMToken.objects.get(token='rotated-token')
+        self.assertIn(rotated.id, FCMTopicService.get_token_ids('library'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                '/api/notifications/push-notifications/topic/',
+                {'topic': 'library', 'title': 'Closed', 'body': 'Closed today'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(PushNotification.objects.get().status, 'pending')
+
+        response = self.client.post('/api/notifications/topics/unsubscribe/', {'topic': 'library'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(FCMTopicSubscription.objects.filter(token=rotated).exists())
+        self.assertNotIn(rotated.id, FCMTopicService.get_token_ids('library'))
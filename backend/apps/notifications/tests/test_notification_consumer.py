@@ -0,0 +1,167 @@
+"""
+Test cases for the authenticated notification WebSocket consumer
+"""
+import asyncio
+import json
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.ws_authentication import JWTAuthMiddleware
+from apps.notifications.models import Notification
+from apps.notifications.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+# Independent of the Redis layer settings.py picks off Render
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+def create_notifications(user, count, **kwargs):
+    return [
+        Notification.objects.create(
+            user=user, notification_type='general', title=f'Notice {index}', message='Body', **kwargs
+        )
+        for index in range(count)
+    ]
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class NotificationConsumerTestCase(TransactionTestCase):
+    """Test cases for authentication, backlog, coalescing and read acks"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='wsuser', email='wsuser@example.com', password='testpass123',
+        )
+        self.other = User.objects.create_user(
+            username='wsother', email='wsother@example.com', password='testpass123',
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    async def test_connections_are_authenticated(self):
+        """Test the user comes from the JWT, not from the URL"""
+        communicator = WebsocketCommunicator(application, f'/ws/notifications/{self.user.id}/')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+        communicator = WebsocketCommunicator(
+            application, f'/ws/notifications/{self.other.id}/?token={self.token}',
+        )
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+        for headers in (
+            [(b'authorization', f'Bearer {self.token}'.encode())],
+            [(b'cookie', f'access_token={self.token}'.encode())],
+        ):
+            communicator = WebsocketCommunicator(application, '/ws/notifications/', headers=headers)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            frame = await communicator.receive_json_from()
+            self.assertEqual(frame['type'], 'backlog')
+            await communicator.disconnect()
+
+    async def test_backlog_is_one_frame_with_resume_cursor(self):
+        """Test unread notifications arrive in one frame and ?cursor= resumes after it"""
+        unread = await database_sync_to_async(create_notifications)(self.user, 3)
+        await database_sync_to_async(create_notifications)(self.user, 1, is_read=True)
+        await database_sync_to_async(create_notifications)(self.other, 1)
+
+        communicator = WebsocketCommunicator(application, f'/ws/notifications/?token={self.token}')
+        await communicator.connect()
+        frame = await communicator.receive_json_from()
+        self.assertEqual([item['id'] for item in frame['notifications']], [str(n.id) for n in unread])
+        self.assertEqual(frame['notifications'][0]['type'], 'general')
+        self.assertEqual(frame['cursor'], unread[-1].id)
+        self.assertFalse(frame['has_more'])
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+        communicator = WebsocketCommunicator(
+            application, f'/ws/notifications/?token={self.token}&cursor={unread[0].id}',
+        )
+        await communicator.connect()
+        frame = await communicator.receive_json_from()
+        self.assertEqual([item['id'] for item in frame['notifications']], [str(n.id) for n in unread[1:]])
+        await communicator.disconnect()
+
+    async def test_bursts_are_coalesced_and_acks_batched(self):
+        """Test pushes within the window share a frame and read acks share an UPDATE"""
+        communicator = WebsocketCommunicator(application, f'/ws/notifications/?token={self.token}')
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        created = await database_sync_to_async(create_notifications)(self.user, 5)
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame['type'], 'notifications')
+        self.assertEqual(len(frame['notifications']), 5)
+        self.assertEqual(frame['cursor'], created[-1].id)
+
+        await communicator.send_json_to({'type': 'mark_read', 'notification_id': created[0].id})
+        await communicator.send_json_to({
+            'type': 'mark_read', 'notification_ids': [created[1].id, created[2].id],
+        })
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame['type'], 'read_ack')
+        self.assertEqual(frame['notification_ids'], [n.id for n in created[:3]])
+        self.assertEqual(frame['updated'], 3)
+
+        await communicator.send_json_to({'type': 'mark_all_read'})
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame['updated'], 2)
+        unread = await database_sync_to_async(
+            Notification.objects.filter(user=self.user, is_read=False).count
+        )()
+        self.assertEqual(unread, 0)
+        self.assertFalse(await database_sync_to_async(
+            Notification.objects.filter(user=self.user, read_at__isnull=True).exists
+        )())
+        await communicator.disconnect()
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class NotificationConsumerScaleTestCase(TransactionTestCase):
+    """Test many concurrent notification sockets in one process"""
+
+    CONNECTIONS = 2000
+
+    def setUp(self):
+        self.users = User.objects.bulk_create([
+            User(username=f'socketuser{index}', email=f'socketuser{index}@example.com')
+            for index in range(self.CONNECTIONS)
+        ])
+
+    async def test_thousands_of_sockets(self):
+        """Test every socket connects, gets its backlog and receives its own push"""
+        communicators = [
+            WebsocketCommunicator(application, f'/ws/notifications/?token={AccessToken.for_user(user)}')
+            for user in self.users
+        ]
+        results = await asyncio.gather(*(communicator.connect(timeout=60) for communicator in communicators))
+        self.assertTrue(all(connected for connected, _ in results))
+        backlogs = await asyncio.gather(*(
+            communicator.receive_json_from(timeout=60) for communicator in communicators
+        ))
+        self.assertTrue(all(frame['type'] == 'backlog' for frame in backlogs))
+
+        channel_layer = get_channel_layer()
+        for user in self.users:
+            await channel_layer.group_send(f'notifications_{user.id}', {
+                'type': 'send_notification',
+                'notification': {'id': str(user.id), 'title': 'Ping'},
+            })
+        frames = await asyncio.gather(*(
+            communicator.receive_json_from(timeout=60) for communicator in communicators
+        ))
+        self.assertEqual(
+            [frame['notification']['id'] for frame in frames], [str(user.id) for user in self.users],
+        )
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
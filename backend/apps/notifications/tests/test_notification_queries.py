@@ -0,0 +1,51 @@
+"""
+Query budgets for the notification endpoints the app polls
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from apps.notifications.models import Notification
+
+User = get_user_model()
+
+
+class NotificationQueryBudgetTestCase(APITestCase):
+    """Test the list, unread count and preference endpoints stay within their query budgets"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='budgeted', email='budgeted@example.com')
+        other = User.objects.create_user(username='unbudgeted', email='unbudgeted@example.com')
+        Notification.objects.bulk_create([
+            Notification(user=user, notification_type='push', title=f'Notice {index}', message='Body',
+                         is_read=index % 3 == 0)
+            for index in range(20)
+            for user in (self.user, other)
+        ])
+        self.client.force_authenticate(user=self.user)
+
+    @pytest.mark.query_budget(3, duplicates=1)
+    def test_notification_list(self):
+        """Test the list is a count, a page and the cache fill however many notifications there are"""
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 20)
+        self.assertEqual(response.data['results'][0]['user_id'], self.user.id)
+
+        cached = self.client.get('/api/notifications/')
+        self.assertEqual(len(cached.data), 20)
+
+    @pytest.mark.query_budget(1)
+    def test_unread_count(self):
+        """Test the unread count is one count query, then cached"""
+        for _ in range(2):
+            response = self.client.get('/api/notifications/unread-count/')
+            self.assertEqual(response.data, {'unread_count': 13})
+
+    @pytest.mark.query_budget(4, duplicates=1)
+    def test_preferences(self):
+        """Test preferences are created once and then served from the cache"""
+        for _ in range(2):
+            response = self.client.get('/api/notifications/preferences/')
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,208 @@
+"""
+Test cases for batched push notification delivery
+"""
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.notifications.fcm_models import FCMToken, PushNotification
+from apps.notifications.fcm_stub import StubFCMServer
+from apps.notifications.models import Notification
+from apps.notifications.services.push_delivery_service import PushDeliveryWorker
+
+User = get_user_model()
+
+
+class PushDeliveryWorkerTestCase(TestCase):
+    """Test cases for PushDeliveryWorker against a local stub FCM server"""
+
+    def setUp(self):
+        self.stub = StubFCMServer().start()
+        self.addCleanup(self.stub.stop)
+        self.users = User.objects.bulk_create([
+            User(username=f'pushuser{index}', email=f'pushuser{index}@example.com')
+            for index in range(1200)
+        ])
+        FCMToken.objects.bulk_create([
+            FCMToken(
+                user=user,
+                token=f'{"invalid" if index % 100 == 0 else "device"}-{user.id}',
+                platform='android',
+            )
+            for index, user in enumerate(self.users)
+        ])
+
+    def _worker(self):
+        worker = PushDeliveryWorker(server_key='test-key', fcm_url=self.stub.url, concurrency=4)
+        self.addCleanup(worker.close)
+        return worker
+
+    def test_multicast_batches_and_bulk_writes(self):
+        """Test tokens go out in batches of 500 and results are written in bulk"""
+        notification = PushNotification.objects.create(
+            title='Exam schedule', body='Published', notification_type='notice',
+        )
+        notification.target_users.add(*self.users)
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = self._worker().run()
+        # Constant in the token count; bulk writes only split on SQLite's parameter limit
+        self.assertLessEqual(len(queries), 22)
+
+        self.assertEqual(self.stub.requests, 3)  # 500 + 500 + 200
+        self.assertLessEqual(len(self.stub.connections), 4)
+        self.assertEqual(stats['notifications'], 1)
+        self.assertEqual(stats['tokens'], 1200)
+        self.assertEqual(stats['delivered'], 1188)
+        self.assertEqual(stats['invalid'], 12)
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'sent')
+        self.assertIsNotNone(notification.sent_at)
+        self.assertEqual(notification.fcm_tokens.count(), 1188)
+        self.assertEqual(FCMToken.objects.filter(is_active=False).count(), 12)
+        self.assertFalse(FCMToken.objects.filter(token__startswith='invalid', last_used__isnull=False).exists())
+        self.assertEqual(FCMToken.objects.filter(last_used__isnull=False).count(), 1188)
+
+    def test_failures_and_scheduled_notifications(self):
+        """Test unreachable FCM requeues the claim, and future notifications stay queued"""
+        due = PushNotification.objects.create(title='Now', body='Now', notification_type='system')
+        due.target_users.add(self.users[1])
+        later = PushNotification.objects.create(
+            title='Later', body='Later', notification_type='system',
+            scheduled_at=timezone.now() + timedelta(hours=1),
+        )
+        later.target_users.add(self.users[1])
+        no_devices = PushNotification.objects.create(title='None', body='None', notification_type='system')
+
+        worker = self._worker()
+        worker.fcm_url = 'http://127.0.0.1:9/fcm/send'  # Nothing listens on the discard port
+        stats = worker.run()
+
+        self.assertEqual((stats['failed'], stats['retried']), (1, 1))
+        due.refresh_from_db()
+        no_devices.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual((due.status, due.retry_count), ('pending', 1))
+        self.assertGreater(due.next_attempt_at, timezone.now())
+        self.assertEqual((no_devices.status, no_devices.error_message), ('failed', 'No active FCM tokens'))
+        self.assertEqual(later.status, 'pending')
+
+    def test_transient_failure_is_delivered_on_a_later_claim(self):
+        """Test a requeued notification waits out its backoff, then is delivered"""
+        notification = PushNotification.objects.create(title='Retry', body='Retry', notification_type='system')
+        notification.target_users.add(self.users[1])
+        worker = self._worker()
+        worker.fcm_url = 'http://127.0.0.1:9/fcm/send'
+        worker.run()
+
+        worker.fcm_url = self.stub.url
+        self.assertNotIn('notifications', worker.run())  # Still backing off, nothing claimed
+        PushNotification.objects.filter(pk=notification.pk).update(next_attempt_at=timezone.now())
+        stats = worker.run()
+        self.assertEqual((stats['notifications'], stats['sent']), (1, 1))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.retry_count), ('sent', 1))
+        self.assertIsNone(notification.next_attempt_at)
+
+        # Once max_retries is used up the failure is final
+        last = PushNotification.objects.create(
+            title='Last', body='Last', notification_type='system', retry_count=2,
+        )
+        last.target_users.add(self.users[1])
+        worker.fcm_url = 'http://127.0.0.1:9/fcm/send'
+        self.assertEqual(worker.run()['failed'], 1)
+        last.refresh_from_db()
+        self.assertEqual((last.status, last.retry_count), ('failed', 3))
+
+    def test_failed_batch_is_retried_for_its_tokens_only(self):
+        """Test a notification with one failed batch of two is requeued and resent to that batch"""
+        notification = PushNotification.objects.create(title='Split', body='Split', notification_type='notice')
+        notification.target_users.add(*self.users[:1000])
+        self.stub.fail_requests = 1
+        worker = self._worker()
+
+        stats = worker.run()
+        self.assertEqual((stats['sent'], stats['retried']), (0, 1))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.retry_count), ('pending', 1))
+        self.assertEqual(notification.fcm_tokens.count(), 495)
+
+        PushNotification.objects.filter(pk=notification.pk).update(next_attempt_at=timezone.now())
+        stats = worker.run()
+        self.assertEqual((stats['sent'], stats['tokens']), (1, 500))
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'sent')
+        self.assertIsNone(notification.error_message)
+        self.assertEqual(notification.fcm_tokens.count(), 990)
+        self.assertEqual((self.stub.requests, self.stub.tokens), (3, 1500))
+
+    @override_settings(FCM_SERVER_KEY='test-key', CELERY_BROKER_URL=None)
+    def test_thread_drain_wakes_for_retries_and_scheduled_pushes(self):
+        """Test a drain without Celery arms a timer for the next row that falls due"""
+        self.addCleanup(lambda: PushDeliveryWorker._wake_timer and PushDeliveryWorker._wake_timer.cancel())
+        retry_at = timezone.now() + timedelta(seconds=40)
+        retry = PushNotification.objects.create(
+            title='Retry', body='Retry', notification_type='system', retry_count=1, next_attempt_at=retry_at,
+        )
+        retry.target_users.add(self.users[1])
+        PushNotification.objects.create(
+            title='Later', body='Later', notification_type='system',
+            scheduled_at=timezone.now() + timedelta(hours=1),
+        )
+
+        with override_settings(FCM_URL=self.stub.url):
+            PushDeliveryWorker._drain_in_thread()
+            timer = PushDeliveryWorker._wake_timer
+            self.assertTrue(timer.is_alive())
+            self.assertAlmostEqual(timer.interval, 40, delta=2)
+            later = PushNotification.objects.get(title='Later')
+            self.assertEqual(PushDeliveryWorker.next_due_at(retry_at), later.scheduled_at)
+
+            # When the timer fires the retry is delivered
+            timer.cancel()
+            PushNotification.objects.filter(pk=retry.pk).update(next_attempt_at=timezone.now())
+            timer.function()
+        retry.refresh_from_db()
+        self.assertEqual(retry.status, 'sent')
+
+    @override_settings(FCM_SERVER_KEY='test-key', CELERY_BROKER_URL=None)
+    def test_notifications_queue_a_push_copy(self):
+        """Test in-app notifications queue a push copy instead of sending inline"""
+        user = self.users[1]
+        notification = Notification.objects.create(
+            user=user, notification_type='notice', title='New notice', message='Read it',
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            push = PushDeliveryWorker.enqueue_for_notification(notification)
+        self.assertEqual(len(callbacks), 1)  # Delivery starts after commit
+        self.assertEqual(list(push.target_users.all()), [user])
+        self.assertEqual(push.data['notification_id'], notification.id)
+        self.assertEqual(push.priority, 'normal')
+
+        with override_settings(FCM_URL=self.stub.url):
+            PushDeliveryWorker().run()
+        notification.refresh_from_db()
+        self.assertTrue(notification.push_sent)
+
+        # Users without devices get no push row
+        no_device = Notification.objects.create(
+            user=User.objects.create_user(username='nodevice', email='nodevice@example.com'),
+            notification_type='notice', title='New notice', message='Read it',
+        )
+        self.assertIsNone(PushDeliveryWorker.enqueue_for_notification(no_device))
+        self.assertEqual(PushNotification.objects.count(), 1)
+
+    def test_benchmark_command(self):
+        """Test the throughput benchmark runs and leaves no data behind"""
+        output = StringIO()
+        call_command(
+            'benchmark_push_delivery', tokens=300, notifications=2, latency=0, sample=20, stdout=output,
+        )
+        self.assertIn('Batched worker:', output.getvalue())
+        self.assertEqual(FCMToken.objects.count(), 1200)
+        self.assertEqual(PushNotification.objects.count(), 0)
@@ -7,6 +7,9 @@ from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from apps.shared.services import StatsService
+from apps.shared.utils.metrics import record_cache
 from .models import Notification, NotificationPreference, NotificationTemplate, NotificationLog
 from .serializers import (
     NotificationSerializer, NotificationPreferenceSerializer,
@@ -30,7 +33,7 @@ class NotificationListView(generics.ListAPIView):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).select_related('user')
     
     def list(self, request, *args, **kwargs):
         # Cache the queryset results
@@ -38,6 +41,7 @@ class NotificationListView(generics.ListAPIView):
         
         # Try to get from cache
         cached_result = cache.get(cache_key)
+        record_cache('notifications_list', cached_result is not None)
         if cached_result is not None:
             # Return cached serializer data
             serializer = self.get_serializer(cached_result, many=True)
@@ -92,6 +96,7 @@ class NotificationPreferenceView(generics.RetrieveUpdateAPIView):
         
         # Try to get from cache
         preference = cache.get(cache_key)
+        record_cache('notification_preferences', preference is not None)
         if preference is None:
             preference, created = NotificationPreference.objects.get_or_create(
                 user=self.request.user
@@ -116,6 +121,7 @@ class UnreadCountView(generics.RetrieveAPIView):
         
         # Try to get from cache
         count = cache.get(cache_key)
+        record_cache('notification_count', count is not None)
         if count is None:
             count = Notification.objects.filter(
                 user=request.user, 
@@ -134,7 +140,8 @@ class MarkAllReadView(generics.UpdateAPIView):
         updated_count = Notification.objects.filter(
             user=request.user, 
             is_read=False
-        ).update(is_read=True)
+        ).update(is_read=True, read_at=timezone.now())
+        StatsService.invalidate(Notification)
         
         return Response({
             'message': f'{updated_count} notifications marked as read'
@@ -166,26 +173,19 @@ def notification_stats(request):
     if request.user.user_type not in ['admin', 'faculty']:
         return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
+    counts = StatsService.breakdowns(
+        Notification,
+        fields=('notification_type', 'priority'),
+        counts={'unread': Q(is_read=False)},
+    )
     stats = {
-        'total_notifications': Notification.objects.count(),
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
-        'notifications_by_type': {},
-        'notifications_by_priority': {},
+        'total_notifications': counts['total'],
+        'unread_notifications': counts['unread'],
+        'notifications_by_type': counts['notification_type'],
+        'notifications_by_priority': counts['priority'],
         'recent_notifications': [],
     }
     
-    # Type breakdown
-    for notification_type, _ in Notification.NOTIFICATION_TYPES:
-        stats['notifications_by_type'][notification_type] = Notification.objects.filter(
-            notification_type=notification_type
-        ).count()
-    
-    # Priority breakdown
-    for priority, _ in Notification.PRIORITY_CHOICES:
-        stats['notifications_by_priority'][priority] = Notification.objects.filter(
-            priority=priority
-        ).count()
-    
     # Recent notifications
     recent = Notification.objects.select_related('user').order_by('-created_at')[:10]
     stats['recent_notifications'] = NotificationSerializer(recent, many=True).data
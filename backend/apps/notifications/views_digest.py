@@ -6,6 +6,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from apps.shared.utils.metrics import record_cache
 from .models_digest import NotificationDigest, NotificationTier, NotificationSummary, NotificationPriorityRule
 from .serializers_digest import (
     NotificationDigestSerializer, NotificationTierSerializer,
@@ -35,6 +36,7 @@ class NotificationDigestListView(generics.ListAPIView):
         
         # Try to get from cache
         cached_result = cache.get(cache_key)
+        record_cache('notification_digests', cached_result is not None)
         if cached_result is not None:
             serializer = self.get_serializer(cached_result, many=True)
             return Response(serializer.data)
@@ -7,3 +7,8 @@ from django.apps import AppConfig
 class ReservationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reservations'
+    
+    def ready(self):
+        from apps.shared.services import StatsService
+        from .models import ReadingRoom, Reservation, Seat
+        StatsService.register(ReadingRoom, Reservation, Seat)
@@ -8,6 +8,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q, Count
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from apps.shared.services import StatsService
 from .models import ReadingRoom, Seat, Reservation, ReservationHistory, SeatAvailability
 from .serializers import (
     ReadingRoomSerializer, SeatSerializer, ReservationSerializer,
@@ -276,21 +277,18 @@ def reservation_stats(request):
     if request.user.user_type not in ['admin', 'faculty']:
         return Response({'detail': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
     
+    counts = StatsService.breakdowns(Reservation, fields=('status',))
     stats = {
-        'total_reservations': Reservation.objects.count(),
-        'active_reservations': Reservation.objects.filter(status='active').count(),
-        'completed_reservations': Reservation.objects.filter(status='completed').count(),
-        'cancelled_reservations': Reservation.objects.filter(status='cancelled').count(),
-        'total_rooms': ReadingRoom.objects.filter(is_active=True).count(),
-        'total_seats': Seat.objects.filter(is_active=True).count(),
-        'reservations_by_status': {},
+        'total_reservations': counts['total'],
+        'active_reservations': counts['status']['active'],
+        'completed_reservations': counts['status']['completed'],
+        'cancelled_reservations': counts['status']['cancelled'],
+        'total_rooms': StatsService.breakdowns(ReadingRoom, counts={'active': Q(is_active=True)})['active'],
+        'total_seats': StatsService.breakdowns(Seat, counts={'active': Q(is_active=True)})['active'],
+        'reservations_by_status': counts['status'],
         'popular_rooms': [],
     }
     
-    # Status breakdown
-    for status_choice, _ in Reservation.STATUS_CHOICES:
-        stats['reservations_by_status'][status_choice] = Reservation.objects.filter(status=status_choice).count()
-    
     # Popular rooms
     popular_rooms = ReadingRoom.objects.annotate(
         reservation_count=Count('seat__reservations')
@@ -9,4 +9,7 @@ class SharedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.shared'
     verbose_name = 'Shared Utilities'
-
+    
+    def ready(self):
+        from .signals import register_signals
+        register_signals()
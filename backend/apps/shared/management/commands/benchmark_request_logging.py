@@ -0,0 +1,90 @@
+"""
+Management command to measure the per-request overhead of trace and logging middleware
+"""
+import logging
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from apps.shared.middleware import LoggingMiddleware, TraceIDMiddleware
+from apps.shared.utils.logging import StructuredFormatter, flush_logs, get_log_handler, get_logger
+
+
+def view(request):
+    return HttpResponse('ok')
+
+
+class SlowSink:
+    """A log destination whose writes block, like a pipe to a busy log collector"""
+
+    def __init__(self, stream, latency):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data):
+        time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class Command(BaseCommand):
+    help = 'Time TraceIDMiddleware + LoggingMiddleware per request against a bare view (output goes to /dev/null)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Requests per scenario')
+        parser.add_argument(
+            '--sink-latency', type=float, default=0.0002, help='Seconds each write blocks in the slow sink scenarios',
+        )
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        factory = RequestFactory()
+        handler = get_log_handler()
+        devnull = open(os.devnull, 'w')
+        slow = SlowSink(devnull, options['sink_latency'])
+        previous_stream = handler.setStream(devnull)
+        try:
+            bare = self._time(view, factory, '/api/notices/', count)
+            self.stdout.write(f"Bare view:                      {bare:8.1f} us/request")
+            scenarios = [
+                ('Logged, queued', '/api/notices/', {}),
+                ('Sampled at 10%', '/api/notices/', {'LOGGING_SAMPLE_RATES': {'/api/notices/': 0.1}}),
+                ('Skipped path', '/health/', {}),
+            ]
+            for label, path, overrides in scenarios:
+                with override_settings(**overrides):
+                    elapsed = self._time(TraceIDMiddleware(LoggingMiddleware(view)), factory, path, count)
+                self.stdout.write(f"{label + ':':<31} {elapsed - bare:8.1f} us/request overhead")
+            flush_logs()
+
+            self.stdout.write(f"Sink blocking {options['sink_latency'] * 1_000_000:.0f} us per write:")
+            handler.setStream(slow)
+            elapsed = self._time(TraceIDMiddleware(LoggingMiddleware(view)), factory, '/api/notices/', count)
+            self.stdout.write(f"{'  Logged, queued:':<31} {elapsed - bare:8.1f} us/request overhead")
+            flush_logs()
+
+            # Baseline: the same records written on the request thread
+            logger = get_logger('response')
+            queue_handlers = logger.handlers[:]
+            sync_handler = logging.StreamHandler(slow)
+            sync_handler.setFormatter(StructuredFormatter())
+            logger.handlers = [sync_handler]
+            try:
+                elapsed = self._time(TraceIDMiddleware(LoggingMiddleware(view)), factory, '/api/notices/', count)
+            finally:
+                logger.handlers = queue_handlers
+            self.stdout.write(f"{'  Logged, synchronous:':<31} {elapsed - bare:8.1f} us/request overhead")
+        finally:
+            flush_logs()
+            handler.setStream(previous_stream)
+            devnull.close()
+
+    def _time(self, handler, factory, path, count):
+        requests = [factory.get(path) for _ in range(count)]
+        started = time.perf_counter()
+        for request in requests:
+            handler(request)
+        return (time.perf_counter() - started) / count * 1_000_000
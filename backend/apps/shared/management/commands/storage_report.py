@@ -0,0 +1,20 @@
+"""
+Management command to report content-addressed storage usage
+"""
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from apps.shared.models import StoredBlob
+
+
+class Command(BaseCommand):
+    help = 'Report deduplicated file storage usage and bytes saved'
+
+    def handle(self, *args, **options):
+        report = StoredBlob.usage_report()
+        self.stdout.write(f"Blobs stored:      {report['blobs']}")
+        self.stdout.write(f"File references:   {report['references']}")
+        self.stdout.write(f"Bytes stored:      {report['stored_bytes']} ({filesizeformat(report['stored_bytes'])})")
+        self.stdout.write(f"Bytes referenced:  {report['referenced_bytes']} ({filesizeformat(report['referenced_bytes'])})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Bytes saved:       {report['saved_bytes']} ({filesizeformat(report['saved_bytes'])})"
+        ))
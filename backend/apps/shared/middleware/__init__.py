@@ -3,9 +3,13 @@ Shared middleware classes
 """
 from .trace_middleware import TraceIDMiddleware
 from .logging_middleware import LoggingMiddleware
+from .query_profiler_middleware import QueryProfilerMiddleware
+from .metrics_middleware import MetricsMiddleware
 
 __all__ = [
     'TraceIDMiddleware',
     'LoggingMiddleware',
+    'QueryProfilerMiddleware',
+    'MetricsMiddleware',
 ]
 
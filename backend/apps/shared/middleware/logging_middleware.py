@@ -1,27 +1,65 @@
 """
 Logging middleware for request/response logging
 """
+import random
+import time
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
-from apps.shared.utils.logging import log_request, log_response
+from apps.shared.utils.logging import log_response
 from apps.shared.utils.trace import get_trace_id
 
+# Paths never logged (prefix match); override with LOGGING_SKIP_PATHS
+DEFAULT_SKIP_PATHS = ('/health', '/static/', '/media/', '/favicon.ico')
+
 
 class LoggingMiddleware(MiddlewareMixin):
     """
     Middleware to log requests and responses
     
-    Logs structured information about each request and response
+    Writes one structured record per completed request, with its duration,
+    through the queued logging pipeline. Paths in LOGGING_SKIP_PATHS are not
+    logged; LOGGING_SAMPLE_RATES maps path prefixes to the fraction of
+    requests logged (longest prefix wins, LOGGING_SAMPLE_RATE otherwise).
+    Server errors are always logged.
     """
     
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.skip_paths = tuple(getattr(settings, 'LOGGING_SKIP_PATHS', DEFAULT_SKIP_PATHS))
+        self.default_rate = getattr(settings, 'LOGGING_SAMPLE_RATE', 1.0)
+        # Longest prefixes first, so the most specific rate applies
+        self.sample_rates = sorted(
+            getattr(settings, 'LOGGING_SAMPLE_RATES', {}).items(),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+    
+    def sample_rate(self, path):
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_rate
+    
     def process_request(self, request):
-        """Log request"""
-        trace_id = get_trace_id()
-        log_request(request, trace_id=trace_id)
+        """Decide whether the request is logged and start its timer"""
+        path = request.path
+        if path.startswith(self.skip_paths):
+            request._log_sampled = None
+            return None
+        rate = self.sample_rate(path)
+        request._log_sampled = rate >= 1 or random.random() < rate
+        request._log_started = time.perf_counter()
         return None
     
     def process_response(self, request, response):
         """Log response"""
-        trace_id = get_trace_id()
-        log_response(request, response, trace_id=trace_id)
+        sampled = getattr(request, '_log_sampled', None)
+        if sampled is None:
+            return response
+        if sampled or response.status_code >= 500:
+            duration_ms = (time.perf_counter() - request._log_started) * 1000
+            log_response(
+                request, response, trace_id=get_trace_id(),
+                extra_data={'duration_ms': round(duration_ms, 2)},
+            )
         return response
-
@@ -0,0 +1,38 @@
+"""
+Prometheus request metrics middleware
+"""
+import time
+from django.core.exceptions import MiddlewareNotUsed
+from apps.shared.utils import metrics
+
+
+class MetricsMiddleware:
+    """
+    Middleware to record request latency and database query counts
+
+    Observes django_http_request_duration_seconds and
+    django_http_request_db_queries labeled by the resolved URL name, so
+    /api/notices/12/ and /api/notices/13/ share one series. Requests that
+    resolve to no view are grouped under '<unresolved>'. Removes itself when
+    prometheus_client is not installed.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.metrics_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = metrics.QueryCounter().start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            queries = counter.stop()
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else metrics.UNRESOLVED_VIEW
+        metrics.REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(elapsed)
+        metrics.REQUEST_DB_QUERIES.labels(view).observe(queries)
+        return response
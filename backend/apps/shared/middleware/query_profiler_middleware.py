@@ -0,0 +1,63 @@
+"""
+Per-request database query profiling middleware
+"""
+import logging
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+from apps.shared.utils.logging import get_logger
+from apps.shared.utils.query_profiler import QueryProfiler
+from apps.shared.utils.trace import get_trace_id
+
+logger = get_logger('query_profiler')
+
+
+class QueryProfilerMiddleware(MiddlewareMixin):
+    """
+    Middleware to profile the database queries of each request
+    
+    Opt-in with QUERY_PROFILER_ENABLED (it removes itself otherwise). Records
+    the query count, total DB time, repeated statement fingerprints (N+1
+    suspects) and the slowest statements; adds them to the response as a
+    Server-Timing header and logs them as structured fields under the
+    request's trace ID. Requests with a statement repeated
+    QUERY_PROFILER_DUPLICATE_THRESHOLD times or more are logged as warnings.
+    """
+    
+    def __init__(self, get_response=None):
+        if not getattr(settings, 'QUERY_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+        self.duplicate_threshold = getattr(settings, 'QUERY_PROFILER_DUPLICATE_THRESHOLD', 3)
+        self.slowest = getattr(settings, 'QUERY_PROFILER_SLOWEST', 5)
+    
+    def process_request(self, request):
+        """Start recording queries"""
+        request._query_profiler = QueryProfiler(slowest=self.slowest).start()
+        return None
+    
+    def process_response(self, request, response):
+        """Attach the profile to the response and the log"""
+        profiler = getattr(request, '_query_profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        request._query_profiler = None
+        
+        timing = profiler.server_timing(self.duplicate_threshold)
+        response['Server-Timing'] = f"{response['Server-Timing']}, {timing}" if response.has_header('Server-Timing') else timing
+        
+        summary = profiler.summary(self.duplicate_threshold)
+        level = logging.WARNING if summary['db_duplicates'] else logging.INFO
+        logger.log(
+            level,
+            f"{request.method} {request.path} - {profiler.count} queries in {profiler.total_ms:.1f}ms",
+            extra={
+                'request_path': request.path,
+                'request_method': request.method,
+                'status_code': response.status_code,
+                'trace_id': get_trace_id(),
+                'extra_data': summary,
+            },
+        )
+        return response
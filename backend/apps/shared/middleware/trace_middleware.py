@@ -2,19 +2,22 @@
 Trace ID middleware for request tracing
 """
 from django.utils.deprecation import MiddlewareMixin
-from apps.shared.utils.trace import generate_trace_id, set_trace_id, get_trace_id
+from apps.shared.utils.trace import generate_trace_id, set_trace_id, get_trace_id, is_valid_trace_id
 
 
 class TraceIDMiddleware(MiddlewareMixin):
     """
     Middleware to add trace ID to each request
     
-    Adds a trace ID to the request context and response headers
+    Adds a trace ID to the request context and response headers. A valid
+    X-Trace-ID sent by the caller is kept, so one trace spans services.
     """
     
     def process_request(self, request):
         """Generate trace ID for request"""
-        trace_id = generate_trace_id()
+        trace_id = request.META.get('HTTP_X_TRACE_ID')
+        if not is_valid_trace_id(trace_id):
+            trace_id = generate_trace_id()
         set_trace_id(trace_id)
         request.trace_id = trace_id
         return None
@@ -25,4 +28,3 @@ class TraceIDMiddleware(MiddlewareMixin):
         if trace_id:
             response['X-Trace-ID'] = trace_id
         return response
-
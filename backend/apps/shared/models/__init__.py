@@ -4,6 +4,7 @@ Shared models
 from .base import TimestampedModel, SoftDeleteModel
 from .rbac import Permission, Role, UserRole, ResourcePermission
 from .audit import AuditLog
+from .storage import StoredBlob, ImageVariant
 
 __all__ = [
     'TimestampedModel',
@@ -13,4 +14,6 @@ __all__ = [
     'UserRole',
     'ResourcePermission',
     'AuditLog',
+    'StoredBlob',
+    'ImageVariant',
 ]
@@ -2,6 +2,7 @@
 Role-Based Access Control (RBAC) models
 """
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
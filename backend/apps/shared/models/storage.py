@@ -0,0 +1,59 @@
+"""
+Content-addressed storage models
+"""
+from django.db import models
+from django.db.models import F, Sum
+
+
+class StoredBlob(models.Model):
+    """A unique file body kept once by ContentAddressedStorage, with a reference count"""
+    
+    sha256 = models.CharField(max_length=64, db_index=True)
+    blob_name = models.CharField(max_length=255, unique=True)  # Name in the wrapped storage
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+    
+    @classmethod
+    def usage_report(cls):
+        """Bytes stored, bytes referenced and bytes saved by deduplication"""
+        totals = cls.objects.filter(ref_count__gt=0).aggregate(
+            stored_bytes=Sum('size'),
+            referenced_bytes=Sum(F('size') * F('ref_count')),
+            blobs=models.Count('id'),
+            references=Sum('ref_count'),
+        )
+        totals = {key: value or 0 for key, value in totals.items()}
+        totals['saved_bytes'] = totals['referenced_bytes'] - totals['stored_bytes']
+        return totals
+
+
+class ImageVariant(models.Model):
+    """A resized, metadata-free rendition of an image blob, stored next to the original"""
+    
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+    
+    blob = models.ForeignKey(StoredBlob, on_delete=models.CASCADE, related_name='variants')
+    max_dimension = models.PositiveIntegerField()  # Longest side of the variant in pixels
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    name = models.CharField(max_length=255, unique=True)  # Name in the wrapped storage
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['blob', 'format', 'max_dimension']
+        unique_together = ['blob', 'format', 'max_dimension']
+    
+    def __str__(self):
+        return f"{self.blob.sha256[:12]} {self.max_dimension}px {self.format}"
@@ -0,0 +1,32 @@
+"""
+pytest plugin enforcing per-request database query budgets
+
+Mark a test with @pytest.mark.query_budget(max_queries) (optionally
+duplicates=N to allow at most N runs of any one statement) and every
+request it makes through the test client is profiled; the test fails if
+any request goes over the budget. Works on Django TestCase methods too.
+"""
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries, duplicates=None): fail if a request made by the test '
+        'runs more than max_queries queries, or one statement more than duplicates times',
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+
+    from apps.shared.utils.query_profiler import QueryBudget
+    budget = QueryBudget(*marker.args, **marker.kwargs)
+    with budget:
+        outcome = yield
+    if outcome.excinfo is None and budget.violations:
+        pytest.fail(budget.report(), pytrace=False)
@@ -0,0 +1,31 @@
+"""
+In-process Redis for tests, behind django-redis (needs fakeredis[lua])
+"""
+import itertools
+
+_servers = itertools.count()
+
+
+def fake_redis_caches():
+    """
+    A CACHES setting whose default cache is django-redis on a fresh fake Redis server
+
+    Lua scripts, hashes and renames behave as on Redis, so code paths that
+    take the raw connection (get_redis_connection) run unchanged.
+    """
+    import fakeredis
+
+    return {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            # django-redis pools connections per URL, so each server gets its own
+            'LOCATION': f'redis://fake-redis-{next(_servers)}:6379/0',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'CONNECTION_POOL_KWARGS': {
+                    'connection_class': fakeredis.FakeConnection,
+                    'server': fakeredis.FakeServer(),
+                },
+            },
+        },
+    }
@@ -2,9 +2,14 @@
 Shared services
 """
 from .audit_service import AuditService, get_client_ip
+from .image_service import ImageVariantService, render_variants
+from .stats_service import StatsService
 
 __all__ = [
     'AuditService',
     'get_client_ip',
+    'ImageVariantService',
+    'render_variants',
+    'StatsService',
 ]
 
@@ -3,6 +3,7 @@ Audit logging service
 """
 from typing import Optional, Dict, Any
 from django.contrib.auth import get_user_model
+from rest_framework.settings import api_settings
 from apps.shared.models.audit import AuditLog
 from apps.shared.utils.trace import get_trace_id
 
@@ -165,8 +166,12 @@ def get_client_ip(request) -> Optional[str]:
         IP address string
     """
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+    num_proxies = api_settings.NUM_PROXIES
+    if x_forwarded_for and num_proxies != 0:
+        addrs = [addr.strip() for addr in x_forwarded_for.split(',')]
+        # With a known number of proxies, trust only the address the
+        # outermost one saw; the leading entries are client-supplied
+        ip = addrs[0] if num_proxies is None else addrs[-min(num_proxies, len(addrs))]
     else:
         ip = request.META.get('REMOTE_ADDR')
     return ip
@@ -0,0 +1,201 @@
+"""
+Image variant pipeline: thumbnails for uploaded images
+"""
+import atexit
+import io
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from PIL import Image, ImageOps
+from apps.shared.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SHA256_RE = re.compile(r'(?<![0-9a-f])([0-9a-f]{64})(?![0-9a-f])')
+
+# Longest side, in pixels, of the generated variants
+VARIANT_SIZES = (64, 128, 256, 512, 1024)
+VARIANT_FORMATS = ('webp', 'jpeg')
+CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+SAVE_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+
+def render_variants(data, sizes=VARIANT_SIZES, formats=VARIANT_FORMATS):
+    """
+    Resize an encoded image to each size and format.
+
+    Runs in a worker process, so it only deals in bytes. EXIF orientation is
+    applied to the pixels and the outputs are written without EXIF, ICC or
+    other metadata. Sizes above the original are clamped to it rather than
+    upscaled. Returns dicts with max_dimension, format, width, height, content.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        image = ImageOps.exif_transpose(original)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    longest = max(image.size)
+    variants = []
+    for max_dimension in sorted({min(size, longest) for size in sizes}):
+        resized = image.copy()
+        resized.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        for fmt in formats:
+            frame = resized
+            if fmt == 'jpeg' and frame.mode == 'RGBA':
+                frame = Image.new('RGB', resized.size, (255, 255, 255))
+                frame.paste(resized, mask=resized.getchannel('A'))
+            buffer = io.BytesIO()
+            frame.save(buffer, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+            variants.append({
+                'max_dimension': max_dimension,
+                'format': fmt,
+                'width': frame.width,
+                'height': frame.height,
+                'content': buffer.getvalue(),
+            })
+    return variants
+
+
+class ImageVariantService:
+    """
+    Generates and serves resized variants of content-addressed images.
+
+    Uploads are scheduled after commit, on Celery when a broker is configured
+    or a background thread otherwise. The CPU-bound resizing runs in a process
+    pool and the variants are written next to the original blob
+    (cas/ab/<sha256>/<size>.<format>), so they share its lifetime.
+    """
+
+    PROCESS_TIMEOUT = 120
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @staticmethod
+    def schedule(name):
+        """Generate variants for a stored image once the current transaction commits"""
+        if not name or not SHA256_RE.search(name):
+            return
+        transaction.on_commit(lambda: ImageVariantService._dispatch(name))
+
+    @staticmethod
+    def _dispatch(name):
+        if getattr(settings, 'CELERY_BROKER_URL', None):
+            from apps.shared.tasks import process_image_variants
+            process_image_variants.delay(name)
+            return
+        # No Celery (e.g. on Render): keep the request fast with a thread
+        threading.Thread(target=ImageVariantService._process_in_thread, args=(name,), daemon=True).start()
+
+    @staticmethod
+    def _process_in_thread(name):
+        try:
+            ImageVariantService.process(name)
+        except Exception as e:
+            logger.error(f"Image variant generation failed for {name}: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def process(name):
+        """Render and store every variant of a content-addressed image. Returns the variants."""
+        from apps.shared.models import ImageVariant, StoredBlob
+        from apps.shared.storage import content_addressed_storage
+
+        blob_name = content_addressed_storage.resolve(name)
+        blob = StoredBlob.objects.filter(blob_name=blob_name).first()
+        if blob is None:
+            logger.warning(f"No stored blob for image {name}")
+            return []
+        if blob.variants.exists():
+            return list(blob.variants.all())
+
+        backend = content_addressed_storage.backend
+        with backend.open(blob.blob_name, 'rb') as f:
+            data = f.read()
+        rendered = ImageVariantService._render(data)
+
+        base_name = os.path.splitext(blob.blob_name)[0]
+        variants = []
+        for item in rendered:
+            variant_name = f"{base_name}/{item['max_dimension']}.{item['format']}"
+            if backend.exists(variant_name):
+                backend.delete(variant_name)
+            saved_name = backend.save(variant_name, ContentFile(item['content']))
+            variants.append(ImageVariant(
+                blob=blob,
+                max_dimension=item['max_dimension'],
+                format=item['format'],
+                name=saved_name,
+                width=item['width'],
+                height=item['height'],
+                size=len(item['content']),
+            ))
+        ImageVariant.objects.bulk_create(variants, ignore_conflicts=True)
+        return variants
+
+    @staticmethod
+    def _render(data):
+        """Render variants in the process pool, or inline where a pool cannot run"""
+        try:
+            executor = ImageVariantService._get_executor()
+            return executor.submit(render_variants, data).result(timeout=ImageVariantService.PROCESS_TIMEOUT)
+        except (AssertionError, BrokenProcessPool, OSError) as e:
+            # Daemonic Celery prefork children may not start processes of their own
+            logger.info(f"Rendering image variants inline: {e}")
+            ImageVariantService._reset_executor()
+            return render_variants(data)
+
+    @staticmethod
+    def _get_executor():
+        with ImageVariantService._executor_lock:
+            if ImageVariantService._executor is None:
+                workers = getattr(settings, 'IMAGE_PROCESSING_WORKERS', None) or min(2, os.cpu_count() or 1)
+                ImageVariantService._executor = ProcessPoolExecutor(max_workers=workers)
+                atexit.register(ImageVariantService._reset_executor)
+            return ImageVariantService._executor
+
+    @staticmethod
+    def _reset_executor():
+        with ImageVariantService._executor_lock:
+            executor, ImageVariantService._executor = ImageVariantService._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def best_variant(sha256, size=None, fmt='webp'):
+        """
+        Smallest variant covering size (longest side) in a format, else the largest.
+
+        Returns None while variants have not been generated yet.
+        """
+        from apps.shared.models import ImageVariant
+
+        variants = list(ImageVariant.objects.filter(
+            blob__sha256=sha256, format=fmt,
+        ).select_related('blob').order_by('max_dimension'))
+        if not variants:
+            return None
+        if size:
+            for variant in variants:
+                if variant.max_dimension >= size:
+                    return variant
+        return variants[-1]
+
+    @staticmethod
+    def variant_url(name_or_url, size=None):
+        """URL of the variant endpoint for a content-addressed name or URL, or None"""
+        match = SHA256_RE.search(name_or_url) if isinstance(name_or_url, str) else None
+        if not match:
+            return None
+        url = reverse('image-variant', kwargs={'sha256': match.group(1)})
+        return f"{url}?size={size}" if size else url
@@ -0,0 +1,87 @@
+"""
+Signals for shared app
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.signals import post_delete, pre_save
+from .storage import ContentAddressedStorage
+from .utils.permissions import PermissionResolver
+
+
+def content_addressed_fields(model):
+    """File fields of a model that are stored in ContentAddressedStorage"""
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def release_replaced_files(sender, instance, raw=False, **kwargs):
+    """
+    Release blobs whose file was replaced or cleared, once the save commits
+
+    Legacy names (saved before the field switched storage) are left alone,
+    as Django never deleted replaced files.
+    """
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fields = content_addressed_fields(sender)
+    previous = sender._default_manager.filter(pk=instance.pk).values(
+        *[field.attname for field in fields]
+    ).first()
+    if not previous:
+        return
+    for field in fields:
+        old_name = previous[field.attname]
+        new_name = getattr(instance, field.attname).name
+        if old_name and old_name != new_name and field.storage.is_content_addressed(old_name):
+            transaction.on_commit(lambda storage=field.storage, name=old_name: storage.delete(name))
+
+
+def release_deleted_files(sender, instance, **kwargs):
+    """Release blobs referenced by a deleted row, once the delete commits (legacy files are kept)"""
+    for field in content_addressed_fields(sender):
+        name = getattr(instance, field.attname).name
+        if name and field.storage.is_content_addressed(name):
+            transaction.on_commit(lambda storage=field.storage, name=name: storage.delete(name))
+
+
+def register_signals():
+    """Connect reference counting for every model with content-addressed files"""
+    for model in apps.get_models():
+        if content_addressed_fields(model):
+            pre_save.connect(release_replaced_files, sender=model, dispatch_uid=f'cas_replace_{model._meta.label}')
+            post_delete.connect(release_deleted_files, sender=model, dispatch_uid=f'cas_delete_{model._meta.label}')
+    register_trace_propagation()
+    register_metrics_collection()
+    PermissionResolver.register()
+
+
+def register_trace_propagation():
+    """Carry the request's trace ID into the Celery tasks it queues"""
+    try:
+        from celery.signals import before_task_publish, task_postrun, task_prerun
+    except ImportError:
+        return
+    from .utils.trace import adopt_trace_header, attach_trace_header, clear_trace_id
+    before_task_publish.connect(attach_trace_header, dispatch_uid='trace_attach_header', weak=False)
+    task_prerun.connect(adopt_trace_header, dispatch_uid='trace_adopt_header', weak=False)
+    task_postrun.connect(clear_trace_id, dispatch_uid='trace_clear', weak=False)
+
+
+def register_metrics_collection():
+    """Time Celery tasks and their queue lag, and serve worker metrics"""
+    try:
+        from celery.signals import (
+            before_task_publish, task_postrun, task_prerun, worker_init, worker_process_shutdown, worker_ready,
+        )
+    except ImportError:
+        return
+    from .utils import metrics
+    before_task_publish.connect(metrics.attach_publish_time, dispatch_uid='metrics_publish_time', weak=False)
+    task_prerun.connect(metrics.start_task_timer, dispatch_uid='metrics_task_start', weak=False)
+    task_postrun.connect(metrics.stop_task_timer, dispatch_uid='metrics_task_stop', weak=False)
+    worker_init.connect(metrics.prepare_worker_metrics, dispatch_uid='metrics_worker_init', weak=False)
+    worker_ready.connect(metrics.serve_worker_metrics, dispatch_uid='metrics_worker_ready', weak=False)
+    worker_process_shutdown.connect(metrics.release_worker_process, dispatch_uid='metrics_worker_exit', weak=False)
@@ -0,0 +1,160 @@
+"""
+Content-addressed, deduplicating file storage
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+from django.db import transaction
+from django.db.models import F
+
+# <upload_to>/<sha256>/<original filename>
+CONTENT_ADDRESSED_NAME_RE = re.compile(r'^(?:.*/)?(?P<sha256>[0-9a-f]{64})/(?P<filename>[^/]+)$')
+
+
+class ContentAddressedStorage(Storage):
+    """
+    Storage that keeps each distinct file body once.
+
+    Uploads are hashed (SHA-256) while they are spooled to a temporary file,
+    and the body is written to the wrapped storage (default_storage, so the
+    local MEDIA_ROOT or a django-storages backend) only when no blob with
+    that hash exists yet. Blobs are reference counted in StoredBlob.
+
+    The name stored on the model is <upload_to>/<sha256>/<original filename>,
+    which keeps the original filename for downloads while open/path/url/size
+    resolve to the shared blob. delete() releases one reference and removes
+    the blob with the last one. Names saved before a field switched to this
+    storage are passed through to the wrapped storage unchanged.
+    """
+
+    BLOB_PREFIX = 'cas'
+    CHUNK_SIZE = 64 * 1024
+    SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or default_storage
+
+    def blob_name(self, sha256, filename):
+        """Name of a blob in the wrapped storage; the extension keeps MIME types guessable"""
+        extension = os.path.splitext(filename)[1].lower()
+        return f"{self.BLOB_PREFIX}/{sha256[:2]}/{sha256}{extension}"
+
+    def resolve(self, name):
+        """Map a stored name to the wrapped storage's name"""
+        match = CONTENT_ADDRESSED_NAME_RE.match(name or '')
+        if not match:
+            return name
+        return self.blob_name(match.group('sha256'), match.group('filename'))
+
+    def is_content_addressed(self, name):
+        """Whether a stored name refers to a reference-counted blob (not a legacy file)"""
+        return bool(CONTENT_ADDRESSED_NAME_RE.match(name or ''))
+
+    def get_available_name(self, name, max_length=None):
+        """Names embed the content hash, so they never collide; long filenames are cut to fit max_length"""
+        if max_length is None:
+            return name
+        directory, filename = posixpath.split(name)
+        room = max_length - len(posixpath.join(directory, '0' * 64, ''))
+        if len(filename) <= room:
+            return name
+        root, extension = os.path.splitext(filename)
+        if room - len(extension) < 1:
+            raise SuspiciousFileOperation(
+                f'Storage can not find an available filename for "{name}". '
+                'Please make sure that the corresponding file field allows sufficient "max_length".'
+            )
+        return posixpath.join(directory, root[:room - len(extension)] + extension)
+
+    def _save(self, name, content):
+        from apps.shared.models import StoredBlob
+
+        directory, filename = posixpath.split(name)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as spool:
+            for chunk in content.chunks(self.CHUNK_SIZE):
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+            sha256 = digest.hexdigest()
+            blob_name = self.blob_name(sha256, filename)
+
+            with transaction.atomic():
+                blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                    blob_name=blob_name,
+                    defaults={'sha256': sha256, 'size': size},
+                )
+                if created or not self.backend.exists(blob_name):
+                    spool.seek(0)
+                    self.backend.save(blob_name, File(spool, name=filename))
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+        return posixpath.join(directory, sha256, filename)
+
+    def delete(self, name):
+        """Release one reference to a blob, deleting it with the last reference"""
+        from apps.shared.models import StoredBlob
+
+        blob_name = self.resolve(name)
+        if blob_name == name:
+            self.backend.delete(name)
+            return
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(blob_name=blob_name).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            # Deleted under the row lock so a concurrent upload re-creates the body
+            variant_names = list(blob.variants.values_list('name', flat=True))
+            blob.delete()
+            self.backend.delete(blob_name)
+            for variant_name in variant_names:
+                self.backend.delete(variant_name)
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(self.resolve(name), mode)
+
+    def exists(self, name):
+        return self.backend.exists(self.resolve(name))
+
+    def path(self, name):
+        return self.backend.path(self.resolve(name))
+
+    def url(self, name):
+        return self.backend.url(self.resolve(name))
+
+    def size(self, name):
+        return self.backend.size(self.resolve(name))
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(self.resolve(name))
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(self.resolve(name))
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(self.resolve(name))
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def get_content_addressed_storage():
+    """Storage callable for FileFields (keeps migrations independent of settings)"""
+    return content_addressed_storage
@@ -82,3 +82,27 @@ def cleanup_old_logs_task(days: int = 30):
         logger.error(f"Failed to cleanup logs: {exc}", exc_info=True)
         raise
 
+
+
+@shared_task(bind=True, max_retries=3)
+def process_image_variants(self, name: str):
+    """
+    Generate resized variants of an uploaded image
+    
+    Args:
+        name: Content-addressed storage name of the original image
+        
+    Returns:
+        Number of variants stored
+    """
+    from PIL import Image, UnidentifiedImageError
+    from apps.shared.services.image_service import ImageVariantService
+    try:
+        return len(ImageVariantService.process(name))
+    except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        # Not an image Pillow will decode; retrying cannot help
+        logger.warning(f"Skipping image variants for {name}: {exc}")
+        return 0
+    except Exception as exc:
+        logger.error(f"Image variant generation failed for {name}: {exc}", exc_info=True)
+        raise self.retry(exc=exc, countdown=60)
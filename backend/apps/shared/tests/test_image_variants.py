@@ -0,0 +1,165 @@
+"""
+Test cases for the image variant pipeline
+"""
+import io
+import os
+import shutil
+import tempfile
+from urllib.parse import quote
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+from apps.accounts.models import Student
+from apps.shared.models import ImageVariant, StoredBlob
+from apps.shared.services.image_service import ImageVariantService, render_variants
+from apps.shared.storage import content_addressed_storage
+
+User = get_user_model()
+
+
+def make_jpeg(width=300, height=200, orientation=None):
+    image = Image.new('RGB', (width, height), (200, 40, 40))
+    exif = Image.Exif()
+    exif[0x010F] = 'Test Camera'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class RenderVariantsTestCase(TestCase):
+    """Test cases for render_variants"""
+
+    def test_variants_are_oriented_clamped_and_stripped(self):
+        """Test EXIF rotation is applied, sizes never upscale and metadata is dropped"""
+        # Orientation 6: stored landscape, displayed rotated 90 degrees
+        variants = render_variants(make_jpeg(300, 200, orientation=6))
+
+        self.assertEqual(
+            sorted({(v['max_dimension'], v['format']) for v in variants}),
+            sorted((size, fmt) for size in (64, 128, 256, 300) for fmt in ('jpeg', 'webp')),
+        )
+        largest = [v for v in variants if v['max_dimension'] == 300 and v['format'] == 'jpeg'][0]
+        self.assertEqual((largest['width'], largest['height']), (200, 300))
+        for variant in variants:
+            with Image.open(io.BytesIO(variant['content'])) as image:
+                self.assertEqual(image.format, variant['format'].upper())
+                self.assertEqual(max(image.size), variant['max_dimension'])
+                self.assertFalse(image.getexif())
+                self.assertNotIn('icc_profile', image.info)
+
+
+class ImageVariantPipelineTestCase(APITestCase):
+    """Test cases for generating and serving image variants"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL_REDIRECT_PREFIX=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='avatarstudent',
+            email='avatarstudent@example.com',
+            password='testpass123',
+            user_type='student',
+        )
+        self.student = Student.objects.create(
+            user=self.user, student_id='S100', year_of_study=1, branch='CSE',
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _upload(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                '/api/auth/profile/picture/',
+                {'profile_picture': SimpleUploadedFile('me.jpg', make_jpeg(600, 400), content_type='image/jpeg')},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)  # Variant generation is deferred
+        self.student.refresh_from_db()
+        return response.data
+
+    def test_upload_generates_variants_next_to_original(self):
+        """Test processing an uploaded picture stores every size and format beside the blob"""
+        data = self._upload()
+        blob = StoredBlob.objects.get()
+        self.assertIn(blob.sha256, data['thumbnail_url'])
+        self.assertFalse(ImageVariant.objects.exists())
+
+        variants = ImageVariantService.process(self.student.profile_picture.name)
+        self.assertEqual(len(variants), 10)  # 64, 128, 256, 512, 600 in WebP and JPEG
+        blob_dir = os.path.splitext(content_addressed_storage.backend.path(blob.blob_name))[0]
+        self.assertEqual(
+            sorted(os.listdir(blob_dir)),
+            sorted(f'{size}.{fmt}' for size in (64, 128, 256, 512, 600) for fmt in ('jpeg', 'webp')),
+        )
+        # Reprocessing is a no-op
+        self.assertEqual(len(ImageVariantService.process(self.student.profile_picture.name)), 10)
+        self.assertEqual(ImageVariant.objects.count(), 10)
+
+    def test_serves_best_variant_with_immutable_caching(self):
+        """Test the endpoint picks the smallest covering variant and format from Accept"""
+        data = self._upload()
+        url = data['thumbnail_url']
+
+        # Before processing the original is served through an uncached redirect
+        response = self.client.get(url, {'size': 100})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        ImageVariantService.process(self.student.profile_picture.name)
+        response = self.client.get(url, {'size': 100}, HTTP_ACCEPT='image/avif,image/webp,*/*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('Accept', response['Vary'])
+        etag = response['ETag']
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (128, 85))
+
+        response = self.client.get(url, {'size': 2000}, HTTP_ACCEPT='image/jpeg')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (600, 400))
+
+        response = self.client.get(url, {'size': 100}, HTTP_ACCEPT='image/webp', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_accel_redirect_quotes_stored_name(self):
+        """Test nginx offload percent-encodes the stored variant name"""
+        data = self._upload()
+        ImageVariantService.process(self.student.profile_picture.name)
+        variant = ImageVariant.objects.get(max_dimension=128, format='webp')
+        # Names come from the storage backend, which may keep characters unsafe in a URI
+        variant.name = variant.name.replace('128.webp', 'thumb #1 ?é.webp')
+        variant.save(update_fields=['name'])
+
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(data['thumbnail_url'], {'size': 100, 'format': 'webp'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + quote(variant.name))
+        self.assertTrue(response['X-Accel-Redirect'].endswith('/thumb%20%231%20%3F%C3%A9.webp'))
+        self.assertEqual(response.content, b'')
+
+    def test_variants_deleted_with_blob(self):
+        """Test releasing the last reference to an image removes its variants"""
+        self._upload()
+        ImageVariantService.process(self.student.profile_picture.name)
+        variant_paths = [
+            content_addressed_storage.backend.path(name)
+            for name in ImageVariant.objects.values_list('name', flat=True)
+        ]
+        self.assertTrue(all(os.path.exists(path) for path in variant_paths))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.delete()
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertFalse(ImageVariant.objects.exists())
+        self.assertFalse(any(os.path.exists(path) for path in variant_paths))
@@ -0,0 +1,121 @@
+"""
+Test cases for the Prometheus metrics endpoint and collectors
+"""
+import time
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import resolve
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.ws_authentication import JWTAuthMiddleware
+from apps.notifications.routing import websocket_urlpatterns
+from apps.shared.utils.metrics import attach_publish_time, start_task_timer, stop_task_timer
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsEndpointTestCase(APITestCase):
+    """Test cases for MetricsMiddleware, cache counters, Celery handlers and /metrics/"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='metricsuser', email='metricsuser@example.com')
+        self.client.force_authenticate(user=self.user)
+
+    def test_requests_and_cache_lookups_are_recorded(self):
+        """Test latency and query counts are labeled by URL name, not path"""
+        view = resolve('/api/notifications/unread-count/').view_name
+        requests = sample('django_http_request_duration_seconds_count', view=view, method='GET', status='200')
+        queries = sample('django_http_request_db_queries_sum', view=view)
+        misses = sample('django_cache_requests_total', cache='notification_count', result='miss')
+        hits = sample('django_cache_requests_total', cache='notification_count', result='hit')
+
+        self.client.get('/api/notifications/unread-count/')
+        self.client.get('/api/notifications/unread-count/')
+        self.client.get('/api/no-such-endpoint/')
+
+        self.assertEqual(
+            sample('django_http_request_duration_seconds_count', view=view, method='GET', status='200'), requests + 2,
+        )
+        self.assertGreater(sample('django_http_request_db_queries_sum', view=view), queries)
+        self.assertEqual(sample('django_cache_requests_total', cache='notification_count', result='miss'), misses + 1)
+        self.assertEqual(sample('django_cache_requests_total', cache='notification_count', result='hit'), hits + 1)
+        self.assertGreaterEqual(
+            sample('django_http_request_duration_seconds_count', view='<unresolved>', method='GET', status='404'), 1,
+        )
+
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            f'django_http_request_duration_seconds_count{{method="GET",status="200",view="{view}"}}',
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_is_required_when_set(self):
+        """Test scrapes must present the bearer token"""
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+
+    def test_celery_task_duration_and_queue_lag(self):
+        """Test the publish header gives the queue lag and postrun observes the duration"""
+        headers = {}
+        attach_publish_time(headers=headers)
+        self.assertIn('published_at', headers)
+
+        name = 'apps.faculty_admin.tasks.sweep_sla_states_task'
+        request = type('Request', (), {'published_at': time.time() - 12, 'eta': None})()
+        task = type('Task', (), {'name': name, 'request': request})()
+        lag = sample('celery_task_queue_lag_seconds_sum', task=name)
+        lagged = sample('celery_task_queue_lag_seconds_count', task=name)
+        runs = sample('celery_task_duration_seconds_count', task=name, state='SUCCESS')
+        failures = sample('celery_task_duration_seconds_count', task=name, state='FAILURE')
+
+        start_task_timer(task_id='task-1', task=task)
+        stop_task_timer(task_id='task-1', task=task, state='SUCCESS')
+        self.assertGreaterEqual(sample('celery_task_queue_lag_seconds_sum', task=name) - lag, 12)
+        self.assertEqual(sample('celery_task_duration_seconds_count', task=name, state='SUCCESS'), runs + 1)
+
+        # Eager runs carry no publish time: timed, but no lag observed
+        request.published_at = None
+        start_task_timer(task_id='task-2', task=task)
+        stop_task_timer(task_id='task-2', task=task, state='FAILURE')
+        self.assertEqual(sample('celery_task_queue_lag_seconds_count', task=name), lagged + 1)
+        self.assertEqual(sample('celery_task_duration_seconds_count', task=name, state='FAILURE'), failures + 1)
+
+
+class WebSocketConnectionMetricsTestCase(TransactionTestCase):
+    """Test cases for the websocket_connections gauge"""
+
+    async def test_gauge_follows_accepted_connections(self):
+        """Test only accepted connections are counted, and only until they close"""
+        user = await User.objects.acreate(username='wsmetrics', email='wsmetrics@example.com')
+        application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        before = sample('websocket_connections', consumer='NotificationConsumer')
+
+        rejected = WebsocketCommunicator(application, '/ws/notifications/me/')
+        connected, _ = await rejected.connect()
+        self.assertFalse(connected)
+        self.assertEqual(sample('websocket_connections', consumer='NotificationConsumer'), before)
+
+        communicator = WebsocketCommunicator(
+            application, f'/ws/notifications/me/?token={AccessToken.for_user(user)}',
+        )
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()
+        self.assertEqual(sample('websocket_connections', consumer='NotificationConsumer'), before + 1)
+
+        await communicator.disconnect()
+        self.assertEqual(sample('websocket_connections', consumer='NotificationConsumer'), before)
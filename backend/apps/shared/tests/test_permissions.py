@@ -0,0 +1,127 @@
+"""
+Test cases for the compiled RBAC permission resolver
+"""
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from apps.shared.models import Permission, ResourcePermission, Role, UserRole
+from apps.shared.utils import (
+    PermissionResolver, filter_accessible, get_user_permissions, get_user_roles,
+    user_has_permission, user_has_permissions, user_has_role,
+)
+
+User = get_user_model()
+
+
+class PermissionResolverTestCase(TestCase):
+    """Test cases for PermissionResolver, the permission helpers and filter_accessible"""
+
+    def setUp(self):
+        cache.clear()
+        # The test process is the only one using the LocMem cache, so it acts as shared
+        patcher = mock.patch('apps.shared.utils.permissions.is_shared_cache', return_value=True)
+        self.shared_cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='rbacuser', email='rbacuser@example.com')
+        self.others = [
+            User.objects.create_user(username=f'rbacother{index}', email=f'rbacother{index}@example.com')
+            for index in range(3)
+        ]
+        self.permissions = {
+            codename: Permission.objects.create(name=codename.title(), codename=codename)
+            for codename in ('notice.read', 'notice.publish', 'user.view', 'complaint.assign')
+        }
+        self.editor = Role.objects.create(name='Editor', codename='editor')
+        self.editor.permissions.add(self.permissions['notice.read'], self.permissions['notice.publish'])
+        UserRole.objects.create(user=self.user, role=self.editor)
+
+    def grant(self, codename, obj, **kwargs):
+        return ResourcePermission.objects.create(
+            user=self.user, permission=self.permissions[codename],
+            content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk, **kwargs,
+        )
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_set_is_compiled_once_and_batches_are_answered_in_memory(self):
+        """Test repeated and batched checks run no queries after the first compile"""
+        self.grant('user.view', self.others[0])
+        with self.assertNumQueries(3):
+            self.assertTrue(user_has_permissions(self.user, ['notice.read', 'notice.publish', 'user.view']))
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permission(self.user, 'notice.read'))
+            self.assertFalse(user_has_permissions(self.user, ['notice.read', 'complaint.assign']))
+            self.assertTrue(user_has_role(self.user, 'editor'))
+            self.assertEqual(sorted(get_user_roles(self.user)), ['editor'])
+            self.assertEqual(sorted(get_user_permissions(self.user)), ['notice.publish', 'notice.read', 'user.view'])
+
+        # Another request (a new user instance) reads the shared cache
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permission(user, 'user.view'))
+
+    def test_unshared_cache_compiles_once_per_request(self):
+        """Test a per-process cache is not trusted across requests, only the instance memo is"""
+        self.shared_cache.return_value = False
+        with self.assertNumQueries(3):
+            self.assertTrue(user_has_permission(self.user, 'notice.read'))
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_role(self.user, 'editor'))
+
+        # A change made elsewhere (no signal here) shows up in the next request
+        UserRole.objects.filter(user=self.user).update(is_active=False)
+        self.assertFalse(user_has_permission(self.fresh_user(), 'notice.read'))
+
+    def test_expired_inactive_and_changed_grants(self):
+        """Test expiry and is_active are respected and changes invalidate cached sets"""
+        past = timezone.now() - timedelta(hours=1)
+        auditor = Role.objects.create(name='Auditor', codename='auditor')
+        auditor.permissions.add(self.permissions['complaint.assign'])
+        UserRole.objects.create(user=self.user, role=auditor, expires_at=past)
+        self.grant('user.view', self.others[0], expires_at=past)
+        self.assertFalse(user_has_permission(self.user, 'complaint.assign'))
+        self.assertFalse(user_has_permission(self.user, 'user.view'))
+        self.assertFalse(user_has_role(self.user, 'auditor'))
+
+        # Role permission added: visible on the next check
+        self.editor.permissions.add(self.permissions['complaint.assign'])
+        self.assertTrue(user_has_permission(self.user, 'complaint.assign'))
+
+        # Permission deactivated, then role assignment deactivated
+        self.permissions['notice.publish'].is_active = False
+        self.permissions['notice.publish'].save()
+        self.assertFalse(user_has_permission(self.user, 'notice.publish'))
+        UserRole.objects.filter(user=self.user, role=self.editor).update(is_active=False)
+        PermissionResolver.invalidate()  # update() sends no signals
+        self.assertFalse(user_has_permission(self.user, 'notice.read'))
+
+        # A grant expiring soon caps how long the set is cached
+        self.grant('user.view', self.others[1], expires_at=timezone.now() + timedelta(seconds=30))
+        permission_set, timeout = PermissionResolver.compile(self.user)
+        self.assertTrue(permission_set.has_permission('user.view'))
+        self.assertLessEqual(timeout, 31)
+
+    def test_filter_accessible(self):
+        """Test role permissions cover every object and direct grants only their own"""
+        users = User.objects.filter(username__startswith='rbacother')
+        self.assertQuerysetEqual(filter_accessible(self.user, users, 'user.view'), [])
+
+        self.grant('user.view', self.others[0])
+        self.grant('user.view', self.others[2])
+        self.grant('user.view', self.editor)  # Other content types are ignored
+        self.assertEqual(
+            sorted(filter_accessible(self.user, users, 'user.view').values_list('username', flat=True)),
+            ['rbacother0', 'rbacother2'],
+        )
+
+        self.editor.permissions.add(self.permissions['user.view'])
+        self.assertEqual(filter_accessible(self.user, users, 'user.view').count(), 3)
+
+        admin = User.objects.create_superuser(username='rbacadmin', email='rbacadmin@example.com', password='x')
+        self.assertEqual(filter_accessible(admin, users, 'complaint.assign').count(), 3)
+        self.assertTrue(user_has_permissions(admin, ['anything']))
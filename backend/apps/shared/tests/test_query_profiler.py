@@ -0,0 +1,90 @@
+"""
+Test cases for the query profiler middleware and query budgets
+"""
+import json
+from io import StringIO
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from apps.shared.utils.logging import flush_logs, get_log_handler
+from apps.shared.utils.query_profiler import QueryBudget, QueryProfiler, fingerprint
+
+User = get_user_model()
+
+
+class QueryProfilerTestCase(APITestCase):
+    """Test cases for QueryProfiler, QueryProfilerMiddleware and QueryBudget"""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'profiled{index}', email=f'profiled{index}@example.com')
+            for index in range(4)
+        ]
+        self.client.force_authenticate(user=self.users[0])
+
+    def test_fingerprints_and_duplicates(self):
+        """Test statements differing only in values share a fingerprint and N+1 loops are caught"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'it''s'   LIMIT 21"),
+            'SELECT * FROM t WHERE id = ? AND name = ? LIMIT ?',
+        )
+        self.assertEqual(fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'), 'SELECT ? FROM t WHERE id IN (...)')
+
+        with QueryProfiler(slowest=2) as profiler:
+            for user in self.users:
+                User.objects.get(pk=user.pk)
+            User.objects.count()
+        self.assertEqual(profiler.count, 5)
+        duplicate, = profiler.duplicates()
+        self.assertEqual(duplicate['count'], 4)
+        self.assertIn('WHERE "accounts_user"."id" = ?', duplicate['fingerprint'])
+        self.assertEqual(len(profiler.slowest_queries()), 2)
+
+        User.objects.count()  # Not recorded once stopped
+        self.assertEqual(profiler.count, 5)
+
+    def test_middleware_is_opt_in(self):
+        """Test profiles reach the Server-Timing header and the log under the trace ID"""
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        output = StringIO()
+        handler = get_log_handler()
+        previous = handler.setStream(output)
+        try:
+            with override_settings(QUERY_PROFILER_ENABLED=True):
+                self.client.handler.load_middleware()  # As a server started with the setting would
+                response = self.client.get('/api/notifications/')
+            flush_logs()
+        finally:
+            handler.setStream(previous)
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries"')
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        record = next(record for record in records if record['logger'] == 'query_profiler')
+        self.assertEqual(record['request_path'], '/api/notifications/')
+        self.assertEqual(record['trace_id'], response['X-Trace-ID'])
+        self.assertGreaterEqual(record['db_queries'], 1)
+        self.assertIn('db_slowest', record)
+
+    def test_budget_reports_requests_over_budget(self):
+        """Test QueryBudget flags requests over the query or repeat limit"""
+        with QueryBudget(0) as budget:
+            self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(len(budget.requests), 1)
+        self.assertEqual(budget.violations[0][0], 'GET /api/notifications/unread-count/')
+        self.assertIn('Query budget (0 queries) exceeded', budget.report())
+
+        with QueryBudget(50, duplicates=1) as budget:
+            self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(budget.violations, [])
+
+    @pytest.mark.query_budget(5)
+    def test_query_budget_marker(self):
+        """Test the pytest marker profiles requests made by a TestCase method"""
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, 200)
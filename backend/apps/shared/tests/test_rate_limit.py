@@ -0,0 +1,160 @@
+"""
+Test cases for the sliding-window rate limiter and DRF throttles
+"""
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.shared.redis_stub import fake_redis_caches
+from apps.shared.services import get_client_ip
+from apps.shared.utils import RateLimiter
+
+WINDOW_START = 1_700_000_400.0  # A multiple of 60
+
+
+def reset_script():
+    RateLimiter._script = None
+    RateLimiter._script_loaded = False
+
+
+def rest_framework_settings(**overrides):
+    return {**settings.REST_FRAMEWORK, **overrides}
+
+
+class RateLimiterTestCase(TestCase):
+    """Test cases for RateLimiter"""
+
+    def setUp(self):
+        cache.clear()
+        reset_script()
+        self.addCleanup(reset_script)
+        patcher = mock.patch('apps.shared.utils.rate_limit.time.time', return_value=WINDOW_START)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = RateLimiter('test', limit=3, window=60)
+
+    def test_limit_within_window(self):
+        """Test hits up to the limit pass, the next is refused, and idents are independent"""
+        self.assertTrue(all(self.limiter.hit('a').allowed for _ in range(3)))
+        self.assertTrue(self.limiter.peek('b').allowed)
+        refused = self.limiter.hit('a')
+        self.assertFalse(refused.allowed)
+        self.assertEqual(refused.count, 4)
+        self.assertGreater(refused.retry_after, 0)
+        self.assertTrue(self.limiter.hit('b').allowed)
+
+        self.limiter.reset('a')
+        self.assertTrue(self.limiter.hit('a').allowed)
+
+    def test_peek_does_not_count(self):
+        """Test peek reports the next hit's outcome without counting it"""
+        for _ in range(2):
+            self.assertTrue(self.limiter.peek('a').allowed)
+            self.limiter.hit('a')
+        self.assertTrue(self.limiter.peek('a').allowed)
+        self.limiter.hit('a')
+        self.assertFalse(self.limiter.peek('a').allowed)
+        self.assertEqual(self.limiter.peek('a').count, 3)
+
+    def test_previous_window_decays(self):
+        """Test the previous window counts in proportion to its overlap"""
+        for _ in range(3):
+            self.limiter.hit('a')
+
+        # A quarter into the next window, 3 * 0.75 = 2.25 still counts
+        self.clock.return_value = WINDOW_START + 75
+        refused = self.limiter.peek('a')
+        self.assertFalse(refused.allowed)
+        self.assertAlmostEqual(refused.count, 2.25)
+        # Room for one more once the weight drops to 2/3, 20 seconds in
+        self.assertAlmostEqual(refused.retry_after, 5)
+        self.clock.return_value = WINDOW_START + 81
+        self.assertTrue(self.limiter.hit('a').allowed)
+        self.assertFalse(self.limiter.hit('a').allowed)
+
+        # Two windows later nothing is left
+        self.clock.return_value = WINDOW_START + 180
+        self.assertEqual(self.limiter.peek('a').count, 0)
+
+
+@override_settings(CACHES=fake_redis_caches())
+class RedisRateLimiterTestCase(RateLimiterTestCase):
+    """The RateLimiter cases again, counting through the Lua script on a fake Redis server"""
+
+    def test_hits_go_through_the_script(self):
+        """Test hits run the script on the cache's own keys and peek reads what it wrote"""
+        from django_redis import get_redis_connection
+
+        redis = get_redis_connection()
+        self.limiter.hit('a')
+        self.assertIsNotNone(RateLimiter._script)
+        with mock.patch.object(RateLimiter, '_script', wraps=RateLimiter._script) as script:
+            self.limiter.hit('a')
+        index = int(WINDOW_START // 60)
+        script.assert_called_once_with(
+            keys=[cache.make_key(f'ratelimit:test:a:{index}'), cache.make_key(f'ratelimit:test:a:{index - 1}')],
+            args=[120],
+        )
+        self.assertEqual(redis.get(cache.make_key(f'ratelimit:test:a:{index}')), b'2')
+        self.assertTrue(0 < redis.ttl(cache.make_key(f'ratelimit:test:a:{index}')) <= 120)
+        self.assertEqual(self.limiter.peek('a').count, 2)
+
+
+@override_settings(REST_FRAMEWORK=rest_framework_settings(
+    DEFAULT_THROTTLE_RATES={
+        'login': '2/min', 'login_ip': '4/min', 'otp': None, 'otp_ip': None, 'chatbot': None, 'search': '1/min',
+    },
+    NUM_PROXIES=1,
+))
+class ThrottleTestCase(APITestCase):
+    """Test cases for the throttles on login and search endpoints"""
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username, forwarded_for):
+        return self.client.post(
+            '/api/auth/login/', {'username': username, 'password': 'wrong'}, format='json',
+            HTTP_X_FORWARDED_FOR=forwarded_for,
+        ).status_code
+
+    def test_login_is_throttled_per_account_and_client_ip(self):
+        """Test logins are limited per username across addresses, and per address more loosely"""
+        for _ in range(2):
+            self.assertEqual(self.login('nobody', '1.2.3.4, 10.0.0.1'), status.HTTP_401_UNAUTHORIZED)
+        # Another address does not help the same account
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'Nobody', 'password': 'wrong'}, format='json',
+            HTTP_X_FORWARDED_FOR='10.0.0.2',
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+        # Other accounts behind the same address still get in, up to the address's own limit;
+        # only the address nginx saw counts, so a forged leading entry does not help
+        self.assertEqual(self.login('someone', '9.9.9.9, 10.0.0.1'), status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('anyone', '8.8.8.8, 10.0.0.1'), status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('everyone', '7.7.7.7, 10.0.0.1'), status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login('everyone', '10.0.0.3'), status.HTTP_401_UNAUTHORIZED)
+
+    def test_search_is_throttled_and_unrated_scopes_are_not(self):
+        """Test search is limited by its scope and a scope without a rate is not"""
+        self.assertEqual(self.client.get('/api/chatbot/search/', {'query': 'exam'}).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get('/api/chatbot/search/', {'query': 'exam'}).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        for _ in range(3):
+            response = self.client.post('/api/chatbot/chat/', {'message': ''}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_client_ip(self):
+        """Test get_client_ip trusts only NUM_PROXIES entries of X-Forwarded-For"""
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(get_client_ip(request), '2.2.2.2')
+        with override_settings(REST_FRAMEWORK=rest_framework_settings(NUM_PROXIES=None)):
+            self.assertEqual(get_client_ip(request), '1.1.1.1')
+        with override_settings(REST_FRAMEWORK=rest_framework_settings(NUM_PROXIES=0)):
+            self.assertEqual(get_client_ip(request), '10.0.0.1')
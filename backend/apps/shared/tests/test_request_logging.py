@@ -0,0 +1,128 @@
+"""
+Test cases for the queued logging pipeline, request sampling and trace propagation
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from apps.shared.middleware import LoggingMiddleware, TraceIDMiddleware
+from apps.shared.utils.logging import flush_logs, get_log_handler, get_logger
+from apps.shared.utils.trace import (
+    adopt_trace_header, attach_trace_header, clear_trace_id, get_trace_id, set_trace_id,
+)
+
+
+class RequestLoggingTestCase(SimpleTestCase):
+    """Test cases for LoggingMiddleware, get_logger and Celery trace headers"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.output = StringIO()
+        handler = get_log_handler()
+        previous = handler.setStream(self.output)
+        self.addCleanup(handler.setStream, previous)
+        self.addCleanup(flush_logs)
+        self.addCleanup(set_trace_id, None)
+
+    def records(self):
+        flush_logs()
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def request(self, path, status=200, **headers):
+        chain = TraceIDMiddleware(LoggingMiddleware(lambda request: HttpResponse(status=status)))
+        return chain(self.factory.get(path, **headers))
+
+    def test_loggers_share_one_queued_handler(self):
+        """Test every logger enqueues to the same handler and records keep their fields"""
+        first, second = get_logger('apps.first'), get_logger('apps.second')
+        self.assertEqual(first.handlers, second.handlers)
+        self.assertEqual(len(first.handlers), 1)
+        self.assertFalse(first.propagate)
+
+        set_trace_id('trace-0001')
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            first.exception('Failed for %s', 'user 7', extra={'extra_data': {'case': 3}})
+
+        record, = self.records()
+        self.assertEqual(record['message'], 'Failed for user 7')
+        self.assertEqual(record['level'], 'ERROR')
+        self.assertEqual(record['trace_id'], 'trace-0001')
+        self.assertEqual(record['case'], 3)
+        self.assertIn('ValueError: boom', record['exception'])
+
+    def test_records_reach_the_root_log_file(self):
+        """Test the root logger's file handler receives records, and console handlers are not doubled"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        file_handler = logging.FileHandler(os.path.join(directory, 'django.log'))
+        file_handler.setFormatter(logging.Formatter('{levelname} {name} {message}', style='{'))
+        console_handler = logging.StreamHandler(StringIO())
+        root = logging.getLogger()
+        for handler in (file_handler, console_handler):
+            root.addHandler(handler)
+            self.addCleanup(root.removeHandler, handler)
+        self.addCleanup(file_handler.close)
+        flush_logs()  # The listener picks up root's handlers when it starts
+
+        get_logger('apps.filed').warning('Disk at %d%%', 91)
+        record, = self.records()
+        self.assertEqual(record['message'], 'Disk at 91%')
+        self.assertTrue(record['timestamp'].endswith('+00:00'))
+        file_handler.flush()
+        with open(file_handler.baseFilename) as log_file:
+            self.assertEqual(log_file.read(), 'WARNING apps.filed Disk at 91%\n')
+        self.assertEqual(console_handler.stream.getvalue(), '')
+
+    def test_requests_are_skipped_sampled_and_traced(self):
+        """Test health checks are skipped, sampling applies and errors are always logged"""
+        response = self.request('/api/notices/', HTTP_X_TRACE_ID='client-trace-1234')
+        self.assertEqual(response['X-Trace-ID'], 'client-trace-1234')
+        self.request('/health/')
+        self.request('/static/app.js')
+        # Unusable incoming trace IDs are replaced
+        response = self.request('/api/notices/', HTTP_X_TRACE_ID='bad id\n')
+        self.assertNotEqual(response['X-Trace-ID'], 'bad id\n')
+
+        with override_settings(LOGGING_SAMPLE_RATES={'/api/': 0.5, '/api/notifications/': 0}):
+            self.request('/api/notifications/')
+            self.request('/api/notifications/', status=503)
+
+        records = self.records()
+        self.assertEqual([record['request_path'] for record in records], ['/api/notices/', '/api/notices/', '/api/notifications/'])
+        self.assertEqual(records[0]['trace_id'], 'client-trace-1234')
+        self.assertEqual(records[0]['status_code'], 200)
+        self.assertIn('duration_ms', records[0])
+        self.assertEqual((records[2]['status_code'], records[2]['level']), (503, 'ERROR'))
+
+    def test_trace_id_travels_in_celery_headers(self):
+        """Test the publishing request's trace ID is adopted by the task and cleared after"""
+        set_trace_id('request-trace-42')
+        headers = {}
+        attach_trace_header(headers=headers)
+        self.assertEqual(headers, {'trace_id': 'request-trace-42'})
+
+        set_trace_id(None)
+        task = type('Task', (), {'request': type('Request', (), {'trace_id': 'request-trace-42'})()})()
+        adopt_trace_header(task=task)
+        self.assertEqual(get_trace_id(), 'request-trace-42')
+        get_logger('apps.tasks').info('Task ran')
+        self.assertEqual(self.records()[0]['trace_id'], 'request-trace-42')
+
+        clear_trace_id()
+        self.assertIsNone(get_trace_id())
+        adopt_trace_header(task=type('Task', (), {'request': None})())
+        self.assertIsNotNone(get_trace_id())  # Tasks queued outside a request get their own
+
+    def test_benchmark_command(self):
+        """Test the middleware overhead benchmark runs"""
+        output = StringIO()
+        call_command('benchmark_request_logging', requests=50, sink_latency=0, stdout=output)
+        self.assertIn('Skipped path:', output.getvalue())
+        self.assertEqual(self.records(), [])
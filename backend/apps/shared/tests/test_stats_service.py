@@ -0,0 +1,102 @@
+"""
+Test cases for cached single-query dashboard statistics
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from apps.complaints.models import Complaint
+from apps.notifications.models import Notification
+from apps.notifications.views import notification_stats
+from apps.shared.services import StatsService
+from apps.shared.utils.cache import invalidate_on_commit
+
+User = get_user_model()
+
+
+class StatsServiceTestCase(APITestCase):
+    """Test cases for StatsService and the stats endpoints built on it"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='statsadmin', email='statsadmin@example.com', user_type='admin',
+        )
+        for category, status, urgency in [
+            ('academic', 'submitted', 'urgent'),
+            ('academic', 'in_progress', 'medium'),
+            ('hostel', 'resolved', 'urgent'),
+            ('hostel', 'under_review', 'low'),
+        ]:
+            Complaint.objects.create(
+                category=category, status=status, urgency=urgency, title='Issue', description='Details',
+            )
+
+    def test_breakdowns_are_one_cached_query(self):
+        """Test all breakdowns come from one query, cached until the model changes"""
+        with self.assertNumQueries(1):
+            counts = StatsService.breakdowns(
+                Complaint, fields=('category', 'status'), counts={'urgent': Q(urgency='urgent')},
+            )
+        self.assertEqual(counts['total'], 4)
+        self.assertEqual(counts['category']['academic'], 2)
+        self.assertEqual(counts['category']['infrastructure'], 0)
+        self.assertEqual(counts['status']['under_review'], 1)
+        self.assertEqual(counts['urgent'], 2)
+
+        with self.assertNumQueries(0):
+            StatsService.breakdowns(Complaint, fields=('category', 'status'), counts={'urgent': Q(urgency='urgent')})
+
+        complaint = Complaint.objects.create(category='academic', title='Issue', description='Details')
+        self.assertEqual(StatsService.breakdowns(Complaint, fields=('category',))['category']['academic'], 3)
+        complaint.delete()
+        self.assertEqual(StatsService.breakdowns(Complaint, fields=('category',))['category']['academic'], 2)
+
+    def test_complaint_endpoints_share_one_query(self):
+        """Test both complaint dashboards are served from the same cached breakdown"""
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/complaints/stats/')
+        self.assertEqual(response.data['total_complaints'], 4)
+        self.assertEqual(response.data['pending_complaints'], 1)
+        self.assertEqual(response.data['urgent_complaints'], 2)
+        self.assertEqual(response.data['complaints_by_status']['resolved'], 1)
+
+        faculty = User.objects.create_user(username='statsfaculty', email='statsfaculty@example.com', user_type='faculty')
+        self.client.force_authenticate(user=faculty)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/complaints/faculty/stats/')
+        self.assertEqual(response.data['pending_complaints'], 3)
+        self.assertEqual(response.data['complaints_by_category']['hostel'], 2)
+
+    def test_notification_stats_invalidated_by_bulk_reads(self):
+        """Test marking notifications read through bulk updates refreshes the unread count"""
+        for priority in ('low', 'high', 'high'):
+            Notification.objects.create(
+                user=self.admin, notification_type='general', priority=priority, title='Hi', message='Hi',
+            )
+        request = APIRequestFactory().get('/stats/')
+        force_authenticate(request, user=self.admin)
+        response = notification_stats(request)
+        self.assertEqual(response.data['unread_notifications'], 3)
+        self.assertEqual(response.data['notifications_by_priority']['high'], 2)
+
+        self.client.force_authenticate(user=self.admin)
+        self.client.put('/api/notifications/mark-all-read/')
+        request = APIRequestFactory().get('/stats/')
+        force_authenticate(request, user=self.admin)
+        self.assertEqual(notification_stats(request).data['unread_notifications'], 0)
+
+    def test_invalidation_repeats_after_commit(self):
+        """Test invalidate_on_commit acts now and again on commit, restarting lost counters from the clock"""
+        cache.set('cached', 'stale')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            invalidate_on_commit('cached')
+            invalidate_on_commit('generation', generation=True)
+            self.assertIsNone(cache.get('cached'))
+            cache.set('cached', 'rebuilt before commit')
+            started = cache.get('generation')
+        self.assertEqual(len(callbacks), 2)
+        self.assertIsNone(cache.get('cached'))
+        self.assertGreater(started, 10 ** 18)  # Nanoseconds, not 1
+        self.assertEqual(cache.get('generation'), started + 1)
@@ -0,0 +1,136 @@
+"""
+Test cases for content-addressed, deduplicating storage
+"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from apps.shared.models import StoredBlob
+from apps.study_groups.models import GroupMembership, Resource, StudyGroup
+
+User = get_user_model()
+
+
+class ContentAddressedStorageTestCase(TestCase):
+    """Test cases for ContentAddressedStorage and blob reference counting"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL_REDIRECT_PREFIX=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='uploader',
+            email='uploader@example.com',
+            password='testpass123',
+        )
+        self.groups = []
+        for name in ['Group A', 'Group B']:
+            group = StudyGroup.objects.create(
+                name=name,
+                description=name,
+                subject='mathematics',
+                difficulty_level='beginner',
+                creator=self.user,
+            )
+            GroupMembership.objects.create(group=group, user=self.user, role='admin')
+            self.groups.append(group)
+        self.content = b'%PDF-1.4 lecture notes ' * 4096
+
+    def _resource(self, group, filename='lecture.pdf', content=None):
+        return Resource.objects.create(
+            group=group,
+            uploaded_by=self.user,
+            title='Lecture',
+            resource_type='document',
+            file=SimpleUploadedFile(filename, content or self.content),
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        """Test the same file uploaded twice is stored once and downloads under its own name"""
+        first = self._resource(self.groups[0])
+        second = self._resource(self.groups[1], filename='week1.pdf')
+
+        blob = StoredBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, len(self.content))
+        self.assertEqual(first.file.path, second.file.path)
+        self.assertTrue(first.file.name.endswith(f'{blob.sha256}/lecture.pdf'))
+        self.assertEqual(len(os.listdir(os.path.dirname(first.file.path))), 1)
+
+        response = self.client.get(
+            f'/api/study-groups/{self.groups[1].id}/resources/{second.id}/download/'
+        )
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertIn('week1.pdf', response['Content-Disposition'])
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        report = StoredBlob.usage_report()
+        self.assertEqual(report['saved_bytes'], len(self.content))
+        output = StringIO()
+        call_command('storage_report', stdout=output)
+        self.assertIn(f"Bytes saved:       {len(self.content)}", output.getvalue())
+
+    def test_blob_deleted_with_last_reference(self):
+        """Test deleting rows releases references and removes the blob at zero"""
+        first = self._resource(self.groups[0])
+        second = self._resource(self.groups[1])
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_long_filenames_are_shortened_to_fit(self):
+        """Test a 250-character filename is cut to fit max_length, keeping its extension"""
+        resource = self._resource(self.groups[0], filename=f"{'n' * 246}.pdf")
+        field = Resource._meta.get_field('file')
+        self.assertEqual(len(resource.file.name), field.max_length)
+        self.assertTrue(resource.file.name.endswith('n.pdf'))
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+        with resource.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_replacing_a_file_releases_the_old_blob(self):
+        """Test saving a new file on a row releases the previous blob"""
+        resource = self._resource(self.groups[0])
+        old_path = resource.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resource.file.save('revised.pdf', ContentFile(b'revised notes'))
+        self.assertEqual(list(StoredBlob.objects.values_list('size', flat=True)), [len(b'revised notes')])
+        self.assertFalse(os.path.exists(old_path))
+        with resource.file.open('rb') as f:
+            self.assertEqual(f.read(), b'revised notes')
+
+    def test_replacing_a_legacy_file_keeps_it(self):
+        """Test files saved before the switch to content addressing are not deleted"""
+        legacy_name = 'group_resources/legacy.pdf'
+        os.makedirs(os.path.join(self.media_root, 'group_resources'))
+        legacy_path = os.path.join(self.media_root, legacy_name)
+        with open(legacy_path, 'wb') as f:
+            f.write(b'legacy notes')
+        resource = self._resource(self.groups[0])
+        Resource.objects.filter(pk=resource.pk).update(file=legacy_name)
+        resource.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resource.file.save('revised.pdf', ContentFile(b'revised notes'))
+        self.assertTrue(os.path.exists(legacy_path))
+        with self.captureOnCommitCallbacks(execute=True):
+            Resource.objects.filter(pk=resource.pk).update(file=legacy_name)
+            Resource.objects.get(pk=resource.pk).delete()
+        self.assertTrue(os.path.exists(legacy_path))
@@ -0,0 +1,103 @@
+"""
+DRF throttles backed by the shared sliding-window rate limiter
+"""
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from apps.shared.services.audit_service import get_client_ip
+from apps.shared.utils.rate_limit import RateLimiter, parse_rate
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Throttle requests per user (or per client IP when anonymous).
+
+    The rate comes from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope];
+    a scope without a rate is not throttled.
+    """
+
+    scope = None
+    per_user = True
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_ident(self, request):
+        if self.per_user and request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{get_client_ip(request) or 'unknown'}"
+
+    def get_limiter(self, scope=None):
+        scope = scope or self.scope
+        limit, window = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if limit is None:
+            return None
+        return RateLimiter(scope, limit, window)
+
+    def allow_request(self, request, view):
+        limiter = self.get_limiter()
+        if limiter is None:
+            return True
+        result = limiter.hit(self.get_ident(request))
+        self.retry_after = result.retry_after
+        return result.allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class AccountRateThrottle(SlidingWindowThrottle):
+    """
+    Throttle per account named in the request, with a looser per-IP bucket.
+
+    The account (the first of ident_fields present in the request body)
+    is limited by the scope's rate, so one client cannot hammer an account
+    from many addresses; the client IP is limited by the "<scope>_ip" rate,
+    which is loose enough for a campus behind one NAT address. A request
+    has to fit both. Requests naming no account count against their IP in
+    both buckets.
+    """
+
+    per_user = False
+    ident_fields = ('username', 'email', 'phone_number', 'user_id')
+
+    def get_account(self, request):
+        data = getattr(request, 'data', None)
+        if not hasattr(data, 'get'):
+            return None
+        for field in self.ident_fields:
+            value = data.get(field)
+            if value:
+                return f"{field}:{str(value).strip().lower()}"
+        return None
+
+    def allow_request(self, request, view):
+        ip_ident = self.get_ident(request)
+        account = self.get_account(request)
+        buckets = [
+            (self.get_limiter(), f"account:{account}" if account else ip_ident),
+            (self.get_limiter(f"{self.scope}_ip"), ip_ident),
+        ]
+        results = [limiter.hit(ident) for limiter, ident in buckets if limiter is not None]
+        refused = [result for result in results if not result.allowed]
+        self.retry_after = max((result.retry_after for result in refused), default=None)
+        return not refused
+
+
+class OTPRateThrottle(AccountRateThrottle):
+    """OTP requests and verification, per phone number (or user) and client IP"""
+    scope = 'otp'
+
+
+class LoginRateThrottle(AccountRateThrottle):
+    """Password logins, per username and client IP"""
+    scope = 'login'
+
+
+class ChatbotRateThrottle(SlidingWindowThrottle):
+    """Chatbot messages"""
+    scope = 'chatbot'
+
+
+class SearchRateThrottle(SlidingWindowThrottle):
+    """Search and suggestion queries"""
+    scope = 'search'
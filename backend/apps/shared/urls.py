@@ -0,0 +1,6 @@
+from django.urls import re_path
+from . import views
+
+urlpatterns = [
+    re_path(r'^(?P<sha256>[0-9a-f]{64})/$', views.image_variant, name='image-variant'),
+]
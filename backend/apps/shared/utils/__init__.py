@@ -1,30 +1,46 @@
 """
 Shared utility functions
 """
-from .logging import get_logger, log_request, log_response
-from .trace import generate_trace_id, get_trace_id, set_trace_id
-from .cache import cache_result, invalidate_cache
+from .logging import get_logger, log_request, log_response, flush_logs
+from .trace import generate_trace_id, get_trace_id, set_trace_id, is_valid_trace_id
+from .cache import cache_result, invalidate_cache, invalidate_on_commit, is_shared_cache
+from .bloom import BloomFilter
+from .rate_limit import RateLimiter, RateLimitResult
+from .file_response import serve_file, is_download_start
 from .permissions import (
     user_has_permission,
     user_has_permissions,
     user_has_role,
     get_user_permissions,
     get_user_roles,
+    filter_accessible,
+    PermissionResolver,
 )
 
 __all__ = [
     'get_logger',
     'log_request',
     'log_response',
+    'flush_logs',
     'generate_trace_id',
     'get_trace_id',
     'set_trace_id',
+    'is_valid_trace_id',
     'cache_result',
     'invalidate_cache',
+    'invalidate_on_commit',
+    'is_shared_cache',
+    'BloomFilter',
+    'RateLimiter',
+    'RateLimitResult',
+    'serve_file',
+    'is_download_start',
     'user_has_permission',
     'user_has_permissions',
     'user_has_role',
     'get_user_permissions',
     'get_user_roles',
+    'filter_accessible',
+    'PermissionResolver',
 ]
 
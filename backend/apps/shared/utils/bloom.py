@@ -0,0 +1,49 @@
+"""
+Bloom filter for cheap in-memory membership checks
+"""
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    A fixed-size set of strings that may report false positives, never false negatives.
+
+    Sized for `capacity` items at `error_rate`; positions come from one
+    blake2b digest split into two hashes (Kirsch-Mitzenmacher), so a lookup
+    costs a single hash however many bits are probed.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], error_rate: float = 0.01, headroom: int = 1024) -> 'BloomFilter':
+        """A filter holding `items`, with room for `headroom` more at the same error rate"""
+        items = list(items)
+        bloom = cls(len(items) + headroom, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
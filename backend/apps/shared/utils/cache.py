@@ -3,10 +3,51 @@ Cache utilities
 """
 from functools import wraps
 from typing import Callable, Any, Optional
-from django.core.cache import cache as django_cache
+from django.core.cache import cache as django_cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.conf import settings
+from django.db import transaction
+from .metrics import record_cache
 import hashlib
 import json
+import time
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    """
+    Whether a cache is shared between processes
+
+    LocMem and dummy caches live in one process, so anything cached there
+    cannot be invalidated from another worker.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def invalidate_on_commit(key: str, generation: bool = False):
+    """
+    Invalidate a cache key now and again after the current transaction commits
+
+    Doing it twice means an entry rebuilt from pre-commit data in between
+    cannot outlive the change. Outside a transaction both happen at once.
+
+    Args:
+        key: Cache key to invalidate
+        generation: Treat key as a generation counter and move it on instead
+            of deleting it. A missing counter restarts from the current time,
+            so it cannot land back on a generation that was used before.
+    """
+    def invalidate():
+        if not generation:
+            django_cache.delete(key)
+            return
+        try:
+            django_cache.incr(key)
+        except ValueError:
+            django_cache.set(key, time.time_ns(), None)
+
+    invalidate()
+    transaction.on_commit(invalidate)
 
 
 def cache_result(timeout: Optional[int] = None, key_prefix: str = 'cache'):
@@ -31,6 +72,7 @@ def cache_result(timeout: Optional[int] = None, key_prefix: str = 'cache'):
             
             # Try to get from cache
             result = django_cache.get(cache_key)
+            record_cache(key_prefix, result is not None)
             if result is not None:
                 return result
             
@@ -0,0 +1,149 @@
+"""
+File download utilities
+"""
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a Range header that cannot be served for the file size"""
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header into an inclusive (start, end).
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges, in which case the whole file is served (RFC 7233 allows ignoring
+    Range). Raises RangeNotSatisfiable when the range lies outside the file.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    elif last:
+        # Suffix range: the final N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable()
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def iter_file_range(path: str, start: int, length: int, chunk_size: int = CHUNK_SIZE):
+    """Yield length bytes of a file from offset start, one chunk at a time"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, file_field, filename: Optional[str] = None, as_attachment: bool = True):
+    """
+    Stream a stored file without loading it into memory.
+
+    Supports If-Modified-Since (304), single byte ranges (206/416) and, when
+    settings.MEDIA_ACCEL_REDIRECT_PREFIX is set, hands the transfer to nginx
+    with X-Accel-Redirect. Storages without local paths are streamed whole.
+    """
+    filename = filename or os.path.basename(file_field.name)
+    try:
+        path = file_field.path
+    except NotImplementedError:
+        # Remote storage: no stat/seek, stream the whole object
+        response = FileResponse(file_field.open('rb'), as_attachment=as_attachment, filename=filename)
+        response.block_size = CHUNK_SIZE
+        return response
+
+    if not os.path.exists(path):
+        raise Http404("File not found on server")
+
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = http_date(stat.st_mtime)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        response = HttpResponseNotModified()
+        response['Last-Modified'] = last_modified
+        return response
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix:
+        # nginx serves the bytes (including ranges) from an internal location
+        response = HttpResponse(content_type=content_type)
+        # Content-addressed names are logical; nginx needs the blob's real path
+        storage_name = getattr(file_field.storage, 'resolve', lambda name: name)(file_field.name)
+        response['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{quote(storage_name)}"
+    else:
+        range_header = request.META.get('HTTP_RANGE')
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range and parse_http_date_safe(if_range) != int(stat.st_mtime):
+            # The client's partial copy is stale, send the full file
+            range_header = None
+        try:
+            byte_range = parse_range_header(range_header, size) if request.method == 'GET' else None
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(path, start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response.block_size = CHUNK_SIZE
+            response['Content-Length'] = str(size)
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified
+    return response
+
+
+def is_download_start(request, response) -> bool:
+    """
+    Whether a file response begins a download (full file or first byte range)
+
+    Judged from the request's Range header, since with X-Accel-Redirect the
+    response is always a 200 and nginx applies the range itself.
+    """
+    if response.status_code not in (200, 206):
+        return False
+    if response.status_code == 200 and not response.has_header('X-Accel-Redirect'):
+        return True  # The whole file was sent, whatever was asked for
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    return match is None or match.group(1) == '0'
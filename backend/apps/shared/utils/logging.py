@@ -1,21 +1,46 @@
 """
 Structured logging utilities
+
+Loggers returned by get_logger() share one QueueHandler: records are
+enqueued on the calling thread and formatted and written by a single
+QueueListener thread, so logging never blocks a request on I/O. The
+listener prints structured JSON to stderr and also hands records to the
+root logger's non-console handlers (e.g. the production log file), each
+with its own formatter.
 """
-import logging
+import atexit
 import json
-from datetime import datetime
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, Any
-from django.conf import settings
-from django.utils import timezone
+from apps.shared.utils.trace import get_trace_id
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+_json_encoder = json.JSONEncoder(separators=(',', ':'), default=str, check_circular=False)
+
+
+def dumps(data: Dict[str, Any]) -> str:
+    """Encode a log payload as compact JSON (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return _json_encoder.encode(data)
 
 
 class StructuredFormatter(logging.Formatter):
     """JSON formatter for structured logging"""
-    
+
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON"""
         log_data = {
-            'timestamp': timezone.now().isoformat(),
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -23,89 +48,189 @@ class StructuredFormatter(logging.Formatter):
             'function': record.funcName,
             'line': record.lineno,
         }
-        
+
         # Add trace ID if available
-        if hasattr(record, 'trace_id'):
+        if getattr(record, 'trace_id', None):
             log_data['trace_id'] = record.trace_id
-        
+
         # Add user information if available
         if hasattr(record, 'user_id'):
             log_data['user_id'] = record.user_id
-        
+
         # Add request information if available
         if hasattr(record, 'request_path'):
             log_data['request_path'] = record.request_path
             log_data['request_method'] = getattr(record, 'request_method', None)
             log_data['status_code'] = getattr(record, 'status_code', None)
-        
-        # Add exception information if available
+
+        # Add exception information if available (pre-rendered by the queue handler)
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
-        
+        elif record.exc_text:
+            log_data['exception'] = record.exc_text
+
         # Add extra fields
         if hasattr(record, 'extra_data'):
             log_data.update(record.extra_data)
-        
-        return json.dumps(log_data)
+
+        return dumps(log_data)
+
+
+class TraceIDFilter(logging.Filter):
+    """Stamp records with the current trace ID while still on the emitting thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'trace_id', None):
+            record.trace_id = get_trace_id()
+        return True
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps records structured.
+
+    The stock prepare() copies the record and formats it into its message;
+    this one only resolves the message arguments and renders the traceback
+    to text, in place (get_logger loggers have no other handler), so the
+    listener's StructuredFormatter still sees every field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_formatter = StructuredFormatter()
+_queue = queue.SimpleQueue()
+_queue_handler = StructuredQueueHandler(_queue)
+_queue_handler.addFilter(TraceIDFilter())
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_formatter)
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _root_handlers():
+    """
+    The root logger's configured handlers, minus console streams
+
+    The structured stream handler already writes to the console; file and
+    other handlers (the production log file) still receive every record.
+    """
+    return [
+        handler for handler in logging.getLogger().handlers
+        if isinstance(handler, logging.FileHandler) or not isinstance(handler, logging.StreamHandler)
+    ]
+
+
+def _start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_queue, _stream_handler, *_root_handlers(), respect_handler_level=True)
+            _listener.start()
+
+
+def flush_logs():
+    """Write out every queued record (stops and restarts the listener)"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+    _start_listener()
+
+
+def get_log_handler() -> logging.Handler:
+    """The handler the listener writes through; swap its stream to redirect output"""
+    return _stream_handler
+
+
+def _stop_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _reset_after_fork():
+    # The listener thread does not survive fork (e.g. Celery prefork workers)
+    global _listener, _listener_lock
+    _listener = None
+    _listener_lock = threading.Lock()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with structured formatting
-    
+
     Args:
         name: Logger name (typically __name__)
-        
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
-    
+
     # Only configure if not already configured
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(StructuredFormatter())
-        logger.addHandler(handler)
+        logger.addHandler(_queue_handler)
         logger.setLevel(logging.INFO)
-    
+        # The listener writes to the console and root's other handlers;
+        # don't print it again via root
+        logger.propagate = False
+    if _listener is None:
+        _start_listener()
+
     return logger
 
 
+def _request_extra(request, trace_id, extra_data, **fields):
+    extra = {
+        'request_path': request.path,
+        'request_method': request.method,
+        'trace_id': trace_id,
+        **fields,
+    }
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        extra['user_id'] = user.id
+    if extra_data:
+        extra['extra_data'] = extra_data
+    return extra
+
+
 def log_request(request, trace_id: Optional[str] = None, extra_data: Optional[Dict[str, Any]] = None):
     """
     Log HTTP request
-    
+
     Args:
         request: Django request object
         trace_id: Optional trace ID
         extra_data: Optional extra data to include
     """
     logger = get_logger('request')
-    log_record = logging.LogRecord(
-        name='request',
-        level=logging.INFO,
-        pathname='',
-        lineno=0,
-        msg=f"{request.method} {request.path}",
-        args=(),
-        exc_info=None,
-    )
-    log_record.request_path = request.path
-    log_record.request_method = request.method
-    if trace_id:
-        log_record.trace_id = trace_id
-    if hasattr(request, 'user') and request.user.is_authenticated:
-        log_record.user_id = request.user.id
-    if extra_data:
-        log_record.extra_data = extra_data
-    
-    logger.handle(log_record)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            f"{request.method} {request.path}",
+            extra=_request_extra(request, trace_id, extra_data),
+        )
 
 
 def log_response(request, response, trace_id: Optional[str] = None, extra_data: Optional[Dict[str, Any]] = None):
     """
     Log HTTP response
-    
+
     Args:
         request: Django request object
         response: Django response object
@@ -113,24 +238,10 @@ def log_response(request, response, trace_id: Optional[str] = None, extra_data:
         extra_data: Optional extra data to include
     """
     logger = get_logger('response')
-    log_record = logging.LogRecord(
-        name='response',
-        level=logging.INFO,
-        pathname='',
-        lineno=0,
-        msg=f"{request.method} {request.path} - {response.status_code}",
-        args=(),
-        exc_info=None,
-    )
-    log_record.request_path = request.path
-    log_record.request_method = request.method
-    log_record.status_code = response.status_code
-    if trace_id:
-        log_record.trace_id = trace_id
-    if hasattr(request, 'user') and request.user.is_authenticated:
-        log_record.user_id = request.user.id
-    if extra_data:
-        log_record.extra_data = extra_data
-    
-    logger.handle(log_record)
-
+    level = logging.ERROR if response.status_code >= 500 else logging.INFO
+    if logger.isEnabledFor(level):
+        logger.log(
+            level,
+            f"{request.method} {request.path} - {response.status_code}",
+            extra=_request_extra(request, trace_id, extra_data, status_code=response.status_code),
+        )
@@ -0,0 +1,197 @@
+"""
+Prometheus metrics for the Django, Celery and WebSocket tiers
+
+Under gunicorn (or a prefork Celery worker) set PROMETHEUS_MULTIPROC_DIR
+to an empty, writable directory before the processes start: every process
+then writes its samples there and render_metrics() merges them, so a
+scrape sees the whole server rather than whichever worker answered.
+"""
+import os
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # pragma: no cover - metrics are disabled without the client
+    prometheus_client = None
+
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+UNRESOLVED_VIEW = '<unresolved>'
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'django_http_request_duration_seconds',
+        'Time spent handling a request, by resolved URL name',
+        ['view', 'method', 'status'],
+    )
+    REQUEST_DB_QUERIES = Histogram(
+        'django_http_request_db_queries',
+        'Database queries run while handling a request',
+        ['view'],
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float('inf')),
+    )
+    CACHE_REQUESTS = Counter(
+        'django_cache_requests_total',
+        'Lookups in application caches, by cache and hit or miss',
+        ['cache', 'result'],
+    )
+    TASK_DURATION = Histogram(
+        'celery_task_duration_seconds',
+        'Time spent running a Celery task',
+        ['task', 'state'],
+        buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float('inf')),
+    )
+    TASK_QUEUE_LAG = Histogram(
+        'celery_task_queue_lag_seconds',
+        'Time between a task being due (published, or its ETA) and a worker starting it',
+        ['task'],
+        buckets=(0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, float('inf')),
+    )
+    WEBSOCKET_CONNECTIONS = Gauge(
+        'websocket_connections',
+        'Open WebSocket connections, by consumer',
+        ['consumer'],
+        multiprocess_mode='livesum',
+    )
+
+
+def metrics_enabled() -> bool:
+    return prometheus_client is not None
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a lookup in the named application cache"""
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def _registry():
+    if os.environ.get(MULTIPROCESS_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The exposition text for a scrape and its content type"""
+    return prometheus_client.generate_latest(_registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Drop a finished worker's live gauges (call from the parent on child exit)"""
+    if prometheus_client is not None and os.environ.get(MULTIPROCESS_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
+
+
+class QueryCounter:
+    """Connection execute wrapper that only counts statements"""
+
+    def __init__(self):
+        self.count = 0
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def start(self) -> 'QueryCounter':
+        from django.db import connections
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+            self._connections.append(connection)
+        return self
+
+    def stop(self) -> int:
+        for connection in self._connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+        self._connections = []
+        return self.count
+
+
+class ConnectionMetricsMixin:
+    """
+    Keeps websocket_connections in step with accepted connections.
+
+    Goes before AsyncWebsocketConsumer in the bases; connections closed
+    before accept() are never counted.
+    """
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        if prometheus_client is not None and not getattr(self, '_metrics_counted', False):
+            self._metrics_counted = True
+            WEBSOCKET_CONNECTIONS.labels(type(self).__name__).inc()
+
+    async def websocket_disconnect(self, message):
+        if getattr(self, '_metrics_counted', False):
+            self._metrics_counted = False
+            WEBSOCKET_CONNECTIONS.labels(type(self).__name__).dec()
+        await super().websocket_disconnect(message)
+
+
+# Celery signal handlers (connected by apps.shared.signals.register_metrics_collection)
+
+_task_started = {}
+
+
+def attach_publish_time(headers=None, **kwargs):
+    """before_task_publish: stamp the message with when it was queued"""
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+
+def start_task_timer(task_id=None, task=None, **kwargs):
+    """task_prerun: observe the queue lag and start timing the task"""
+    if prometheus_client is None or task is None:
+        return
+    now = time.time()
+    _task_started[task_id] = time.perf_counter()
+    due = _due_time(getattr(task, 'request', None))
+    if due is not None:
+        TASK_QUEUE_LAG.labels(task.name).observe(max(now - due, 0))
+
+
+def stop_task_timer(task_id=None, task=None, state=None, **kwargs):
+    """task_postrun: observe how long the task ran"""
+    started = _task_started.pop(task_id, None)
+    if started is not None and task is not None:
+        TASK_DURATION.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+def _due_time(request) -> Optional[float]:
+    published_at = getattr(request, 'published_at', None)
+    if published_at is None:
+        return None  # Run eagerly, or queued by a publisher without the header
+    due = float(published_at)
+    eta = getattr(request, 'eta', None)
+    if eta:
+        try:
+            due = max(due, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    return due
+
+
+def prepare_worker_metrics(**kwargs):
+    """worker_init: create the multiprocess directory before children fork"""
+    directory = os.environ.get(MULTIPROCESS_DIR_ENV)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def serve_worker_metrics(**kwargs):
+    """worker_ready: expose the worker's metrics on CELERY_METRICS_PORT"""
+    from django.conf import settings
+    port = getattr(settings, 'CELERY_METRICS_PORT', None)
+    if prometheus_client is None or not port:
+        return
+    prometheus_client.start_http_server(int(port), registry=_registry())
+
+
+def release_worker_process(**kwargs):
+    """worker_process_shutdown: drop an exiting pool process's live gauges"""
+    mark_process_dead(os.getpid())
@@ -1,13 +1,165 @@
 """
 Permission checking utilities
 """
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
 from apps.shared.models.rbac import Role, UserRole, Permission, ResourcePermission
+from .cache import invalidate_on_commit, is_shared_cache
 
 User = get_user_model()
 
 
+class PermissionSet:
+    """
+    A user's effective RBAC permissions, compiled once and checked in memory
+
+    `permissions` holds every codename granted by a valid role assignment or
+    a valid direct grant; `object_grants` maps the direct grants' codenames
+    to {content type id: object ids} for object-level filtering.
+    """
+
+    __slots__ = ('is_superuser', 'roles', 'role_permissions', 'permissions', 'object_grants')
+
+    def __init__(self, is_superuser: bool = False, roles: FrozenSet[str] = frozenset(),
+                 role_permissions: FrozenSet[str] = frozenset(),
+                 object_grants: Optional[Dict[str, Dict[int, FrozenSet[int]]]] = None):
+        self.is_superuser = is_superuser
+        self.roles = roles
+        self.role_permissions = role_permissions
+        self.object_grants = object_grants or {}
+        self.permissions = role_permissions | frozenset(self.object_grants)
+
+    def has_permission(self, codename: str) -> bool:
+        return self.is_superuser or codename in self.permissions
+
+    def has_permissions(self, codenames: Iterable[str]) -> bool:
+        return self.is_superuser or self.permissions.issuperset(codenames)
+
+    def has_any_permission(self, codenames: Iterable[str]) -> bool:
+        return self.is_superuser or not self.permissions.isdisjoint(codenames)
+
+    def has_role(self, codename: str) -> bool:
+        return self.is_superuser or codename in self.roles
+
+    def object_ids(self, codename: str, content_type_id: int) -> FrozenSet[int]:
+        return self.object_grants.get(codename, {}).get(content_type_id, frozenset())
+
+
+class PermissionResolver:
+    """
+    Compiles and caches per-user permission sets.
+
+    Sets are cached under a global generation that moves whenever a Role,
+    Permission, UserRole, ResourcePermission or role-permission link
+    changes, and never outlive the earliest expires_at they depend on.
+    The compiled set is also kept on the user instance, so repeated checks
+    within a request cost one cache read each and no queries. Without a
+    shared cache (LocMem on Render) a generation bump would only reach the
+    worker that made it, so sets are compiled once per request instead.
+    """
+
+    CACHE_PREFIX = 'rbac'
+    CACHE_TIMEOUT = 300
+    _EMPTY = PermissionSet()
+    _local_generation = 0
+
+    @staticmethod
+    def for_user(user) -> PermissionSet:
+        if not user or not user.is_authenticated:
+            return PermissionResolver._EMPTY
+        if user.is_superuser:
+            return PermissionSet(is_superuser=True)
+
+        shared = is_shared_cache()
+        generation = PermissionResolver._generation() if shared else PermissionResolver._local_generation
+        memo = getattr(user, '_rbac_permission_set', None)
+        if memo is not None and memo[0] == generation:
+            return memo[1]
+
+        if shared:
+            cache_key = f"{PermissionResolver.CACHE_PREFIX}:{generation}:{user.pk}"
+            permission_set = cache.get(cache_key)
+            if permission_set is None:
+                permission_set, timeout = PermissionResolver.compile(user)
+                cache.set(cache_key, permission_set, timeout)
+        else:
+            permission_set, _ = PermissionResolver.compile(user)
+        user._rbac_permission_set = (generation, permission_set)
+        return permission_set
+
+    @staticmethod
+    def compile(user):
+        """
+        Build a user's permission set from the database (three queries)
+
+        Returns:
+            (PermissionSet, seconds it stays valid)
+        """
+        now = timezone.now()
+        unexpired = Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+        expiries = []
+
+        assignments = list(UserRole.objects.filter(
+            unexpired, user=user, is_active=True, role__is_active=True,
+        ).values_list('role_id', 'role__codename', 'expires_at'))
+        role_permissions = Role.permissions.through.objects.filter(
+            role_id__in=[role_id for role_id, _, _ in assignments], permission__is_active=True,
+        ).values_list('permission__codename', flat=True)
+
+        object_grants = {}
+        grants = ResourcePermission.objects.filter(
+            unexpired, user=user, is_active=True, permission__is_active=True,
+        ).values_list('permission__codename', 'content_type_id', 'object_id', 'expires_at')
+        for codename, content_type_id, object_id, expires_at in grants:
+            object_grants.setdefault(codename, {}).setdefault(content_type_id, set()).add(object_id)
+            expiries.append(expires_at)
+        expiries.extend(expires_at for _, _, expires_at in assignments)
+
+        permission_set = PermissionSet(
+            roles=frozenset(codename for _, codename, _ in assignments),
+            role_permissions=frozenset(role_permissions),
+            object_grants={
+                codename: {content_type_id: frozenset(ids) for content_type_id, ids in by_type.items()}
+                for codename, by_type in object_grants.items()
+            },
+        )
+        timeout = PermissionResolver.CACHE_TIMEOUT
+        for expires_at in expiries:
+            if expires_at:
+                timeout = min(timeout, max(1, int((expires_at - now).total_seconds()) + 1))
+        return permission_set, timeout
+
+    @staticmethod
+    def invalidate():
+        """Invalidate every cached permission set, now and again after commit"""
+        PermissionResolver._local_generation += 1
+        invalidate_on_commit(f"{PermissionResolver.CACHE_PREFIX}:generation", generation=True)
+
+    @staticmethod
+    def register():
+        """Invalidate cached sets whenever RBAC data changes"""
+        for model in (Role, Permission, UserRole, ResourcePermission):
+            label = model._meta.label_lower
+            post_save.connect(PermissionResolver._changed, sender=model, dispatch_uid=f'rbac_save_{label}')
+            post_delete.connect(PermissionResolver._changed, sender=model, dispatch_uid=f'rbac_delete_{label}')
+        m2m_changed.connect(
+            PermissionResolver._changed, sender=Role.permissions.through, dispatch_uid='rbac_role_permissions',
+        )
+
+    @staticmethod
+    def _changed(sender, **kwargs):
+        PermissionResolver.invalidate()
+
+    @staticmethod
+    def _generation():
+        return cache.get(f"{PermissionResolver.CACHE_PREFIX}:generation", 0)
+
+
 def user_has_permission(user: User, permission_codename: str) -> bool:
     """
     Check if user has a specific permission
@@ -19,36 +171,7 @@ def user_has_permission(user: User, permission_codename: str) -> bool:
     Returns:
         True if user has permission, False otherwise
     """
-    if not user or not user.is_authenticated:
-        return False
-    
-    # Check if user is superuser
-    if user.is_superuser:
-        return True
-    
-    # Check user roles
-    user_roles = UserRole.objects.filter(
-        user=user,
-        is_active=True,
-        role__is_active=True
-    ).select_related('role').prefetch_related('role__permissions')
-    
-    for user_role in user_roles:
-        if user_role.is_valid() and user_role.role.has_permission(permission_codename):
-            return True
-    
-    # Check direct permissions
-    direct_permissions = ResourcePermission.objects.filter(
-        user=user,
-        permission__codename=permission_codename,
-        is_active=True
-    )
-    
-    for perm in direct_permissions:
-        if perm.is_valid():
-            return True
-    
-    return False
+    return PermissionResolver.for_user(user).has_permission(permission_codename)
 
 
 def user_has_permissions(user: User, permission_codenames: List[str]) -> bool:
@@ -64,16 +187,7 @@ def user_has_permissions(user: User, permission_codenames: List[str]) -> bool:
     """
     if not user or not user.is_authenticated:
         return False
-    
-    # Check if user is superuser
-    if user.is_superuser:
-        return True
-    
-    for codename in permission_codenames:
-        if not user_has_permission(user, codename):
-            return False
-    
-    return True
+    return PermissionResolver.for_user(user).has_permissions(permission_codenames)
 
 
 def user_has_role(user: User, role_codename: str) -> bool:
@@ -87,19 +201,7 @@ def user_has_role(user: User, role_codename: str) -> bool:
     Returns:
         True if user has role, False otherwise
     """
-    if not user or not user.is_authenticated:
-        return False
-    
-    # Check if user is superuser
-    if user.is_superuser:
-        return True
-    
-    return UserRole.objects.filter(
-        user=user,
-        role__codename=role_codename,
-        is_active=True,
-        role__is_active=True
-    ).exists()
+    return PermissionResolver.for_user(user).has_role(role_codename)
 
 
 def get_user_permissions(user: User) -> List[str]:
@@ -117,33 +219,9 @@ def get_user_permissions(user: User) -> List[str]:
     
     # Superuser has all permissions
     if user.is_superuser:
-        return Permission.objects.filter(is_active=True).values_list('codename', flat=True)
+        return list(Permission.objects.filter(is_active=True).values_list('codename', flat=True))
     
-    permissions = set()
-    
-    # Get permissions from roles
-    user_roles = UserRole.objects.filter(
-        user=user,
-        is_active=True,
-        role__is_active=True
-    ).select_related('role').prefetch_related('role__permissions')
-    
-    for user_role in user_roles:
-        if user_role.is_valid():
-            role_permissions = user_role.role.permissions.filter(is_active=True)
-            permissions.update(role_permissions.values_list('codename', flat=True))
-    
-    # Get direct permissions
-    direct_permissions = ResourcePermission.objects.filter(
-        user=user,
-        is_active=True
-    ).select_related('permission')
-    
-    for perm in direct_permissions:
-        if perm.is_valid():
-            permissions.add(perm.permission.codename)
-    
-    return list(permissions)
+    return list(PermissionResolver.for_user(user).permissions)
 
 
 def get_user_roles(user: User) -> List[str]:
@@ -161,13 +239,31 @@ def get_user_roles(user: User) -> List[str]:
     
     # Superuser has all roles
     if user.is_superuser:
-        return Role.objects.filter(is_active=True).values_list('codename', flat=True)
-    
-    user_roles = UserRole.objects.filter(
-        user=user,
-        is_active=True,
-        role__is_active=True
-    ).select_related('role')
+        return list(Role.objects.filter(is_active=True).values_list('codename', flat=True))
     
-    return [ur.role.codename for ur in user_roles if ur.is_valid()]
+    return list(PermissionResolver.for_user(user).roles)
 
+
+def filter_accessible(user: User, queryset, permission_codename: str):
+    """
+    Restrict a queryset to the objects a user holds a permission on
+    
+    A role granting the permission covers every object; otherwise only the
+    objects of direct (object-level) grants are kept.
+    
+    Args:
+        user: User instance
+        queryset: QuerySet to filter
+        permission_codename: Permission codename
+        
+    Returns:
+        The filtered queryset (empty if nothing is accessible)
+    """
+    permission_set = PermissionResolver.for_user(user)
+    if permission_set.is_superuser or permission_codename in permission_set.role_permissions:
+        return queryset
+    content_type = ContentType.objects.get_for_model(queryset.model)
+    object_ids = permission_set.object_ids(permission_codename, content_type.id)
+    if not object_ids:
+        return queryset.none()
+    return queryset.filter(pk__in=object_ids)
@@ -0,0 +1,167 @@
+"""
+Database query profiling utilities
+"""
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_VALUE_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so the same query with different values compares equal
+
+    Args:
+        sql: SQL statement
+
+    Returns:
+        The statement with literals replaced by ? and IN lists collapsed
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _VALUE_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryProfiler:
+    """
+    Records every statement run on this thread's connections while active.
+
+    Installed as a connection execute wrapper, so it costs one timer call
+    per query and nothing when not started.
+    """
+
+    def __init__(self, slowest: int = 5):
+        self.slowest = slowest
+        self.queries = []
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def start(self) -> 'QueryProfiler':
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+            self._connections.append(connection)
+        return self
+
+    def stop(self) -> 'QueryProfiler':
+        for connection in self._connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+        self._connections = []
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(duration for _, duration in self.queries) * 1000
+
+    def duplicates(self, threshold: int = 2) -> List[Dict]:
+        """Fingerprints run at least `threshold` times, most repeated first (N+1 suspects)"""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [
+            {'fingerprint': statement, 'count': count}
+            for statement, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def slowest_queries(self) -> List[Dict]:
+        ranked = sorted(self.queries, key=lambda query: query[1], reverse=True)[:self.slowest]
+        return [{'sql': fingerprint(sql)[:500], 'ms': round(duration * 1000, 2)} for sql, duration in ranked]
+
+    def summary(self, duplicate_threshold: int = 2) -> Dict:
+        return {
+            'db_queries': self.count,
+            'db_time_ms': round(self.total_ms, 2),
+            'db_duplicates': self.duplicates(duplicate_threshold),
+            'db_slowest': self.slowest_queries(),
+        }
+
+    def server_timing(self, duplicate_threshold: int = 2) -> str:
+        """The profile as a Server-Timing header value"""
+        metrics = [f'db;dur={self.total_ms:.2f};desc="{self.count} queries"']
+        duplicates = self.duplicates(duplicate_threshold)
+        if duplicates:
+            repeated = sum(duplicate['count'] for duplicate in duplicates)
+            metrics.append(f'db-dup;desc="{repeated} queries in {len(duplicates)} repeated statements"')
+        if self.queries:
+            metrics.append(f'db-slowest;dur={max(duration for _, duration in self.queries) * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+class QueryBudget:
+    """
+    Checks every request handled while active against a query budget.
+
+    Hooks request_started/request_finished, which the test client sends
+    around each request, so it works for Django TestCase and pytest tests
+    alike (see apps.shared.pytest_plugin for the query_budget marker).
+    """
+
+    def __init__(self, max_queries: int, duplicates: Optional[int] = None):
+        self.max_queries = max_queries
+        self.max_duplicates = duplicates
+        self.requests = []
+        self.violations = []
+        self._profiler = None
+        self._path = None
+
+    def __enter__(self):
+        request_started.connect(self._started, dispatch_uid=f'query_budget_start_{id(self)}')
+        request_finished.connect(self._finished, dispatch_uid=f'query_budget_finish_{id(self)}')
+        return self
+
+    def __exit__(self, *exc_info):
+        request_started.disconnect(dispatch_uid=f'query_budget_start_{id(self)}')
+        request_finished.disconnect(dispatch_uid=f'query_budget_finish_{id(self)}')
+        if self._profiler is not None:
+            self._profiler.stop()
+            self._profiler = None
+
+    def _started(self, sender, environ=None, **kwargs):
+        environ = environ or {}
+        self._path = f"{environ.get('REQUEST_METHOD', '')} {environ.get('PATH_INFO', '')}".strip()
+        self._profiler = QueryProfiler().start()
+
+    def _finished(self, sender, **kwargs):
+        if self._profiler is None:
+            return
+        profiler = self._profiler.stop()
+        self._profiler = None
+        self.requests.append((self._path, profiler))
+        repeated = profiler.duplicates(self.max_duplicates + 1) if self.max_duplicates is not None else []
+        if profiler.count > self.max_queries or repeated:
+            self.violations.append((self._path, profiler))
+
+    def report(self) -> str:
+        limits = f"{self.max_queries} queries"
+        if self.max_duplicates is not None:
+            limits += f", {self.max_duplicates} runs of one statement"
+        lines = [f"Query budget ({limits}) exceeded:"]
+        for path, profiler in self.violations:
+            lines.append(f"  {path}: {profiler.count} queries, {profiler.total_ms:.1f}ms")
+            for duplicate in profiler.duplicates()[:5]:
+                lines.append(f"    {duplicate['count']}x {duplicate['fingerprint'][:200]}")
+        return '\n'.join(lines)
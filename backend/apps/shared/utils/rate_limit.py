@@ -0,0 +1,137 @@
+"""
+Sliding-window rate limiting backed by the shared cache
+"""
+import time
+from typing import NamedTuple, Optional
+from django.core.cache import cache
+
+try:
+    from django_redis import get_redis_connection
+except ImportError:  # pragma: no cover - django-redis is in requirements.txt
+    get_redis_connection = None
+
+# Count a hit in the current window and read the previous one in a single
+# round trip; the counter lives for two windows so it can serve as "previous"
+_HIT_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return {current, tonumber(redis.call('GET', KEYS[2]) or '0')}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    count: float
+    limit: int
+    retry_after: Optional[float]
+
+
+class RateLimiter:
+    """
+    Sliding-window counter: at most `limit` hits per `window` seconds per ident.
+
+    Hits are counted in fixed windows and the previous window's count is
+    weighted by how much of it still overlaps the sliding window, which
+    approximates a true sliding log with two integers per ident. Counting is
+    a single atomic INCR: a Lua script on Redis, cache.add/cache.incr on other
+    backends (LocMem increments under its own lock, so no extra locking is
+    needed here). Rejected hits are counted too, so a client that keeps
+    retrying stays limited until it backs off.
+    """
+
+    CACHE_PREFIX = 'ratelimit'
+
+    _script = None
+    _script_loaded = False
+
+    def __init__(self, scope: str, limit: int, window: int):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def hit(self, ident) -> RateLimitResult:
+        """Count one hit for ident and report whether it is within the limit"""
+        now = time.time()
+        current_key, previous_key = self._keys(ident, now)
+        current, previous = self._increment(current_key, previous_key)
+        return self._result(current, previous, now, pending=0)
+
+    def peek(self, ident) -> RateLimitResult:
+        """Report whether one more hit would be allowed, without counting it"""
+        now = time.time()
+        current_key, previous_key = self._keys(ident, now)
+        counts = cache.get_many([current_key, previous_key])
+        return self._result(counts.get(current_key, 0), counts.get(previous_key, 0), now, pending=1)
+
+    def reset(self, ident):
+        now = time.time()
+        cache.delete_many(self._keys(ident, now))
+
+    def _keys(self, ident, now):
+        index = int(now // self.window)
+        base = f"{self.CACHE_PREFIX}:{self.scope}:{ident}"
+        return f"{base}:{index}", f"{base}:{index - 1}"
+
+    def _increment(self, current_key, previous_key):
+        script = self._redis_script()
+        if script is not None:
+            current, previous = script(
+                keys=[cache.make_key(current_key), cache.make_key(previous_key)], args=[self.window * 2],
+            )
+            return int(current), int(previous)
+
+        if not cache.add(current_key, 1, self.window * 2):
+            try:
+                current = cache.incr(current_key)
+            except ValueError:  # Expired between add and incr
+                cache.set(current_key, 1, self.window * 2)
+                current = 1
+        else:
+            current = 1
+        return current, cache.get(previous_key, 0)
+
+    @staticmethod
+    def _redis_script():
+        if not RateLimiter._script_loaded:
+            if get_redis_connection is not None:
+                try:
+                    RateLimiter._script = get_redis_connection().register_script(_HIT_SCRIPT)
+                except NotImplementedError:  # Not a django-redis cache
+                    pass
+            RateLimiter._script_loaded = True
+        return RateLimiter._script
+
+    def _result(self, current, previous, now, pending):
+        elapsed = (now % self.window) / self.window
+        count = previous * (1 - elapsed) + current
+        if count + pending <= self.limit:
+            return RateLimitResult(True, count, self.limit, None)
+        return RateLimitResult(False, count, self.limit, self._retry_after(current, previous, elapsed))
+
+    def _retry_after(self, current, previous, elapsed):
+        """Seconds until previous * (1 - elapsed) + current leaves room for one more hit"""
+        room = self.limit - 1
+        if current <= room and previous:
+            # The previous window's weight alone has to decay far enough
+            decayed_at = 1 - (room - current) / previous
+            return max(0.0, (decayed_at - elapsed) * self.window)
+        # Wait for the next window, where this window's count starts to decay
+        decayed_at = max(0.0, 1 - room / current) if current else 0.0
+        return (1 - elapsed + decayed_at) * self.window
+
+
+def parse_rate(rate: Optional[str]):
+    """
+    Parse a DRF-style rate such as "5/min" or "100/hour"
+
+    Returns:
+        (limit, window in seconds), or (None, None) for no rate
+    """
+    if rate is None:
+        return None, None
+    count, period = rate.split('/')
+    window = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return int(count), window
+
@@ -1,6 +1,8 @@
 """
 Request tracing utilities
 """
+import random
+import re
 import uuid
 from typing import Optional
 from contextvars import ContextVar
@@ -8,6 +10,12 @@ from contextvars import ContextVar
 # Context variable for trace ID
 _trace_id: ContextVar[Optional[str]] = ContextVar('trace_id', default=None)
 
+# Trace IDs accepted from callers and task headers
+_TRACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+# Celery message header carrying the trace ID
+TRACE_HEADER = 'trace_id'
+
 
 def generate_trace_id() -> str:
     """
@@ -16,10 +24,24 @@ def generate_trace_id() -> str:
     Returns:
         Unique trace ID string
     """
-    return str(uuid.uuid4())
+    # Trace IDs need to be unique, not unguessable: skip uuid4's os.urandom call
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+
+def is_valid_trace_id(trace_id: Optional[str]) -> bool:
+    """
+    Check a trace ID received from outside (request header, task header)
+    
+    Args:
+        trace_id: Candidate trace ID
+        
+    Returns:
+        True if it is safe to adopt
+    """
+    return bool(trace_id) and bool(_TRACE_ID_PATTERN.match(trace_id))
 
 
-def set_trace_id(trace_id: str):
+def set_trace_id(trace_id: Optional[str]):
     """
     Set trace ID in context
     
@@ -38,3 +60,21 @@ def get_trace_id() -> Optional[str]:
     """
     return _trace_id.get()
 
+
+def attach_trace_header(headers=None, **kwargs):
+    """before_task_publish handler: send the current trace ID with the task"""
+    trace_id = get_trace_id()
+    if trace_id and headers is not None:
+        headers.setdefault(TRACE_HEADER, trace_id)
+
+
+def adopt_trace_header(task=None, **kwargs):
+    """task_prerun handler: run the task under the trace ID it was sent with"""
+    request = getattr(task, 'request', None)
+    trace_id = getattr(request, TRACE_HEADER, None) or (getattr(request, 'headers', None) or {}).get(TRACE_HEADER)
+    set_trace_id(trace_id if is_valid_trace_id(trace_id) else generate_trace_id())
+
+
+def clear_trace_id(**kwargs):
+    """task_postrun handler: don't leak a trace ID into the worker's next task"""
+    set_trace_id(None)
@@ -0,0 +1,67 @@
+"""
+Views for shared utilities
+"""
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_safe
+from apps.shared.models import StoredBlob
+from apps.shared.services.image_service import CONTENT_TYPES, ImageVariantService
+from apps.shared.storage import content_addressed_storage
+
+# Variant URLs embed the content hash, so a response never changes
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _preferred_format(request):
+    fmt = request.GET.get('format')
+    if fmt in CONTENT_TYPES:
+        return fmt
+    return 'webp' if 'image/webp' in request.META.get('HTTP_ACCEPT', '') else 'jpeg'
+
+
+@require_safe
+def image_variant(request, sha256):
+    """
+    Serve the best stored variant of an image for ?size=<pixels>.
+
+    The smallest variant whose longest side covers the requested size is
+    returned as WebP when the client accepts it (or ?format= asks for it),
+    otherwise JPEG, with year-long immutable caching. Until the variants have
+    been generated the request is redirected, uncached, to the original.
+    """
+    try:
+        size = int(request.GET.get('size') or 0)
+    except ValueError:
+        size = 0
+    fmt = _preferred_format(request)
+
+    variant = ImageVariantService.best_variant(sha256, size, fmt)
+    if variant is None:
+        blob = StoredBlob.objects.filter(sha256=sha256, ref_count__gt=0).first()
+        if blob is None:
+            raise Http404("Image not found")
+        response = HttpResponseRedirect(content_addressed_storage.backend.url(blob.blob_name))
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    etag = f'"{sha256}-{variant.max_dimension}.{variant.format}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+        if accel_prefix:
+            response = HttpResponse(content_type=CONTENT_TYPES[variant.format])
+            response['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{quote(variant.name)}"
+        else:
+            response = FileResponse(
+                content_addressed_storage.backend.open(variant.name, 'rb'),
+                content_type=CONTENT_TYPES[variant.format],
+            )
+            response['Content-Length'] = str(variant.size)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    if 'format' not in request.GET:
+        patch_vary_headers(response, ['Accept'])
+    return response
@@ -6,4 +6,7 @@ from django.apps import AppConfig
 
 class StudyGroupsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.study_groups'
\ No newline at end of file
+    name = 'apps.study_groups'
+    
+    def ready(self):
+        import apps.study_groups.signals  # noqa
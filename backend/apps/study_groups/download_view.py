@@ -1,21 +1,21 @@
 """
 Download view for study group resources
 """
-from django.http import HttpResponse, Http404
+from django.db.models import F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework import status
-import os
-import mimetypes
+from apps.shared.utils import serve_file, is_download_start
 from .models import Resource
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])  # Allow anonymous access for now
 def download_resource(request, group_id, resource_id):
-    """Download a study group resource with proper MIME type"""
+    """Download a study group resource, streamed in chunks"""
     try:
         # Get the resource
         resource = get_object_or_404(Resource, id=resource_id, group_id=group_id)
@@ -23,30 +23,12 @@ def download_resource(request, group_id, resource_id):
         if not resource.file:
             raise Http404("File not found")
         
-        # Get the file path
-        file_path = resource.file.path
+        # Stream the file (with Range / If-Modified-Since support)
+        response = serve_file(request, resource.file)
         
-        # Check if file exists
-        if not os.path.exists(file_path):
-            raise Http404("File not found on server")
-        
-        # Get MIME type from file extension
-        mime_type, _ = mimetypes.guess_type(file_path)
-        if not mime_type:
-            mime_type = 'application/octet-stream'
-        
-        # Read file content
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-        
-        # Increment download count
-        resource.download_count += 1
-        resource.save(update_fields=['download_count'])
-        
-        # Create response with proper headers
-        response = HttpResponse(file_content, content_type=mime_type)
-        response['Content-Disposition'] = f'attachment; filename="{resource.file.name.split("/")[-1]}"'
-        response['Content-Length'] = len(file_content)
+        # Count each download once, not every resumed range request
+        if is_download_start(request, response):
+            Resource.objects.filter(pk=resource.pk).update(download_count=F('download_count') + 1)
         
         return response
         
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:34
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_active_member_count(apps, schema_editor):
+    """Backfill counts for groups created before the column existed"""
+    StudyGroup = apps.get_model('study_groups', 'StudyGroup')
+    GroupMembership = apps.get_model('study_groups', 'GroupMembership')
+    active = GroupMembership.objects.filter(
+        group=OuterRef('pk'), is_active=True,
+    ).order_by().values('group').annotate(total=Count('id')).values('total')
+    StudyGroup.objects.update(
+        active_member_count=Coalesce(Subquery(active, output_field=models.IntegerField()), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_groups', '0006_resource_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studygroup',
+            name='active_member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_active_member_count, migrations.RunPython.noop),
+    ]
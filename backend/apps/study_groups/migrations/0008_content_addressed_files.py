@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:43
+
+import apps.shared.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study_groups', '0007_studygroup_active_member_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resource',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=apps.shared.storage.get_content_addressed_storage, upload_to='group_resources/'),
+        ),
+    ]
@@ -1,9 +1,11 @@
 """
 Study Groups models for KSIT Nexus
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.shared.storage import get_content_addressed_storage
 
 User = get_user_model()
 
@@ -73,6 +75,9 @@ class StudyGroup(models.Model):
     meeting_schedule = models.CharField(max_length=200, blank=True, null=True)
     meeting_location = models.CharField(max_length=200, blank=True, null=True)
     
+    # Denormalized count of active memberships, maintained by GroupMembership
+    active_member_count = models.PositiveIntegerField(default=0)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -85,11 +90,18 @@ class StudyGroup(models.Model):
     
     @property
     def current_member_count(self):
-        return self.members.filter(is_active=True).count()
+        return self.active_member_count
     
     @property
     def is_full(self):
         return self.current_member_count >= self.max_members
+    
+    @staticmethod
+    def adjust_member_count(group_id, delta):
+        """Atomically add delta to a group's active member count"""
+        StudyGroup.objects.filter(pk=group_id).update(
+            active_member_count=F('active_member_count') + delta
+        )
 
 
 class GroupMembership(models.Model):
@@ -113,6 +125,23 @@ class GroupMembership(models.Model):
     
     def __str__(self):
         return f"{self.user.username} in {self.group.name}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_active = instance.is_active
+        return instance
+    
+    def save(self, *args, **kwargs):
+        was_active = False if self._state.adding else getattr(self, '_saved_is_active', self.is_active)
+        delta = int(self.is_active) - int(was_active)
+        
+        # Keep StudyGroup.active_member_count in the same transaction as the membership
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if delta:
+                StudyGroup.adjust_member_count(self.group_id, delta)
+        self._saved_is_active = self.is_active
 
 
 class GroupReport(models.Model):
@@ -233,7 +262,10 @@ class Resource(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, blank=True, null=True)
     
     # File or link
-    file = models.FileField(upload_to='group_resources/', blank=True, null=True)
+    file = models.FileField(
+        upload_to='group_resources/', storage=get_content_addressed_storage,
+        max_length=255, blank=True, null=True
+    )
     external_url = models.URLField(blank=True, null=True)
     
     # Metadata
@@ -4,12 +4,34 @@ Serializers for study_groups app
 import json
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.utils import timezone
 from .models import StudyGroup, GroupMembership, GroupMessage, Resource, UpcomingEvent, GroupJoinRequest
 
 User = get_user_model()
 
 
+def get_member_group_ids(serializer):
+    """
+    IDs of the groups the requesting user is an active member of.
+
+    Loaded once and kept on the (shared) serializer context, so list pages
+    resolve is_member from a set instead of one query per group.
+    """
+    context = serializer.context
+    if 'member_group_ids' not in context:
+        request = context.get('request')
+        if request and request.user.is_authenticated:
+            context['member_group_ids'] = set(
+                GroupMembership.objects.filter(
+                    user=request.user, is_active=True,
+                ).values_list('group_id', flat=True)
+            )
+        else:
+            context['member_group_ids'] = set()
+    return context['member_group_ids']
+
+
 class GroupMembershipSerializer(serializers.ModelSerializer):
     """Group membership serializer"""
     user = serializers.StringRelatedField(read_only=True)
@@ -226,15 +248,18 @@ class StudyGroupSerializer(serializers.ModelSerializer):
                 return obj.creator.email
         return "Unknown User"
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load creator and memberships (with users) in a fixed number of queries"""
+        return queryset.select_related('creator').prefetch_related(
+            Prefetch('members', queryset=GroupMembership.objects.select_related('user'))
+        )
+    
     def get_is_member(self, obj):
         """Check if current user is a member"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return GroupMembership.objects.filter(
-                group=obj, 
-                user=request.user, 
-                is_active=True
-            ).exists()
+            return obj.id in get_member_group_ids(self)
         elif request and not request.user.is_authenticated:
             # For anonymous users, check if they're using the anonymous user
             from django.contrib.auth import get_user_model
@@ -322,6 +347,17 @@ class StudyGroupListSerializer(serializers.ModelSerializer):
                 return obj.creator.email
         return "Unknown"
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load creator and active memberships (with users) in a fixed number of queries"""
+        return queryset.select_related('creator').prefetch_related(
+            Prefetch(
+                'members',
+                queryset=GroupMembership.objects.filter(is_active=True).select_related('user'),
+                to_attr='active_memberships',
+            )
+        )
+    
     def get_member_count(self, obj):
         return obj.current_member_count
     
@@ -333,7 +369,9 @@ class StudyGroupListSerializer(serializers.ModelSerializer):
     
     def get_members(self, obj):
         """Return active members only"""
-        memberships = obj.members.filter(is_active=True)
+        memberships = getattr(obj, 'active_memberships', None)
+        if memberships is None:
+            memberships = obj.members.filter(is_active=True).select_related('user')
         return [{
             'id': m.id,
             'user_id': m.user.id if m.user else None,
@@ -372,14 +410,7 @@ class StudyGroupListSerializer(serializers.ModelSerializer):
     
     def get_is_member(self, obj):
         """Check if current user is a member"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return GroupMembership.objects.filter(
-                group=obj, 
-                user=request.user, 
-                is_active=True
-            ).exists()
-        return False
+        return obj.id in get_member_group_ids(self)
 
 
 class JoinGroupSerializer(serializers.Serializer):
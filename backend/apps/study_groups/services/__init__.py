@@ -0,0 +1,8 @@
+"""
+Study group services
+"""
+from .chat_service import GroupChatService
+
+__all__ = [
+    'GroupChatService',
+]
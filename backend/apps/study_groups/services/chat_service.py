@@ -0,0 +1,71 @@
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from apps.study_groups.models import GroupMessage
+
+logger = logging.getLogger(__name__)
+
+
+class GroupChatService:
+    """Fan-out of study group chat messages over Channels groups"""
+
+    # Upper bound on messages returned by one delta/backlog fetch
+    DELTA_LIMIT = 200
+
+    @staticmethod
+    def group_name(group_id):
+        """Channels group that members of a study group subscribe to"""
+        return f'study_group_{group_id}'
+
+    @staticmethod
+    def serialize_message(message):
+        """Payload pushed to subscribers; same shape as the REST message list"""
+        from apps.study_groups.serializers import GroupMessageSerializer
+        return GroupMessageSerializer(message).data
+
+    @staticmethod
+    def publish_message(message):
+        """
+        Push a new message to everyone subscribed to its study group.
+
+        Sent after the surrounding transaction commits, so subscribers never
+        receive a message that a delta fetch could not return yet.
+        """
+        def send():
+            channel_layer = get_channel_layer()
+            if channel_layer is None:
+                return
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    GroupChatService.group_name(message.group_id),
+                    {
+                        'type': 'chat_message',
+                        'message': GroupChatService.serialize_message(message),
+                    }
+                )
+            except Exception:
+                # Clients recover missed pushes through the delta endpoint
+                logger.warning(
+                    "Failed to publish message %s to group %s", message.id, message.group_id, exc_info=True,
+                )
+
+        transaction.on_commit(send)
+
+    @staticmethod
+    def messages_since(group_id, since_id=None, limit=None):
+        """
+        Messages of a group newer than since_id, oldest first.
+
+        Returns (messages, has_more). Without since_id the most recent
+        messages are returned, so a first load is bounded as well.
+        """
+        limit = min(limit or GroupChatService.DELTA_LIMIT, GroupChatService.DELTA_LIMIT)
+        queryset = GroupMessage.objects.filter(group_id=group_id).select_related('sender')
+        if since_id is not None:
+            messages = list(queryset.filter(id__gt=since_id).order_by('id')[:limit + 1])
+            has_more = len(messages) > limit
+            return messages[:limit], has_more
+        messages = list(queryset.order_by('-id')[:limit + 1])
+        has_more = len(messages) > limit
+        return list(reversed(messages[:limit])), has_more
@@ -0,0 +1,21 @@
+"""
+Signals for study_groups app
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import GroupMembership, GroupMessage, StudyGroup
+from .services import GroupChatService
+
+
+@receiver(post_delete, sender=GroupMembership)
+def decrement_member_count(sender, instance, **kwargs):
+    """Keep active_member_count in step when an active membership is deleted"""
+    if getattr(instance, '_saved_is_active', instance.is_active):
+        StudyGroup.adjust_member_count(instance.group_id, -1)
+
+
+@receiver(post_save, sender=GroupMessage)
+def publish_group_message(sender, instance, created, **kwargs):
+    """Push new chat messages to the group's subscribers"""
+    if created:
+        GroupChatService.publish_message(instance)
@@ -0,0 +1,155 @@
+"""
+Test cases for real-time study group chat and the message delta endpoint
+"""
+import json
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.ws_authentication import JWTAuthMiddleware
+from apps.notifications.routing import websocket_urlpatterns
+from apps.study_groups.models import GroupMembership, GroupMessage, StudyGroup
+from apps.study_groups.services import GroupChatService
+
+User = get_user_model()
+
+# Independent of the Redis layer settings.py picks off Render
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+def create_group(creator, name='Compilers'):
+    group = StudyGroup.objects.create(
+        name=name,
+        description=name,
+        subject='computer_science',
+        difficulty_level='advanced',
+        creator=creator,
+    )
+    GroupMembership.objects.create(group=group, user=creator, role='admin')
+    return group
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class GroupChatPushTestCase(TransactionTestCase):
+    """Test cases for pushing group messages over the channel layer"""
+
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='chatmember',
+            email='chatmember@example.com',
+            password='testpass123',
+        )
+        self.outsider = User.objects.create_user(
+            username='chatoutsider',
+            email='chatoutsider@example.com',
+            password='testpass123',
+        )
+        self.group = create_group(self.member)
+
+    def _communicator(self, user, query=''):
+        token = AccessToken.for_user(user)
+        return WebsocketCommunicator(
+            application, f'/ws/study-groups/{self.group.id}/?token={token}{query}',
+        )
+
+    async def test_new_messages_are_pushed(self):
+        """Test a message created through the API reaches subscribed members"""
+        communicator = self._communicator(self.member)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        client = APIClient()
+        client.force_authenticate(user=self.member)
+        response = await sync_to_async(client.post)(
+            f'/api/study-groups/{self.group.id}/messages/',
+            {'content': 'Hello group'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+
+        event = json.loads(await communicator.receive_from(timeout=5))
+        self.assertEqual(event['type'], 'chat_message')
+        self.assertEqual(event['message']['content'], 'Hello group')
+        self.assertEqual(event['message']['id'], response.json()['id'])
+        await communicator.disconnect()
+
+    async def test_reconnect_replays_missed_messages(self):
+        """Test ?since= replays messages created while disconnected"""
+        first = await database_sync_to_async(GroupMessage.objects.create)(
+            group=self.group, sender=self.member, content='First',
+        )
+        await database_sync_to_async(GroupMessage.objects.create)(
+            group=self.group, sender=self.member, content='Second',
+        )
+        communicator = self._communicator(self.member, f'&since={first.id}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        event = json.loads(await communicator.receive_from(timeout=5))
+        self.assertEqual(event['message']['content'], 'Second')
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_non_members_and_anonymous_are_rejected(self):
+        """Test only authenticated group members can subscribe"""
+        connected, code = await self._communicator(self.outsider).connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+        communicator = WebsocketCommunicator(application, f'/ws/study-groups/{self.group.id}/')
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+
+class GroupMessageDeltaTestCase(TestCase):
+    """Test cases for the since-message-id delta endpoint"""
+
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='deltamember',
+            email='deltamember@example.com',
+            password='testpass123',
+        )
+        self.group = create_group(self.member)
+        self.messages = [
+            GroupMessage.objects.create(group=self.group, sender=self.member, content=f'Message {index}')
+            for index in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.member)
+        self.url = f'/api/study-groups/{self.group.id}/messages/delta/'
+
+    def test_since_returns_newer_messages_in_order(self):
+        """Test only messages after the given id are returned, oldest first"""
+        response = self.client.get(self.url, {'since': self.messages[2].id})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([m['content'] for m in data['messages']], ['Message 3', 'Message 4'])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['last_id'], self.messages[4].id)
+
+    def test_limit_and_latest_window(self):
+        """Test deltas are bounded and the first load returns the latest messages"""
+        data = self.client.get(self.url, {'since': 0, 'limit': 2}).json()
+        self.assertEqual([m['content'] for m in data['messages']], ['Message 0', 'Message 1'])
+        self.assertTrue(data['has_more'])
+
+        with patch.object(GroupChatService, 'DELTA_LIMIT', 3):
+            data = self.client.get(self.url).json()
+        self.assertEqual([m['content'] for m in data['messages']], ['Message 2', 'Message 3', 'Message 4'])
+
+    def test_non_member_forbidden(self):
+        """Test the delta endpoint requires membership"""
+        outsider = User.objects.create_user(
+            username='deltaoutsider',
+            email='deltaoutsider@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
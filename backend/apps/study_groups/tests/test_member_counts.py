@@ -0,0 +1,96 @@
+"""
+Test cases for denormalized member counts and study group list query cost
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.study_groups.models import StudyGroup, GroupMembership
+
+User = get_user_model()
+
+
+class StudyGroupMemberCountTestCase(TestCase):
+    """Test cases for StudyGroup.active_member_count"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='groupcreator',
+            email='groupcreator@example.com',
+            password='testpass123',
+        )
+        self.user = User.objects.create_user(
+            username='groupjoiner',
+            email='groupjoiner@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _group(self, name='Algorithms', **kwargs):
+        group = StudyGroup.objects.create(
+            name=name,
+            description=name,
+            subject='computer_science',
+            difficulty_level='beginner',
+            creator=self.creator,
+            **kwargs,
+        )
+        GroupMembership.objects.create(group=group, user=self.creator, role='admin')
+        return group
+
+    def test_join_leave_and_rejoin(self):
+        """Test the count follows joins, leaves and rejoins"""
+        group = self._group()
+        url = f'/api/study-groups/{group.id}/'
+
+        response = self.client.post(url + 'join/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['group']['current_member_count'], 2)
+
+        response = self.client.post(url + 'leave/')
+        self.assertEqual(response.json()['group']['current_member_count'], 1)
+
+        response = self.client.post(url + 'join/')
+        self.assertEqual(response.status_code, 201)
+        group.refresh_from_db()
+        self.assertEqual(group.active_member_count, 2)
+
+        GroupMembership.objects.get(group=group, user=self.user).delete()
+        group.refresh_from_db()
+        self.assertEqual(group.active_member_count, 1)
+
+    def test_full_group_rejects_join(self):
+        """Test joins are refused once the maintained count reaches max_members"""
+        group = self._group(max_members=1)
+        response = self.client.post(f'/api/study-groups/{group.id}/join/')
+        self.assertEqual(response.status_code, 400)
+        group.refresh_from_db()
+        self.assertEqual(group.active_member_count, 1)
+
+    def test_list_query_count_is_constant(self):
+        """Test the list page cost does not grow with groups or members"""
+        def create_groups(count):
+            for index in range(count):
+                group = self._group(name=f'Group {StudyGroup.objects.count()}')
+                for member in range(3):
+                    member_user = User.objects.create_user(
+                        username=f'member{group.id}_{member}',
+                        email=f'member{group.id}_{member}@example.com',
+                        password='testpass123',
+                    )
+                    GroupMembership.objects.create(group=group, user=member_user)
+            GroupMembership.objects.create(group=group, user=self.user)
+
+        create_groups(2)
+        # count, groups, active memberships with users, requester's group ids
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/study-groups/')
+        self.assertEqual(len(response.json()['results']), 2)
+
+        create_groups(18)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/study-groups/')
+        results = response.json()['results']
+        self.assertEqual(len(results), 20)
+        self.assertEqual([group['is_member'] for group in results].count(True), 2)
+        self.assertTrue(all(len(group['members']) == group['member_count'] for group in results))
@@ -0,0 +1,114 @@
+"""
+Test cases for streamed, range-capable resource downloads
+"""
+import os
+import shutil
+import tempfile
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+from apps.study_groups.models import GroupMembership, Resource, StudyGroup
+
+User = get_user_model()
+
+
+class ResourceDownloadTestCase(TestCase):
+    """Test cases for the resource download endpoint"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_ACCEL_REDIRECT_PREFIX=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='downloader',
+            email='downloader@example.com',
+            password='testpass123',
+        )
+        group = StudyGroup.objects.create(
+            name='Signals',
+            description='Signals',
+            subject='electronics',
+            difficulty_level='beginner',
+            creator=self.user,
+        )
+        GroupMembership.objects.create(group=group, user=self.user, role='admin')
+        self.content = bytes(range(256)) * 1024
+        self.resource = Resource.objects.create(
+            group=group,
+            uploaded_by=self.user,
+            title='Notes',
+            resource_type='document',
+            file=SimpleUploadedFile('notes.pdf', self.content, content_type='application/pdf'),
+        )
+        self.url = f'/api/study-groups/{group.id}/resources/{self.resource.id}/download/'
+
+    def _download_count(self):
+        self.resource.refresh_from_db()
+        return self.resource.download_count
+
+    def test_full_download_is_streamed(self):
+        """Test the whole file is streamed and counted once"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment; filename="notes', response['Content-Disposition'])
+        self.assertEqual(self._download_count(), 1)
+
+    def test_range_requests(self):
+        """Test byte ranges return 206 and resumed ranges are not recounted"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-99')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[:100])
+        self.assertEqual(response['Content-Range'], f'bytes 0-99/{len(self.content)}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[1000:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+        self.assertEqual(self._download_count(), 1)
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_conditional_requests(self):
+        """Test If-Modified-Since returns 304 and stale If-Range ignores Range"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._download_count(), 2)
+
+    def test_accel_redirect(self):
+        """Test nginx offload returns an empty body with X-Accel-Redirect"""
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        # The header names the stored blob, not the logical content-addressed name
+        blob_name = response['X-Accel-Redirect'][len('/protected-media/'):]
+        self.assertTrue(blob_name.startswith('cas/'))
+        with open(os.path.join(settings.MEDIA_ROOT, blob_name), 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self._download_count(), 1)
+
+    def test_accel_redirect_counts_by_requested_range(self):
+        """Test resumed ranges are not recounted when nginx serves them"""
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            for header in ['bytes=0-', 'bytes=1000-', 'bytes=-10']:
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._download_count(), 1)
@@ -13,6 +13,7 @@ urlpatterns = [
     path('<int:pk>/join-requests/', views.GroupJoinRequestListView.as_view(), name='group-join-requests'),
     path('<int:pk>/join-requests/<int:request_id>/', views.GroupJoinRequestUpdateView.as_view(), name='update-join-request'),
     path('<int:pk>/messages/', views.GroupMessageListCreateView.as_view(), name='group-messages'),
+    path('<int:pk>/messages/delta/', views.group_messages_since, name='group-messages-delta'),
     path('<int:pk>/resources/', views.ResourceListCreateView.as_view(), name='group-resources'),
     path('<int:group_id>/resources/<int:resource_id>/download/', download_view.download_resource, name='download-resource'),
     path('<int:pk>/events/', views.EventListCreateView.as_view(), name='group-events'),
@@ -6,13 +6,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.http import HttpResponse, Http404
+from django.http import Http404
 from django.conf import settings
-import os
-import mimetypes
 from .models import StudyGroup, GroupMembership, GroupMessage, Resource, UpcomingEvent, GroupJoinRequest, GroupReport
 from .serializers import (
     StudyGroupSerializer, StudyGroupCreateSerializer, StudyGroupListSerializer,
@@ -21,6 +20,8 @@ from .serializers import (
     EventCreateSerializer, GroupJoinRequestSerializer, GroupJoinRequestCreateSerializer,
     GroupJoinRequestUpdateSerializer
 )
+from .services import GroupChatService
+from apps.shared.utils import serve_file, is_download_start
 
 User = get_user_model()
 
@@ -44,6 +45,14 @@ def check_group_membership(group_id, user):
     return group, None
 
 
+def user_groups_queryset(user):
+    """Groups a user created or is an active member of (semi-join, no DISTINCT)"""
+    return StudyGroup.objects.filter(
+        Q(creator=user) |
+        Q(id__in=GroupMembership.objects.filter(user=user, is_active=True).values('group_id'))
+    )
+
+
 class StudyGroupListCreateView(generics.ListCreateAPIView):
     """List and create study groups"""
     permission_classes = [permissions.IsAuthenticated]
@@ -64,9 +73,7 @@ class StudyGroupListCreateView(generics.ListCreateAPIView):
         group = serializer.save()
         
         # Get all groups user is a member of (for My Groups tab)
-        user_groups = StudyGroup.objects.filter(
-            Q(creator=request.user) | Q(members__user=request.user, members__is_active=True)
-        ).distinct().prefetch_related('members', 'creator')
+        user_groups = StudyGroupListSerializer.setup_eager_loading(user_groups_queryset(request.user))
         
         # Return the created group and all user's groups
         group_serializer = StudyGroupSerializer(group, context={'request': request})
@@ -88,13 +95,14 @@ class StudyGroupListCreateView(generics.ListCreateAPIView):
         
         if is_faculty:
             # Faculty can see all groups including closed ones
-            return StudyGroup.objects.all().prefetch_related('members', 'creator')
+            return StudyGroupListSerializer.setup_eager_loading(StudyGroup.objects.all())
         else:
             # Students can only see active groups (not closed or suspended)
-            return StudyGroup.objects.filter(
-                Q(is_public=True) | Q(creator=self.request.user) | Q(members__user=self.request.user),
+            return StudyGroupListSerializer.setup_eager_loading(StudyGroup.objects.filter(
+                Q(is_public=True) | Q(creator=self.request.user) |
+                Q(id__in=GroupMembership.objects.filter(user=self.request.user).values('group_id')),
                 Q(status='active') | Q(status='reported')  # Students can see active and reported groups
-            ).distinct().prefetch_related('members', 'creator')
+            ))
 
 
 class StudyGroupDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -112,13 +120,14 @@ class StudyGroupDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         if is_faculty:
             # Faculty can see all groups including closed ones
-            return StudyGroup.objects.all().prefetch_related('members', 'creator')
+            return StudyGroupSerializer.setup_eager_loading(StudyGroup.objects.all())
         else:
             # Students can only see active groups (not closed or suspended)
-            return StudyGroup.objects.filter(
-                Q(is_public=True) | Q(creator=self.request.user) | Q(members__user=self.request.user),
+            return StudyGroupSerializer.setup_eager_loading(StudyGroup.objects.filter(
+                Q(is_public=True) | Q(creator=self.request.user) |
+                Q(id__in=GroupMembership.objects.filter(user=self.request.user).values('group_id')),
                 Q(status='active') | Q(status='reported')  # Students can see active and reported groups
-            ).distinct().prefetch_related('members', 'creator')
+            ))
 
 
 
@@ -187,6 +196,34 @@ class GroupMessageListCreateView(generics.ListCreateAPIView):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def group_messages_since(request, pk):
+    """
+    Messages posted after ?since=<message id>, for clients catching up after
+    a reconnect. Without since, returns the most recent messages.
+    """
+    group, error = check_group_membership(pk, request.user)
+    if error:
+        return error
+    
+    try:
+        since_id = int(request.query_params['since']) if request.query_params.get('since') else None
+        limit = int(request.query_params.get('limit', GroupChatService.DELTA_LIMIT))
+    except ValueError:
+        return Response(
+            {'error': 'since and limit must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    messages, has_more = GroupChatService.messages_since(group.id, since_id, max(limit, 1))
+    return Response({
+        'messages': GroupMessageSerializer(messages, many=True, context={'request': request}).data,
+        'has_more': has_more,
+        'last_id': messages[-1].id if messages else since_id,
+    })
+
+
 class ResourceListCreateView(generics.ListCreateAPIView):
     """Group resources list and create"""
     permission_classes = [permissions.IsAuthenticated]
@@ -328,9 +365,7 @@ class MyStudyGroupsView(generics.ListAPIView):
         if not self.request.user.is_authenticated:
             return StudyGroup.objects.none()
         
-        return StudyGroup.objects.filter(
-            Q(creator=self.request.user) | Q(members__user=self.request.user, members__is_active=True)
-        ).distinct().prefetch_related('members', 'creator')
+        return StudyGroupListSerializer.setup_eager_loading(user_groups_queryset(self.request.user))
 
 
 @api_view(['GET'])
@@ -421,21 +456,30 @@ def join_group(request, pk):
         )
     
     if group.is_public:
-        # Direct join for public groups
-        GroupMembership.objects.create(
-            group=group,
-            user=user,
-            role='member',
-            is_active=True
-        )
+        # Direct join for public groups; lock the group row so concurrent
+        # joins cannot push active_member_count past max_members
+        with transaction.atomic():
+            group = StudyGroup.objects.select_for_update().get(pk=group.pk)
+            if group.is_full:
+                return Response(
+                    {'error': 'This group is full'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            membership, created = GroupMembership.objects.get_or_create(
+                group=group,
+                user=user,
+                defaults={'role': 'member', 'is_active': True}
+            )
+            if not created:
+                # Rejoining after leaving reactivates the old membership
+                membership.is_active = True
+                membership.save()
+        group.refresh_from_db(fields=['active_member_count'])
         
         # Get all groups user is a member of (for My Groups tab)
-        user_groups = StudyGroup.objects.filter(
-            Q(creator=user) | Q(members__user=user, members__is_active=True)
-        ).distinct().prefetch_related('members', 'creator')
+        user_groups = StudyGroupListSerializer.setup_eager_loading(user_groups_queryset(user))
         
         # Return updated group data along with success message
-        from .serializers import StudyGroupSerializer, StudyGroupListSerializer
         joined_group_serializer = StudyGroupSerializer(group, context={'request': request})
         user_groups_serializer = StudyGroupListSerializer(user_groups, many=True, context={'request': request})
         
@@ -496,6 +540,7 @@ def leave_group(request, pk):
         membership = GroupMembership.objects.get(group=group, user=user, is_active=True)
         membership.is_active = False
         membership.save()
+        group.refresh_from_db(fields=['active_member_count'])
         
         # Return updated group data along with success message
         from .serializers import StudyGroupSerializer
@@ -696,7 +741,7 @@ def faculty_study_groups(request):
     print(f"Study groups requested with filter: {filter_type} by user: {request.user.email}")
     
     # Base queryset - get ALL study groups
-    queryset = StudyGroup.objects.all().prefetch_related('members', 'creator')
+    queryset = StudyGroupListSerializer.setup_eager_loading(StudyGroup.objects.all())
     print(f"Total study groups in database: {queryset.count()}")
     
     # Apply filters
@@ -868,7 +913,7 @@ def reopen_study_group(request, group_id):
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def download_resource(request, group_id, resource_id):
-    """Download a study group resource with proper MIME type"""
+    """Download a study group resource, streamed in chunks"""
     try:
         # Only authenticated users can download resources
         if not request.user.is_authenticated:
@@ -884,30 +929,12 @@ def download_resource(request, group_id, resource_id):
         if not resource.file:
             raise Http404("File not found")
         
-        # Get the file path
-        file_path = resource.file.path
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
-            raise Http404("File not found on server")
-        
-        # Get MIME type from file extension
-        mime_type, _ = mimetypes.guess_type(file_path)
-        if not mime_type:
-            mime_type = "application/octet-stream"
-        
-        # Read file content
-        with open(file_path, "rb") as f:
-            file_content = f.read()
-        
-        # Increment download count
-        resource.download_count += 1
-        resource.save(update_fields=["download_count"])
+        # Stream the file (with Range / If-Modified-Since support)
+        response = serve_file(request, resource.file)
         
-        # Create response with proper headers
-        response = HttpResponse(file_content, content_type=mime_type)
-        response["Content-Disposition"] = f'attachment; filename="{resource.file.name.split("/")[-1]}"'
-        response["Content-Length"] = len(file_content)
+        # Count each download once, not every resumed range request
+        if is_download_start(request, response):
+            Resource.objects.filter(pk=resource.pk).update(download_count=F('download_count') + 1)
         
         return response
         
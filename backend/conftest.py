@@ -0,0 +1,4 @@
+"""
+Project-wide pytest configuration
+"""
+pytest_plugins = ['apps.shared.pytest_plugin']
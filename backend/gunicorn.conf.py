@@ -0,0 +1,24 @@
+"""
+Gunicorn hooks for multiprocess Prometheus metrics
+
+Gunicorn loads this file from the working directory; command-line flags
+still set the workers, bind address and so on.
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    # Samples left by a previous run would be merged into the new one
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (open WebSocket connections);
+    # imported here so the master does not need Django loaded
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
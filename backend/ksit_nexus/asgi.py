@@ -14,7 +14,13 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ksit_nexus.settings')
 
 # Initialize Django ASGI application early to ensure the AppRegistry
 # is populated before importing code that may import ORM models.
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
 
-# Temporarily disable channels/websocket functionality
-# TODO: Re-enable when channels is properly installed
\ No newline at end of file
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from apps.accounts.ws_authentication import JWTAuthMiddleware  # noqa: E402
+from apps.notifications.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
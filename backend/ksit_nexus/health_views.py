@@ -1,7 +1,9 @@
 """
 Simple health check views for Render deployment
 """
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 
@@ -20,3 +22,21 @@ def health(request):
     })
 
 
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Prometheus metrics endpoint
+    Requires "Authorization: Bearer <METRICS_TOKEN>" when METRICS_TOKEN is set
+    """
+    from apps.shared.utils.metrics import metrics_enabled, render_metrics
+    
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    if not metrics_enabled():
+        return HttpResponse('prometheus_client is not installed\n', status=503, content_type='text/plain')
+    
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
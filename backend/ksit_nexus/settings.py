@@ -79,8 +79,10 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 # ---------------------------------------------------------
 
 MIDDLEWARE = [
+    "apps.shared.middleware.metrics_middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "apps.shared.middleware.trace_middleware.TraceIDMiddleware",
+    "apps.shared.middleware.query_profiler_middleware.QueryProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -110,10 +112,9 @@ TEMPLATES = [
     },
 ]
 
-# ON RENDER — ONLY WSGI WORKS
 WSGI_APPLICATION = "ksit_nexus.wsgi.application"
-# Disable ASGI (Channels requires Redis)
-ASGI_APPLICATION = None
+# WebSockets (study group chat, notifications) are served by the ASGI app
+ASGI_APPLICATION = "ksit_nexus.asgi.application"
 
 # ---------------------------------------------------------
 # DATABASE
@@ -156,6 +157,25 @@ else:
         }
     }
 
+# ---------------------------------------------------------
+# CHANNEL LAYERS
+# ---------------------------------------------------------
+
+if ON_RENDER:
+    # Single instance without Redis: in-process layer
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [REDIS_URL]},
+        }
+    }
+
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
@@ -174,6 +194,13 @@ if ON_RENDER:
     # Render has ephemeral storage but directory must exist
     MEDIA_ROOT.mkdir(exist_ok=True)
 
+# Internal nginx location for X-Accel-Redirect downloads (e.g. "/protected-media/");
+# unset means Django streams files itself
+MEDIA_ACCEL_REDIRECT_PREFIX = env("MEDIA_ACCEL_REDIRECT_PREFIX", default=None)
+
+# Worker processes for generating image thumbnails (0 = min(2, CPU count))
+IMAGE_PROCESSING_WORKERS = int(env("IMAGE_PROCESSING_WORKERS", default=0))
+
 # ---------------------------------------------------------
 # AUTH
 # ---------------------------------------------------------
@@ -185,10 +212,13 @@ AUTH_USER_MODEL = "accounts.User"
 # REST FRAMEWORK
 # ---------------------------------------------------------
 
+# Proxies in front of Django that append to X-Forwarded-For (nginx, or
+# Render's load balancer: 1); unset elsewhere trusts the first address
+NUM_PROXIES = env("NUM_PROXIES", default="1" if ON_RENDER else None)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "apps.accounts.jwt_authentication.CookieJWTAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.TokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
@@ -197,6 +227,18 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Sliding-window limits for apps.shared.throttling; a scope set to None is not throttled.
+    # otp and login count per account, otp_ip and login_ip per client IP (a campus NAT
+    # address is shared by many students, hence the looser rates)
+    "DEFAULT_THROTTLE_RATES": {
+        "otp": env("THROTTLE_RATE_OTP", default="5/min"),
+        "otp_ip": env("THROTTLE_RATE_OTP_IP", default="60/min"),
+        "login": env("THROTTLE_RATE_LOGIN", default="10/min"),
+        "login_ip": env("THROTTLE_RATE_LOGIN_IP", default="120/min"),
+        "chatbot": env("THROTTLE_RATE_CHATBOT", default="30/min"),
+        "search": env("THROTTLE_RATE_SEARCH", default="60/min"),
+    },
+    "NUM_PROXIES": int(NUM_PROXIES) if NUM_PROXIES else None,
 }
 
 # ---------------------------------------------------------
@@ -262,3 +304,22 @@ LOGGING = {
     },
 }
 
+# Request logging (apps.shared.middleware.LoggingMiddleware)
+LOGGING_SKIP_PATHS = ("/health", "/metrics", "/static/", "/media/", "/favicon.ico")
+LOGGING_SAMPLE_RATE = env.float("LOGGING_SAMPLE_RATE", default=1.0)
+# Path prefix -> fraction of requests logged, e.g. {"/api/notifications/": 0.1}
+LOGGING_SAMPLE_RATES = {}
+
+# Per-request query profiling (Server-Timing headers + log fields), e.g. on staging
+QUERY_PROFILER_ENABLED = env.bool("QUERY_PROFILER_ENABLED", default=False)
+# A statement run this many times in one request is logged as an N+1 suspect
+QUERY_PROFILER_DUPLICATE_THRESHOLD = 3
+QUERY_PROFILER_SLOWEST = 5
+
+# Prometheus metrics (/metrics/). Under gunicorn or a prefork Celery worker
+# also set PROMETHEUS_MULTIPROC_DIR so every process's samples are merged.
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>" when it is set.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+# Port a Celery worker serves its task metrics on (unset: not served)
+CELERY_METRICS_PORT = env.int("CELERY_METRICS_PORT", default=None)
+
@@ -159,10 +159,10 @@ REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = [
     'rest_framework.throttling.AnonRateThrottle',
     'rest_framework.throttling.UserRateThrottle'
 ]
-REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].update({
     'anon': '100/hour',
     'user': '1000/hour'
-}
+})
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
@@ -6,7 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
-from .health_views import health
+from .health_views import health, metrics
 # from apps.notifications.health_views import health_check, detailed_health_check, metrics
 
 urlpatterns = [
@@ -32,6 +32,7 @@ urlpatterns = [
     path('api/lifecycle/', include('apps.lifecycle.urls')),
     path('api/local/', include('apps.local_integrations.urls')),
     path('api/awards/', include('apps.awards.urls')),
+    path('api/images/', include('apps.shared.urls')),
     
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -41,7 +42,7 @@ urlpatterns = [
     # Health check endpoints
     path('health/', health, name='health'),
     # path('health/detailed/', detailed_health_check, name='detailed-health'),
-    # path('metrics/', metrics, name='metrics'),
+    path('metrics/', metrics, name='metrics'),
 ]
 
 # Serve media files in development